@@ -1,4 +1,5 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.shortcuts import redirect
 from .models.student_movement import StudentMovement, BulkMovement
 from .models.academic import Payment
 from .models import ECDClassProfile, ECDClassFee, Class, Student
@@ -23,12 +24,36 @@ class ClassAdmin(admin.ModelAdmin):
 	list_filter = ('academic_year', 'grade')
 	search_fields = ('grade', 'section', 'academic_year')
 	inlines = [ECDClassProfileInline, ECDClassFeeInline]
+	actions = ['generate_statements', 'generate_class_statements']
 	
 	def get_queryset(self, request):
 		"""Optimize queryset by selecting related fields to avoid N+1 queries"""
 		qs = super().get_queryset(request)
 		return qs.select_related('academic_year', 'teacher')
 
+	@admin.action(description='Generate current term statements (one PDF per student)')
+	def generate_statements(self, request, queryset):
+		return self._queue_statements(request, queryset, merge_by_class=False)
+
+	@admin.action(description='Generate current term statements (one PDF per class)')
+	def generate_class_statements(self, request, queryset):
+		return self._queue_statements(request, queryset, merge_by_class=True)
+
+	def _queue_statements(self, request, queryset, merge_by_class):
+		"""Rendered by the report worker; the admin is sent to the job's status page"""
+		from .services import report_jobs
+
+		try:
+			job, _ = report_jobs.enqueue(
+				'term_statements',
+				{'classes': list(queryset.values_list('pk', flat=True)), 'merge_by_class': merge_by_class},
+				requested_by=request.user,
+			)
+		except ValueError as e:
+			self.message_user(request, f'Cannot generate statements: {e}', messages.ERROR)
+			return None
+		return redirect('report_job_page', job_id=job.pk)
+
 
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
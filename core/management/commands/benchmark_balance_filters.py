@@ -0,0 +1,128 @@
+"""
+Management command comparing the student list ?balance= filters in Python
+(load every StudentBalance, filter id__in=[...]) against the SQL filters of
+StudentQuerySet.filter_balance_status().
+
+Synthetic students, balances and a term are bulk-created inside a transaction
+that is rolled back at the end, so the database is left unchanged.
+
+Usage:
+    python manage.py benchmark_balance_filters
+    python manage.py benchmark_balance_filters --students 5000 20000 --repeat 5
+"""
+
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core.models import AcademicTerm, Class, Student, StudentBalance, TermFee
+
+STATUSES = ('paid', 'partial', 'unpaid', 'arrears')
+PAGE_SIZE = 12  # StudentListView.paginate_by
+
+
+class Command(BaseCommand):
+    help = 'Benchmark student list balance filters in Python vs SQL on synthetic data (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--students',
+            type=int,
+            nargs='+',
+            default=[5000, 20000],
+            help='School sizes to benchmark',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per filter; the best time is reported',
+        )
+
+    def handle(self, *args, **options):
+        for size in options['students']:
+            with transaction.atomic():
+                term = self._build_school(size)
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{size} students'))
+                self.stdout.write(f"  {'filter':<8} {'python ms':>10} {'queries':>8} {'sql ms':>8} {'queries':>8}")
+                for status in STATUSES:
+                    python_ms, python_queries, python_ids = self._measure(
+                        lambda: self._python_filter(term, status), options['repeat'])
+                    sql_ms, sql_queries, sql_ids = self._measure(
+                        lambda: self._sql_filter(term, status), options['repeat'])
+                    if python_ids != sql_ids:
+                        self.stdout.write(self.style.ERROR(f'  {status}: results differ'))
+                    self.stdout.write(
+                        f'  {status:<8} {python_ms:>10.1f} {python_queries:>8} {sql_ms:>8.1f} {sql_queries:>8}'
+                    )
+                transaction.set_rollback(True)
+
+    def _build_school(self, size):
+        """Bulk-create a term, a class and `size` students with varied balances (no signals)"""
+        term = AcademicTerm.objects.bulk_create([
+            AcademicTerm(academic_year=9000 + size % 1000, term=1, start_date='2026-01-01', end_date='2026-04-30')
+        ])[0]
+        fee = TermFee.objects.bulk_create([TermFee(term=term, grade_level='PRIMARY', amount=Decimal('100.00'))])[0]
+        cls = Class.objects.bulk_create([Class(grade='3', section='A', academic_year=term.academic_year)])[0]
+
+        students = Student.objects.bulk_create(
+            [
+                Student(
+                    surname=f'Bench{i:05d}', first_name='Pupil', sex='MF'[i % 2],
+                    date_of_birth='2016-01-01', birth_entry_number=f'BENCH-{size}-{i}',
+                    current_class=cls,
+                )
+                for i in range(size)
+            ],
+            batch_size=1000,
+        )
+
+        # Cycle through unpaid, partial, paid, overpaid and arrears accounts
+        patterns = [(0, 0), (40, 0), (100, 0), (150, 0), (0, 60), (100, 60)]
+        balances = []
+        for i, student in enumerate(students):
+            paid, arrears = (Decimal(v) for v in patterns[i % len(patterns)])
+            balance = StudentBalance(
+                student=student, term=term, term_fee_record=fee,
+                previous_arrears=arrears, amount_paid=paid, term_fee=fee.amount,
+            )
+            balance.refresh_derived_totals()
+            balances.append(balance)
+        StudentBalance.objects.bulk_create(balances, batch_size=1000)
+        return term
+
+    def _python_filter(self, term, status):
+        """The previous StudentListView implementation"""
+        balances = list(StudentBalance.objects.filter(term=term))
+        if status == 'paid':
+            ids = [b.student_id for b in balances if b.amount_paid >= (b.term_fee + b.previous_arrears)]
+        elif status == 'partial':
+            ids = [b.student_id for b in balances if 0 < b.amount_paid < (b.term_fee + b.previous_arrears)]
+        elif status == 'unpaid':
+            ids = [b.student_id for b in balances if b.amount_paid == 0 and (b.term_fee + b.previous_arrears) > 0]
+        else:
+            ids = [b.student_id for b in balances if b.previous_arrears > 0]
+        queryset = Student.objects.filter(is_archived=False, id__in=ids).select_related('current_class')
+        return self._first_page(queryset)
+
+    def _sql_filter(self, term, status):
+        queryset = Student.objects.filter(is_archived=False).select_related('current_class')
+        return self._first_page(queryset.with_financials(term).filter_balance_status(status))
+
+    def _first_page(self, queryset):
+        page = Paginator(queryset, PAGE_SIZE).page(1)
+        return page.paginator.count, [s.id for s in page.object_list]
+
+    def _measure(self, run, repeat):
+        best = None
+        for _ in range(max(repeat, 1)):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                result = run()
+                elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, len(queries), result
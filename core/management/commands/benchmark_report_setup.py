@@ -0,0 +1,95 @@
+"""
+Management command timing the per-report setup overhead of the PDF reports:
+style sheets, paragraph/table styles and school branding rebuilt on every
+call (the previous behaviour, reproduced by clearing core/utils/report_theme.py
+before each run) against the process-level theme cache.
+
+Each report is rendered with one row of data, so the time is dominated by
+setup rather than by drawing rows. The ZIMSEC exporters are timed by
+construction only and are skipped when export_service's optional
+dependencies are not installed.
+
+Usage:
+    python manage.py benchmark_report_setup
+    python manage.py benchmark_report_setup --repeat 50
+"""
+
+import time
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.utils import report_theme
+
+
+class Command(BaseCommand):
+    help = 'Benchmark PDF report setup (styles and branding rebuilt per call vs cached by report_theme)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Runs per report; the median time is reported',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING('Per-report setup: rebuilt every call vs report_theme cache'))
+        self.stdout.write(f"  {'report':<32} {'rebuilt ms':>11} {'cached ms':>10} {'queries':>9}")
+        for label, run in self._reports():
+            rebuilt_ms, rebuilt_queries = self._measure(run, options['repeat'], cold=True)
+            cached_ms, cached_queries = self._measure(run, options['repeat'], cold=False)
+            self.stdout.write(
+                f'  {label:<32} {rebuilt_ms:>11.2f} {cached_ms:>10.2f} {rebuilt_queries:>4} -> {cached_queries}'
+            )
+        report_theme.clear()
+
+    def _reports(self):
+        from core.utils import pdf_reports, pdf_reports_modern
+
+        student = SimpleNamespace(
+            id=1, full_name='Moyo Tendai', date_of_birth=date(2015, 1, 1), date_enrolled=date(2021, 1, 1),
+            current_class='3A', is_active=True,
+        )
+        balance_info = {'term_fee': 100, 'amount_paid': 40, 'previous_arrears': 0, 'current_balance': 60}
+        students_data = [{'name': 'Moyo Tendai', 'class': '3A', 'term_fee': 100, 'amount_paid': 40, 'current_balance': 60}]
+        arrears = [{'name': 'Moyo Tendai', 'id': 1, 'current_class': '3A', 'balance': Decimal('60')}]
+
+        reports = [
+            ('pdf_reports payment history', lambda: pdf_reports.PaymentHistoryReport.generate_student_payment_pdf(student, [], balance_info)),
+            ('pdf_reports fee dashboard', lambda: pdf_reports.PaymentHistoryReport.generate_fee_dashboard_pdf('Term 1', students_data)),
+            ('pdf_reports arrears', lambda: pdf_reports.ArrearsReport.generate_arrears_pdf(arrears, 'Term 1')),
+            ('modern payment history', lambda: pdf_reports_modern.PaymentHistoryReport.generate_student_payment_pdf(student, [], balance_info)),
+            ('modern fee dashboard', lambda: pdf_reports_modern.PaymentHistoryReport.generate_fee_dashboard_pdf('Term 1', students_data)),
+            ('modern arrears', lambda: pdf_reports_modern.ArrearsReport.generate_arrears_pdf(arrears, 'Term 1')),
+        ]
+
+        try:
+            from core.services.export_service import DetailedResultsPDFExporter, PDFExporter
+            from core.services.grade7_exporter import Grade7CompletionPDFExporter
+        except ImportError as e:
+            self.stdout.write(f'  (ZIMSEC exporters skipped: {e})')
+        else:
+            reports += [
+                ('ZIMSEC PDFExporter()', PDFExporter),
+                ('ZIMSEC DetailedResultsPDFExporter()', DetailedResultsPDFExporter),
+                ('Grade7CompletionPDFExporter()', Grade7CompletionPDFExporter),
+            ]
+        return reports
+
+    def _measure(self, run, repeat, cold):
+        run()
+        times = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(max(repeat, 1)):
+                if cold:
+                    report_theme.clear()
+                start = time.perf_counter()
+                run()
+                times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        return times[len(times) // 2], len(queries) // max(repeat, 1)
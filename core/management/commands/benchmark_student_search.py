@@ -0,0 +1,101 @@
+"""
+Management command timing student search on synthetic data: the previous
+icontains scan against the ranked search of core/services/student_search.py
+(the in-process index on SQLite, pg_trgm on PostgreSQL).
+
+Synthetic students and classes are bulk-created inside a transaction that is
+rolled back at the end, so the database is left unchanged.
+
+Usage:
+    python manage.py benchmark_student_search
+    python manage.py benchmark_student_search --students 50000 --repeat 5
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from core.models import Class, Student
+from core.services import student_search
+
+SURNAMES = ['Moyo', 'Ncube', 'Dube', 'Sibanda', 'Ndlovu', 'Mpofu', 'Nyathi', 'Khumalo', 'Chikwanha', 'Mutasa']
+FIRST_NAMES = ['Tendai', 'Rudo', 'Tatenda', 'Chipo', 'Farai', 'Nyasha', 'Tafadzwa', 'Kudzai', 'Anesu', 'Thabo']
+QUERIES = ['mo', 'moyo', 'moyo ten', 'ncub', 'dubbe', '3a', 'grade 5b chipo', '1002', '12']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark student search (icontains scan vs search index) on synthetic data (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--students',
+            type=int,
+            default=50000,
+            help='School size to benchmark',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per query; the best time is reported',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._build_school(options['students'])
+            student_search.invalidate()
+
+            start = time.perf_counter()
+            student_search.get_index()
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{options['students']} students, index built in {(time.perf_counter() - start) * 1000:.0f} ms"
+            ))
+            self.stdout.write(f"  {'query':<16} {'scan ms':>8} {'index ms':>9} {'hits':>5}")
+            for query in QUERIES:
+                scan_ms, _ = self._measure(lambda: self._scan(query), options['repeat'])
+                index_ms, hits = self._measure(lambda: student_search.search(query, 10), options['repeat'])
+                self.stdout.write(f'  {query:<16} {scan_ms:>8.1f} {index_ms:>9.2f} {len(hits):>5}')
+
+            transaction.set_rollback(True)
+        student_search.invalidate()
+
+    def _build_school(self, size):
+        """Bulk-create classes and `size` students (no signals)"""
+        rng = random.Random(size)
+        classes = Class.objects.bulk_create([
+            Class(grade=str(grade), section=section, academic_year=9000 + size % 1000)
+            for grade in range(1, 8) for section in 'ABC'
+        ])
+        Student.objects.bulk_create(
+            [
+                Student(
+                    surname=rng.choice(SURNAMES) + ('' if i % 3 else str(i % 97)),
+                    first_name=rng.choice(FIRST_NAMES), sex='MF'[i % 2], date_of_birth='2016-01-01',
+                    birth_entry_number=f'{i % 90 + 10:02d}-{100000 + i}-X{i % 50:02d}',
+                    current_class=classes[i % len(classes)],
+                )
+                for i in range(size)
+            ],
+            batch_size=2000,
+        )
+
+    def _scan(self, query):
+        """The previous search: icontains over every term, ordered by name"""
+        students = Student.objects.all()
+        for term in query.split():
+            students = students.filter(
+                Q(surname__icontains=term) | Q(first_name__icontains=term) | Q(birth_entry_number__icontains=term)
+            )
+        return list(students.values('id', 'surname', 'first_name')[:10])
+
+    def _measure(self, run, repeat):
+        best = None
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            result = run()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
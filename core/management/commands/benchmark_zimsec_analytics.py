@@ -0,0 +1,140 @@
+"""
+Management command timing the advanced analytics group-by work on synthetic
+ZIMSEC results: model instances filtered with list comprehensions per class,
+gender and subject (the previous behaviour) against the columnar
+ResultMatrix of core/services/zimsec_matrix.py.
+
+Both sides produce the inputs of the class, subject and gender comparison
+panels and the statistical tests; the scipy calls on those inputs are the
+same either way and are not timed. Load times include the database query.
+
+Synthetic classes, students and results are bulk-created inside a transaction
+that is rolled back at the end, so the database is left unchanged. Requires
+numpy.
+
+Usage:
+    python manage.py benchmark_zimsec_analytics
+    python manage.py benchmark_zimsec_analytics --candidates 50000 --repeat 5
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Class, Student, ZimsecResults
+from core.services.zimsec_matrix import SUBJECT_FIELDS, ResultMatrix
+from core.utils.lazy_imports import is_available
+
+YEAR = 2099
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ZIMSEC analytics group-bys (list comprehensions vs NumPy result matrix) on synthetic data (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--candidates',
+            type=int,
+            default=10000,
+            help='Grade 7 candidates to benchmark',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per measurement; the best time is reported',
+        )
+
+    def handle(self, *args, **options):
+        if not is_available('numpy'):
+            raise CommandError('numpy is not installed')
+
+        with transaction.atomic():
+            classes = self._build_results(options['candidates'])
+            repeat = options['repeat']
+
+            list_load, results = self._measure(lambda: list(
+                ZimsecResults.objects.filter(academic_year=YEAR).select_related('student', 'student__current_class')
+            ), repeat)
+            matrix_load, matrix = self._measure(lambda: ResultMatrix.load(YEAR), repeat)
+            list_panels, _ = self._measure(lambda: self._list_panels(results, classes), repeat)
+            matrix_panels, _ = self._measure(lambda: self._matrix_panels(matrix, classes), repeat)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{len(results)} candidates in {len(classes)} classes"))
+            self.stdout.write(f"  {'':<22} {'load ms':>9} {'panels ms':>10} {'total ms':>9}")
+            self.stdout.write(f"  {'model instances':<22} {list_load:>9.1f} {list_panels:>10.1f} {list_load + list_panels:>9.1f}")
+            self.stdout.write(f"  {'result matrix':<22} {matrix_load:>9.1f} {matrix_panels:>10.2f} {matrix_load + matrix_panels:>9.1f}")
+
+            transaction.set_rollback(True)
+
+    def _build_results(self, size):
+        """Bulk-create grade 7 classes, `size` students and their results (no signals)"""
+        rng = random.Random(size)
+        classes = Class.objects.bulk_create([
+            Class(grade='7', section=section, academic_year=YEAR) for section in 'ABCDEF'
+        ])
+        students = Student.objects.bulk_create([
+            Student(
+                surname=f'Bench{i}', first_name='Candidate', sex='MF'[i % 2], date_of_birth='2014-01-01',
+                birth_entry_number=f'{i % 90 + 10:02d}-{200000 + i}-Z{i % 50:02d}',
+                current_class=classes[i % len(classes)],
+            )
+            for i in range(size)
+        ], batch_size=2000)
+
+        results = []
+        for student in students:
+            units = [rng.choice([None] + list(range(1, 10)) * 20) for _ in SUBJECT_FIELDS]
+            complete = None not in units
+            results.append(ZimsecResults(
+                student=student, academic_year=YEAR, **dict(zip(SUBJECT_FIELDS, units)),
+                total_aggregate=sum(units) if complete else None,
+                overall_status=('PASS' if all(u <= 5 for u in units) else 'FAIL') if complete else None,
+            ))
+        ZimsecResults.objects.bulk_create(results, batch_size=2000)
+        return classes
+
+    def _list_panels(self, results, classes):
+        """The comparison and test inputs as the views used to build them"""
+        panels = {}
+        for cls in classes:
+            class_results = [r for r in results if r.student.current_class == cls]
+            panels[cls.id] = (
+                len(class_results),
+                sum(1 for r in class_results if r.overall_status == 'PASS'),
+                [r.total_aggregate for r in class_results if r.total_aggregate],
+                sum(1 for r in class_results if r.total_aggregate and r.total_aggregate <= 13),
+            )
+        for field in SUBJECT_FIELDS:
+            values = [getattr(r, field) for r in results if getattr(r, field) is not None]
+            panels[field] = (len(values), sum(values), sum(1 for v in values if v >= 4), sum(1 for v in values if v >= 8))
+        for sex in 'MF':
+            sex_results = [r for r in results if r.student.sex == sex]
+            panels[sex] = (
+                sum(1 for r in sex_results if r.overall_status == 'PASS'),
+                [r.total_aggregate for r in sex_results if r.total_aggregate],
+                [1 if r.overall_status == 'PASS' else 0 for r in sex_results],
+            )
+        return panels
+
+    def _matrix_panels(self, matrix, classes):
+        return (
+            matrix.group_summary('class_id'),
+            matrix.groups('class_id'),
+            matrix.subject_summary(),
+            matrix.group_summary('sex'),
+            matrix.groups('sex'),
+            matrix.pass_flags(matrix.data['sex'] == matrix.sex_code('M')),
+            matrix.crosstab('sex', 'status'),
+        )
+
+    def _measure(self, run, repeat):
+        best, value = None, None
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            value = run()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, value
@@ -0,0 +1,84 @@
+"""
+Management command writing the end-of-term statement of every student (the
+payment history PDF) into one zip file with core/services/statements.py.
+
+Rendering is spread over a process pool, one process per CPU by default.
+
+Usage:
+    python manage.py generate_statements
+    python manage.py generate_statements --term 12 --output statements.zip
+    python manage.py generate_statements --class 3 --class 4 --merge-by-class
+    python manage.py generate_statements --workers 1
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from core.models import AcademicTerm
+from core.services.statements import DEFAULT_CHUNK_SIZE, StatementBatch
+
+
+class Command(BaseCommand):
+    help = 'Generate end-of-term statements for every student into a zip file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term',
+            type=int,
+            help='AcademicTerm id (defaults to the current term)',
+        )
+        parser.add_argument(
+            '--class',
+            dest='classes',
+            type=int,
+            action='append',
+            help='Only students of this Class id (repeatable; default: whole school)',
+        )
+        parser.add_argument(
+            '--output',
+            help='Zip file to write (default: statements_<year>_term<n>.zip)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Render processes (default: one per CPU; 1 renders in this process)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Students rendered per task',
+        )
+        parser.add_argument(
+            '--merge-by-class',
+            action='store_true',
+            help='Write one PDF per class instead of one per student',
+        )
+
+    def handle(self, *args, **options):
+        term = None
+        if options.get('term'):
+            try:
+                term = AcademicTerm.objects.get(pk=options['term'])
+            except AcademicTerm.DoesNotExist:
+                raise CommandError(f"AcademicTerm {options['term']} does not exist")
+
+        batch = StatementBatch(
+            term=term,
+            class_ids=options.get('classes'),
+            workers=options.get('workers'),
+            chunk_size=options['chunk_size'],
+            merge_by_class=options['merge_by_class'],
+        )
+        if not batch.term:
+            raise CommandError('No current term is set')
+
+        output = options.get('output') or f'statements_{batch.term.academic_year}_term{batch.term.term}.zip'
+        try:
+            result = batch.write(output)
+        except OSError as e:
+            raise CommandError(f'Cannot write {output}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['students']} statements for {result['term']} written to {output} "
+            f"({result['files']} PDFs, {result['bytes'] / 1024 / 1024:.1f} MB, "
+            f"{result['workers']} workers, {result['seconds']}s)"
+        ))
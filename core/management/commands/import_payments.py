@@ -0,0 +1,84 @@
+"""
+Management command to import a payment file (bank statement, mobile money
+export or cashbook CSV) with PaymentImportService.
+
+Usage:
+    python manage.py import_payments statement.csv
+    python manage.py import_payments statement.csv --term 12 --dry-run
+    python manage.py import_payments statement.csv --errors rejected.csv
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from core.models import AcademicTerm
+from core.services.payment_import import PaymentImportService
+
+
+class Command(BaseCommand):
+    help = 'Import payments from a CSV file, matching rows to students by birth entry number or reference'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to import')
+        parser.add_argument(
+            '--term',
+            type=int,
+            help='AcademicTerm id the payments are for (defaults to the current term)',
+        )
+        parser.add_argument(
+            '--method',
+            default='BANK',
+            help='payment_method for rows that do not give one',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows validated and inserted per batch',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and report without saving anything',
+        )
+        parser.add_argument(
+            '--errors',
+            help='Write rejected rows to this CSV file',
+        )
+
+    def handle(self, *args, **options):
+        term = None
+        if options.get('term'):
+            try:
+                term = AcademicTerm.objects.get(pk=options['term'])
+            except AcademicTerm.DoesNotExist:
+                raise CommandError(f"AcademicTerm {options['term']} does not exist")
+
+        service = PaymentImportService(
+            term=term,
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+            default_method=options['method'].upper(),
+        )
+        if not service.term:
+            raise CommandError('No current term is set')
+
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as f:
+                result = service.import_csv(f)
+        except OSError as e:
+            raise CommandError(f'Cannot read {options["path"]}: {e}')
+
+        for error in result['errors'][:20]:
+            self.stdout.write(self.style.WARNING(f"  Row {error['row']}: {error['error']}"))
+        if len(result['errors']) > 20:
+            self.stdout.write(self.style.WARNING(f"  ... {len(result['errors']) - 20} more"))
+
+        if options.get('errors') and result['errors']:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as f:
+                PaymentImportService.write_error_report(result['errors'], f)
+            self.stdout.write(f"Error report written to {options['errors']}")
+
+        prefix = 'Dry run: ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{result['imported']} of {result['rows']} rows imported "
+            f"(${result['total_amount']} for {result['students']} students), {result['failed']} rejected."
+        ))
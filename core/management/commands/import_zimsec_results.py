@@ -0,0 +1,80 @@
+"""
+Management command to import the official ZIMSEC Grade 7 results sheet
+(CSV or XLSX) with ZimsecImportService.
+
+Usage:
+    python manage.py import_zimsec_results results.csv --year 2027
+    python manage.py import_zimsec_results results.xlsx --year 2027 --dry-run
+    python manage.py import_zimsec_results results.csv --year 2027 --errors rejected.csv
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Grade7Statistics
+from core.services.zimsec_import import ZimsecImportService
+
+
+class Command(BaseCommand):
+    help = 'Import a ZIMSEC results sheet, matching rows by candidate number (birth entry number for new candidates)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file to import')
+        parser.add_argument(
+            '--year',
+            type=int,
+            required=True,
+            help='Academic year the results are for',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows looked up and written per batch',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and report without saving anything',
+        )
+        parser.add_argument(
+            '--errors',
+            help='Write rejected rows to this CSV file',
+        )
+
+    def handle(self, *args, **options):
+        service = ZimsecImportService(
+            options['year'],
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+        )
+
+        path = options['path']
+        try:
+            if path.lower().endswith(('.xlsx', '.xlsm')):
+                with open(path, 'rb') as f:
+                    result = service.import_xlsx(f)
+            else:
+                with open(path, newline='', encoding='utf-8-sig') as f:
+                    result = service.import_csv(f)
+        except OSError as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for error in result['errors'][:20]:
+            self.stdout.write(self.style.WARNING(f"  Row {error['row']}: {error['error']}"))
+        if len(result['errors']) > 20:
+            self.stdout.write(self.style.WARNING(f"  ... {len(result['errors']) - 20} more"))
+
+        if options.get('errors') and result['errors']:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as f:
+                ZimsecImportService.write_error_report(result['errors'], f)
+            self.stdout.write(f"Error report written to {options['errors']}")
+
+        if not options['dry_run'] and (result['created'] or result['updated']):
+            Grade7Statistics.calculate_for_year(options['year'])
+
+        prefix = 'Dry run: ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{result['created']} created and {result['updated']} updated of {result['rows']} rows, "
+            f"{result['failed']} rejected."
+        ))
@@ -0,0 +1,73 @@
+"""
+Management command to open (or re-open) a term for all active students.
+
+Creates missing StudentBalance records and corrects carried-forward arrears
+using the set-based TermActivationService. This is the same work done when a
+term is marked current, and is safe to run repeatedly.
+
+Usage:
+    python manage.py open_term              # Current term
+    python manage.py open_term --term 12    # A specific AcademicTerm id
+    python manage.py open_term --missing-only   # Only students without a balance
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from core.models import AcademicTerm
+from core.services.term_activation import TermActivationService
+
+
+class Command(BaseCommand):
+    help = 'Create or correct StudentBalance records for all active students in a term'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term',
+            type=int,
+            help='AcademicTerm id to open (defaults to the current term)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Students per progress update and rows per bulk statement',
+        )
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Only create balances for active students that have none in the term',
+        )
+
+    def handle(self, *args, **options):
+        term_id = options.get('term')
+        if term_id:
+            try:
+                term = AcademicTerm.objects.get(pk=term_id)
+            except AcademicTerm.DoesNotExist:
+                raise CommandError(f'AcademicTerm {term_id} does not exist')
+        else:
+            term = AcademicTerm.get_current_term()
+            if not term:
+                raise CommandError('No current term is set')
+
+        def report(processed, total):
+            self.stdout.write(f'  {processed}/{total} students resolved')
+
+        service = TermActivationService(
+            term,
+            batch_size=options.get('batch_size', 500),
+            progress_callback=report,
+        )
+        if options.get('missing_only'):
+            self.stdout.write(f'{service.missing_students().count()} active students have no balance for {term}')
+            result = service.activate(missing_only=True)
+        else:
+            self.stdout.write(f'Opening {term}...')
+            result = service.activate()
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f'  {error}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['created']} created, {result['updated']} updated, "
+            f"{result['unchanged']} unchanged ({result['students']} active students)"
+        ))
@@ -8,12 +8,14 @@ Options:
     --from-grade: Only promote students from specific grade (e.g., "7" or "ECDB")
     --to-year: Target academic year for promotion
     --dry-run: Preview promotions without saving
+    --seed: Seed for placing ECDB pupils in Grade 1 sections (same seed, same classes)
+    --balance-sex: Also balance boys and girls across the Grade 1 sections
     --confirm: Auto-confirm without asking
 """
 
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
-from core.models import Student, Class, AcademicYear
+from core.models import Student, AcademicYear
+from core.services.promotion import BulkPromotionService
 
 
 class Command(BaseCommand):
@@ -35,6 +37,16 @@ class Command(BaseCommand):
             action='store_true',
             help='Preview promotions without saving',
         )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Seed for the Grade 1 section placement, to make it reproducible',
+        )
+        parser.add_argument(
+            '--balance-sex',
+            action='store_true',
+            help='Balance boys and girls across the Grade 1 sections',
+        )
         parser.add_argument(
             '--confirm',
             action='store_true',
@@ -76,22 +88,16 @@ class Command(BaseCommand):
             )
             AcademicYear.objects.create(year=to_year, is_active=False)
 
-        # Prepare promotions
-        promotions = []
-        skipped = []
-
-        for student in students:
-            next_class = student.get_next_class()
-
-            if not next_class:
-                skipped.append((student, "No next class available (likely Grade 7)"))
-                continue
-
-            promotions.append({
-                'student': student,
-                'from_class': student.current_class,
-                'to_class': next_class,
-            })
+        # Prepare promotions (Grade 7 students are not graduated here)
+        service = BulkPromotionService(
+            students.values_list('id', flat=True), graduate=False,
+            balance_sex=options.get('balance_sex'), seed=options.get('seed'),
+        ).plan()
+        promotions = [
+            {'student': student, 'from_class': from_class, 'to_class': to_class}
+            for student, from_class, to_class in service.moves
+        ]
+        skipped = service.errors
 
         # Display summary
         self.stdout.write(self.style.SUCCESS(f'\n📊 PROMOTION SUMMARY\n'))
@@ -111,8 +117,8 @@ class Command(BaseCommand):
 
         if skipped:
             self.stdout.write(self.style.WARNING('\n⚠️  Skipped:'))
-            for student, reason in skipped:
-                self.stdout.write(f'  {student.full_name}: {reason}')
+            for reason in skipped:
+                self.stdout.write(f'  {reason}')
 
         # Confirm and execute
         if dry_run:
@@ -126,27 +132,12 @@ class Command(BaseCommand):
                 return
 
         # Execute promotions
-        with transaction.atomic():
-            promoted_count = 0
-            failed_count = 0
-
-            for promo in promotions:
-                student = promo['student']
-                try:
-                    student.current_class = promo['to_class']
-                    student.save()
-                    promoted_count += 1
-                except Exception as e:
-                    failed_count += 1
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f'  ❌ {student.full_name}: {str(e)}'
-                        )
-                    )
+        result = service.apply()
 
         self.stdout.write(self.style.SUCCESS(f'\n✅ Promotion complete!'))
-        self.stdout.write(f'  Successfully promoted: {promoted_count}')
-        if failed_count:
-            self.stdout.write(
-                self.style.ERROR(f'  Failed: {failed_count}')
-            )
+        self.stdout.write(f'  Successfully promoted: {result["promoted"]}')
+        if result['balances_created']:
+            self.stdout.write(f'  Term 1 balances opened: {result["balances_created"]}')
+        # Errors after the skipped students come from opening balances
+        for error in result['errors'][len(skipped):]:
+            self.stdout.write(self.style.WARNING(f'  Warning: {error}'))
@@ -0,0 +1,35 @@
+"""
+Management command to rebuild the TermFinancialSnapshot dashboard rollups.
+
+Signals keep the snapshots current; run this after bulk data fixes done
+outside the ORM, or to check that nothing has drifted.
+
+Usage:
+    python manage.py rebuild_financial_snapshots
+    python manage.py rebuild_financial_snapshots --term 12
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from core.models import AcademicTerm, TermFinancialSnapshot
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-term, per-class financial snapshot rows from StudentBalance'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term',
+            type=int,
+            help='Only rebuild this AcademicTerm id',
+        )
+
+    def handle(self, *args, **options):
+        term_id = options.get('term')
+        if term_id:
+            if not AcademicTerm.objects.filter(pk=term_id).exists():
+                raise CommandError(f'AcademicTerm {term_id} does not exist')
+            rows = TermFinancialSnapshot.rebuild([term_id])
+        else:
+            rows = TermFinancialSnapshot.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(f'Financial snapshots rebuilt: {rows} rows written.'))
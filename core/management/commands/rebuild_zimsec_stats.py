@@ -0,0 +1,30 @@
+"""
+Management command to rebuild the ZimsecYearStats dashboard rollups.
+
+Signals keep the statistics current; run this after bulk data fixes done
+outside the ORM (queryset.update(), raw SQL imports), or once after migrating.
+
+Usage:
+    python manage.py rebuild_zimsec_stats
+    python manage.py rebuild_zimsec_stats --year 2027
+"""
+
+from django.core.management.base import BaseCommand
+from core.models import ZimsecYearStats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-year ZIMSEC statistics rows from ZimsecResults'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--year',
+            type=int,
+            action='append',
+            help='Only rebuild this academic year (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        years = options.get('year')
+        rows = ZimsecYearStats.rebuild(years) if years else ZimsecYearStats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'ZIMSEC statistics rebuilt: {rows} rows written.'))
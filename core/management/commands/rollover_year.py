@@ -1,44 +1,125 @@
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from core.models import AcademicYear
-import sys
+"""
+Management command to roll the active academic year over into the next one
+(see core/services/rollover.py).
+
+The promotion plan is checked before anything is written. The rollover runs
+in the foreground unless --queue hands it to the run_report_worker command.
+A rollover that stopped part way is continued with --resume. --dry-run runs
+every phase and rolls it back, printing what would change and how long each
+phase took.
+
+Usage:
+    python manage.py rollover_year
+    python manage.py rollover_year --dry-run
+    python manage.py rollover_year --queue
+    python manage.py rollover_year --resume <job id>
+"""
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from core.models import AcademicYear, RolloverJob
+from core.services import rollover
 
 
 class Command(BaseCommand):
     help = 'Perform year rollover for the current academic year'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queue',
+            action='store_true',
+            help='Queue the rollover for the background worker instead of running it here',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Simulate the rollover and roll it back, reporting what would change',
+        )
+        parser.add_argument(
+            '--resume',
+            metavar='JOB_ID',
+            help='Continue a rollover job that stopped part way',
+        )
+
     def handle(self, *args, **options):
+        if options.get('resume'):
+            try:
+                job = RolloverJob.objects.get(pk=options['resume'])
+            except (RolloverJob.DoesNotExist, ValidationError):
+                raise CommandError(f"Rollover job {options['resume']} does not exist")
+            if job.status == 'DONE':
+                raise CommandError(f'{job} has already finished')
+            rollover.resume(job)
+            return self._run(job)
+
+        current_year = AcademicYear.objects.filter(is_active=True).first()
+        if not current_year:
+            raise CommandError('No active academic year found!')
+
+        self.stdout.write(f'Current Academic Year: {current_year.year}')
+        if options['dry_run']:
+            try:
+                report = rollover.simulate(current_year)
+            except ValidationError as e:
+                raise CommandError('; '.join(e.messages))
+            return self._report(report)
+
         try:
-            # Get the current active academic year
-            current_year = AcademicYear.objects.filter(is_active=True).first()
-            
-            if not current_year:
-                self.stdout.write(self.style.ERROR('No active academic year found!'))
-                sys.exit(1)
-            
-            self.stdout.write(f'Current Academic Year: {current_year.year}')
-            self.stdout.write(f'Starting rollover process...\n')
-            
-            # Check if next year already exists
-            next_year_obj = AcademicYear.objects.filter(year=current_year.year + 1).first()
-            if next_year_obj:
-                self.stdout.write(self.style.WARNING(f'Academic Year {current_year.year + 1} already exists!'))
-                response = input('Do you want to continue with the existing year? (yes/no): ')
-                if response.lower() != 'yes':
-                    self.stdout.write('Rollover cancelled.')
-                    sys.exit(0)
-            
-            # Perform rollover
-            new_year = current_year.rollover_to_new_year()
-            
-            self.stdout.write(self.style.SUCCESS(f'\n✓ Successfully rolled over to Academic Year {new_year.year}'))
-            self.stdout.write(f'  - New academic year created')
-            self.stdout.write(f'  - Terms created for the new year')
-            self.stdout.write(f'  - Students promoted to their new classes')
-            self.stdout.write(f'  - Student balances and arrears preserved')
-            
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f'Error during rollover: {str(e)}'))
-            import traceback
-            traceback.print_exc()
-            sys.exit(1)
+            job, created = rollover.enqueue(current_year)
+        except ValidationError as e:
+            raise CommandError('; '.join(e.messages))
+        if not created:
+            raise CommandError(f'{job} is already queued or running (job {job.pk})')
+
+        self.stdout.write(
+            f"Plan: {job.summary['promoted']} students to promote, "
+            f"{job.summary['graduating']} graduating (job {job.pk})"
+        )
+        if options['queue']:
+            self.stdout.write(self.style.SUCCESS('Rollover queued for the background worker.'))
+            return
+        self._run(job)
+
+    def _run(self, job):
+        if not rollover.claim(job):
+            raise CommandError(f'{job} is being run by {job.worker or "another worker"}')
+        job = rollover.run_job(job)
+        if job.status != 'DONE':
+            RolloverJob.objects.filter(pk=job.pk).update(status='FAILED')
+            raise CommandError(
+                f'Rollover stopped in phase {job.get_phase_display()}: {job.error}\n'
+                f'Fix the problem and continue with: manage.py rollover_year --resume {job.pk}'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'\n✓ Successfully rolled over to Academic Year {job.to_year}'))
+        self.stdout.write(f"  - {job.summary['promoted']} students promoted to their new classes")
+        self.stdout.write(f"  - {job.summary['graduating']} Grade 7 students graduated")
+        self.stdout.write(f"  - {job.summary.get('balances_created', 0)} Term 1 balances opened with arrears carried forward")
+        for error in job.summary.get('balance_errors', [])[:10]:
+            self.stdout.write(self.style.WARNING(f'  Warning: {error}'))
+
+    def _report(self, report):
+        self.stdout.write(self.style.WARNING(
+            f"\nDRY RUN - rollover {report['from_year']} -> {report['to_year']} simulated, nothing was saved"
+        ))
+        self.stdout.write(f"\nStudents per class in {report['to_year']}:")
+        for row in report['target_classes']:
+            self.stdout.write(f"  {row['name']:<12} {row['students']:>5} students  {row['arrears']:>12,.2f} arrears")
+        graduates = report['graduates']
+        self.stdout.write(f"\nGraduating: {graduates['students']} ({graduates['arrears']:,.2f} owed)")
+        self.stdout.write(f"Term fees created: {report['term_fees_created']}")
+        self.stdout.write(
+            f"Term 1 balances opened: {report['balances']['created']} "
+            f"({report['balances']['total_due']:,.2f} due)"
+        )
+        self.stdout.write(
+            f"Arrears to carry: {report['arrears']['to_carry']:,.2f}, "
+            f"carried into Term 1: {report['arrears']['carried']:,.2f}"
+        )
+        for error in report['balance_errors'][:10]:
+            self.stdout.write(self.style.WARNING(f'  Warning: {error}'))
+
+        self.stdout.write('\nPhase                              Seconds  Queries')
+        for phase in report['profile']:
+            self.stdout.write(f"  {phase['label']:<32} {phase['seconds']:>7.3f}  {phase['queries']:>7}")
+        self.stdout.write(f"  {'Total':<32} {report['seconds']:>7.3f}  {report['queries']:>7}")
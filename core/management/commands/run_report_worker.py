@@ -0,0 +1,74 @@
+"""
+Management command running the background PDF report worker.
+
+Claims PENDING ReportJob rows, renders them and stores the PDFs (see
+core/services/report_jobs.py). Queued academic year rollovers (RolloverJob,
+core/services/rollover.py) are run by the same worker. Several workers can
+run side by side; each job is claimed by exactly one. Jobs left RUNNING by a
+killed worker are re-queued and old finished jobs are pruned as the worker
+goes.
+
+Usage:
+    python manage.py run_report_worker
+    python manage.py run_report_worker --once
+    python manage.py run_report_worker --sleep 2 --keep-days 14
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.services import report_jobs, rollover
+
+
+class Command(BaseCommand):
+    help = 'Render queued PDF reports in the background'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue and exit instead of polling forever',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Seconds to wait between polls when the queue is empty',
+        )
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=7,
+            help='Prune finished jobs not produced or downloaded for this many days',
+        )
+
+    def handle(self, *args, **options):
+        worker = report_jobs.worker_name()
+        self.stdout.write(f'Report worker {worker} started')
+        last_housekeeping = 0
+
+        while True:
+            close_old_connections()
+            if time.monotonic() - last_housekeeping > 60:
+                requeued = report_jobs.requeue_stale() + rollover.requeue_stale()
+                pruned = report_jobs.prune(options['keep_days'])
+                if requeued or pruned:
+                    self.stdout.write(f'Re-queued {requeued} stale job(s), pruned {pruned} old job(s)')
+                last_housekeeping = time.monotonic()
+
+            rollover_job = rollover.run_next(worker)
+            if rollover_job:
+                style = self.style.SUCCESS if rollover_job.status == 'DONE' else self.style.ERROR
+                self.stdout.write(style(f'{rollover_job} {rollover_job.error}'.rstrip()))
+                continue
+
+            job = report_jobs.run_next(worker)
+            if job:
+                style = self.style.SUCCESS if job.status == 'DONE' else self.style.ERROR
+                self.stdout.write(style(f'{job.report_type} {job.params}: {job.status} {job.error}'.rstrip()))
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
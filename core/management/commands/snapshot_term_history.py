@@ -0,0 +1,55 @@
+"""
+Management command to record StudentTermHistory snapshots for a term
+(see core/services/term_history.py).
+
+Snapshots are taken automatically when a term is completed; this fills in
+terms completed before that, or a term that has to be recorded early.
+Safe to run repeatedly: students already recorded are left as they are.
+
+Usage:
+    python manage.py snapshot_term_history --term 12     # A specific AcademicTerm id
+    python manage.py snapshot_term_history --completed   # Every completed term
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from core.models import AcademicTerm
+from core.services.term_history import snapshot_term
+
+
+class Command(BaseCommand):
+    help = 'Record the class, status and balance of every student enrolled in a term'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term',
+            type=int,
+            help='AcademicTerm id to record',
+        )
+        parser.add_argument(
+            '--completed',
+            action='store_true',
+            help='Record every completed term',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows per bulk insert',
+        )
+
+    def handle(self, *args, **options):
+        if options.get('term'):
+            terms = AcademicTerm.objects.filter(pk=options['term'])
+            if not terms.exists():
+                raise CommandError(f"AcademicTerm {options['term']} does not exist")
+        elif options.get('completed'):
+            terms = AcademicTerm.objects.filter(is_completed=True).order_by('academic_year', 'term')
+        else:
+            raise CommandError('Specify --term or --completed')
+
+        total = 0
+        for term in terms:
+            added = snapshot_term(term, batch_size=options.get('batch_size', 500))
+            total += added
+            self.stdout.write(f'  {term}: {added} students recorded')
+        self.stdout.write(self.style.SUCCESS(f'{total} term history rows added'))
@@ -0,0 +1,70 @@
+"""
+Management command to backfill or verify the materialized StudentBalance totals.
+
+StudentBalance stores term_fee, total_due and current_balance as real columns so
+financial summaries can be computed with SQL aggregates. This command recomputes
+them from TermFee, ECDClassProfile and ECDClassFee.
+
+Usage:
+    python manage.py sync_balance_totals            # Backfill all balances
+    python manage.py sync_balance_totals --verify   # Report stale rows only
+    python manage.py sync_balance_totals --term 12  # Limit to one AcademicTerm id
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from core.models import StudentBalance
+
+
+class Command(BaseCommand):
+    help = 'Backfill (or verify with --verify) the stored term_fee/total_due/current_balance columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only report balances whose stored totals are stale; make no changes',
+        )
+        parser.add_argument(
+            '--term',
+            type=int,
+            help='Only process balances for this AcademicTerm id',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows per bulk update statement',
+        )
+
+    def handle(self, *args, **options):
+        verify = options.get('verify', False)
+        term_id = options.get('term')
+
+        queryset = StudentBalance.objects.all()
+        if term_id:
+            queryset = queryset.filter(term_id=term_id)
+
+        total = queryset.count()
+        self.stdout.write(f'Checking {total} student balance(s)...')
+
+        stale = StudentBalance.refresh_materialized_totals(
+            queryset,
+            dry_run=verify,
+            batch_size=options.get('batch_size', 500),
+        )
+
+        for balance in stale[:20]:
+            self.stdout.write(
+                f'  {balance.student.full_name} ({balance.term}): '
+                f'term_fee={balance.term_fee} total_due={balance.total_due} '
+                f'current_balance={balance.current_balance}'
+            )
+        if len(stale) > 20:
+            self.stdout.write(f'  ... and {len(stale) - 20} more')
+
+        if verify:
+            if stale:
+                raise CommandError(f'{len(stale)} of {total} balance(s) have stale totals. Run without --verify to fix.')
+            self.stdout.write(self.style.SUCCESS(f'All {total} balance(s) are up to date.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Updated {len(stale)} of {total} balance(s).'))
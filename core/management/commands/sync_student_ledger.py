@@ -0,0 +1,43 @@
+"""
+Management command to bring student ledgers back in line with StudentBalance.
+
+Balances written outside StudentBalance.save() (raw updates, deletions) leave
+the ledger behind. This command appends ARREARS/CREDIT, CHARGE and PAYMENT
+entries for any difference, term by term in order. StudentBalance rows are
+treated as correct and are not changed.
+
+Usage:
+    python manage.py sync_student_ledger
+    python manage.py sync_student_ledger --student 42
+"""
+
+from django.core.management.base import BaseCommand
+from core.models import AcademicTerm, StudentBalance, StudentLedgerEntry
+
+
+class Command(BaseCommand):
+    help = 'Append ledger entries so every student ledger matches their StudentBalance rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--student',
+            type=int,
+            help='Only sync this Student id',
+        )
+
+    def handle(self, *args, **options):
+        student_id = options.get('student')
+
+        created = 0
+        for term in AcademicTerm.objects.order_by('academic_year', 'term'):
+            balances = StudentBalance.objects.filter(term=term)
+            if student_id:
+                balances = balances.filter(student_id=student_id)
+            entries = StudentLedgerEntry.record_balances(
+                term, balances, cascade=False, description='Ledger sync'
+            )
+            if entries:
+                self.stdout.write(f'  {term}: {len(entries)} entr{"y" if len(entries) == 1 else "ies"} added')
+            created += len(entries)
+
+        self.stdout.write(self.style.SUCCESS(f'Ledger sync complete: {created} entries added.'))
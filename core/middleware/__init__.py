@@ -1,3 +1,4 @@
 from .fresh_system_middleware import FreshSystemMiddleware
+from .current_period_middleware import CurrentPeriodMiddleware
 
-__all__ = ['FreshSystemMiddleware']
+__all__ = ['FreshSystemMiddleware', 'CurrentPeriodMiddleware']
@@ -0,0 +1,28 @@
+"""
+Middleware giving each request its own memo of the current term/year
+"""
+from django.utils.deprecation import MiddlewareMixin
+from core.services import current_period
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CurrentPeriodMiddleware(MiddlewareMixin):
+    """
+    Opens a per-request memo for AcademicTerm.get_current_term() and
+    AcademicYear.get_current_year(), so repeated lookups while rendering a
+    page (model properties, template rows) resolve without further cache or
+    database access.
+    """
+
+    def process_request(self, request):
+        request._current_period_token = current_period.start_request()
+
+    def process_response(self, request, response):
+        token = getattr(request, '_current_period_token', None)
+        if token is not None:
+            current_period.end_request(token)
+            del request._current_period_token
+            logger.debug('Current period cache: %s', current_period.get_stats())
+        return response
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:35
+
+import django.db.models.deletion
+from django.conf import settings
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_balance_totals(apps, schema_editor):
+    """Populate term_fee, total_due and current_balance for existing balances"""
+    StudentBalance = apps.get_model('core', 'StudentBalance')
+    ECDClassProfile = apps.get_model('core', 'ECDClassProfile')
+    ECDClassFee = apps.get_model('core', 'ECDClassFee')
+
+    profile_fees = {
+        p.cls_id: p.meal_plan_fee + p.nappies_fee + p.materials_fee
+        for p in ECDClassProfile.objects.all()
+    }
+    class_fees = {
+        (row['cls_id'], row['term_id']): row['total'] or Decimal('0')
+        for row in ECDClassFee.objects.values('cls_id', 'term_id').annotate(total=Sum('amount'))
+    }
+
+    balances = list(StudentBalance.objects.select_related('term_fee_record', 'student__current_class'))
+    for balance in balances:
+        fee = balance.term_fee_record.amount if balance.term_fee_record_id else Decimal('0')
+        current_class = balance.student.current_class
+        if current_class is not None and str(current_class.grade).startswith('ECD'):
+            fee += profile_fees.get(current_class.id, Decimal('0'))
+            fee += class_fees.get((current_class.id, balance.term_id), Decimal('0'))
+        balance.term_fee = fee
+        balance.total_due = fee + balance.previous_arrears
+        balance.current_balance = balance.total_due - balance.amount_paid
+
+    StudentBalance.objects.bulk_update(
+        balances, ['term_fee', 'total_due', 'current_balance'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0054_alter_class_grade_alter_class_section'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentbalance',
+            name='current_balance',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='total_due - amount_paid (positive=owe, negative=credit)', max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='studentbalance',
+            name='term_fee',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Effective term fee: base TermFee plus ECD class profile fees and ECD class fees', max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='studentbalance',
+            name='total_due',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='term_fee + previous_arrears', max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='recorded_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recorded_payments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='studentbalance',
+            index=models.Index(fields=['term', 'current_balance'], name='core_studen_term_id_a1b732_idx'),
+        ),
+        migrations.RunPython(backfill_balance_totals, migrations.RunPython.noop),
+    ]
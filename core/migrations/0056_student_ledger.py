@@ -0,0 +1,78 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:42
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_student_ledger(apps, schema_editor):
+    """Build each student's ledger from their existing StudentBalance rows, in term order"""
+    StudentBalance = apps.get_model('core', 'StudentBalance')
+    StudentLedgerEntry = apps.get_model('core', 'StudentLedgerEntry')
+
+    entries = []
+    student_id = None
+    running = Decimal('0')
+    balances = StudentBalance.objects.select_related('term').order_by(
+        'student_id', 'term__academic_year', 'term__term'
+    )
+    for balance in balances.iterator():
+        if balance.student_id != student_id:
+            student_id = balance.student_id
+            running = Decimal('0')
+
+        position = (balance.term.academic_year * 10 + balance.term.term) * 10
+        movements = [
+            ('ARREARS' if balance.previous_arrears > running else 'CREDIT', position, balance.previous_arrears - running),
+            ('CHARGE', position + 1, balance.term_fee),
+            ('PAYMENT', position + 1, -balance.amount_paid),
+        ]
+        for entry_type, entry_position, amount in movements:
+            if not amount:
+                continue
+            running += amount
+            entries.append(StudentLedgerEntry(
+                student_id=balance.student_id,
+                term_id=balance.term_id,
+                position=entry_position,
+                entry_type=entry_type,
+                amount=amount,
+                running_balance=running,
+                description='Opening balance',
+            ))
+
+        if len(entries) >= 1000:
+            StudentLedgerEntry.objects.bulk_create(entries)
+            entries = []
+
+    StudentLedgerEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0055_studentbalance_materialized_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveBigIntegerField(help_text="Sort key: (academic_year * 10 + term) * 10, +1 for the term's own charges and payments")),
+                ('entry_type', models.CharField(choices=[('ARREARS', 'Arrears Brought Forward'), ('CREDIT', 'Credit Brought Forward'), ('CHARGE', 'Term Fee Charge'), ('PAYMENT', 'Payment')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, help_text='Positive increases what the student owes, negative reduces it', max_digits=12)),
+                ('running_balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='core.student')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='core.academicterm')),
+            ],
+            options={
+                'verbose_name_plural': 'Student ledger entries',
+                'ordering': ['student', 'position', 'id'],
+                'indexes': [models.Index(fields=['student', 'position'], name='core_studen_student_e6ff33_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_student_ledger, migrations.RunPython.noop),
+    ]
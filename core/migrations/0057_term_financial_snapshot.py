@@ -0,0 +1,80 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:51
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+
+
+def backfill_term_financial_snapshots(apps, schema_editor):
+    """Roll up existing StudentBalance rows per term and current class"""
+    StudentBalance = apps.get_model('core', 'StudentBalance')
+    TermFinancialSnapshot = apps.get_model('core', 'TermFinancialSnapshot')
+
+    rows = StudentBalance.objects.values(
+        'term_id', 'student__current_class_id', 'student__current_class__grade'
+    ).annotate(
+        student_count=Count('id'),
+        term_fees=Sum('term_fee'),
+        expected=Sum('total_due'),
+        collected=Sum('amount_paid'),
+        arrears=Sum('previous_arrears'),
+        net_balance=Sum('current_balance'),
+        outstanding=Sum(Case(
+            When(current_balance__gt=0, then=F('current_balance')),
+            default=Value(Decimal('0')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )),
+        arrears_count=Count('id', filter=Q(previous_arrears__gt=0)),
+        no_payment_count=Count('id', filter=Q(amount_paid=0)),
+        paid_count=Count('id', filter=Q(current_balance__lte=0)),
+        partial_count=Count('id', filter=Q(current_balance__gt=0, amount_paid__gt=0)),
+        unpaid_count=Count('id', filter=Q(current_balance__gt=0, amount_paid__lte=0)),
+    ).order_by()
+
+    TermFinancialSnapshot.objects.bulk_create([
+        TermFinancialSnapshot(
+            term_id=row.pop('term_id'),
+            student_class_id=row.pop('student__current_class_id'),
+            grade_level='ECD' if str(row.pop('student__current_class__grade') or '').startswith('ECD') else 'PRIMARY',
+            **{field: value or 0 for field, value in row.items()},
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0056_student_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermFinancialSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade_level', models.CharField(help_text='ECD or PRIMARY, from the class grade', max_length=10)),
+                ('student_count', models.PositiveIntegerField(default=0)),
+                ('term_fees', models.DecimalField(decimal_places=2, default=0, help_text='Sum of term_fee', max_digits=14)),
+                ('expected', models.DecimalField(decimal_places=2, default=0, help_text='Sum of total_due (fees + arrears)', max_digits=14)),
+                ('collected', models.DecimalField(decimal_places=2, default=0, help_text='Sum of amount_paid', max_digits=14)),
+                ('arrears', models.DecimalField(decimal_places=2, default=0, help_text='Sum of previous_arrears', max_digits=14)),
+                ('net_balance', models.DecimalField(decimal_places=2, default=0, help_text='Sum of current_balance (credits included)', max_digits=14)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, help_text='Sum of positive current_balance', max_digits=14)),
+                ('arrears_count', models.PositiveIntegerField(default=0)),
+                ('no_payment_count', models.PositiveIntegerField(default=0)),
+                ('paid_count', models.PositiveIntegerField(default=0)),
+                ('partial_count', models.PositiveIntegerField(default=0)),
+                ('unpaid_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student_class', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='financial_snapshots', to='core.class')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='financial_snapshots', to='core.academicterm')),
+            ],
+            options={
+                'ordering': ['term', 'student_class'],
+                'indexes': [models.Index(fields=['term', 'student_class'], name='core_termfi_term_id_58807c_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_term_financial_snapshots, migrations.RunPython.noop),
+    ]
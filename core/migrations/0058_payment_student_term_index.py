@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0057_term_financial_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['student', 'term'], name='core_paymen_student_1d8e6e_idx'),
+        ),
+    ]
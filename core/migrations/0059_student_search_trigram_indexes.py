@@ -0,0 +1,36 @@
+from django.db import migrations
+
+TRIGRAM_INDEXES = {
+    'core_student_surname_trgm': ('core_student', 'surname'),
+    'core_student_first_name_trgm': ('core_student', 'first_name'),
+    'core_student_birth_entry_trgm': ('core_student', 'birth_entry_number'),
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """pg_trgm GIN indexes for student search; other databases use the in-process index"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, (table, column) in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0058_payment_student_term_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
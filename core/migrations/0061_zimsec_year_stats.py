@@ -0,0 +1,85 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+SUBJECTS = [
+    'english_units', 'mathematics_units', 'science_units',
+    'social_studies_units', 'indigenous_language_units', 'agriculture_units',
+]
+
+
+def backfill_zimsec_year_stats(apps, schema_editor):
+    """Roll up existing ZimsecResults per year, current class, gender and subject"""
+    ZimsecResults = apps.get_model('core', 'ZimsecResults')
+    ZimsecYearStats = apps.get_model('core', 'ZimsecYearStats')
+
+    group = ('academic_year', 'student__current_class_id', 'student__sex')
+    stats = {}
+    for row in ZimsecResults.objects.values(*group).annotate(
+        candidates=Count('id'),
+        passed=Count('id', filter=Q(overall_status='PASS')),
+        distinctions=Count('id', filter=Q(**{f'{field}__lte': 2 for field in SUBJECTS})),
+    ).order_by():
+        key = (row['academic_year'], row['student__current_class_id'], row['student__sex'] or '')
+        stats[key + ('total_aggregate',)] = ZimsecYearStats(
+            academic_year=key[0], student_class_id=key[1], gender=key[2], subject='total_aggregate',
+            candidates=row['candidates'], passed=row['passed'], distinctions=row['distinctions'], histogram={},
+        )
+
+    for subject in SUBJECTS + ['total_aggregate']:
+        rows = ZimsecResults.objects.filter(**{f'{subject}__isnull': False}).values(*group, subject).annotate(n=Count('id')).order_by()
+        for row in rows:
+            key = (row['academic_year'], row['student__current_class_id'], row['student__sex'] or '')
+            stat = stats.get(key + (subject,))
+            if stat is None:
+                stat = stats[key + (subject,)] = ZimsecYearStats(
+                    academic_year=key[0], student_class_id=key[1], gender=key[2], subject=subject,
+                    candidates=stats[key + ('total_aggregate',)].candidates, histogram={},
+                )
+            value, n = row[subject], row['n']
+            stat.count += n
+            stat.total += value * n
+            stat.total_squares += value * value * n
+            stat.histogram[str(value)] = n
+            if subject != 'total_aggregate':
+                stat.passed += n if value <= 5 else 0
+                stat.distinctions += n if value == 1 else 0
+
+    ZimsecYearStats.objects.bulk_create(stats.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0060_report_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZimsecYearStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_year', models.IntegerField()),
+                ('gender', models.CharField(blank=True, max_length=1)),
+                ('subject', models.CharField(choices=[('english_units', 'English'), ('mathematics_units', 'Mathematics'), ('science_units', 'Science'), ('social_studies_units', 'Social Studies'), ('indigenous_language_units', 'Indigenous Language'), ('agriculture_units', 'Agriculture'), ('total_aggregate', 'Aggregate')], max_length=30)),
+                ('candidates', models.PositiveIntegerField(default=0)),
+                ('count', models.PositiveIntegerField(default=0, help_text='Results with a value for the subject')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('total_squares', models.PositiveIntegerField(default=0)),
+                ('passed', models.PositiveIntegerField(default=0)),
+                ('distinctions', models.PositiveIntegerField(default=0)),
+                ('histogram', models.JSONField(default=dict, help_text='{value: number of results}')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student_class', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='zimsec_year_stats', to='core.class')),
+            ],
+            options={
+                'verbose_name': 'ZIMSEC Year Statistics',
+                'verbose_name_plural': 'ZIMSEC Year Statistics',
+                'ordering': ['-academic_year', 'student_class', 'gender', 'subject'],
+                'indexes': [models.Index(fields=['academic_year', 'student_class'], name='core_zimsec_academi_e0c26f_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_zimsec_year_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:40
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0061_zimsec_year_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RolloverJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('from_year', models.IntegerField()),
+                ('to_year', models.IntegerField()),
+                ('plan', models.JSONField(blank=True, default=dict, help_text="Students to move: {'moves': [[student, from class, to class]], 'graduates': [[student, from class]]}")),
+                ('summary', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('phase', models.CharField(choices=[('YEAR', 'Create academic year and terms'), ('PROMOTE', 'Promote and graduate students'), ('BALANCES', 'Open Term 1 balances'), ('DONE', 'Done')], default='YEAR', max_length=10)),
+                ('processed', models.PositiveIntegerField(default=0, help_text='Items of the current phase already applied')),
+                ('total', models.PositiveIntegerField(default=0, help_text='Items in the current phase')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rollover_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='core_rollov_status_ceb82d_idx')],
+            },
+        ),
+    ]
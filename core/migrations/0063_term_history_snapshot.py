@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0062_rollover_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studenttermhistory',
+            name='amount_paid',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='studenttermhistory',
+            name='balance',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Balance for the term when it was completed (positive=owe, negative=credit)', max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='studenttermhistory',
+            name='status',
+            field=models.CharField(blank=True, choices=[('ENROLLED', 'Enrolled'), ('ACTIVE', 'Active'), ('ALUMNI', 'Alumni'), ('GRADUATED', 'Graduated'), ('EXPELLED', 'Expelled')], help_text="The student's status when the term was completed", max_length=10),
+        ),
+        migrations.AddField(
+            model_name='studenttermhistory',
+            name='term_fee',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='studenttermhistory',
+            index=models.Index(fields=['academic_term', 'class_enrolled'], name='core_studen_academi_f67f71_idx'),
+        ),
+    ]
@@ -5,9 +5,13 @@ from .student import Student
 from .student_movement import StudentMovement
 from .academic import AcademicTerm, Payment
 from .fee import TermFee, StudentBalance
+from .ledger import StudentLedgerEntry
+from .financial_snapshot import TermFinancialSnapshot
+from .report_job import ReportJob
+from .rollover_job import RolloverJob
 from .ecd import ECDClassProfile, ECDClassFee
 from .academic_year import AcademicYear
-from .zimsec import ZimsecResults, Grade7Statistics
+from .zimsec import ZimsecResults, Grade7Statistics, ZimsecYearStats
 from .payment_allocation import PaymentAllocation, PaymentAllocationLog, StudentCredit
 from .term_history import StudentTermHistory
 from .arrears_import import (
@@ -28,9 +32,14 @@ __all__ = [
     'Payment',
     'TermFee',
     'StudentBalance',
+    'StudentLedgerEntry',
+    'TermFinancialSnapshot',
+    'ReportJob',
+    'RolloverJob',
     'AcademicYear',
     'ZimsecResults',
     'Grade7Statistics',
+    'ZimsecYearStats',
     'PaymentAllocation',
     'PaymentAllocationLog',
     'StudentCredit',
@@ -86,7 +86,13 @@ class AcademicTerm(models.Model):
 
     @classmethod
     def get_current_term(cls):
-        """Get the current academic term"""
+        """Get the current academic term (cached per request and per process)"""
+        from core.services import current_period
+        return current_period.get_current_term()
+
+    @classmethod
+    def lookup_current_term(cls):
+        """Get the current academic term from the database"""
         try:
             return cls.objects.get(is_current=True)
         except cls.DoesNotExist:
@@ -153,6 +159,10 @@ class Payment(models.Model):
 
     class Meta:
         ordering = ['-payment_date', '-created_at']
+        indexes = [
+            # amount_paid is recomputed as the sum of a student's payments in a term
+            models.Index(fields=['student', 'term']),
+        ]
 
     def __str__(self):
         receipt = self.receipt_number if self.receipt_number else "NEW"
@@ -248,6 +258,13 @@ class Payment(models.Model):
         
         return f"{prefix}-{timestamp}-{unique_id}"
 
+    def _generate_receipt_number(self):
+        """Generate receipt number: PMT + 2-digit year + term + 6 random digits"""
+        year = str(timezone.now().year)[-2:]
+        term = str(self.term.term)
+        unique_id = str(uuid.uuid4().int)[:6]
+        return f"PMT{year}{term}{unique_id}"
+
     def save(self, *args, **kwargs):
         # Validate before saving
         self.full_clean()
@@ -258,10 +275,7 @@ class Payment(models.Model):
         
         # Generate receipt number if not exists
         if not self.receipt_number and self.term:
-            year = str(timezone.now().year)[-2:]
-            term = str(self.term.term)
-            unique_id = str(uuid.uuid4().int)[:6]
-            self.receipt_number = f"PMT{year}{term}{unique_id}"
+            self.receipt_number = self._generate_receipt_number()
         
         super().save(*args, **kwargs)
         
@@ -314,8 +328,11 @@ class Payment(models.Model):
                     # No term fee set for next term - don't create balance yet
                     return
                 
-                # Get or create balance for next term with the credit as previous_arrears
-                next_balance, created = StudentBalance.objects.get_or_create(
+                # Create the next term's balance with the credit as previous_arrears.
+                # An existing balance already received the credit: saving this term's
+                # balance posted the payment to the student ledger, which shifts
+                # previous_arrears of later terms.
+                StudentBalance.objects.get_or_create(
                     student=self.student,
                     term=next_term,
                     defaults={
@@ -324,15 +341,6 @@ class Payment(models.Model):
                         'amount_paid': Decimal('0')
                     }
                 )
-                
-                # If balance already exists, update previous_arrears to reflect current credit
-                # Only update if the recalculated credit is different (e.g., more payments made)
-                if not created:
-                    # Recalculate what the previous_arrears should be from the current term's balance
-                    recalculated_arrears = StudentBalance.calculate_arrears(self.student, next_term)
-                    if next_balance.previous_arrears != recalculated_arrears:
-                        next_balance.previous_arrears = recalculated_arrears
-                        next_balance.save(update_fields=['previous_arrears'])
 
     
     def _get_next_term(self):
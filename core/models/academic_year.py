@@ -5,6 +5,7 @@ from django.db.models import Sum, F
 from .student import Student
 from .academic import AcademicTerm
 from .fee import StudentBalance, TermFee
+from .financial_snapshot import TermFinancialSnapshot
 from .class_model import Class
 
 class AcademicYear(models.Model):
@@ -48,7 +49,13 @@ class AcademicYear(models.Model):
 
     @classmethod
     def get_current_year(cls):
-        """Get the current academic year"""
+        """Get the current academic year (cached per request and per process)"""
+        from core.services import current_period
+        return current_period.get_current_year()
+
+    @classmethod
+    def lookup_current_year(cls):
+        """Get the current academic year from the database"""
         try:
             return cls.objects.get(is_active=True)
         except cls.DoesNotExist:
@@ -151,47 +158,11 @@ class AcademicYear(models.Model):
     def _validate_target_classes_exist(self, new_year):
         """Validation 4: All target promotion classes must exist in new year"""
         from django.core.exceptions import ValidationError
+        from core.services.rollover import RolloverPlanner
         
-        # Get all active students with class assignments
-        students_to_promote = Student.objects.filter(
-            is_active=True,
-            current_class__isnull=False
-        )
-        
-        missing_classes = []
-        for student in students_to_promote:
-            current_grade = student.current_class.grade
-            current_section = student.current_class.section
-            
-            # Check if student will be promoted (grade < 7)
-            if current_grade < 7:
-                next_grade = current_grade + 1
-                
-                # Check if target class exists
-                target_class = Class.objects.filter(
-                    grade=next_grade,
-                    section=current_section,
-                    academic_year=new_year
-                ).exists()
-                
-                if not target_class:
-                    # Check if ANY class exists in that grade (fallback)
-                    any_grade_class = Class.objects.filter(
-                        grade=next_grade,
-                        academic_year=new_year
-                    ).exists()
-                    
-                    if not any_grade_class:
-                        class_key = f"Grade {next_grade} (for {next_grade-1}{current_section})"
-                        if class_key not in missing_classes:
-                            missing_classes.append(class_key)
-        
-        if missing_classes:
-            raise ValidationError(
-                f"Cannot rollover: The following classes must exist in {new_year} "
-                f"for student promotion: {', '.join(missing_classes)}. "
-                f"Please create these classes before rolling over."
-            )
+        plan = RolloverPlanner(self).plan()
+        if not plan.is_complete:
+            raise ValidationError(plan.missing_message())
     
     def _validate_new_year_ready(self, new_year):
         """Validation 5: Check if new year setup prerequisites are met"""
@@ -205,104 +176,20 @@ class AcademicYear(models.Model):
         # The terms and fees will be created from the current year's structure
         pass
 
-    def rollover_to_new_year(self):
+    def rollover_to_new_year(self, requested_by=None):
         """
         Handle year rollover process including:
         - Creating new academic year
         - Promoting students
         - Preserving arrears
+        
+        Runs the set-based rollover of core/services/rollover.py in the
+        foreground; views queue it for the background worker instead.
         """
-        from django.db import transaction
-        from django.core.exceptions import ValidationError
-
-        # Validate rollover before proceeding
-        self._validate_rollover()
-
-        # Calculate new year dates (assuming standard academic calendar)
-        new_year = self.year + 1
-        new_start_date = self.end_date.replace(year=self.end_date.year + 1)
-        new_end_date = self.start_date.replace(year=self.start_date.year + 2)
-
-        with transaction.atomic():
-            # Create new academic year
-            new_academic_year = AcademicYear.objects.create(
-                year=new_year,
-                start_date=new_start_date,
-                end_date=new_end_date,
-                is_active=False  # Don't automatically activate
-            )
-
-            # Get all current year's terms for fee structure
-            current_terms = self.get_terms()
-            
-            # Create new terms with same fee structure
-            new_term_dates = []
-            for term in current_terms:
-                term_fee = TermFee.objects.get(term=term)
-                new_term_dates.append({
-                    'start_date': term.start_date.replace(year=new_start_date.year),
-                    'end_date': term.end_date.replace(year=new_start_date.year),
-                    'fee_amount': term_fee.amount
-                })
-            
-            # Create terms for new year
-            new_academic_year.create_terms(new_term_dates)
-
-            # Handle student promotions - move students to next grade classes in new year
-            students = Student.objects.filter(is_active=True)
-            for student in students:
-                # Calculate total arrears for current year
-                total_arrears = StudentBalance.objects.filter(
-                    student=student,
-                    term__academic_year=self.year
-                ).aggregate(
-                    total=Sum(F('term_fee') + F('previous_arrears') - F('amount_paid'))
-                )['total'] or 0
-
-                # If student has a current class, handle promotion
-                if student.current_class:
-                    current_grade = student.current_class.grade
-                    current_section = student.current_class.section
-                    
-                    # Only promote if not in final grade (7 is the highest)
-                    if current_grade < 7:
-                        next_grade = current_grade + 1
-                        
-                        # Find the EXISTING next grade class in the new academic year
-                        # (These classes should already be created and waiting for students)
-                        next_class = Class.objects.filter(
-                            grade=next_grade,
-                            section=current_section,
-                            academic_year=new_year,
-                        ).first()
-                        
-                        # If the same-section class doesn't exist, find any class in that grade
-                        if not next_class:
-                            next_class = Class.objects.filter(
-                                grade=next_grade,
-                                academic_year=new_year,
-                            ).first()
-                        
-                        # If a class exists in the new year, promote student
-                        if next_class:
-                            student.current_class = next_class
-                        else:
-                            print(f"Warning: No Grade {next_grade} class exists in {new_year} for student {student.full_name}. Student not promoted.")
-                    else:
-                        # Student is graduating
-                        student.is_active = False
-                    
-                    student.save()
-
-                # Store arrears for first term of new year using initialize_term_balance
-                # This ensures proper calculation of what carries over from previous year
-                first_term = AcademicTerm.objects.get(academic_year=new_year, term=1)
-                try:
-                    StudentBalance.initialize_term_balance(student, first_term)
-                except Exception as e:
-                    print(f"Warning: Could not initialize balance for {student.full_name} in {new_year}: {e}")
-
-            return new_academic_year
+        from core.services import rollover
+        
+        job = rollover.run_now(self, requested_by=requested_by)
+        return AcademicYear.objects.get(year=job.to_year)
 
     def activate(self):
         """Activate this academic year and deactivate others"""
@@ -311,8 +198,12 @@ class AcademicYear(models.Model):
         self.save()
 
     def get_financial_summary(self):
-        """Get financial summary for the academic year"""
-        terms = self.get_terms()
+        """Get financial summary for the academic year
+        
+        Reads the TermFinancialSnapshot rollup rows, so all terms are
+        summarised with a single grouped query.
+        """
+        terms = list(self.get_terms())
         summary = {
             'total_expected': 0,
             'total_collected': 0,
@@ -320,19 +211,16 @@ class AcademicYear(models.Model):
             'terms': []
         }
 
+        term_totals = TermFinancialSnapshot.totals_by_term(terms)
+
         for term in terms:
+            totals = term_totals.get(term.id, {})
             term_summary = {
                 'term': term.get_term_display(),
-                'expected': 0,
-                'collected': 0,
+                'expected': totals.get('expected') or 0,
+                'collected': totals.get('collected') or 0,
                 'arrears': 0
             }
-
-            balances = StudentBalance.objects.filter(term=term)
-            term_summary['expected'] = balances.aggregate(
-                total=Sum(F('term_fee') + F('previous_arrears')))['total'] or 0
-            term_summary['collected'] = balances.aggregate(
-                total=Sum('amount_paid'))['total'] or 0
             term_summary['arrears'] = term_summary['expected'] - term_summary['collected']
 
             summary['terms'].append(term_summary)
@@ -345,4 +233,4 @@ class AcademicYear(models.Model):
             if summary['total_expected'] else 0
         )
 
-        return summary
\ No newline at end of file
+        return summary
@@ -1,7 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from decimal import Decimal
-from django.db.models import Sum, Q
+from django.db.models import F, Sum, Q
 from django.core.exceptions import ValidationError
 
 class TermFee(models.Model):
@@ -65,12 +65,42 @@ class StudentBalance(models.Model):
     )
     amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     last_payment_date = models.DateField(null=True, blank=True)
+
+    # Materialized totals - kept in sync by save() and refresh_materialized_totals()
+    # so that dashboards and summaries can aggregate them in SQL
+    term_fee = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Effective term fee: base TermFee plus ECD class profile fees and ECD class fees"
+    )
+    total_due = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="term_fee + previous_arrears"
+    )
+    current_balance = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="total_due - amount_paid (positive=owe, negative=credit)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Columns derived from term_fee_record, previous_arrears and amount_paid
+    MATERIALIZED_FIELDS = ('term_fee', 'total_due', 'current_balance')
+
     class Meta:
         unique_together = ['student', 'term']
         ordering = ['-term__academic_year', '-term__term']
+        indexes = [
+            models.Index(fields=['term', 'current_balance']),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.term}"
@@ -104,12 +134,38 @@ class StudentBalance(models.Model):
                 )
             # Otherwise allow it - student enrolled mid-term but term is still active/ongoing
     
-    def save(self, *args, **kwargs):
+    # Fields whose changes are posted to the student's ledger
+    LEDGER_FIELDS = ('previous_arrears', 'amount_paid', 'term_fee', 'term_fee_record')
+
+    def save(self, *args, ledger_description='', **kwargs):
         # Auto-assign correct TermFee based on student's grade if not already set
-        if not self.term_fee_record and self.student.current_class:
+        if not self.term_fee_record_id and self.student.current_class:
             self.term_fee_record = self.get_appropriate_term_fee()
         self.full_clean()
-        super().save(*args, **kwargs)
+
+        # Keep the materialized totals in step with the fields being written.
+        # Partial saves (e.g. update_fields=['amount_paid']) only re-derive the
+        # totals; the effective fee is recalculated when the fee record may change.
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'term_fee_record' in update_fields or 'term_fee' in update_fields:
+            self.term_fee = self.calculate_term_fee()
+        self.refresh_derived_totals()
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.MATERIALIZED_FIELDS)
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # Post any change to the ledger; later terms' previous_arrears are
+            # shifted by the same amount instead of being recalculated
+            if update_fields is None or set(update_fields) & set(self.LEDGER_FIELDS):
+                from .ledger import StudentLedgerEntry
+                StudentLedgerEntry.record_balances(self.term, [self], description=ledger_description)
+
+    def refresh_derived_totals(self):
+        """Recompute total_due and current_balance from the stored columns (no queries)"""
+        self.total_due = (self.term_fee or Decimal('0')) + (self.previous_arrears or Decimal('0'))
+        self.current_balance = self.total_due - (self.amount_paid or Decimal('0'))
     
     def get_appropriate_term_fee(self):
         """Get the correct TermFee for this student based on their class grade.
@@ -136,14 +192,15 @@ class StudentBalance(models.Model):
                 f"Please create a TermFee record in admin."
             )
     
-    @property
-    def term_fee(self):
-        """Dynamically get current term fee from TermFee record
+    def calculate_term_fee(self):
+        """Calculate the effective term fee from the TermFee record
         
         For ECD students (ECDA/ECDB), this includes:
         1. Base TermFee for 'ECD' grade level
         2. ECDClassProfile fees (meal_plan_fee, nappies_fee, materials_fee) - per-class settings
         3. ECDClassFee amounts - per-term additional fees
+        
+        The result is stored in the term_fee column by save().
         """
         base = self.term_fee_record.amount
 
@@ -152,8 +209,6 @@ class StudentBalance(models.Model):
             if self.student and self.student.current_class:
                 student_grade = str(self.student.current_class.grade)
                 if student_grade.startswith('ECD'):  # Matches ECDA, ECDB
-                    from decimal import Decimal
-                    
                     # 1. Add ECDClassProfile fees (meal_plan, nappies, materials)
                     from .ecd import ECDClassProfile
                     try:
@@ -175,28 +230,119 @@ class StudentBalance(models.Model):
             pass
 
         return base
-    
-    @property
-    def total_due(self):
-        """Calculate total amount due including arrears and credits
+
+    @classmethod
+    def load_ecd_fee_components(cls, class_ids, term_ids):
+        """Load ECD fee extras for many classes/terms in two queries
         
-        Formula: term_fee + previous_arrears
-        Where:
-        - term_fee = original charge for this term
-        - previous_arrears = balance from previous term (+ owe, - credit)
-        - If previous_arrears is negative (credit), it reduces the total due
+        Returns:
+            tuple: (profile_fees, class_fees)
+            - profile_fees: {class_id: meal_plan_fee + nappies_fee + materials_fee}
+            - class_fees: {(class_id, term_id): sum of ECDClassFee amounts}
         """
-        return self.term_fee + self.previous_arrears
+        from .ecd import ECDClassProfile, ECDClassFee
 
-    @property
-    def current_balance(self):
-        """Calculate current balance (what student still owes or has as credit)
+        class_ids = set(class_ids)
+        term_ids = set(term_ids)
+        profile_fees = {}
+        class_fees = {}
+        if not class_ids:
+            return profile_fees, class_fees
+
+        for profile in ECDClassProfile.objects.filter(cls_id__in=class_ids).values(
+            'cls_id', 'meal_plan_fee', 'nappies_fee', 'materials_fee'
+        ):
+            profile_fees[profile['cls_id']] = (
+                profile['meal_plan_fee'] + profile['nappies_fee'] + profile['materials_fee']
+            )
+
+        for row in ECDClassFee.objects.filter(cls_id__in=class_ids, term_id__in=term_ids).values(
+            'cls_id', 'term_id'
+        ).annotate(total=Sum('amount')):
+            class_fees[(row['cls_id'], row['term_id'])] = row['total'] or Decimal('0')
+
+        return profile_fees, class_fees
+
+    @staticmethod
+    def resolve_term_fee(base_amount, current_class, term_id, profile_fees, class_fees):
+        """In-memory equivalent of calculate_term_fee() using preloaded ECD components"""
+        fee = base_amount
+        if current_class is not None and str(current_class.grade).startswith('ECD'):
+            fee = fee + profile_fees.get(current_class.id, Decimal('0'))
+            fee = fee + class_fees.get((current_class.id, term_id), Decimal('0'))
+        return fee
+
+    @classmethod
+    def refresh_materialized_totals(cls, queryset=None, dry_run=False, batch_size=500):
+        """Recalculate term_fee, total_due and current_balance for many balances
+        
+        ECD fee components are loaded once for the whole set, so this costs a
+        fixed number of queries regardless of how many balances are refreshed.
+        
+        Args:
+            queryset: StudentBalance queryset to refresh (defaults to all balances)
+            dry_run: If True, only report rows whose stored values are stale
+            batch_size: Rows per bulk_update statement
+            
+        Returns:
+            list: StudentBalance objects whose stored values were (or would be) changed
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+
+        balances = list(queryset.select_related('term', 'term_fee_record', 'student__current_class'))
+        class_ids = [b.student.current_class_id for b in balances if b.student.current_class_id]
+        term_ids = [b.term_id for b in balances]
+        profile_fees, class_fees = cls.load_ecd_fee_components(class_ids, term_ids)
+
+        changed = []
+        for balance in balances:
+            stored = (balance.term_fee, balance.total_due, balance.current_balance)
+            balance.term_fee = cls.resolve_term_fee(
+                balance.term_fee_record.amount,
+                balance.student.current_class,
+                balance.term_id,
+                profile_fees,
+                class_fees,
+            )
+            balance.refresh_derived_totals()
+            if (balance.term_fee, balance.total_due, balance.current_balance) != stored:
+                changed.append(balance)
+
+        if changed and not dry_run:
+            from .ledger import StudentLedgerEntry
+            now = timezone.now()
+            for balance in changed:
+                balance.updated_at = now
+            with transaction.atomic():
+                cls.objects.bulk_update(changed, [*cls.MATERIALIZED_FIELDS, 'updated_at'], batch_size=batch_size)
+                from core.services import financial_snapshots
+                for balance in changed:
+                    financial_snapshots.mark_balance(balance.term_id, balance.student_id)
+                by_term = {}
+                for balance in changed:
+                    by_term.setdefault(balance.term_id, []).append(balance)
+                for term_balances in by_term.values():
+                    StudentLedgerEntry.record_balances(
+                        term_balances[0].term, term_balances,
+                        description='Term fee changed', batch_size=batch_size,
+                        fields=('term_fee',),
+                    )
+
+        return changed
+
+    @classmethod
+    def refresh_for_class_change(cls, student_ids):
+        """Re-price the balances of students who changed class
         
-        Formula: total_due - amount_paid
-        - If positive: student owes this amount
-        - If negative: student has credit (school owes student)
+        Only balances in the year of the student's current class are
+        refreshed; balances of earlier years keep the fees they were billed
+        with.
         """
-        return self.total_due - self.amount_paid
+        return cls.refresh_materialized_totals(cls.objects.filter(
+            student_id__in=list(student_ids),
+            term__academic_year=F('student__current_class__academic_year'),
+        ))
 
     @property
     def current_outstanding(self):
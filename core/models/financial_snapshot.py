@@ -0,0 +1,183 @@
+from django.db import models, transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from decimal import Decimal
+
+
+class TermFinancialSnapshot(models.Model):
+    """Per-term, per-class rollup of StudentBalance figures for the dashboards
+
+    One row per (term, class) of the students holding a balance in that term,
+    by their current class (student_class is empty for students without one).
+    Dashboards sum a handful of these rows instead of scanning every balance.
+
+    Rows are rebuilt from StudentBalance, never edited by hand: see
+    core/services/financial_snapshots.py for the incremental refresh and the
+    rebuild_financial_snapshots command for a full rebuild.
+    """
+    term = models.ForeignKey('AcademicTerm', on_delete=models.CASCADE, related_name='financial_snapshots')
+    student_class = models.ForeignKey(
+        'Class',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='financial_snapshots'
+    )
+    grade_level = models.CharField(max_length=10, help_text="ECD or PRIMARY, from the class grade")
+
+    student_count = models.PositiveIntegerField(default=0)
+    term_fees = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Sum of term_fee")
+    expected = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Sum of total_due (fees + arrears)")
+    collected = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Sum of amount_paid")
+    arrears = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Sum of previous_arrears")
+    net_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Sum of current_balance (credits included)")
+    outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Sum of positive current_balance")
+
+    arrears_count = models.PositiveIntegerField(default=0)
+    no_payment_count = models.PositiveIntegerField(default=0)
+    paid_count = models.PositiveIntegerField(default=0)
+    partial_count = models.PositiveIntegerField(default=0)
+    unpaid_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    AMOUNT_FIELDS = ('term_fees', 'expected', 'collected', 'arrears', 'net_balance', 'outstanding')
+    COUNT_FIELDS = (
+        'student_count', 'arrears_count', 'no_payment_count',
+        'paid_count', 'partial_count', 'unpaid_count',
+    )
+
+    class Meta:
+        ordering = ['term', 'student_class']
+        indexes = [
+            models.Index(fields=['term', 'student_class']),
+        ]
+
+    def __str__(self):
+        return f"{self.term} - {self.student_class or 'No class'}: ${self.collected}/{self.expected}"
+
+    @staticmethod
+    def grade_level_for(grade):
+        return 'ECD' if grade and str(grade).startswith('ECD') else 'PRIMARY'
+
+    @classmethod
+    def _rollup_aggregates(cls):
+        """Aggregates over StudentBalance producing each snapshot field"""
+        zero = Value(Decimal('0'))
+        amount = DecimalField(max_digits=14, decimal_places=2)
+        return {
+            'student_count': Count('id'),
+            'term_fees': Sum('term_fee'),
+            'expected': Sum('total_due'),
+            'collected': Sum('amount_paid'),
+            'arrears': Sum('previous_arrears'),
+            'net_balance': Sum('current_balance'),
+            'outstanding': Sum(Case(
+                When(current_balance__gt=0, then=F('current_balance')),
+                default=zero,
+                output_field=amount,
+            )),
+            'arrears_count': Count('id', filter=Q(previous_arrears__gt=0)),
+            'no_payment_count': Count('id', filter=Q(amount_paid=0)),
+            'paid_count': Count('id', filter=Q(current_balance__lte=0)),
+            'partial_count': Count('id', filter=Q(current_balance__gt=0, amount_paid__gt=0)),
+            'unpaid_count': Count('id', filter=Q(current_balance__gt=0, amount_paid__lte=0)),
+        }
+
+    @classmethod
+    def refresh(cls, term_ids=(), buckets=None):
+        """Rebuild snapshot rows from StudentBalance in one grouped query
+
+        Args:
+            term_ids: Terms whose rows are all rebuilt
+            buckets: {term_id: set of class ids (None for no class)} to rebuild
+                individually, for terms not in term_ids
+
+        Returns:
+            int: Number of snapshot rows written
+        """
+        from .fee import StudentBalance
+
+        term_ids = set(term_ids)
+        buckets = {t: classes for t, classes in (buckets or {}).items() if t not in term_ids and classes}
+        if not term_ids and not buckets:
+            return 0
+
+        scope = Q(term_id__in=term_ids) if term_ids else Q()
+        for term_id, class_ids in buckets.items():
+            bucket = Q(term_id=term_id) & cls._class_condition('student__current_class_id', class_ids)
+            scope = scope | bucket if scope else bucket
+
+        rows = StudentBalance.objects.filter(scope).values(
+            'term_id', 'student__current_class_id', 'student__current_class__grade'
+        ).annotate(**cls._rollup_aggregates()).order_by()
+
+        snapshots = [
+            cls(
+                term_id=row['term_id'],
+                student_class_id=row['student__current_class_id'],
+                grade_level=cls.grade_level_for(row['student__current_class__grade']),
+                **{field: row[field] or 0 for field in cls.AMOUNT_FIELDS + cls.COUNT_FIELDS},
+            )
+            for row in rows
+        ]
+
+        stale = Q(term_id__in=term_ids) if term_ids else Q()
+        for term_id, class_ids in buckets.items():
+            bucket = Q(term_id=term_id) & cls._class_condition('student_class_id', class_ids)
+            stale = stale | bucket if stale else bucket
+
+        with transaction.atomic():
+            cls.objects.filter(stale).delete()
+            cls.objects.bulk_create(snapshots)
+        return len(snapshots)
+
+    @staticmethod
+    def _class_condition(field, class_ids):
+        condition = Q(**{f'{field}__in': [c for c in class_ids if c is not None]})
+        if None in class_ids:
+            condition |= Q(**{f'{field}__isnull': True})
+        return condition
+
+    @classmethod
+    def rebuild(cls, terms=None):
+        """Rebuild all rows (or those of the given terms)"""
+        from .academic import AcademicTerm
+
+        if terms is None:
+            with transaction.atomic():
+                cls.objects.all().delete()
+                return cls.refresh(AcademicTerm.objects.values_list('id', flat=True))
+        return cls.refresh([getattr(t, 'pk', t) for t in terms])
+
+    @classmethod
+    def totals(cls, term, student_class=None):
+        """Summed snapshot figures for a term (optionally one class), plus collection_rate
+
+        collection_rate is collected / expected as a percentage. Missing terms
+        give zeros.
+        """
+        rows = cls.objects.filter(term=term)
+        if student_class is not None:
+            rows = rows.filter(student_class=student_class)
+        totals = rows.aggregate(**{field: Sum(field) for field in cls.AMOUNT_FIELDS + cls.COUNT_FIELDS})
+        for field in cls.AMOUNT_FIELDS:
+            totals[field] = totals[field] or Decimal('0')
+        for field in cls.COUNT_FIELDS:
+            totals[field] = totals[field] or 0
+        totals['collection_rate'] = (
+            float(totals['collected']) / float(totals['expected']) * 100
+            if totals['expected'] > 0 else 0
+        )
+        return totals
+
+    @classmethod
+    def totals_by_term(cls, terms):
+        """{term_id: {'expected', 'collected', 'outstanding'}} for several terms in one query"""
+        return {
+            row['term_id']: row
+            for row in cls.objects.filter(term__in=terms).values('term_id').annotate(
+                expected=Sum('expected'),
+                collected=Sum('collected'),
+                outstanding=Sum('outstanding'),
+            ).order_by()
+        }
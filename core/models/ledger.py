@@ -0,0 +1,241 @@
+from django.db import models, transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.utils import timezone
+from decimal import Decimal
+
+
+class StudentLedgerEntry(models.Model):
+    """Append-only record of every movement on a student's fee account
+
+    Each entry stores the running balance of the student's account after it, in
+    term order. A term's previous arrears is therefore a prefix-sum lookup (the
+    running balance of the last entry before the term's own charges), and a new
+    entry only has to shift the rows after it instead of re-deriving the chain
+    term by term.
+
+    Amounts are signed: positive increases what the student owes, negative
+    reduces it. Entries are never edited except for running_balance shifts.
+    """
+    ARREARS = 'ARREARS'
+    CREDIT = 'CREDIT'
+    CHARGE = 'CHARGE'
+    PAYMENT = 'PAYMENT'
+
+    ENTRY_TYPE_CHOICES = [
+        (ARREARS, 'Arrears Brought Forward'),
+        (CREDIT, 'Credit Brought Forward'),
+        (CHARGE, 'Term Fee Charge'),
+        (PAYMENT, 'Payment'),
+    ]
+
+    student = models.ForeignKey('Student', on_delete=models.CASCADE, related_name='ledger_entries')
+    term = models.ForeignKey('AcademicTerm', on_delete=models.PROTECT, related_name='ledger_entries')
+    position = models.PositiveBigIntegerField(
+        help_text="Sort key: (academic_year * 10 + term) * 10, +1 for the term's own charges and payments"
+    )
+    entry_type = models.CharField(max_length=10, choices=ENTRY_TYPE_CHOICES)
+    amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        help_text="Positive increases what the student owes, negative reduces it"
+    )
+    running_balance = models.DecimalField(max_digits=12, decimal_places=2)
+    description = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['student', 'position', 'id']
+        indexes = [
+            models.Index(fields=['student', 'position']),
+        ]
+        verbose_name_plural = 'Student ledger entries'
+
+    def __str__(self):
+        return f"{self.student} - {self.term} {self.get_entry_type_display()}: ${self.amount}"
+
+    @staticmethod
+    def term_position(term, brought_forward=False):
+        """Ledger sort key for a term
+
+        Arrears and credits brought forward into a term sort before the term's
+        own charges and payments.
+        """
+        return (term.academic_year * 10 + term.term) * 10 + (0 if brought_forward else 1)
+
+    @classmethod
+    def previous_arrears_for(cls, student, term):
+        """Balance carried into a term (positive=owe, negative=credit)"""
+        running = cls.objects.filter(
+            student=student,
+            position__lt=cls.term_position(term),
+        ).order_by('-position', '-id').values_list('running_balance', flat=True).first()
+        return running if running is not None else Decimal('0')
+
+    @classmethod
+    def balance_after(cls, student, term):
+        """Account balance at the end of a term (positive=owe, negative=credit)"""
+        running = cls.objects.filter(
+            student=student,
+            position__lte=cls.term_position(term),
+        ).order_by('-position', '-id').values_list('running_balance', flat=True).first()
+        return running if running is not None else Decimal('0')
+
+    @classmethod
+    def record_balances(cls, term, balances, cascade=True, description='', batch_size=500,
+                        fields=('previous_arrears', 'term_fee', 'amount_paid')):
+        """Append entries bringing the ledger in line with StudentBalance rows of one term
+
+        Differences between each balance's previous_arrears, term_fee and
+        amount_paid and what the ledger already holds for the term become
+        ARREARS/CREDIT, CHARGE and PAYMENT entries. Later ledger rows are shifted
+        by the same amount in a single UPDATE.
+
+        Args:
+            term: AcademicTerm all balances belong to
+            balances: StudentBalance objects (saved) for that term
+            cascade: Also shift previous_arrears (and totals) of the students'
+                later StudentBalance rows, in a single UPDATE
+            description: Text stored on the created entries
+            batch_size: Students per statement
+            fields: StudentBalance fields to compare; others are left as the ledger has them
+
+        Returns:
+            list: Created StudentLedgerEntry objects
+        """
+        balances = list(balances)
+        created = []
+        for start in range(0, len(balances), batch_size):
+            created.extend(cls._record_batch(term, balances[start:start + batch_size], cascade, description, fields))
+        return created
+
+    @classmethod
+    def _record_batch(cls, term, balances, cascade, description, fields):
+        from .fee import StudentBalance
+
+        if not balances:
+            return []
+
+        brought_position = cls.term_position(term, brought_forward=True)
+        term_position = cls.term_position(term)
+        held = {
+            row['student_id']: row
+            for row in cls.objects.filter(
+                student_id__in=[b.student_id for b in balances],
+            ).values('student_id').annotate(
+                brought_forward=Sum('amount', filter=Q(position__lt=term_position)),
+                charged=Sum('amount', filter=Q(position=term_position, entry_type=cls.CHARGE)),
+                paid=Sum('amount', filter=Q(position=term_position, entry_type=cls.PAYMENT)),
+                later=Count('id', filter=Q(position__gt=term_position)),
+            )
+        }
+
+        entries = []
+        arrears_shift = {}
+        total_shift = {}
+        for balance in balances:
+            row = held.get(balance.student_id, {})
+            brought_forward = row.get('brought_forward') or Decimal('0')
+            charged = row.get('charged') or Decimal('0')
+            paid = -(row.get('paid') or Decimal('0'))
+
+            arrears_delta = charge_delta = payment_delta = Decimal('0')
+            if 'previous_arrears' in fields:
+                arrears_delta = (balance.previous_arrears or Decimal('0')) - brought_forward
+            if 'term_fee' in fields:
+                charge_delta = (balance.term_fee or Decimal('0')) - charged
+            if 'amount_paid' in fields:
+                payment_delta = (balance.amount_paid or Decimal('0')) - paid
+
+            running = brought_forward + arrears_delta
+            if arrears_delta:
+                entries.append(cls(
+                    student_id=balance.student_id,
+                    term=term,
+                    position=brought_position,
+                    entry_type=cls.ARREARS if arrears_delta > 0 else cls.CREDIT,
+                    amount=arrears_delta,
+                    running_balance=running,
+                    description=description,
+                ))
+                arrears_shift[balance.student_id] = arrears_delta
+
+            running += charged - paid
+            if charge_delta:
+                running += charge_delta
+                entries.append(cls(
+                    student_id=balance.student_id,
+                    term=term,
+                    position=term_position,
+                    entry_type=cls.CHARGE,
+                    amount=charge_delta,
+                    running_balance=running,
+                    description=description,
+                ))
+            if payment_delta:
+                running -= payment_delta
+                entries.append(cls(
+                    student_id=balance.student_id,
+                    term=term,
+                    position=term_position,
+                    entry_type=cls.PAYMENT,
+                    amount=-payment_delta,
+                    running_balance=running,
+                    description=description,
+                ))
+
+            total = arrears_delta + charge_delta - payment_delta
+            if total:
+                total_shift[balance.student_id] = total
+
+        if not entries:
+            return []
+
+        with transaction.atomic():
+            # Shift existing rows first so the new entries (already carrying
+            # their own running balance) are left untouched
+            if arrears_shift:
+                cls.objects.filter(
+                    student_id__in=arrears_shift, position=term_position
+                ).update(running_balance=F('running_balance') + cls._shift_by_student(arrears_shift))
+            # Only students with later rows take part in the shifting UPDATEs; a
+            # per-student CASE over the whole batch is expensive to build
+            ledger_shift = {
+                student_id: amount for student_id, amount in total_shift.items()
+                if held.get(student_id, {}).get('later')
+            }
+            if ledger_shift:
+                cls.objects.filter(
+                    student_id__in=ledger_shift, position__gt=term_position
+                ).update(running_balance=F('running_balance') + cls._shift_by_student(ledger_shift))
+            if total_shift and cascade:
+                later_balances = StudentBalance.objects.filter(student_id__in=total_shift).filter(
+                    Q(term__academic_year__gt=term.academic_year) |
+                    Q(term__academic_year=term.academic_year, term__term__gt=term.term)
+                )
+                balance_shift = {
+                    student_id: total_shift[student_id]
+                    for student_id in later_balances.values_list('student_id', flat=True).distinct()
+                }
+                if balance_shift:
+                    shift = cls._shift_by_student(balance_shift)
+                    later_balances.filter(student_id__in=balance_shift).update(
+                        previous_arrears=F('previous_arrears') + shift,
+                        total_due=F('total_due') + shift,
+                        current_balance=F('current_balance') + shift,
+                        updated_at=timezone.now(),
+                    )
+                    # The UPDATE bypasses StudentBalance signals and auto_now
+                    from core.services import financial_snapshots
+                    financial_snapshots.mark_students(balance_shift)
+            cls.objects.bulk_create(entries)
+
+        return entries
+
+    @staticmethod
+    def _shift_by_student(shifts):
+        """Per-student amount expression for a single set-based UPDATE"""
+        return Case(
+            *[When(student_id=student_id, then=Value(amount)) for student_id, amount in shifts.items()],
+            default=Value(Decimal('0')),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
@@ -0,0 +1,66 @@
+import uuid
+from django.db import models
+from django.utils import timezone
+
+
+class ReportJob(models.Model):
+    """A PDF report rendered in the background by the run_report_worker command
+
+    Views enqueue a job and poll its status; the worker claims pending jobs,
+    renders them and stores the PDF here. A finished job doubles as the cache
+    for identical requests: cache_key hashes the report type, its parameters
+    and the source data's last-modified stamp, so a repeat request is served
+    from the stored PDF until the underlying data changes.
+
+    See core/services/report_jobs.py for the report types.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    report_type = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    source_stamp = models.CharField(max_length=200, help_text="Last-modified stamp of the data the report reads")
+    cache_key = models.CharField(max_length=64, db_index=True, help_text="sha256 of report type, params and source stamp")
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+
+    filename = models.CharField(max_length=200, blank=True)
+    content = models.BinaryField(null=True, blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, help_text="sha256 of the PDF, used as the download ETag")
+    size = models.PositiveIntegerField(default=0)
+
+    requested_by = models.ForeignKey(
+        'Administrator',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='report_jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_downloaded_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.report_type} {self.params} - {self.status}"
+
+    @property
+    def is_finished(self):
+        return self.status in ('DONE', 'FAILED')
+
+    def mark_downloaded(self):
+        ReportJob.objects.filter(pk=self.pk).update(last_downloaded_at=timezone.now())
@@ -0,0 +1,74 @@
+import uuid
+from django.db import models
+
+
+class RolloverJob(models.Model):
+    """An academic year rollover run in the background by the run_report_worker command
+
+    The promotion plan (where every active student goes) is worked out when
+    the job is queued and stored in `plan`. The worker then applies it phase
+    by phase; `phase` and `processed` are saved in the same transaction as
+    each batch of changes, so a job whose worker died resumes where it
+    stopped instead of starting over.
+
+    See core/services/rollover.py.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+    PHASE_CHOICES = [
+        ('YEAR', 'Create academic year and terms'),
+        ('PROMOTE', 'Promote and graduate students'),
+        ('BALANCES', 'Open Term 1 balances'),
+        ('DONE', 'Done'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    from_year = models.IntegerField()
+    to_year = models.IntegerField()
+    plan = models.JSONField(default=dict, blank=True, help_text="Students to move: {'moves': [[student, from class, to class]], 'graduates': [[student, from class]]}")
+    summary = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    phase = models.CharField(max_length=10, choices=PHASE_CHOICES, default='YEAR')
+    processed = models.PositiveIntegerField(default=0, help_text="Items of the current phase already applied")
+    total = models.PositiveIntegerField(default=0, help_text="Items in the current phase")
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+
+    requested_by = models.ForeignKey(
+        'Administrator',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='rollover_jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Rollover {self.from_year} -> {self.to_year} - {self.status} ({self.phase})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('DONE', 'FAILED')
+
+    @property
+    def percent(self):
+        """Progress through the three phases, 0-100"""
+        phases = [code for code, _ in self.PHASE_CHOICES]
+        index = phases.index(self.phase) if self.phase in phases else 0
+        within = self.processed / self.total if self.total else 0
+        return round(min((index + within) / (len(phases) - 1), 1) * 100)
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Case, F, FilteredRelation, OuterRef, Q, Subquery, Value, When
 from django.utils import timezone
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
@@ -6,13 +7,89 @@ from core.models import Class
 from .academic import AcademicTerm
 
 
+class StudentQuerySet(models.QuerySet):
+    def with_financials(self, term=None):
+        """Annotate each student's StudentBalance figures for a term (default: current term)
+
+        Adds, in the same SQL query:
+        fin_term_id, fin_has_balance, fin_term_fee, fin_previous_arrears,
+        fin_amount_paid, fin_total_due, fin_current_balance,
+        fin_payment_status ('green'/'yellow'/'red', None without a balance) and
+        fin_latest_past_balance (current_balance of the latest non-current term).
+
+        overall_balance, payment_status, current_term_balance,
+        previous_term_arrears, total_due and has_arrears read these instead of
+        querying StudentBalance per student.
+        """
+        from .fee import StudentBalance
+
+        if term is None:
+            term = AcademicTerm.get_current_term()
+        if term is None:
+            return self
+
+        latest_past_balance = StudentBalance.objects.filter(
+            student=OuterRef('pk'),
+            term__is_current=False,
+        ).order_by('-term__academic_year', '-term__term').values('current_balance')[:1]
+
+        return self.annotate(
+            fin_balance=FilteredRelation('balances', condition=Q(balances__term=term)),
+        ).annotate(
+            fin_term_id=Value(term.id, output_field=models.IntegerField()),
+            fin_has_balance=Case(
+                When(fin_balance__id__isnull=False, then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField(),
+            ),
+            fin_term_fee=F('fin_balance__term_fee'),
+            fin_previous_arrears=F('fin_balance__previous_arrears'),
+            fin_amount_paid=F('fin_balance__amount_paid'),
+            fin_total_due=F('fin_balance__total_due'),
+            fin_current_balance=F('fin_balance__current_balance'),
+            fin_payment_status=Case(
+                When(fin_balance__current_balance__lte=0, then=Value('green')),
+                When(fin_balance__amount_paid__gt=0, then=Value('yellow')),
+                When(fin_balance__id__isnull=False, then=Value('red')),
+                default=None,
+                output_field=models.CharField(),
+            ),
+            fin_latest_past_balance=Subquery(latest_past_balance),
+        )
+
+    # ?balance= filters of the student list, over with_financials() annotations.
+    # Students without a balance for the term match none of them.
+    BALANCE_STATUS_FILTERS = {
+        'paid': Q(fin_amount_paid__gte=F('fin_total_due')),
+        'partial': Q(fin_amount_paid__gt=0, fin_amount_paid__lt=F('fin_total_due')),
+        'unpaid': Q(fin_amount_paid=0, fin_total_due__gt=0),
+        'arrears': Q(fin_previous_arrears__gt=0),
+    }
+
+    def filter_balance_status(self, status, term=None):
+        """Keep students whose balance for a term is paid, partial, unpaid or in arrears
+
+        Filters in SQL on the with_financials() annotations (added here if
+        missing). Unknown statuses, or no current term, leave the queryset as is.
+        """
+        condition = self.BALANCE_STATUS_FILTERS.get(status)
+        if condition is None:
+            return self
+        queryset = self
+        if 'fin_term_id' not in queryset.query.annotations:
+            queryset = queryset.with_financials(term)
+            if 'fin_term_id' not in queryset.query.annotations:
+                return self
+        return queryset.filter(condition)
+
+
 # Custom manager to exclude deleted students by default
-class ActiveStudentManager(models.Manager):
+class ActiveStudentManager(models.Manager.from_queryset(StudentQuerySet)):
     def get_queryset(self):
         return super().get_queryset().filter(is_deleted=False)
 
 
-class AllStudentsManager(models.Manager):
+class AllStudentsManager(models.Manager.from_queryset(StudentQuerySet)):
     """Manager that includes deleted students for audit purposes"""
     def get_queryset(self):
         return super().get_queryset()
@@ -289,82 +366,32 @@ class Student(models.Model):
         """Get the next class for student progression.
         
         Progression path:
-        ECDA (Age 4-5) → ECDB (Age 5-6, same year) → Grade 1 (next year, random section A-D)
+        ECDA (Age 4-5) → ECDB (Age 5-6, same year) → Grade 1 (next year, least full section)
                                                     → Grade 2 → ... → Grade 7 (final)
         
         Special Handling:
         - ECDA → ECDB: Same academic year, preserve section (A→A, B→B)
-        - ECDB → Grade 1: Next academic year, RANDOM section selection (A, B, C, or D)
-        - Grade 1-6 → Next: Keep same section and year progression
+        - ECDB → Grade 1: Next academic year, the section with the most free places
+        - Grade 1-6 → Next: Next academic year, keep the section (else the first section)
         - Grade 7: No progression (final grade, student graduates)
         
+        The rules live in core/services/promotion.py and are shared with bulk promotion.
+        
         Returns: Class object or None if student is in Grade 7 (final grade)
         """
-        import random
+        from core.services.promotion import (
+            BALANCED_GRADE, NEXT_GRADE, ClassMap, SectionBalancer, is_final_grade, promotion_target, target_year,
+        )
         
-        if not self.current_class:
+        if not self.current_class or is_final_grade(self.current_class.grade):
             return None
         
-        current_grade = self.current_class.grade
-        current_section = self.current_class.section
-        
-        # Define progression map
-        progression_map = {
-            'ECDA': 'ECDB',  # ECDA → ECDB (same year)
-            'ECDB': '1',     # ECDB → Grade 1 (next year, random section)
-            '1': '2',
-            '2': '3',
-            '3': '4',
-            '4': '5',
-            '5': '6',
-            '6': '7',
-            '7': None,  # Grade 7 is final, no progression
-        }
-        
-        next_grade = progression_map.get(str(current_grade))
-        
-        if not next_grade:
-            return None  # No progression for Grade 7
-        
-        # Determine next year
-        # ECDA → ECDB stays in same year; ECDB → Grade 1 goes to next year
-        if current_grade == 'ECDB':
-            next_year = self.current_class.academic_year + 1
-        else:
-            next_year = self.current_class.academic_year
-        
-        # For ECDB → Grade 1 transition: randomly select from available sections
-        if current_grade == 'ECDB' and next_grade == '1':
-            available_classes = Class.objects.filter(
-                grade=next_grade,
-                academic_year=next_year
-            ).order_by('section')
-            
-            if available_classes.exists():
-                # Randomly select one of the available Grade 1 sections
-                next_class = random.choice(list(available_classes))
-                return next_class
-            else:
-                return None
-        
-        # For all other transitions: try to preserve section first, then fall back
-        try:
-            next_class = Class.objects.get(
-                grade=next_grade,
-                section=current_section,
-                academic_year=next_year
-            )
-            return next_class
-        except Class.DoesNotExist:
-            # If same section doesn't exist, try to get any available class of that grade
-            try:
-                next_class = Class.objects.filter(
-                    grade=next_grade,
-                    academic_year=next_year
-                ).first()
-                return next_class
-            except:
-                return None
+        next_year = target_year(self.current_class)
+        classes = ClassMap.load([next_year])
+        if self.current_class.grade == BALANCED_GRADE:
+            sections = classes.sections(NEXT_GRADE[BALANCED_GRADE], next_year)
+            return SectionBalancer(sections).assign([self]).get(self.id)
+        return promotion_target(self.current_class, classes, next_year)
     
     def promote_to_next_class(self, next_year=None):
         """Promote student to the next class.
@@ -404,6 +431,10 @@ class Student(models.Model):
             total=models.Sum('amount')
         )['total'] or 0
 
+    def _has_financials_for(self, term):
+        """True if this instance carries with_financials() annotations for term"""
+        return term is not None and getattr(self, 'fin_term_id', None) == term.id
+
     def get_previous_term_payments(self):
         """Get total payments made for the previous term"""
         previous_term = AcademicTerm.get_previous_term()
@@ -421,13 +452,17 @@ class Student(models.Model):
         if not current_term:
             return 0
         
-        balance = StudentBalance.objects.filter(
-            student=self,
-            term=current_term
-        ).first()
-        
-        if balance:
-            return balance.previous_arrears
+        if self._has_financials_for(current_term):
+            if self.fin_has_balance:
+                return self.fin_previous_arrears
+        else:
+            balance = StudentBalance.objects.filter(
+                student=self,
+                term=current_term
+            ).first()
+            
+            if balance:
+                return balance.previous_arrears
         
         # Fallback to old calculation if no StudentBalance exists
         previous_payments = self.get_previous_term_payments()
@@ -441,13 +476,17 @@ class Student(models.Model):
         if not current_term:
             return 0
         
-        balance = StudentBalance.objects.filter(
-            student=self,
-            term=current_term
-        ).first()
-        
-        if balance:
-            return balance.current_balance
+        if self._has_financials_for(current_term):
+            if self.fin_has_balance:
+                return self.fin_current_balance
+        else:
+            balance = StudentBalance.objects.filter(
+                student=self,
+                term=current_term
+            ).first()
+            
+            if balance:
+                return balance.current_balance
         
         # Fallback to old calculation if no StudentBalance exists
         current_payments = self.get_current_term_payments()
@@ -479,22 +518,28 @@ class Student(models.Model):
         # Try to get current term first
         current_term = AcademicTerm.get_current_term()
         if current_term:
-            # Check prefetched data first if available
-            if hasattr(self, '_prefetched_objects_cache') and 'balances' in self._prefetched_objects_cache:
-                current_balance = next(
-                    (b for b in self.balances.all() if b.term_id == current_term.id),
-                    None
-                )
+            # Use with_financials() annotations, then prefetched data, if available
+            if self._has_financials_for(current_term):
+                if self.fin_has_balance:
+                    result = float(self.fin_current_balance)
+                    self._overall_balance_cache = result
+                    return result
             else:
-                current_balance = StudentBalance.objects.filter(
-                    student=self,
-                    term=current_term
-                ).first()
-            
-            if current_balance:
-                result = float(current_balance.current_balance)
-                self._overall_balance_cache = result
-                return result
+                if hasattr(self, '_prefetched_objects_cache') and 'balances' in self._prefetched_objects_cache:
+                    current_balance = next(
+                        (b for b in self.balances.all() if b.term_id == current_term.id),
+                        None
+                    )
+                else:
+                    current_balance = StudentBalance.objects.filter(
+                        student=self,
+                        term=current_term
+                    ).first()
+                
+                if current_balance:
+                    result = float(current_balance.current_balance)
+                    self._overall_balance_cache = result
+                    return result
             
             # No StudentBalance yet, but check if student is active and current term has a fee
             if self.is_active:
@@ -507,6 +552,11 @@ class Student(models.Model):
                     pass
         
         # If no current term balance, get the most recent term balance from past terms
+        if self._has_financials_for(current_term):
+            if self.fin_latest_past_balance is not None:
+                return float(self.fin_latest_past_balance)
+            return 0
+        
         latest_balance = StudentBalance.objects.filter(
             student=self,
             term__is_current=False  # Only past terms
@@ -528,6 +578,9 @@ class Student(models.Model):
         if not current_term:
             return 0
         
+        if self._has_financials_for(current_term):
+            return float(self.fin_total_due) if self.fin_has_balance else 0
+        
         # Get current term balance
         balance = StudentBalance.objects.filter(
             student=self,
@@ -548,10 +601,15 @@ class Student(models.Model):
         if not current_term:
             return 'green'
         
-        balance = StudentBalance.objects.filter(
-            student=self,
-            term=current_term
-        ).first()
+        if self._has_financials_for(current_term):
+            if self.fin_has_balance:
+                return self.fin_payment_status
+            balance = None
+        else:
+            balance = StudentBalance.objects.filter(
+                student=self,
+                term=current_term
+            ).first()
         
         if balance:
             if balance.current_balance <= 0:
@@ -3,6 +3,12 @@ Student Term History Model
 
 Tracks which students were in which classes during which terms.
 Essential for determining ZIMSEC entry eligibility and historical records.
+
+Rows are snapshots taken when a term is completed (see
+core/services/term_history.py): the class, status and balance each student
+had at the end of the term. They are only ever added, never rewritten, so
+"who was in Grade 5B in Term 2 of 2026 and what did they owe" is a lookup
+here rather than a reconstruction from StudentMovement.
 """
 
 from django.db import models
@@ -78,6 +84,23 @@ class StudentTermHistory(models.Model):
         help_text="For Grade 7 Term 3: Did student sit ZIMSEC exams?"
     )
     
+    # Snapshot at term close
+    status = models.CharField(
+        max_length=10,
+        choices=Student.STATUS_CHOICES,
+        blank=True,
+        help_text="The student's status when the term was completed"
+    )
+    term_fee = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    amount_paid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    balance = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Balance for the term when it was completed (positive=owe, negative=credit)"
+    )
+    
     # Tracking
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -91,6 +114,7 @@ class StudentTermHistory(models.Model):
             models.Index(fields=['academic_year', 'academic_term']),
             models.Index(fields=['student', 'academic_year']),
             models.Index(fields=['class_enrolled', 'academic_year']),
+            models.Index(fields=['academic_term', 'class_enrolled']),
         ]
     
     def __str__(self):
@@ -124,16 +148,30 @@ class StudentTermHistory(models.Model):
         query = cls.objects.filter(
             academic_year=academic_year,
             academic_term=term3,
-            class_enrolled__grade=7,
+            class_enrolled__grade='7',
             attendance_status__in=['PRESENT', 'ABSENT'],  # They took exam or were expected
             student__is_deleted=False
-        ).select_related('student', 'class_enrolled')
+        )
         
         if grade7_class:
             query = query.filter(class_enrolled=grade7_class)
         
-        # Return distinct students (not the history records)
-        return query.values_list('student_id', flat=True).distinct()
+        if cls.objects.filter(academic_term=term3).exists():
+            # Return distinct students (not the history records)
+            return query.values_list('student_id', flat=True).distinct()
+        
+        # Term 3 not completed yet (no snapshot): the Grade 7 students billed for it
+        from core.models.fee import StudentBalance
+        
+        balances = StudentBalance.objects.filter(
+            term=term3,
+            student__is_deleted=False,
+            student__current_class__grade='7',
+            student__current_class__academic_year=academic_year,
+        )
+        if grade7_class:
+            balances = balances.filter(student__current_class=grade7_class)
+        return balances.values_list('student_id', flat=True)
     
     @classmethod
     def mark_term3_attendance(cls, students, academic_year, class_obj, attendance_status='PRESENT'):
@@ -2,7 +2,8 @@
 ZIMSEC Grade 7 Examination Management Models
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from decimal import Decimal
@@ -92,23 +93,27 @@ class ZimsecResults(models.Model):
     def __str__(self):
         return f"{self.student} - {self.academic_year} (Aggregate: {self.total_aggregate})"
     
+    UNIT_FIELDS = [
+        'english_units', 'mathematics_units', 'science_units',
+        'social_studies_units', 'indigenous_language_units', 'agriculture_units',
+    ]
+    
+    @classmethod
+    def outcome(cls, units):
+        """(total_aggregate, overall_status) for the six unit values, None for both until all are entered"""
+        units = [u for u in units if u is not None]
+        if len(units) != len(cls.UNIT_FIELDS):
+            return None, None
+        # A pass needs every subject at 1-5 units
+        return sum(units), 'PASS' if all(u <= 5 for u in units) else 'FAIL'
+    
+    def calculate_outcome(self):
+        self.total_aggregate, self.overall_status = self.outcome(
+            getattr(self, field, None) for field in self.UNIT_FIELDS
+        )
+    
     def save(self, *args, **kwargs):
-        # Calculate aggregate
-        units = []
-        for field in ['english_units', 'mathematics_units', 'science_units', 
-                      'social_studies_units', 'indigenous_language_units', 'agriculture_units']:
-            value = getattr(self, field, None)
-            if value is not None:
-                units.append(value)
-        
-        if len(units) == 6:  # All subjects entered
-            self.total_aggregate = sum(units)
-            # Check if all subjects are passes (1-5 units)
-            self.overall_status = 'PASS' if all(u <= 5 for u in units) else 'FAIL'
-        else:
-            self.total_aggregate = None
-            self.overall_status = None
-        
+        self.calculate_outcome()
         super().save(*args, **kwargs)
     
     @property
@@ -247,3 +252,152 @@ class Grade7Statistics(models.Model):
         
         stats.save()
         return stats
+
+
+class ZimsecYearStats(models.Model):
+    """Per-year rollup of ZimsecResults for the statistics dashboards
+
+    One row per (academic year, class, gender, subject) where class is the
+    candidate's current class (empty for students without one) and subject is
+    a unit field of ZimsecResults or 'total_aggregate'. Each row holds the
+    count, sum, sum of squares and a histogram of the values, so means,
+    variances, pass rates and percentiles of any combination of classes and
+    genders come from a few dozen rows instead of every result.
+
+    candidates counts every result of the bucket (also those without a value
+    for the subject). passed and distinctions are per subject (units 1-5 and
+    unit 1); on the total_aggregate row they are overall passes and
+    candidates with 1-2 units in all six subjects.
+
+    Rows are rebuilt from ZimsecResults, never edited by hand: see
+    core/services/zimsec_stats.py for the incremental refresh and the
+    rebuild_zimsec_stats command for a full rebuild.
+    """
+    SUBJECTS = [
+        ('english_units', 'English'),
+        ('mathematics_units', 'Mathematics'),
+        ('science_units', 'Science'),
+        ('social_studies_units', 'Social Studies'),
+        ('indigenous_language_units', 'Indigenous Language'),
+        ('agriculture_units', 'Agriculture'),
+    ]
+    AGGREGATE = 'total_aggregate'
+    SUBJECT_CHOICES = SUBJECTS + [(AGGREGATE, 'Aggregate')]
+
+    academic_year = models.IntegerField()
+    student_class = models.ForeignKey(
+        'Class',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='zimsec_year_stats'
+    )
+    gender = models.CharField(max_length=1, blank=True)
+    subject = models.CharField(max_length=30, choices=SUBJECT_CHOICES)
+
+    candidates = models.PositiveIntegerField(default=0)
+    count = models.PositiveIntegerField(default=0, help_text="Results with a value for the subject")
+    total = models.PositiveIntegerField(default=0)
+    total_squares = models.PositiveIntegerField(default=0)
+    passed = models.PositiveIntegerField(default=0)
+    distinctions = models.PositiveIntegerField(default=0)
+    histogram = models.JSONField(default=dict, help_text="{value: number of results}")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-academic_year', 'student_class', 'gender', 'subject']
+        indexes = [
+            models.Index(fields=['academic_year', 'student_class']),
+        ]
+        verbose_name = 'ZIMSEC Year Statistics'
+        verbose_name_plural = 'ZIMSEC Year Statistics'
+
+    def __str__(self):
+        return f"{self.academic_year} {self.student_class or 'No class'} {self.gender} {self.subject}: {self.count}"
+
+    @classmethod
+    def refresh(cls, years=(), buckets=None):
+        """Rebuild rows from ZimsecResults with one grouped query per subject
+
+        Args:
+            years: Academic years whose rows are all rebuilt
+            buckets: {year: set of class ids (None for no class)} to rebuild
+                individually, for years not in years
+
+        Returns:
+            int: Number of rows written
+        """
+        years = set(years)
+        buckets = {y: classes for y, classes in (buckets or {}).items() if y not in years and classes}
+        if not years and not buckets:
+            return 0
+
+        scope = Q(academic_year__in=years) if years else Q()
+        stale = Q(academic_year__in=years) if years else Q()
+        for year, class_ids in buckets.items():
+            bucket = Q(academic_year=year) & cls._class_condition('student__current_class_id', class_ids)
+            scope = scope | bucket if scope else bucket
+            bucket = Q(academic_year=year) & cls._class_condition('student_class_id', class_ids)
+            stale = stale | bucket if stale else bucket
+
+        results = ZimsecResults.objects.filter(scope).order_by()
+        group = ('academic_year', 'student__current_class_id', 'student__sex')
+        distinction = Q(**{f'{field}__lte': 2 for field, _ in cls.SUBJECTS})
+        candidates = {
+            (row['academic_year'], row['student__current_class_id'], row['student__sex'] or ''): row
+            for row in results.values(*group).annotate(
+                candidates=models.Count('id'),
+                passed=models.Count('id', filter=Q(overall_status='PASS')),
+                distinctions=models.Count('id', filter=distinction),
+            )
+        }
+
+        # Every bucket gets a total_aggregate row, so candidates without any
+        # units entered yet are still counted
+        stats = {
+            key + (cls.AGGREGATE,): cls(
+                academic_year=key[0], student_class_id=key[1], gender=key[2], subject=cls.AGGREGATE,
+                candidates=bucket['candidates'], passed=bucket['passed'], distinctions=bucket['distinctions'],
+                histogram={},
+            )
+            for key, bucket in candidates.items()
+        }
+        for subject, _ in cls.SUBJECT_CHOICES:
+            for row in results.filter(**{f'{subject}__isnull': False}).values(*group, subject).annotate(n=models.Count('id')):
+                key = (row['academic_year'], row['student__current_class_id'], row['student__sex'] or '')
+                value, n = row[subject], row['n']
+                stat = stats.get(key + (subject,))
+                if stat is None:
+                    stat = stats[key + (subject,)] = cls(
+                        academic_year=key[0], student_class_id=key[1], gender=key[2], subject=subject,
+                        candidates=candidates[key]['candidates'], histogram={},
+                    )
+                stat.count += n
+                stat.total += value * n
+                stat.total_squares += value * value * n
+                stat.histogram[str(value)] = n
+                if subject != cls.AGGREGATE:
+                    stat.passed += n if value <= 5 else 0
+                    stat.distinctions += n if value == 1 else 0
+
+        with transaction.atomic():
+            cls.objects.filter(stale).delete()
+            cls.objects.bulk_create(stats.values())
+        return len(stats)
+
+    @staticmethod
+    def _class_condition(field, class_ids):
+        condition = Q(**{f'{field}__in': [c for c in class_ids if c is not None]})
+        if None in class_ids:
+            condition |= Q(**{f'{field}__isnull': True})
+        return condition
+
+    @classmethod
+    def rebuild(cls, years=None):
+        """Rebuild all rows (or those of the given years)"""
+        if years is None:
+            with transaction.atomic():
+                cls.objects.all().delete()
+                return cls.refresh(ZimsecResults.objects.values_list('academic_year', flat=True).distinct())
+        return cls.refresh(years)
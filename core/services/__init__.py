@@ -2,6 +2,6 @@
 Core business logic services for the school management system
 """
 
-from .payment_allocation import PaymentAllocationService
+from .payment_allocation import PaymentAllocationService, BatchPaymentAllocationService
 
-__all__ = ['PaymentAllocationService']
+__all__ = ['PaymentAllocationService', 'BatchPaymentAllocationService']
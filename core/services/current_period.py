@@ -0,0 +1,106 @@
+"""
+Current Period Resolver
+
+Caches the current AcademicTerm and AcademicYear, which are looked up from
+model properties, signals and almost every view (often several times per
+student row in a template).
+
+Two layers:
+1. Request memo - within a request (see CurrentPeriodMiddleware) every lookup
+   after the first returns the same instance without touching the cache
+2. Process cache - Django's cache (locmem by default, so per worker process)
+   holds the resolved term/year between requests for CACHE_TIMEOUT seconds
+
+Signals in core/signals.py call invalidate() whenever an AcademicTerm or
+AcademicYear is saved or deleted. With locmem each worker only sees its own
+invalidations, so other workers may serve the previous term for up to
+CACHE_TIMEOUT seconds after a switch; a shared cache backend removes that lag.
+"""
+from contextvars import ContextVar
+from django.core.cache import cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_TIMEOUT = 60
+CACHE_KEYS = {
+    'term': 'current_period:term',
+    'year': 'current_period:year',
+}
+
+# Distinguishes a cached "no current term" from a cache miss
+_NONE = '__none__'
+
+_request_memo = ContextVar('current_period_memo', default=None)
+
+_stats = {
+    'request_hits': 0,
+    'cache_hits': 0,
+    'misses': 0,
+    'invalidations': 0,
+}
+
+
+def get_current_term():
+    """Current AcademicTerm (or the latest term if none is marked current)"""
+    from core.models.academic import AcademicTerm
+    return _resolve('term', AcademicTerm.lookup_current_term)
+
+
+def get_current_year():
+    """Active AcademicYear (or the latest year if none is active)"""
+    from core.models.academic_year import AcademicYear
+    return _resolve('year', AcademicYear.lookup_current_year)
+
+
+def _resolve(kind, lookup):
+    memo = _request_memo.get()
+    if memo is not None and kind in memo:
+        _stats['request_hits'] += 1
+        return memo[kind]
+
+    value = cache.get(CACHE_KEYS[kind])
+    if value is not None:
+        _stats['cache_hits'] += 1
+    else:
+        _stats['misses'] += 1
+        value = lookup()
+        cache.set(CACHE_KEYS[kind], value if value is not None else _NONE, CACHE_TIMEOUT)
+
+    if value == _NONE:
+        value = None
+    if memo is not None:
+        memo[kind] = value
+    return value
+
+
+def invalidate():
+    """Drop the cached term/year (process cache and the current request memo)"""
+    _stats['invalidations'] += 1
+    cache.delete_many(list(CACHE_KEYS.values()))
+    memo = _request_memo.get()
+    if memo is not None:
+        memo.clear()
+
+
+def start_request():
+    """Open a request memo; returns a token for end_request()"""
+    return _request_memo.set({})
+
+
+def end_request(token):
+    _request_memo.reset(token)
+
+
+def get_stats():
+    """Hit/miss counters for this process; misses are the only lookups that query the database"""
+    stats = dict(_stats)
+    lookups = stats['request_hits'] + stats['cache_hits'] + stats['misses']
+    stats['queries_saved'] = stats['request_hits'] + stats['cache_hits']
+    stats['hit_rate'] = round(stats['queries_saved'] / lookups * 100, 1) if lookups else 0.0
+    return stats
+
+
+def reset_stats():
+    for key in _stats:
+        _stats[key] = 0
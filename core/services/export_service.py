@@ -11,14 +11,6 @@ import base64
 
 from django.template.loader import render_to_string
 from django.utils import timezone
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.shapes import MSO_SHAPE
-from pptx.dml.color import RGBColor as PowerPointRGBColor
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-import pandas as pd
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
 from reportlab.lib.colors import Color
@@ -28,6 +20,21 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 
 from core.models import ZimsecResults, Student, Class
+from core.utils import report_theme
+from core.utils.lazy_imports import lazy
+
+# python-pptx and openpyxl are imported by the first PowerPoint or Excel
+# export, so the statistics and PDF exports do not load them
+Presentation = lazy('pptx', 'Presentation')
+Inches = lazy('pptx.util', 'Inches')
+Pt = lazy('pptx.util', 'Pt')
+MSO_SHAPE = lazy('pptx.enum.shapes', 'MSO_SHAPE')
+PowerPointRGBColor = lazy('pptx.dml.color', 'RGBColor')
+Workbook = lazy('openpyxl', 'Workbook')
+Font = lazy('openpyxl.styles', 'Font')
+PatternFill = lazy('openpyxl.styles', 'PatternFill')
+Alignment = lazy('openpyxl.styles', 'Alignment')
+get_column_letter = lazy('openpyxl.utils', 'get_column_letter')
 
 
 class PowerPointExporter:
@@ -468,7 +475,6 @@ class PDFExporter:
     def __init__(self, title="ZIMSEC Examination Report", school_name="School Name"):
         self.title = title
         self.school_name = school_name
-        self.styles = getSampleStyleSheet()
         
         # Premium colors (normalized to 0-1 range)
         self.primary_color = Color(15/255, 23/255, 42/255)        # Slate-900
@@ -485,14 +491,14 @@ class PDFExporter:
         self.rgb_bg_lighter = Color(241/255, 245/255, 249/255)    # Slate-50 (#F1F5F9)
         self.rgb_text_dark = Color(30/255, 41/255, 59/255)        # Slate-800 (#1E293B)
         
-        self._add_custom_styles()
+        self.styles = report_theme.stylesheet('zimsec_report', self._add_custom_styles)
         
-    def _add_custom_styles(self):
-        """Add premium custom paragraph styles"""
+    def _add_custom_styles(self, styles):
+        """Add premium custom paragraph styles (once per process, see report_theme)"""
         # Title style
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='PremiumTitle',
-            parent=self.styles['Heading1'],
+            parent=styles['Heading1'],
             fontSize=28,
             textColor=self.secondary_color,
             spaceAfter=24,
@@ -501,9 +507,9 @@ class PDFExporter:
         ))
         
         # Subtitle style
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='PremiumSubtitle',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontSize=14,
             textColor=self.text_dark,
             spaceAfter=8,
@@ -511,9 +517,9 @@ class PDFExporter:
         ))
         
         # Section heading style
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='PremiumHeading',
-            parent=self.styles['Heading2'],
+            parent=styles['Heading2'],
             fontSize=16,
             textColor=self.secondary_color,
             spaceAfter=14,
@@ -522,9 +528,9 @@ class PDFExporter:
         ))
         
         # Finding style
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='Finding',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontSize=11,
             leftIndent=20,
             spaceAfter=8,
@@ -660,7 +666,7 @@ class PDFExporter:
         ]
         
         table = Table(metrics_data, colWidths=[2.0 * inch, 1.6 * inch, 1.9 * inch])
-        table.setStyle(TableStyle([
+        table.setStyle(report_theme.table_style('zimsec_report.metrics', lambda: [
             # Header styling
             ('BACKGROUND', (0, 0), (-1, 0), self.rgb_secondary),
             ('TEXTCOLOR', (0, 0), (-1, 0), Color(0.96, 0.96, 0.96)),
@@ -881,7 +887,7 @@ class PDFExporter:
         ]
         
         table = Table(metrics_data, colWidths=[2.0 * inch, 1.6 * inch, 1.9 * inch])
-        table.setStyle(TableStyle([
+        table.setStyle(report_theme.table_style('zimsec_report.metrics', lambda: [
             # Header styling
             ('BACKGROUND', (0, 0), (-1, 0), self.rgb_secondary),
             ('TEXTCOLOR', (0, 0), (-1, 0), Color(0.96, 0.96, 0.96)),
@@ -999,12 +1005,14 @@ class DetailedResultsPDFExporter:
         self.text_muted = Color(100/255, 116/255, 139/255)  # Muted text
         
         # Paragraph styles
-        self.styles = getSampleStyleSheet()
-        
+        self.styles = report_theme.stylesheet('zimsec_detailed_results', self._add_custom_styles)
+    
+    def _add_custom_styles(self, styles):
+        """Report paragraph styles (once per process, see report_theme)"""
         # Main report title
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='ReportTitle',
-            parent=self.styles['Heading1'],
+            parent=styles['Heading1'],
             fontSize=32,
             textColor=self.primary_dark,
             spaceAfter=4,
@@ -1014,9 +1022,9 @@ class DetailedResultsPDFExporter:
         ))
         
         # School name
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='SchoolName',
-            parent=self.styles['Heading2'],
+            parent=styles['Heading2'],
             fontSize=13,
             textColor=self.primary_blue,
             spaceAfter=2,
@@ -1025,9 +1033,9 @@ class DetailedResultsPDFExporter:
         ))
         
         # Section heading with background
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='SectionHeading',
-            parent=self.styles['Heading2'],
+            parent=styles['Heading2'],
             fontSize=12,
             textColor=self.white,
             spaceAfter=0,
@@ -1036,9 +1044,9 @@ class DetailedResultsPDFExporter:
         ))
         
         # Subsection heading
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='SubsectionHeading',
-            parent=self.styles['Heading3'],
+            parent=styles['Heading3'],
             fontSize=11,
             textColor=self.primary_blue,
             spaceAfter=6,
@@ -1050,9 +1058,9 @@ class DetailedResultsPDFExporter:
         ))
         
         # Class heading
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='ClassHeading',
-            parent=self.styles['Heading3'],
+            parent=styles['Heading3'],
             fontSize=10.5,
             textColor=self.primary_dark,
             spaceAfter=4,
@@ -1066,7 +1074,7 @@ class DetailedResultsPDFExporter:
         header_text = f"{icon} {title}" if icon else title
         header_data = [[header_text]]
         header_table = Table(header_data, colWidths=[7.2*inch])
-        header_table.setStyle(TableStyle([
+        header_table.setStyle(report_theme.table_style('zimsec_detailed_results.section_header', lambda: [
             ('BACKGROUND', (0, 0), (-1, -1), self.primary_blue),
             ('TEXTCOLOR', (0, 0), (-1, -1), self.white),
             ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
@@ -1085,7 +1093,7 @@ class DetailedResultsPDFExporter:
         from reportlab.platypus import Table, TableStyle
         
         table = Table(data, colWidths=colWidths)
-        table.setStyle(TableStyle([
+        table.setStyle(report_theme.table_style('zimsec_detailed_results.metrics', lambda: [
             # Header styling
             ('BACKGROUND', (0, 0), (-1, 0), self.primary_blue),
             ('TEXTCOLOR', (0, 0), (-1, 0), self.white),
@@ -1641,7 +1649,7 @@ class DetailedResultsPDFExporter:
             
             # Create table with proper styling
             table = Table(table_data, colWidths=[2.0*inch, 0.55*inch, 0.55*inch, 0.6*inch, 0.6*inch, 0.65*inch, 0.6*inch, 0.7*inch, 0.65*inch])
-            table.setStyle(TableStyle([
+            table.setStyle(report_theme.table_style('zimsec_detailed_results.class_results', lambda: [
                 # Header
                 ('BACKGROUND', (0, 0), (-1, 0), self.primary_blue),
                 ('TEXTCOLOR', (0, 0), (-1, 0), self.white),
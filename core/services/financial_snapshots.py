@@ -0,0 +1,81 @@
+"""
+Financial Snapshot Refresh
+
+Keeps TermFinancialSnapshot rows in step with StudentBalance. Writers only
+mark what changed; the affected (term, class) rows are rebuilt once when the
+surrounding transaction commits, so a payment, or a whole batch of balance
+writes, costs a single grouped aggregate on commit.
+
+Marks:
+- mark_balance(term_id, student_id) - one balance changed (payments, edits)
+- mark_students(student_ids) - every term of these students (class moves,
+  arrears cascades); rebuilt per term because the old class is not known
+- mark_terms(term_ids) - whole terms (bulk activation)
+
+Marks are per thread and survive a rolled-back transaction; they are then
+refreshed with the next commit, which is harmless.
+"""
+import threading
+from django.db import transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+_pending = threading.local()
+
+
+def _state():
+    if not hasattr(_pending, 'balances'):
+        _pending.balances = set()
+        _pending.students = set()
+        _pending.terms = set()
+    return _pending
+
+
+def mark_balance(term_id, student_id):
+    _state().balances.add((term_id, student_id))
+    transaction.on_commit(flush)
+
+
+def mark_students(student_ids):
+    _state().students.update(student_ids)
+    transaction.on_commit(flush)
+
+
+def mark_terms(term_ids):
+    _state().terms.update(term_ids)
+    transaction.on_commit(flush)
+
+
+def flush():
+    """Rebuild the snapshot rows for everything marked so far"""
+    from core.models.fee import StudentBalance
+    from core.models.student import Student
+    from core.models.financial_snapshot import TermFinancialSnapshot
+
+    state = _state()
+    if not (state.balances or state.students or state.terms):
+        return 0
+
+    balances, students, terms = state.balances, state.students, state.terms
+    state.balances, state.students, state.terms = set(), set(), set()
+
+    term_ids = set(terms)
+    if students:
+        term_ids.update(
+            StudentBalance.objects.filter(student_id__in=students).values_list('term_id', flat=True).distinct()
+        )
+
+    buckets = {}
+    if balances:
+        classes = dict(
+            Student.all_students.filter(id__in={s for _, s in balances}).values_list('id', 'current_class_id')
+        )
+        for term_id, student_id in balances:
+            buckets.setdefault(term_id, set()).add(classes.get(student_id))
+
+    try:
+        return TermFinancialSnapshot.refresh(term_ids, buckets)
+    except Exception as e:
+        logger.error(f"Error refreshing financial snapshots: {e}")
+        return 0
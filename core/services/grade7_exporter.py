@@ -14,6 +14,7 @@ from reportlab.platypus import (
     HRFlowable
 )
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
+from core.utils import report_theme
 
 
 class Grade7CompletionPDFExporter:
@@ -40,8 +41,7 @@ class Grade7CompletionPDFExporter:
         self.border_light = Color(226/255, 232/255, 240/255)
         
         # Setup styles
-        self.styles = getSampleStyleSheet()
-        self._setup_styles()
+        self.styles = report_theme.stylesheet('grade7_completion', self._setup_styles)
         
         # Subject list
         self.subjects = [
@@ -53,11 +53,11 @@ class Grade7CompletionPDFExporter:
             'Agriculture'
         ]
     
-    def _setup_styles(self):
-        """Setup professional paragraph styles"""
-        self.styles.add(ParagraphStyle(
+    def _setup_styles(self, styles):
+        """Setup professional paragraph styles (once per process, see report_theme)"""
+        styles.add(ParagraphStyle(
             name='Grade7CoverTitle',
-            parent=self.styles['Heading1'],
+            parent=styles['Heading1'],
             fontSize=42,
             textColor=self.navy_blue,
             spaceAfter=12,
@@ -66,9 +66,9 @@ class Grade7CompletionPDFExporter:
             leading=48
         ))
         
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='Grade7CoverSubtitle',
-            parent=self.styles['Heading2'],
+            parent=styles['Heading2'],
             fontSize=16,
             textColor=self.emerald_green,
             spaceAfter=8,
@@ -76,9 +76,9 @@ class Grade7CompletionPDFExporter:
             fontName='Helvetica'
         ))
         
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='Grade7SectionHeader',
-            parent=self.styles['Heading2'],
+            parent=styles['Heading2'],
             fontSize=20,
             textColor=self.white,
             spaceAfter=0,
@@ -86,9 +86,9 @@ class Grade7CompletionPDFExporter:
             leading=24
         ))
         
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='Grade7SubsectionHeader',
-            parent=self.styles['Heading3'],
+            parent=styles['Heading3'],
             fontSize=15,
             textColor=self.navy_blue,
             spaceAfter=10,
@@ -96,9 +96,9 @@ class Grade7CompletionPDFExporter:
             leading=18
         ))
         
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='Grade7BodyText',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontSize=11,
             textColor=self.text_dark,
             alignment=TA_JUSTIFY,
@@ -106,9 +106,9 @@ class Grade7CompletionPDFExporter:
             leading=14
         ))
         
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='Grade7HighlightText',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontSize=11,
             textColor=self.emerald_green,
             spaceAfter=6,
@@ -121,7 +121,7 @@ class Grade7CompletionPDFExporter:
             [[Paragraph(title, self.styles['Grade7SectionHeader'])]], 
             colWidths=[7.2*inch]
         )
-        header_table.setStyle(TableStyle([
+        header_table.setStyle(report_theme.table_style('grade7_completion.section_header', lambda: [
             ('BACKGROUND', (0, 0), (-1, 0), self.navy_blue),
             ('ALIGN', (0, 0), (-1, 0), 'LEFT'),
             ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
@@ -406,7 +406,7 @@ class Grade7CompletionPDFExporter:
         table = Table(data, colWidths=[2.2*inch, 0.7*inch, 0.7*inch, 0.7*inch, 0.8*inch, 0.7*inch, 0.7*inch, 0.8*inch, 0.6*inch])
         
         # Style table - all left aligned
-        table.setStyle(TableStyle([
+        table.setStyle(report_theme.table_style('grade7_completion.student_results', lambda: [
             ('BACKGROUND', (0, 0), (-1, 0), self.navy_blue),
             ('TEXTCOLOR', (0, 0), (-1, 0), self.white),
             ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
@@ -473,7 +473,7 @@ class Grade7CompletionPDFExporter:
         ]
         
         summary_table = Table(summary_data, colWidths=[3.2*inch, 2.2*inch])
-        summary_table.setStyle(TableStyle([
+        summary_table.setStyle(report_theme.table_style('grade7_completion.summary', lambda: [
             ('BACKGROUND', (0, 0), (0, -1), self.bg_light),
             ('TEXTCOLOR', (0, 0), (-1, -1), self.text_dark),
             ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
@@ -527,7 +527,7 @@ class Grade7CompletionPDFExporter:
             ])
         
         subject_table = Table(subject_data, colWidths=[2.2*inch, 1.2*inch, 1.2*inch, 1.2*inch])
-        subject_table.setStyle(TableStyle([
+        subject_table.setStyle(report_theme.table_style('grade7_completion.subjects', lambda: [
             ('BACKGROUND', (0, 0), (-1, 0), self.navy_blue),
             ('TEXTCOLOR', (0, 0), (-1, 0), self.white),
             ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
@@ -571,7 +571,7 @@ class Grade7CompletionPDFExporter:
             ])
         
         class_table = Table(class_data, colWidths=[1.8*inch, 1.5*inch, 1.5*inch, 1.5*inch, 1.2*inch])
-        class_table.setStyle(TableStyle([
+        class_table.setStyle(report_theme.table_style('grade7_completion.classes', lambda: [
             ('BACKGROUND', (0, 0), (-1, 0), self.navy_blue),
             ('TEXTCOLOR', (0, 0), (-1, 0), self.white),
             ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
@@ -617,7 +617,7 @@ class Grade7CompletionPDFExporter:
         ]
         
         achievement_table = Table(achievement_data, colWidths=[2.5*inch, 1.2*inch, 1.2*inch, 2*inch])
-        achievement_table.setStyle(TableStyle([
+        achievement_table.setStyle(report_theme.table_style('grade7_completion.achievements', lambda: [
             ('BACKGROUND', (0, 0), (-1, 0), self.navy_blue),
             ('TEXTCOLOR', (0, 0), (-1, 0), self.white),
             ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
@@ -7,12 +7,18 @@ This service implements the allocation algorithm:
 2. Apply payment to arrears first (if any)
 3. Apply remaining payment to term fees (oldest first)
 4. Create credit for any excess payment
+
+BatchPaymentAllocationService runs the same algorithm for many payments at
+once (e.g. a bank statement): balances and credits of every student involved
+are loaded up front, allocation happens in memory and all allocations, logs
+and credits are written with bulk statements in one transaction.
+PaymentAllocationService is the single-payment entry point to it.
 """
 
 from decimal import Decimal
-from django.db.models import Sum, Q
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
-from django.core.exceptions import ValidationError
 from core.models import (
     Payment, StudentBalance, AcademicTerm, PaymentAllocation, 
     PaymentAllocationLog, StudentCredit
@@ -36,194 +42,215 @@ class PaymentAllocationService:
         self.allocations = []
         self.allocation_log = []
     
-    def allocate(self):
+    def allocate(self, dry_run=False):
         """
         Execute the payment allocation algorithm.
         
         Process:
-        1. Get all unpaid/partially paid terms (oldest first)
-        2. Apply payment to arrears first
-        3. Apply payment to current term fees
-        4. Create credit for excess
+        1. Apply existing credits
+        2. Apply payment to unpaid terms (oldest first)
+        3. Create credit for excess
+        
+        Args:
+            dry_run: If True, return the plan without writing anything
         
         Returns:
             dict with allocation results
         """
-        # Step 1: Apply existing credits first (if any)
-        self._apply_existing_credits()
-        
-        # Step 2: Get terms that need payment (oldest first)
-        terms_to_pay = self._get_terms_needing_payment()
-        
-        # Step 3: Allocate to each term
-        priority_order = 1
-        for balance in terms_to_pay:
-            if self.remaining_amount <= 0:
-                break
-            
-            priority_order = self._allocate_to_term(balance, priority_order)
-        
-        # Step 4: Handle any remaining amount as credit
-        if self.remaining_amount > 0:
-            self._create_credit(self.remaining_amount)
-        
-        # Step 5: Save all allocations to database
-        self._save_allocations()
-        
-        return {
-            'payment_id': self.payment.id,
-            'total_allocated': self.payment_amount - self.remaining_amount,
-            'credit_created': self.remaining_amount if self.remaining_amount > 0 else Decimal('0'),
-            'allocations': self.allocations,
-            'log': self.allocation_log
-        }
-    
-    def _apply_existing_credits(self):
-        """Apply existing student credits to oldest unpaid terms"""
-        # Get all available credits for this student (oldest first)
-        available_credits = StudentCredit.objects.filter(
-            student=self.student,
-            applied_amount__lt=models.F('amount')
-        ).order_by('created_at')
-        
-        for credit in available_credits:
-            if self.remaining_amount <= 0:
-                break
-            
-            credit_available = credit.available_amount
-            amount_to_use = min(self.remaining_amount, credit_available)
-            
-            # Apply credit
-            credit.apply_credit(amount_to_use)
-            self.remaining_amount -= amount_to_use
-            
-            self.allocation_log.append(
-                f"Applied existing credit of ${amount_to_use:.2f} (Credit ID: {credit.id})"
-            )
+        result = BatchPaymentAllocationService([self.payment], dry_run=dry_run).allocate()[0]
+        self.remaining_amount = result['credit_created']
+        self.allocations = result['allocations']
+        self.allocation_log = result['log']
+        return result
+
+
+class BatchPaymentAllocationService:
+    """Allocate many payments together with a fixed number of queries"""
     
-    def _get_terms_needing_payment(self):
+    def __init__(self, payments, dry_run=False, batch_size=500):
         """
-        Get all terms that need payment, sorted by date (oldest first).
-        
-        Includes:
-        - Current academic year terms
-        - Previous academic years (for arrears)
-        
-        Returns:
-            List of StudentBalance objects ordered by term date
+        Args:
+            payments: Saved Payment objects, allocated in the given order
+            dry_run: If True, return the plan without writing anything
+            batch_size: Rows per bulk statement
         """
-        # Get all balances for this student
-        all_balances = StudentBalance.objects.filter(
-            student=self.student
-        ).select_related('term').order_by(
-            'term__academic_year', 'term__term'
-        )
-        
-        # Filter to only those that need payment (using property evaluation)
-        terms_needing_payment = [
-            balance for balance in all_balances 
-            if balance.current_balance > Decimal('0')
-        ]
-        
-        return terms_needing_payment
+        self.payments = list(payments)
+        self.dry_run = dry_run
+        self.batch_size = batch_size
     
-    def _allocate_to_term(self, balance, priority_order):
+    def allocate(self):
         """
-        Allocate payment to a specific term.
+        Allocate every payment; later payments of the same student see the
+        credits used and created and the term dues covered by earlier ones.
         
-        Priority:
-        1. Clear arrears first (previous_arrears)
-        2. Then pay current term fee
-        
-        Args:
-            balance: StudentBalance instance
-            priority_order: Order for allocation prioritization
-            
         Returns:
-            Updated priority_order
+            list: One result dict per payment, as PaymentAllocationService.allocate()
         """
-        term = balance.term
-        term_due = balance.current_balance  # Total amount still due
-        
-        if term_due <= 0:
-            # Term already paid
-            return priority_order
+        if not self.payments:
+            return []
         
-        # Amount to allocate to this term (limited by remaining payment)
-        allocation = min(self.remaining_amount, term_due)
-        
-        # Record allocation
-        allocation_record = {
-            'term': term,
-            'amount': allocation,
-            'term_total_due': term_due,
-            'type': 'TERM_PAYMENT',
-            'priority': priority_order
-        }
+        student_ids = {payment.student_id for payment in self.payments}
+        balances = self._load_balances(student_ids)
+        credits = self._load_credits(student_ids)
         
-        self.allocations.append(allocation_record)
+        plans = []
+        used_credits = {}
+        new_credits = []
+        for payment in self.payments:
+            plan = self._plan(payment, balances.get(payment.student_id, []), credits.setdefault(payment.student_id, []))
+            for credit in plan['credits_used']:
+                if credit.pk:
+                    used_credits[credit.pk] = credit
+            if plan['new_credit'] is not None:
+                new_credits.append(plan['new_credit'])
+            plans.append(plan)
         
-        # Log the action
-        self.allocation_log.append(
-            f"Allocated ${allocation:.2f} to {term} (due: ${term_due:.2f})"
-        )
+        if not self.dry_run:
+            self._save(plans, list(used_credits.values()), new_credits)
         
-        # Update remaining amount
-        self.remaining_amount -= allocation
-        
-        return priority_order + 1
+        return [self._result(plan) for plan in plans]
     
-    def _create_credit(self, amount):
-        """
-        Create a credit balance for excess payment.
+    def _load_balances(self, student_ids):
+        """Unpaid StudentBalance rows per student, oldest term first (one query)"""
+        by_student = {}
+        balances = StudentBalance.objects.filter(
+            student_id__in=student_ids,
+            current_balance__gt=0,
+        ).select_related('term').order_by('student_id', 'term__academic_year', 'term__term')
+        for balance in balances:
+            by_student.setdefault(balance.student_id, []).append(balance)
+        return by_student
+    
+    def _load_credits(self, student_ids):
+        """Credits with money left per student, oldest first (one query)"""
+        by_student = {}
+        credits = StudentCredit.objects.filter(
+            student_id__in=student_ids,
+            applied_amount__lt=F('amount'),
+        ).order_by('created_at', 'id')
+        for credit in credits:
+            by_student.setdefault(credit.student_id, []).append(credit)
+        return by_student
+    
+    def _plan(self, payment, balances, credits):
+        """Allocate one payment in memory"""
+        remaining = Decimal(str(payment.amount))
+        plan = {
+            'payment': payment,
+            'allocations': [],
+            'log': [],  # (message, credit) - credit ids are filled in after saving
+            'credits_used': [],
+            'new_credit': None,
+        }
         
-        Args:
-            amount: Credit amount to create
-        """
-        credit = StudentCredit.objects.create(
-            student=self.student,
-            amount=amount,
-            source='OVERPAYMENT',
-            source_payment=self.payment,
-            notes=f"Overpayment from payment {self.payment.receipt_number}"
-        )
+        # Step 1: Apply existing credits first (if any)
+        for credit in credits:
+            if remaining <= 0:
+                break
+            amount_to_use = min(remaining, credit.available_amount)
+            if amount_to_use <= 0:
+                continue
+            credit.applied_amount += amount_to_use
+            remaining -= amount_to_use
+            plan['credits_used'].append(credit)
+            plan['log'].append((f"Applied existing credit of ${amount_to_use:.2f} (Credit ID: {{credit_id}})", credit))
+        
+        # Step 2: Allocate to terms needing payment (oldest first). The due is
+        # reduced in memory, so this student's later payments see what is left
+        priority_order = 1
+        for balance in balances:
+            if remaining <= 0:
+                break
+            term_due = balance.current_balance
+            if term_due <= 0:
+                continue
+            allocation = min(remaining, term_due)
+            balance.current_balance -= allocation
+            plan['allocations'].append({
+                'term': balance.term,
+                'amount': allocation,
+                'term_total_due': term_due,
+                'type': 'TERM_PAYMENT',
+                'priority': priority_order
+            })
+            plan['log'].append((f"Allocated ${allocation:.2f} to {balance.term} (due: ${term_due:.2f})", None))
+            remaining -= allocation
+            priority_order += 1
         
-        self.allocation_log.append(
-            f"Created credit of ${amount:.2f} for future terms (Credit ID: {credit.id})"
-        )
+        # Step 3: Excess becomes a credit, usable by this student's later payments
+        if remaining > 0:
+            credit = StudentCredit(
+                student_id=payment.student_id,
+                amount=remaining,
+                source='OVERPAYMENT',
+                source_payment=payment,
+                notes=f"Overpayment from payment {payment.receipt_number}"
+            )
+            credits.append(credit)
+            plan['new_credit'] = credit
+            plan['log'].append((f"Created credit of ${remaining:.2f} for future terms (Credit ID: {{credit_id}})", credit))
+            plan['allocations'].append({
+                'term': None,
+                'amount': remaining,
+                'term_total_due': None,
+                'type': 'CREDIT',
+                'priority': 999  # Credit is lowest priority
+            })
         
-        self.allocations.append({
-            'term': None,
-            'amount': amount,
-            'term_total_due': None,
-            'type': 'CREDIT',
-            'priority': 999  # Credit is lowest priority
-        })
+        plan['remaining'] = remaining
+        return plan
     
-    def _save_allocations(self):
-        """Save all allocations to database as PaymentAllocation records"""
-        for i, alloc in enumerate(self.allocations):
-            # Only save non-credit allocations to PaymentAllocation table
-            # Credits are handled separately via StudentCredit model
-            if alloc['type'] != 'CREDIT':
-                PaymentAllocation.objects.create(
-                    payment=self.payment,
-                    student=self.student,
-                    term=alloc['term'],
-                    allocated_amount=alloc['amount'],
-                    allocation_type='TERM_PAYMENT',
-                    priority_order=i
-                )
-        
-        # Save allocation logs
-        for log_entry in self.allocation_log:
-            PaymentAllocationLog.objects.create(
-                payment=self.payment,
-                student=self.student,
-                action=log_entry,
-                remaining_payment=self.remaining_amount
+    def _save(self, plans, used_credits, new_credits):
+        """Write credits, allocations and logs with bulk statements in one transaction"""
+        now = timezone.now()
+        with transaction.atomic():
+            # New credits first, so log entries can reference their ids
+            StudentCredit.objects.bulk_create(new_credits, batch_size=self.batch_size)
+            for credit in used_credits:
+                credit.updated_at = now
+            StudentCredit.objects.bulk_update(
+                used_credits, ['applied_amount', 'updated_at'], batch_size=self.batch_size
             )
-
-
-# Import at bottom to avoid circular imports
-from django.db import models
+            
+            allocations = []
+            logs = []
+            for plan in plans:
+                payment = plan['payment']
+                for i, alloc in enumerate(plan['allocations']):
+                    # Credits are held in StudentCredit, not PaymentAllocation
+                    if alloc['type'] != 'CREDIT':
+                        allocations.append(PaymentAllocation(
+                            payment=payment,
+                            student_id=payment.student_id,
+                            term=alloc['term'],
+                            allocated_amount=alloc['amount'],
+                            allocation_type='TERM_PAYMENT',
+                            priority_order=i
+                        ))
+                for message in self._messages(plan):
+                    logs.append(PaymentAllocationLog(
+                        payment=payment,
+                        student_id=payment.student_id,
+                        action=message,
+                        remaining_payment=plan['remaining']
+                    ))
+            PaymentAllocation.objects.bulk_create(allocations, batch_size=self.batch_size)
+            PaymentAllocationLog.objects.bulk_create(logs, batch_size=self.batch_size)
+    
+    @staticmethod
+    def _messages(plan):
+        return [
+            message.format(credit_id=credit.pk if credit is not None and credit.pk else 'new')
+            if credit is not None else message
+            for message, credit in plan['log']
+        ]
+    
+    def _result(self, plan):
+        payment = plan['payment']
+        return {
+            'payment_id': payment.id,
+            'total_allocated': payment.amount - plan['remaining'],
+            'credit_created': plan['remaining'] if plan['remaining'] > 0 else Decimal('0'),
+            'allocations': plan['allocations'],
+            'log': self._messages(plan),
+        }
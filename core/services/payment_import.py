@@ -0,0 +1,330 @@
+"""
+Payment Import Service
+
+Imports payment files (bank statements, mobile money exports, cashbook CSVs)
+without going through Payment.save() one receipt at a time.
+
+Rows are read as a stream and handled in chunks:
+1. Match each row to a student by birth_entry_number, or by a birth entry
+   number found in the row's reference text
+2. Validate the chunk with set-based lookups (the same rules as
+   Payment.clean(): positive amount, a balance for the term, a term fee for
+   the student's grade level) and reject duplicate references
+3. bulk_create the valid payments (post_save receivers do not run)
+
+After the last chunk the deferred signal work runs once per student instead of
+once per payment: amount_paid is recomputed for every affected StudentBalance,
+posted to the student ledger in bulk, overpayments are carried to the next
+term and Grade 7 alumni checks are made.
+
+Expected columns (header names are case-insensitive):
+    birth_entry_number  - optional if the reference contains it
+    amount              - required
+    reference           - bank/mobile money reference (stored as reference_number)
+    payment_date        - optional, YYYY-MM-DD (defaults to today)
+    payment_method      - optional, CASH/BANK/MOBILE/CHEQUE (defaults to BANK)
+    notes               - optional
+"""
+import csv
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from core.models import AcademicTerm, Payment, Student, StudentBalance, StudentLedgerEntry, TermFee
+from core.services import financial_snapshots
+import logging
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_TOKEN = re.compile(r'[A-Z0-9-]+')
+
+
+class PaymentImportService:
+    """Streaming, chunked import of payment rows into one term"""
+
+    def __init__(self, term=None, recorded_by=None, chunk_size=1000, dry_run=False, default_method='BANK'):
+        """
+        Args:
+            term (AcademicTerm): Term the payments are for (defaults to the current term)
+            recorded_by (Administrator): Stored on every imported payment
+            chunk_size (int): Rows validated and inserted per batch
+            dry_run (bool): Validate and report only; nothing is written
+            default_method (str): payment_method for rows that do not give one
+        """
+        self.term = term or AcademicTerm.get_current_term()
+        self.recorded_by = recorded_by
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.default_method = default_method
+        self.methods = {code for code, _ in Payment.PAYMENT_METHODS}
+
+    def import_csv(self, file_obj):
+        """Import a CSV file object (text mode); see the module docstring for columns"""
+        reader = csv.DictReader(file_obj)
+        rows = ({(k or '').strip().lower(): (v or '').strip() for k, v in row.items()} for row in reader)
+        return self.import_rows(rows)
+
+    def import_rows(self, rows):
+        """
+        Import an iterable of dicts, consumed chunk by chunk.
+
+        Returns:
+            dict: {'rows', 'imported', 'failed', 'total_amount', 'students',
+                   'errors': [{'row', 'reference', 'birth_entry_number', 'error'}]}
+        """
+        if not self.term:
+            raise ValueError('No current term is set')
+
+        self._fees = set(TermFee.objects.filter(term=self.term).values_list('grade_level', flat=True))
+        self._seen_references = set()
+        self._seen_receipts = set()
+        result = {
+            'rows': 0,
+            'imported': 0,
+            'failed': 0,
+            'total_amount': Decimal('0'),
+            'students': 0,
+            'errors': [],
+        }
+        affected = {}
+
+        with transaction.atomic():
+            chunk = []
+            for row in rows:
+                result['rows'] += 1
+                chunk.append((result['rows'], row))
+                if len(chunk) >= self.chunk_size:
+                    self._import_chunk(chunk, result, affected)
+                    chunk = []
+            if chunk:
+                self._import_chunk(chunk, result, affected)
+
+            result['failed'] = len(result['errors'])
+            result['students'] = len(affected)
+            if affected and not self.dry_run:
+                self._apply_deferred_updates(affected)
+
+        logger.info(
+            f"Payment import into {self.term}: {result['imported']} imported, "
+            f"{result['failed']} failed, ${result['total_amount']} across {result['students']} students"
+            + (' (dry run)' if self.dry_run else '')
+        )
+        return result
+
+    def _import_chunk(self, chunk, result, affected):
+        parsed = []
+        for row_number, row in chunk:
+            try:
+                parsed.append((row_number, row, self._parse(row)))
+            except ValueError as e:
+                self._error(result, row_number, row, str(e))
+
+        students = self._match_students([p for _, _, p in parsed])
+        balance_ids = set(StudentBalance.objects.filter(
+            term=self.term, student_id__in=[s.id for s in students.values()]
+        ).values_list('student_id', flat=True))
+        inactive_with_balance = set(StudentBalance.objects.filter(
+            student_id__in=[s.id for s in students.values() if not s.is_active]
+        ).values_list('student_id', flat=True).distinct())
+        references = [p['reference'] for _, _, p in parsed if p['reference']]
+        existing_references = set(Payment.objects.filter(
+            term=self.term, reference_number__in=references
+        ).values_list('reference_number', flat=True))
+
+        payments = []
+        for row_number, row, values in parsed:
+            student = self._student_for(values, students)
+            error = self._validate(values, student, balance_ids, inactive_with_balance, existing_references)
+            if error:
+                self._error(result, row_number, row, error)
+                continue
+            if values['reference']:
+                self._seen_references.add(values['reference'])
+            payment = Payment(
+                student=student,
+                term=self.term,
+                amount=values['amount'],
+                payment_date=values['payment_date'],
+                payment_method=values['payment_method'],
+                reference_number=values['reference'],
+                notes=values['notes'],
+                recorded_by=self.recorded_by,
+            )
+            if not payment.reference_number:
+                payment.reference_number = payment._generate_reference_number()
+            payments.append(payment)
+            result['imported'] += 1
+            result['total_amount'] += values['amount']
+            affected.setdefault(student.id, student)
+
+        if payments and not self.dry_run:
+            self._assign_receipt_numbers(payments)
+            Payment.objects.bulk_create(payments, batch_size=self.chunk_size)
+
+    def _parse(self, row):
+        raw_amount = (row.get('amount') or '').replace(',', '').replace('$', '')
+        try:
+            amount = Decimal(raw_amount).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            raise ValueError(f"Invalid amount '{row.get('amount', '')}'")
+
+        payment_date = timezone.now().date()
+        if row.get('payment_date'):
+            try:
+                payment_date = date.fromisoformat(row['payment_date'])
+            except ValueError:
+                raise ValueError(f"Invalid payment_date '{row['payment_date']}' (expected YYYY-MM-DD)")
+
+        method = (row.get('payment_method') or self.default_method).upper()
+        if method not in self.methods:
+            raise ValueError(f"Unknown payment_method '{row.get('payment_method')}'")
+
+        return {
+            'birth_entry_number': (row.get('birth_entry_number') or '').upper(),
+            'reference': (row.get('reference') or row.get('reference_number') or '')[:50],
+            'amount': amount,
+            'payment_date': payment_date,
+            'payment_method': method,
+            'notes': row.get('notes') or '',
+        }
+
+    def _match_students(self, parsed):
+        """One query for every birth entry number (or reference token) in the chunk"""
+        candidates = set()
+        for values in parsed:
+            if values['birth_entry_number']:
+                candidates.add(values['birth_entry_number'])
+            else:
+                candidates.update(REFERENCE_TOKEN.findall(values['reference'].upper()))
+        return {
+            student.birth_entry_number: student
+            for student in Student.objects.filter(birth_entry_number__in=candidates).select_related('current_class')
+        }
+
+    def _student_for(self, values, students):
+        if values['birth_entry_number']:
+            return students.get(values['birth_entry_number'])
+        matches = {
+            students[token].id: students[token]
+            for token in REFERENCE_TOKEN.findall(values['reference'].upper())
+            if token in students
+        }
+        return next(iter(matches.values())) if len(matches) == 1 else None
+
+    def _validate(self, values, student, balance_ids, inactive_with_balance, existing_references):
+        """Payment.clean() rules, answered from the chunk's preloaded sets"""
+        if student is None:
+            if values['birth_entry_number']:
+                return f"No student with birth entry number {values['birth_entry_number']}"
+            return 'No single student could be matched from the reference'
+        if values['amount'] <= 0:
+            return 'Payment amount must be greater than zero'
+        reference = values['reference']
+        if reference and (reference in existing_references or reference in self._seen_references):
+            return f"Reference {reference} has already been recorded for {self.term}"
+        if student.is_archived:
+            return f"{student.full_name} has been archived"
+        if student.is_active and student.id not in balance_ids:
+            return f"No balance record exists for {student.full_name} in {self.term}"
+        if not student.is_active and student.id not in inactive_with_balance:
+            return f"No balance record exists for graduated student {student.full_name}"
+        if student.current_class:
+            grade_level = 'ECD' if str(student.current_class.grade).startswith('ECD') else 'PRIMARY'
+            if grade_level not in self._fees:
+                return f"Term fee has not been set for {grade_level} students in {self.term}"
+        elif not self._fees:
+            return f"Term fee has not been set for {self.term}"
+        return None
+
+    def _assign_receipt_numbers(self, payments):
+        """Receipt numbers as Payment.save() makes them, unique across the import and the table"""
+        pending = payments
+        while pending:
+            for payment in pending:
+                payment.receipt_number = payment._generate_receipt_number()
+            taken = set(Payment.objects.filter(
+                receipt_number__in=[p.receipt_number for p in pending]
+            ).values_list('receipt_number', flat=True))
+            retry = []
+            for payment in pending:
+                if payment.receipt_number in taken or payment.receipt_number in self._seen_receipts:
+                    retry.append(payment)
+                else:
+                    self._seen_receipts.add(payment.receipt_number)
+            pending = retry
+
+    def _apply_deferred_updates(self, affected):
+        """What the Payment post_save receivers do, once per student"""
+        balances = StudentBalance.objects.filter(term=self.term, student_id__in=affected)
+        paid = Payment.objects.filter(
+            term=self.term, student_id=OuterRef('student_id')
+        ).values('student_id').annotate(total=Sum('amount')).values('total')
+        # total_due does not depend on amount_paid, so two set-based UPDATEs suffice.
+        # QuerySet.update() skips auto_now, and report caches key on updated_at
+        balances.update(amount_paid=Coalesce(Subquery(paid), Value(Decimal('0'))), updated_at=timezone.now())
+        balances.update(current_balance=F('total_due') - F('amount_paid'))
+
+        balances = list(balances)
+        StudentLedgerEntry.record_balances(
+            self.term, balances, description='Payment import', batch_size=self.chunk_size,
+            fields=('amount_paid',),
+        )
+        financial_snapshots.mark_terms([self.term.id])
+
+        self._carry_credits_forward([b for b in balances if b.current_balance < 0], affected)
+        for balance in balances:
+            student = affected[balance.student_id]
+            if student.current_class and str(student.current_class.grade) == '7':
+                self._check_grade7(student, balance)
+
+    def _carry_credits_forward(self, overpaid, affected):
+        """Payment._handle_excess_payment for students with no next-term balance yet"""
+        if not overpaid:
+            return
+        next_term = Payment(term=self.term)._get_next_term()
+        if not next_term:
+            return
+        has_next = set(StudentBalance.objects.filter(
+            term=next_term, student_id__in=[b.student_id for b in overpaid]
+        ).values_list('student_id', flat=True))
+        for balance in overpaid:
+            if balance.student_id not in has_next:
+                Payment(student=affected[balance.student_id], term=self.term)._handle_excess_payment()
+
+    def _check_grade7(self, student, balance):
+        """Grade 7 alumni rules of the payment receivers"""
+        from core.services.alumni_conversion import AlumniConversionService
+
+        try:
+            if self.term.term == 3 and balance.current_balance <= 0:
+                if student.status != 'ALUMNI' or student.is_active:
+                    AlumniConversionService.convert_to_alumni(student)
+            if not student.is_archived:
+                outstanding = StudentBalance.objects.filter(
+                    student=student, current_balance__gt=0
+                ).aggregate(total=Sum('current_balance'))['total'] or 0
+                if outstanding <= 0:
+                    student.status = 'ALUMNI'
+                    student.alumni_date = timezone.now()
+                    student.save(update_fields=['status', 'alumni_date'])
+        except Exception as e:
+            logger.error(f"Error checking Grade 7 alumni status for {student}: {e}")
+
+    @staticmethod
+    def _error(result, row_number, row, message):
+        result['errors'].append({
+            'row': row_number,
+            'reference': row.get('reference') or row.get('reference_number') or '',
+            'birth_entry_number': row.get('birth_entry_number') or '',
+            'error': message,
+        })
+
+    @staticmethod
+    def write_error_report(errors, file_obj):
+        """Write the per-row error report as CSV"""
+        writer = csv.DictWriter(file_obj, fieldnames=['row', 'reference', 'birth_entry_number', 'error'])
+        writer.writeheader()
+        writer.writerows(errors)
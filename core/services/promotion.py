@@ -0,0 +1,419 @@
+"""
+Promotion
+
+Grade progression and class lookup shared by the year rollover, the bulk
+promotion page, the promote_students command and Student.get_next_class().
+
+NEXT_GRADE is the progression path (ECDA -> ECDB -> Grade 1 -> ... ->
+Grade 7, which graduates). ClassMap loads every class of the years involved
+in one query, so working out where each of thousands of students goes needs
+no further queries:
+
+    classes = ClassMap.load([2026, 2027])
+    target = classes.next_class(student.current_class, 2027)
+
+ECDB pupils do not keep a section: SectionBalancer spreads each intake over
+the Grade 1 sections in one pass, by size against capacity and optionally by
+sex, in an order drawn from a seed so the same seed gives the same classes.
+
+BulkPromotionService promotes a selection of students with a fixed number of
+queries: one for the students, one for the classes, one arrears lookup per
+class year, then one UPDATE per target class and a bulk_create of the
+StudentMovement rows, all in one transaction.
+"""
+import random
+import uuid
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count
+from core.models import Class
+
+NEXT_GRADE = {
+    'ECDA': 'ECDB',
+    'ECDB': '1',
+    '1': '2',
+    '2': '3',
+    '3': '4',
+    '4': '5',
+    '5': '6',
+    '6': '7',
+    '7': None,  # Final grade: the student graduates
+}
+
+# Pupils of this grade are placed in their next class by SectionBalancer
+BALANCED_GRADE = 'ECDB'
+
+# Places per class where no capacity is given (the dashboard's ideal class size)
+CLASS_CAPACITY = 30
+
+
+def is_final_grade(grade):
+    return NEXT_GRADE.get(str(grade), None) is None
+
+
+def class_label(grade, section=''):
+    """'Grade 2A', 'ECDB A'"""
+    if str(grade).startswith('ECD'):
+        return f"{grade} {section}".strip()
+    return f"Grade {grade}{section}"
+
+
+def target_year(current_class):
+    """Academic year of the class a student in current_class is promoted into
+
+    ECDA moves up to ECDB within the year; every other grade moves into the
+    next year.
+    """
+    if str(current_class.grade) == 'ECDA':
+        return current_class.academic_year
+    return current_class.academic_year + 1
+
+
+def promotion_target(current_class, classes, year=None):
+    """The class a student in current_class is promoted into, or None
+
+    The student keeps their section where the next grade has it (see
+    ClassMap.next_class). ECDB pupils are placed with SectionBalancer instead.
+    """
+    year = target_year(current_class) if year is None else year
+    return classes.next_class(current_class, year)
+
+
+def carried_arrears(student_ids, year):
+    """student id -> current_balance of the student's last StudentBalance of `year`"""
+    from core.models import StudentBalance
+
+    arrears = {}
+    for student_id, current_balance in StudentBalance.objects.filter(
+        student_id__in=list(student_ids), term__academic_year=year,
+    ).order_by('student_id', '-term__term').values_list('student_id', 'current_balance'):
+        arrears.setdefault(student_id, current_balance)
+    return arrears
+
+
+def graduate_students(student_ids):
+    """Mark students as graduated: inactive, GRADUATED and archived"""
+    from core.models import Student
+
+    Student.objects.filter(id__in=list(student_ids)).update(
+        is_active=False, status='GRADUATED', is_archived=True,
+    )
+
+
+def mark_moved(student_ids):
+    """What the Student post_save receivers do, for students moved with UPDATE"""
+    from core.models import StudentBalance
+    from core.services import financial_snapshots, student_search, zimsec_stats
+
+    StudentBalance.refresh_for_class_change(student_ids)
+    financial_snapshots.mark_students(student_ids)
+    zimsec_stats.mark_students(student_ids)
+    transaction.on_commit(student_search.invalidate)
+
+
+class ClassMap:
+    """(grade, section, academic_year) -> Class for a set of years"""
+
+    def __init__(self, classes):
+        self.by_key = {}
+        self.by_grade = {}
+        for cls in sorted(classes, key=lambda c: c.section):
+            self.by_key[(str(cls.grade), cls.section, cls.academic_year)] = cls
+            self.by_grade.setdefault((str(cls.grade), cls.academic_year), []).append(cls)
+
+    @classmethod
+    def load(cls, years):
+        return cls(Class.objects.filter(academic_year__in=list(years)))
+
+    def get(self, grade, section, year):
+        return self.by_key.get((str(grade), section, year))
+
+    def sections(self, grade, year):
+        """Classes of a grade in a year, by section"""
+        return self.by_grade.get((str(grade), year), [])
+
+    def next_class(self, current_class, year):
+        """The class a student in current_class moves to in `year`
+
+        Keeps the section when the next grade has it, otherwise the first
+        section of the next grade. None for Grade 7 or when the next grade
+        has no class in that year.
+        """
+        next_grade = NEXT_GRADE.get(str(current_class.grade))
+        if next_grade is None:
+            return None
+        same_section = self.get(next_grade, current_class.section, year)
+        if same_section:
+            return same_section
+        sections = self.sections(next_grade, year)
+        return sections[0] if sections else None
+
+
+class SectionBalancer:
+    """Assigns students to the sections of a grade in one pass
+
+    Every student goes to the section that is least full for its capacity,
+    counting the active students already in it. With balance_sex the
+    students are placed one sex after the other, and ties go to the section
+    with the fewest students of the same sex, so each sex is spread evenly
+    too. Remaining ties, and the order students are placed in, are drawn
+    from `seed`: the same students, classes and seed always give the same
+    placement.
+
+        placement = SectionBalancer(classes.sections('1', 2027), seed=2026).assign(students)
+    """
+
+    def __init__(self, classes, capacities=None, balance_sex=False, seed=None):
+        """
+        Args:
+            classes: The sections to fill
+            capacities (dict): class id -> places (CLASS_CAPACITY if missing)
+            balance_sex (bool): Also spread boys and girls evenly
+            seed: Seed for the placement order and tie breaks (None: random)
+        """
+        self.classes = sorted(classes, key=lambda cls: cls.section)
+        capacities = capacities or {}
+        self.capacities = {cls.id: capacities.get(cls.id) or CLASS_CAPACITY for cls in self.classes}
+        self.balance_sex = balance_sex
+        self.seed = seed
+        self.sizes = {cls.id: 0 for cls in self.classes}
+        self.by_sex = {}
+        self._load_enrolment()
+
+    def _load_enrolment(self):
+        from core.models import Student
+
+        if not self.classes:
+            return
+        for row in Student.objects.filter(
+            current_class_id__in=list(self.sizes), is_active=True,
+        ).values('current_class_id', 'sex').annotate(students=Count('id')):
+            self._add(row['current_class_id'], row['sex'], row['students'])
+
+    def _add(self, class_id, sex, students=1):
+        self.sizes[class_id] += students
+        self.by_sex[(class_id, sex)] = self.by_sex.get((class_id, sex), 0) + students
+
+    @property
+    def over_capacity(self):
+        """Classes holding more students than their capacity"""
+        return [cls for cls in self.classes if self.sizes[cls.id] > self.capacities[cls.id]]
+
+    def assign(self, students):
+        """student id -> Class for every student (empty when there are no sections)"""
+        if not self.classes:
+            return {}
+        rng = random.Random(self.seed)
+        order = sorted(students, key=lambda student: student.id)
+        rng.shuffle(order)
+        if self.balance_sex:
+            order.sort(key=lambda student: student.sex or '')  # Stable: still shuffled within each sex
+
+        placement = {}
+        for student in order:
+            def load(cls):
+                capacity = self.capacities[cls.id]
+                same_sex = self.by_sex.get((cls.id, student.sex), 0) if self.balance_sex else 0
+                return (self.sizes[cls.id] / capacity, same_sex / capacity, rng.random())
+
+            chosen = min(self.classes, key=load)
+            self._add(chosen.id, student.sex)
+            placement[student.id] = chosen
+        return placement
+
+
+class BulkPromotionService:
+    """Promotes (and graduates) a selection of students in one transaction
+
+    plan() works out every student's target class in memory; apply() writes
+    the moves. Students that cannot be moved are reported in `errors` and
+    left where they are.
+    """
+
+    def __init__(self, student_ids, moved_by=None, reason='', graduate=True,
+                 create_missing_classes=False, balance_sex=False, seed=None, batch_size=500):
+        """
+        Args:
+            student_ids: Ids of the students to promote
+            moved_by (Administrator): Recorded on the StudentMovement rows
+            graduate (bool): Graduate Grade 7 students; when False they are
+                reported as errors instead
+            create_missing_classes (bool): Create the next grade's class (same
+                section) when it does not exist yet. ECD pupils are never
+                placed in a created class.
+            balance_sex (bool): Spread ECDB pupils over the Grade 1 sections
+                by sex as well as by size (see SectionBalancer)
+            seed: Seed for the Grade 1 placement (None: random)
+            batch_size (int): Rows per bulk_create statement
+        """
+        self.student_ids = [int(student_id) for student_id in student_ids]
+        self.moved_by = moved_by if getattr(moved_by, 'is_authenticated', False) else None
+        self.reason = reason
+        self.graduate = graduate
+        self.create_missing_classes = create_missing_classes
+        self.balance_sex = balance_sex
+        self.seed = seed
+        self.batch_size = batch_size
+        self.operation_id = str(uuid.uuid4())
+        self.moves = []      # (student, from_class, to_class or (grade, section, year) to create)
+        self.graduates = []  # (student, from_class)
+        self.errors = []
+
+    def plan(self):
+        from core.models import Student
+
+        students = Student.objects.filter(id__in=self.student_ids).select_related('current_class')
+        students = {student.id: student for student in students}
+        years = set()
+        for student in students.values():
+            if student.current_class_id:
+                years.update([student.current_class.academic_year, target_year(student.current_class)])
+        classes = ClassMap.load(years)
+
+        self.moves, self.graduates, self.errors = [], [], []
+        intake = {}  # year -> ECDB pupils moving up to Grade 1
+        for student_id in self.student_ids:
+            student = students.get(student_id)
+            if student is None:
+                self.errors.append(f'Student {student_id} - Not found')
+                continue
+            current = student.current_class
+            if not student.is_active or student.status == 'GRADUATED':
+                self.errors.append(f'{student.full_name} - Already graduated/inactive')
+            elif current is None:
+                self.errors.append(f'{student.full_name} - No assigned class')
+            elif is_final_grade(current.grade):
+                if self.graduate:
+                    self.graduates.append((student, current))
+                else:
+                    self.errors.append(f'{student.full_name} - In the final grade (graduates)')
+            elif str(current.grade) == BALANCED_GRADE:
+                intake.setdefault(target_year(current), []).append(student)
+            else:
+                year = target_year(current)
+                target = promotion_target(current, classes, year)
+                if target is None and self.create_missing_classes and not str(current.grade).startswith('ECD'):
+                    target = (NEXT_GRADE[str(current.grade)], current.section, year)
+                if target is None:
+                    self.errors.append(
+                        f'{student.full_name} - No Grade {NEXT_GRADE[str(current.grade)]} class for {year}'
+                    )
+                else:
+                    self.moves.append((student, current, target))
+
+        for year, pupils in intake.items():
+            balancer = SectionBalancer(
+                classes.sections(NEXT_GRADE[BALANCED_GRADE], year), balance_sex=self.balance_sex, seed=self.seed,
+            )
+            placement = balancer.assign(pupils)
+            for student in pupils:
+                if student.id in placement:
+                    self.moves.append((student, student.current_class, placement[student.id]))
+                else:
+                    self.errors.append(f'{student.full_name} - No Grade 1 class for {year}')
+        return self
+
+    def apply(self):
+        """Write the planned moves
+
+        Returns:
+            dict: {'promoted': int, 'graduated': int, 'failed': int,
+                   'errors': list, 'balances_created': int}
+        """
+        from core.models import Student, StudentMovement
+
+        result = {
+            'promoted': len(self.moves),
+            'graduated': len(self.graduates),
+            'failed': len(self.errors),
+            'errors': list(self.errors),
+            'balances_created': 0,
+        }
+        if not self.moves and not self.graduates:
+            return result
+
+        with transaction.atomic():
+            moves = self._create_missing_classes()
+            arrears = {}
+            by_year = {}
+            for student, from_class, _ in moves:
+                by_year.setdefault(from_class.academic_year, []).append(student.id)
+            for year, student_ids in by_year.items():
+                arrears.update(carried_arrears(student_ids, year))
+
+            targets, movements = {}, []
+            for student, from_class, to_class in moves:
+                targets.setdefault(to_class.id, []).append(student.id)
+                owed = arrears.get(student.id, Decimal('0'))
+                movements.append(self._movement(student, from_class, to_class, 'PROMOTION', owed))
+            for student, from_class in self.graduates:
+                movements.append(self._movement(student, from_class, None, 'GRADUATION', Decimal('0')))
+
+            # One UPDATE per target class rather than a CASE per student
+            for to_class, student_ids in targets.items():
+                Student.objects.filter(id__in=student_ids).update(current_class_id=to_class)
+            graduate_ids = [student.id for student, _ in self.graduates]
+            if graduate_ids:
+                graduate_students(graduate_ids)
+            StudentMovement.objects.bulk_create(movements, batch_size=self.batch_size)
+            mark_moved([student_id for ids in targets.values() for student_id in ids] + graduate_ids)
+
+            result['balances_created'], balance_errors = self._open_balances(moves)
+            result['errors'] += balance_errors
+        return result
+
+    def run(self):
+        return self.plan().apply()
+
+    def _movement(self, student, from_class, to_class, movement_type, arrears):
+        from core.models import StudentMovement
+
+        return StudentMovement(
+            student_id=student.id,
+            from_class=from_class,
+            to_class=to_class,
+            movement_type=movement_type,
+            reason=self.reason,
+            moved_by=self.moved_by,
+            previous_arrears=arrears,
+            preserved_arrears=arrears,
+            is_bulk_operation=True,
+            bulk_operation_id=self.operation_id,
+        )
+
+    def _create_missing_classes(self):
+        """Replace (grade, section, year) targets with created classes"""
+        from core.models import AcademicYear
+
+        created = {}
+        moves = []
+        for student, from_class, target in self.moves:
+            if isinstance(target, tuple):
+                if target not in created:
+                    grade, section, year = target
+                    AcademicYear.objects.get_or_create(
+                        year=year,
+                        defaults={'is_active': False, 'start_date': f'{year}-01-01', 'end_date': f'{year}-12-31'},
+                    )
+                    created[target], _ = Class.objects.get_or_create(grade=grade, section=section, academic_year=year)
+                target = created[target]
+            moves.append((student, from_class, target))
+        return moves
+
+    def _open_balances(self, moves):
+        """Open Term 1 balances for students who moved into a new year"""
+        from core.models import AcademicTerm
+        from core.services.term_activation import TermActivationService
+
+        by_year = {}
+        for student, from_class, to_class in moves:
+            if to_class.academic_year != from_class.academic_year:
+                by_year.setdefault(to_class.academic_year, []).append(student.id)
+        created, errors = 0, []
+        for term in AcademicTerm.objects.filter(academic_year__in=list(by_year), term=1):
+            activation = TermActivationService(term, batch_size=self.batch_size).activate(
+                missing_only=True, student_ids=by_year[term.academic_year],
+            )
+            created += activation['created']
+            errors += activation['errors']
+        return created, errors
@@ -0,0 +1,475 @@
+"""
+Report Jobs
+
+Background rendering of the PDF reports (fee dashboard, arrears, student
+payment history, ZIMSEC statistics/detailed results, Grade 7 completion) and
+of the zip of term statements.
+
+1. A view calls enqueue(): the report's source stamp (row count and latest
+   updated_at of the data it reads) is hashed with its type and parameters
+   into a cache key. A finished job with that key is returned as is, an
+   in-flight one is shared, otherwise a PENDING ReportJob is created
+2. The run_report_worker command claims PENDING jobs with a conditional
+   UPDATE (safe with several workers, no broker), renders them and stores the
+   PDF and its sha256 on the job
+3. The browser polls the job status and downloads the stored PDF; repeat
+   requests hit the cache until the source data changes
+
+Each report type implements clean_params(), source_stamp() and render().
+"""
+import hashlib
+import json
+import os
+import socket
+import tempfile
+from datetime import timedelta
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A RUNNING job not finished after this long is assumed lost (worker killed) and re-queued
+STALE_AFTER = timedelta(minutes=15)
+MAX_ATTEMPTS = 3
+
+
+def _stamp(queryset, field='updated_at'):
+    """'<count>@<latest updated_at>' of a queryset; changes when rows are added, edited or removed"""
+    row = queryset.aggregate(rows=Count('pk'), latest=Max(field))
+    latest = row['latest'].isoformat() if row['latest'] else '-'
+    return f"{row['rows']}@{latest}"
+
+
+def _school_stamp():
+    from core.models.school_details import SchoolDetails
+    return _stamp(SchoolDetails.objects.all())
+
+
+class Report:
+    """A PDF report the worker can render"""
+    name = None
+    title = None
+
+    def clean_params(self, params):
+        """Validated, JSON-serialisable parameters (raises ValueError)"""
+        return {}
+
+    def source_stamp(self, params):
+        raise NotImplementedError
+
+    def render(self, params):
+        """Returns (pdf bytes, filename)"""
+        raise NotImplementedError
+
+    @staticmethod
+    def _int_param(params, key, default=None):
+        value = params.get(key, default)
+        if value in (None, ''):
+            raise ValueError(f"Missing parameter '{key}'")
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {key} '{value}'")
+
+
+class TermReport(Report):
+    """Reports over one term's balances (defaults to the current term)"""
+
+    def clean_params(self, params):
+        from core.models import AcademicTerm
+
+        if params.get('term'):
+            return {'term': self._int_param(params, 'term')}
+        term = AcademicTerm.get_current_term()
+        if not term:
+            raise ValueError('No current term set')
+        return {'term': term.pk}
+
+    def source_stamp(self, params):
+        from core.models import Payment, StudentBalance
+        return ';'.join([
+            _stamp(StudentBalance.objects.filter(term_id=params['term'])),
+            _stamp(Payment.objects.filter(term_id=params['term'])),
+            _school_stamp(),
+        ])
+
+    @staticmethod
+    def _term(params):
+        from core.models import AcademicTerm
+        return AcademicTerm.objects.get(pk=params['term'])
+
+    @staticmethod
+    def _render_to_file(generate, **kwargs):
+        """Run a page-streamed renderer into a temporary file; returns the PDF bytes"""
+        with tempfile.TemporaryFile() as output:
+            generate(output=output, **kwargs)
+            output.seek(0)
+            return output.read()
+
+
+class FeeDashboardReport(TermReport):
+    name = 'fee_dashboard'
+    title = 'Fee Collection Report'
+
+    def render(self, params):
+        from core.models import StudentBalance
+        from core.utils.pdf_reports_modern import PaymentHistoryReport
+
+        term = self._term(params)
+        balances = StudentBalance.objects.filter(term=term)
+        totals = balances.aggregate(
+            students=Count('pk'), term_fee=Sum('term_fee'),
+            amount_paid=Sum('amount_paid'), current_balance=Sum('current_balance'),
+        )
+        # Rows are read in chunks while the PDF is laid out page by page
+        students_data = (
+            {
+                'name': balance.student.get_full_name(),
+                'class': str(balance.student.current_class) if balance.student.current_class else 'N/A',
+                'term_fee': float(balance.term_fee),
+                'amount_paid': float(balance.amount_paid),
+                'current_balance': float(balance.current_balance),
+            }
+            for balance in balances.select_related('student__current_class').iterator(chunk_size=2000)
+        )
+        content = self._render_to_file(
+            PaymentHistoryReport.generate_fee_dashboard_pdf,
+            current_term=str(term), students_data=students_data, totals=totals,
+        )
+        return content, f"fee_dashboard_{timezone.now().strftime('%Y%m%d')}.pdf"
+
+
+class ArrearsPDFReport(TermReport):
+    name = 'arrears'
+    title = 'Arrears Collection Report'
+
+    def render(self, params):
+        from core.models import StudentBalance
+        from core.utils.pdf_reports_modern import ArrearsReport
+
+        term = self._term(params)
+        # Balances with an outstanding amount, largest first (filtered and sorted in SQL)
+        balances = StudentBalance.objects.filter(
+            term=term,
+            current_balance__gt=0
+        )
+        totals = balances.aggregate(students=Count('pk'), balance=Sum('current_balance'))
+        students_with_arrears = (
+            {
+                'name': balance.student.get_full_name(),
+                'id': balance.student.id,
+                'current_class': str(balance.student.current_class) if balance.student.current_class else 'N/A',
+                'balance': float(balance.current_balance),
+            }
+            for balance in balances.select_related('student__current_class').order_by('-current_balance').iterator(chunk_size=2000)
+        )
+        content = self._render_to_file(
+            ArrearsReport.generate_arrears_pdf,
+            students_with_arrears=students_with_arrears, term=str(term), totals=totals,
+        )
+        return content, f"arrears_report_{timezone.now().strftime('%Y%m%d')}.pdf"
+
+
+class StudentPaymentHistoryReport(Report):
+    name = 'student_payment_history'
+    title = 'Payment History Report'
+
+    def clean_params(self, params):
+        from core.models import AcademicTerm, Student
+
+        student_id = self._int_param(params, 'student')
+        if not Student.objects.filter(pk=student_id).exists():
+            raise ValueError(f'No student with id {student_id}')
+        term = AcademicTerm.get_current_term()
+        return {'student': student_id, 'term': term.pk if term else None}
+
+    def source_stamp(self, params):
+        from core.models import Payment, StudentBalance
+        return ';'.join([
+            _stamp(Payment.objects.filter(student_id=params['student'])),
+            _stamp(StudentBalance.objects.filter(student_id=params['student'], term_id=params['term'])),
+            _school_stamp(),
+        ])
+
+    def render(self, params):
+        from core.models import Payment, Student, StudentBalance
+        from core.utils.pdf_reports_modern import PaymentHistoryReport
+
+        student = Student.objects.select_related('current_class').get(pk=params['student'])
+        payments = Payment.objects.filter(student=student).order_by('-created_at')
+        balance = StudentBalance.objects.filter(student=student, term_id=params['term']).first()
+        balance_info = {}
+        if balance:
+            balance_info = {
+                'term_fee': float(balance.term_fee),
+                'amount_paid': float(balance.amount_paid),
+                'previous_arrears': float(balance.previous_arrears),
+                'current_balance': float(balance.current_balance),
+            }
+        buffer = PaymentHistoryReport.generate_student_payment_pdf(student, payments, balance_info)
+        return buffer.getvalue(), f"payment_history_{student.id}_{timezone.now().strftime('%Y%m%d')}.pdf"
+
+
+class TermStatementsReport(TermReport):
+    """Every student's statement for the term in one zip (core/services/statements.py)"""
+    name = 'term_statements'
+    title = 'Term Statements'
+
+    def clean_params(self, params):
+        cleaned = super().clean_params(params)
+        classes = params.get('classes') or []
+        if isinstance(classes, str):
+            classes = [value for value in classes.split(',') if value.strip()]
+        try:
+            cleaned['classes'] = sorted({int(value) for value in classes})
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid classes '{classes}'")
+        cleaned['merge_by_class'] = str(params.get('merge_by_class', '')).lower() in ('1', 'true', 'yes')
+        return cleaned
+
+    def render(self, params):
+        from io import BytesIO
+        from core.services.statements import StatementBatch
+
+        term = self._term(params)
+        buffer = BytesIO()
+        StatementBatch(
+            term=term, class_ids=params['classes'], merge_by_class=params['merge_by_class'],
+        ).write(buffer)
+        return buffer.getvalue(), f"statements_{term.academic_year}_term{term.term}.zip"
+
+
+class ZimsecYearReport(Report):
+    """Reports over one year's ZIMSEC results"""
+
+    def clean_params(self, params):
+        return {'year': self._int_param(params, 'year', 2027)}
+
+    def source_stamp(self, params):
+        from core.models import ZimsecResults
+        return f"{_stamp(ZimsecResults.objects.filter(academic_year=params['year']))};{_school_stamp()}"
+
+    @staticmethod
+    def _results(params):
+        from core.models import ZimsecResults
+
+        results = list(ZimsecResults.objects.filter(
+            academic_year=params['year']
+        ).select_related('student', 'student__current_class'))
+        if not results:
+            raise ValueError(f"No ZIMSEC results found for {params['year']}")
+        return results
+
+
+class ZimsecStatisticsReport(ZimsecYearReport):
+    name = 'zimsec_report'
+    title = 'ZIMSEC Examination Report'
+
+    def render(self, params):
+        from io import BytesIO
+        from core.models.school_details import SchoolDetails
+        from core.services.export_service import PDFExporter, generate_statistics_snapshot
+
+        year = params['year']
+        stats = generate_statistics_snapshot(self._results(params), year)
+        pdf_exporter = PDFExporter(
+            title=f"ZIMSEC {year} Examination Report",
+            school_name=SchoolDetails.get_or_create_default().school_name
+        )
+        content_data = {
+            'summary': [
+                f"This report provides a comprehensive analysis of ZIMSEC examination results for {year}.",
+                f"A total of {stats['total_students']} students were examined across all Grade 7 classes.",
+                f"The overall pass rate achieved was {stats['pass_rate']:.1f}%, with an average aggregate of {stats['avg_aggregate']:.1f}.",
+            ],
+            'pass_rate': stats['pass_rate'],
+            'avg_aggregate': stats['avg_aggregate'],
+            'distinction_rate': stats['distinction_rate'],
+            'total_students': stats['total_students'],
+        }
+        file_buffer = BytesIO()
+        pdf_exporter.generate_report_to_buffer(file_buffer, content_data)
+        return file_buffer.getvalue(), f"ZIMSEC_{year}_Report.pdf"
+
+
+class ZimsecDetailedResultsReport(ZimsecYearReport):
+    name = 'zimsec_detailed_results'
+    title = 'ZIMSEC Detailed Results'
+
+    def render(self, params):
+        from io import BytesIO
+        from core.models.school_details import SchoolDetails
+        from core.services.export_service import DetailedResultsPDFExporter
+
+        year = params['year']
+        results_by_class = {}
+        for result in self._results(params):
+            # Use str() on the class object which calls __str__ method: "Grade X[A|B]"
+            class_name = str(result.student.current_class) if result.student.current_class else "Unassigned"
+            results_by_class.setdefault(class_name, []).append(result)
+
+        pdf_exporter = DetailedResultsPDFExporter(
+            title=f"ZIMSEC {year} Detailed Results",
+            school_name=SchoolDetails.get_or_create_default().school_name
+        )
+        file_buffer = BytesIO()
+        pdf_exporter.export_to_buffer(file_buffer, results_by_class)
+        return file_buffer.getvalue(), f"ZIMSEC_{year}_Detailed_Results.pdf"
+
+
+class Grade7CompletionReport(Report):
+    name = 'grade7_completion'
+    title = 'Grade 7 Completion Report'
+
+    def source_stamp(self, params):
+        from core.models import ZimsecResults
+        return f"{_stamp(ZimsecResults.objects.all())};{_school_stamp()}"
+
+    def render(self, params):
+        from core.models import Student, ZimsecResults
+        from core.models.school_details import SchoolDetails
+        from core.services.grade7_exporter import Grade7CompletionPDFExporter
+
+        # Get all students with ZIMSEC results (completed Grade 7)
+        students = Student.objects.filter(
+            id__in=ZimsecResults.objects.values('student_id')
+        ).select_related('current_class').order_by('surname', 'first_name')
+        if not students.exists():
+            raise ValueError('No students with ZIMSEC results found in the system')
+
+        students_by_class = {}
+        for student in students:
+            class_name = str(student.current_class) if student.current_class else "Grade 7 (2026)"
+            students_by_class.setdefault(class_name, []).append(student)
+
+        pdf_exporter = Grade7CompletionPDFExporter(school_name=SchoolDetails.get_or_create_default().school_name)
+        return pdf_exporter.export_to_buffer(students_by_class).getvalue(), 'Grade7_Completion_Report.pdf'
+
+
+REPORTS = {
+    report.name: report
+    for report in (
+        FeeDashboardReport, ArrearsPDFReport, StudentPaymentHistoryReport, TermStatementsReport,
+        ZimsecStatisticsReport, ZimsecDetailedResultsReport, Grade7CompletionReport,
+    )
+}
+
+
+def get_report(report_type):
+    if report_type not in REPORTS:
+        raise ValueError(f"Unknown report '{report_type}'")
+    return REPORTS[report_type]()
+
+
+def cache_key(report_type, params, stamp):
+    payload = json.dumps([report_type, params, stamp], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def enqueue(report_type, params=None, requested_by=None):
+    """Find or create the job for a report request
+
+    Returns:
+        tuple: (ReportJob, created) - created is False for a cached or in-flight job
+
+    Raises:
+        ValueError: Unknown report type or invalid parameters
+    """
+    from core.models import ReportJob
+
+    report = get_report(report_type)
+    params = report.clean_params(params or {})
+    stamp = report.source_stamp(params)
+    key = cache_key(report_type, params, stamp)
+
+    existing = ReportJob.objects.filter(
+        cache_key=key, status__in=('DONE', 'PENDING', 'RUNNING')
+    ).defer('content').order_by('-created_at').first()
+    if existing:
+        return existing, False
+
+    job = ReportJob.objects.create(
+        report_type=report_type,
+        params=params,
+        source_stamp=stamp,
+        cache_key=key,
+        requested_by=requested_by if getattr(requested_by, 'is_authenticated', False) else None,
+    )
+    return job, True
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next(worker=None):
+    """Claim the oldest pending job for this worker (None when the queue is empty)"""
+    from core.models import ReportJob
+
+    worker = worker or worker_name()
+    for job_id in ReportJob.objects.filter(status='PENDING').order_by('created_at').values_list('pk', flat=True)[:10]:
+        # Conditional UPDATE: only one worker can move a job out of PENDING
+        claimed = ReportJob.objects.filter(pk=job_id, status='PENDING').update(
+            status='RUNNING', worker=worker, started_at=timezone.now(),
+        )
+        if claimed:
+            return ReportJob.objects.defer('content').get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    """Render a claimed job and store the PDF (or the error)"""
+    from core.models import ReportJob
+
+    job.attempts += 1
+    try:
+        content, filename = get_report(job.report_type).render(job.params)
+    except Exception as e:
+        logger.exception(f"Report job {job.pk} ({job.report_type}) failed")
+        status = 'FAILED' if job.attempts >= MAX_ATTEMPTS or isinstance(e, ValueError) else 'PENDING'
+        ReportJob.objects.filter(pk=job.pk).update(
+            status=status, attempts=job.attempts, error=str(e), finished_at=timezone.now(),
+        )
+        job.status, job.error = status, str(e)
+        return job
+
+    job.status = 'DONE'
+    job.filename = filename
+    job.content = content
+    job.content_hash = hashlib.sha256(content).hexdigest()
+    job.size = len(content)
+    job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=[
+        'status', 'attempts', 'filename', 'content', 'content_hash', 'size', 'error', 'finished_at',
+    ])
+    logger.info(f"Report job {job.pk} ({job.report_type}) rendered {job.size} bytes")
+    return job
+
+
+def run_next(worker=None):
+    """Claim and render one job; returns it, or None when the queue is empty"""
+    job = claim_next(worker)
+    return run_job(job) if job else None
+
+
+def requeue_stale(stale_after=STALE_AFTER):
+    """Put RUNNING jobs whose worker died back in the queue"""
+    from core.models import ReportJob
+
+    return ReportJob.objects.filter(
+        status='RUNNING', started_at__lt=timezone.now() - stale_after
+    ).update(status='PENDING', worker='')
+
+
+def prune(keep_days=7):
+    """Delete finished jobs (and their PDFs) not produced or downloaded in keep_days"""
+    from django.db.models import Q
+    from core.models import ReportJob
+
+    cutoff = timezone.now() - timedelta(days=keep_days)
+    deleted, _ = ReportJob.objects.filter(
+        status__in=('DONE', 'FAILED'), finished_at__lt=cutoff,
+    ).filter(Q(last_downloaded_at__isnull=True) | Q(last_downloaded_at__lt=cutoff)).delete()
+    return deleted
@@ -0,0 +1,524 @@
+"""
+Academic Year Rollover
+
+Moves the school into the next academic year without touching students one
+at a time: the old rollover ran a class lookup, an arrears aggregate,
+student.save() (full_clean plus the balance receivers) and
+initialize_term_balance() per student inside a single request.
+
+1. plan() - RolloverPlanner loads the classes of both years (one query) and
+   the active students (one query) and works out in memory who is promoted
+   to which class and who graduates. ECDB pupils are spread over the Grade 1
+   sections by SectionBalancer, seeded with the year so a simulation and the
+   real run place them alike. Missing target classes are reported before
+   anything is written.
+2. enqueue() - stores the plan on a PENDING RolloverJob
+3. run_job() - applies the plan in phases, each one resumable:
+   YEAR      the new AcademicYear, its terms and their TermFees
+   PROMOTE   students moved into their new class with one UPDATE per
+             target class (Grade 7 graduates are deactivated) and a
+             StudentMovement per student, a batch per transaction;
+             job.processed is saved with each batch
+   BALANCES  Term 1 balances opened with TermActivationService, which
+             carries every student's unpaid balance forward as arrears
+
+The run_report_worker command runs queued jobs, and the browser polls the
+job's status; the rollover_year command runs one in the foreground.
+
+simulate() runs the same three phases inside a transaction that is rolled
+back, and reports what the rollover would do (students per target class,
+graduates, balances opened, arrears carried) with the time and number of
+queries each phase took.
+
+Set-based updates skip the Student post_save receivers, so promotion.mark_moved()
+does their work per batch: balances in the year of the new class are
+re-priced, the financial and ZIMSEC rollups marked and the search index
+invalidated. Balances of the finished year keep the fees they were billed with.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from core.services.promotion import (
+    BALANCED_GRADE, NEXT_GRADE, ClassMap, SectionBalancer, carried_arrears, class_label, graduate_students,
+    is_final_grade, mark_moved,
+)
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# A RUNNING job not updated for this long is assumed lost (worker killed) and re-queued
+STALE_AFTER = timedelta(minutes=15)
+MAX_ATTEMPTS = 3
+BATCH_SIZE = 500
+
+
+def _shift_year(day, years=1):
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:
+        # 29 February
+        return day.replace(year=day.year + years, day=28)
+
+
+class RolloverPlan:
+    """Where every active student goes in the new year"""
+
+    def __init__(self, from_year, to_year):
+        self.from_year = from_year
+        self.to_year = to_year
+        self.moves = []        # (student_id, from_class_id, to_class_id)
+        self.graduates = []    # (student_id, from_class_id)
+        self.missing = {}      # 'Grade 3 (for 2B)' -> students without a target class
+        self.class_sizes = {}  # to_class_id -> students arriving
+
+    @property
+    def is_complete(self):
+        return not self.missing
+
+    def missing_message(self):
+        return (
+            f"Cannot rollover: The following classes must exist in {self.to_year} "
+            f"for student promotion: {', '.join(sorted(self.missing))}. "
+            f"Please create these classes before rolling over."
+        )
+
+    def to_json(self):
+        return {
+            'moves': [list(move) for move in self.moves],
+            'graduates': [list(graduate) for graduate in self.graduates],
+        }
+
+    def summary(self):
+        return {
+            'promoted': len(self.moves),
+            'graduating': len(self.graduates),
+            'class_sizes': {str(class_id): size for class_id, size in self.class_sizes.items()},
+        }
+
+
+class RolloverPlanner:
+    """Computes the promotion plan for rolling `academic_year` over"""
+
+    def __init__(self, academic_year, balance_sex=True, seed=None):
+        """
+        Args:
+            balance_sex (bool): Spread boys and girls evenly over the Grade 1 sections
+            seed: Seed for the Grade 1 placement (defaults to the year)
+        """
+        self.academic_year = academic_year
+        self.to_year = academic_year.year + 1
+        self.balance_sex = balance_sex
+        self.seed = academic_year.year if seed is None else seed
+
+    def plan(self):
+        from core.models import Student
+
+        classes = ClassMap.load([self.academic_year.year, self.to_year])
+        plan = RolloverPlan(self.academic_year.year, self.to_year)
+        students = Student.objects.filter(
+            is_active=True, current_class__isnull=False,
+        ).select_related('current_class').only(
+            'id', 'sex', 'current_class__grade', 'current_class__section', 'current_class__academic_year',
+        ).order_by('id')
+
+        intake = []
+        for student in students:
+            current = student.current_class
+            if current.academic_year >= self.to_year:
+                continue  # Already in a class of the new year
+            if is_final_grade(current.grade):
+                plan.graduates.append((student.id, current.id))
+                continue
+            if str(current.grade) == BALANCED_GRADE:
+                intake.append(student)
+                continue
+            self._add(plan, student, classes.next_class(current, self.to_year))
+
+        placement = SectionBalancer(
+            classes.sections(NEXT_GRADE[BALANCED_GRADE], self.to_year), balance_sex=self.balance_sex, seed=self.seed,
+        ).assign(intake)
+        for student in intake:
+            self._add(plan, student, placement.get(student.id))
+        plan.moves.sort()
+        return plan
+
+    @staticmethod
+    def _add(plan, student, target):
+        current = student.current_class
+        if target is None:
+            key = f"Grade {NEXT_GRADE[str(current.grade)]} (for {current})"
+            plan.missing[key] = plan.missing.get(key, 0) + 1
+            return
+        plan.moves.append((student.id, current.id, target.id))
+        plan.class_sizes[target.id] = plan.class_sizes.get(target.id, 0) + 1
+
+
+def validate(academic_year, plan=None):
+    """The checks of AcademicYear._validate_rollover(); returns the plan"""
+    from core.models import AcademicYear
+
+    if AcademicYear.objects.filter(year=academic_year.year + 1).exists():
+        raise ValidationError(
+            f"Academic year {academic_year.year + 1} already exists. "
+            f"Cannot rollover to an existing year."
+        )
+    plan = plan or RolloverPlanner(academic_year).plan()
+    if not plan.is_complete:
+        raise ValidationError(plan.missing_message())
+    return plan
+
+
+def enqueue(academic_year, requested_by=None):
+    """Plan the rollover and queue it
+
+    Returns:
+        tuple: (RolloverJob, created) - created is False when a rollover of
+        this year is already queued or running
+
+    Raises:
+        ValidationError: The new year exists or target classes are missing
+    """
+    from core.models import RolloverJob
+
+    existing = RolloverJob.objects.filter(
+        from_year=academic_year.year, status__in=('PENDING', 'RUNNING')
+    ).first()
+    if existing:
+        return existing, False
+
+    plan = validate(academic_year)
+    job = RolloverJob.objects.create(
+        from_year=academic_year.year,
+        to_year=plan.to_year,
+        plan=plan.to_json(),
+        summary=plan.summary(),
+        requested_by=requested_by if getattr(requested_by, 'is_authenticated', False) else None,
+    )
+    return job, True
+
+
+def claim(job, worker=None):
+    """Move a PENDING job to RUNNING for this worker (False if someone else has it)"""
+    from core.models import RolloverJob
+    from core.services.report_jobs import worker_name
+
+    worker = worker or worker_name()
+    claimed = RolloverJob.objects.filter(pk=job.pk, status='PENDING').update(
+        status='RUNNING', worker=worker, started_at=timezone.now(), updated_at=timezone.now(),
+    )
+    if claimed:
+        job.refresh_from_db()
+    return bool(claimed)
+
+
+def claim_next(worker=None):
+    """Claim the oldest pending job (None when there is none)"""
+    from core.models import RolloverJob
+
+    for job in RolloverJob.objects.filter(status='PENDING').order_by('created_at')[:5]:
+        if claim(job, worker):
+            return job
+    return None
+
+
+def run_next(worker=None):
+    job = claim_next(worker)
+    return run_job(job) if job else None
+
+
+def run_job(job):
+    """Apply a claimed job's remaining phases"""
+    from core.models import RolloverJob
+
+    job.attempts += 1
+    RolloverJob.objects.filter(pk=job.pk).update(attempts=job.attempts)
+    try:
+        if job.phase == 'YEAR':
+            _create_year(job)
+        if job.phase == 'PROMOTE':
+            _promote(job)
+        if job.phase == 'BALANCES':
+            _open_balances(job)
+    except Exception as e:
+        logger.exception(f"Rollover job {job.pk} failed in phase {job.phase}")
+        status = 'FAILED' if job.attempts >= MAX_ATTEMPTS or isinstance(e, ValidationError) else 'PENDING'
+        message = '; '.join(e.messages) if isinstance(e, ValidationError) else str(e)
+        RolloverJob.objects.filter(pk=job.pk).update(
+            status=status, error=message, finished_at=timezone.now(), worker='',
+        )
+        job.status, job.error = status, message
+        return job
+
+    job.status = 'DONE'
+    job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+    logger.info(f"Rolled over {job.from_year} -> {job.to_year}: {job.summary}")
+    return job
+
+
+def resume(job):
+    """Queue a failed job again; it continues from the phase it stopped in"""
+    from core.models import RolloverJob
+
+    RolloverJob.objects.filter(pk=job.pk, status='FAILED').update(status='PENDING', attempts=0, error='')
+    job.refresh_from_db()
+    return job
+
+
+def requeue_stale(stale_after=STALE_AFTER):
+    """Put RUNNING jobs whose worker died back in the queue"""
+    from core.models import RolloverJob
+
+    return RolloverJob.objects.filter(
+        status='RUNNING', updated_at__lt=timezone.now() - stale_after
+    ).update(status='PENDING', worker='')
+
+
+def _advance(job, phase, total=0):
+    job.phase, job.processed, job.total = phase, 0, total
+    job.save(update_fields=['phase', 'processed', 'total', 'summary', 'updated_at'])
+
+
+def _create_year(job):
+    """The new AcademicYear with the old year's terms and fees shifted by a year"""
+    from core.models import AcademicTerm, AcademicYear, TermFee
+
+    current = AcademicYear.objects.get(year=job.from_year)
+    with transaction.atomic():
+        new_year = AcademicYear.objects.create(
+            year=job.to_year,
+            start_date=_shift_year(current.start_date),
+            end_date=_shift_year(current.end_date),
+            is_active=False,  # Don't automatically activate
+        )
+        fees = {}
+        for fee in TermFee.objects.filter(term__academic_year=job.from_year):
+            fees.setdefault(fee.term_id, []).append(fee)
+        for term in current.get_terms():
+            new_term = AcademicTerm.objects.create(
+                academic_year=new_year.year,
+                term=term.term,
+                start_date=_shift_year(term.start_date),
+                end_date=_shift_year(term.end_date),
+                is_current=False,
+            )
+            TermFee.objects.bulk_create([
+                TermFee(term=new_term, grade_level=fee.grade_level, amount=fee.amount)
+                for fee in fees.get(term.id, [])
+            ])
+        _advance(job, 'PROMOTE', len(job.plan.get('moves', [])) + len(job.plan.get('graduates', [])))
+
+
+def _promote(job, batch_size=BATCH_SIZE):
+    """Apply the plan in batches from job.processed on"""
+    items = [(student, from_class, to_class) for student, from_class, to_class in job.plan.get('moves', [])]
+    items += [(student, from_class, None) for student, from_class in job.plan.get('graduates', [])]
+
+    while job.processed < len(items):
+        batch = items[job.processed:job.processed + batch_size]
+        with transaction.atomic():
+            _promote_batch(job, batch)
+            job.processed += len(batch)
+            job.save(update_fields=['processed', 'updated_at'])
+    _advance(job, 'BALANCES')
+
+
+def _promote_batch(job, batch):
+    from core.models import Student, StudentMovement
+
+    students = Student.objects.in_bulk([student_id for student_id, _, _ in batch])
+    # The last balance of the year is what carries forward
+    arrears = carried_arrears(students, job.from_year)
+
+    targets, movements = {}, []
+    for student_id, from_class, to_class in batch:
+        student = students.get(student_id)
+        # Skip students moved since the plan was made (or by an earlier attempt)
+        if student is None or student.current_class_id != from_class or not student.is_active:
+            continue
+        targets.setdefault(to_class, []).append(student_id)
+        owed = arrears.get(student_id, Decimal('0'))
+        movements.append(StudentMovement(
+            student_id=student_id,
+            from_class_id=from_class,
+            to_class_id=to_class,
+            movement_type='GRADUATION' if to_class is None else 'PROMOTION',
+            reason=f'Year rollover {job.from_year} -> {job.to_year}',
+            previous_arrears=owed,
+            preserved_arrears=owed,
+            is_bulk_operation=True,
+            bulk_operation_id=str(job.pk),
+        ))
+
+    if not movements:
+        return
+    # One UPDATE per target class (graduates under None) rather than a CASE per student
+    for to_class, student_ids in targets.items():
+        if to_class is None:
+            graduate_students(student_ids)
+        else:
+            Student.objects.filter(id__in=student_ids).update(current_class_id=to_class)
+    StudentMovement.objects.bulk_create(movements, batch_size=BATCH_SIZE)
+    mark_moved([student_id for ids in targets.values() for student_id in ids])
+
+
+def _open_balances(job):
+    from core.models import AcademicTerm, RolloverJob
+    from core.services.term_activation import TermActivationService
+
+    first_term = AcademicTerm.objects.get(academic_year=job.to_year, term=1)
+
+    def progress(processed, total):
+        RolloverJob.objects.filter(pk=job.pk).update(processed=processed, total=total, updated_at=timezone.now())
+
+    result = TermActivationService(first_term, progress_callback=progress).activate(missing_only=True)
+    job.summary['balances_created'] = job.summary.get('balances_created', 0) + result['created']
+    job.summary['balance_errors'] = result['errors'][:50]
+    _advance(job, 'DONE')
+
+
+def run_now(academic_year, requested_by=None):
+    """Plan and apply a rollover in the foreground; returns the finished job
+
+    Raises:
+        ValidationError: The rollover cannot start, or failed part way (the
+        job is left FAILED and can be resumed)
+    """
+    job, _ = enqueue(academic_year, requested_by)
+    if not claim(job):
+        raise ValidationError(f"A rollover of {academic_year.year} is already running")
+    job = run_job(job)
+    if job.status != 'DONE':
+        from core.models import RolloverJob
+
+        RolloverJob.objects.filter(pk=job.pk).update(status='FAILED')
+        job.status = 'FAILED'
+        raise ValidationError(f"Rollover stopped in phase {job.get_phase_display()}: {job.error}")
+    return job
+
+
+class _QueryCounter:
+    """connection.execute_wrapper() hook counting the queries run"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def simulate(academic_year):
+    """Run the rollover of `academic_year` and roll it back
+
+    Every phase runs exactly as a real rollover would, so the report reflects
+    the data as it is now (missing fees, enrolment problems) rather than the
+    plan alone. Nothing is kept: the transaction is rolled back and the
+    on_commit hooks of the phases never run.
+
+    Returns:
+        dict: {'from_year', 'to_year', 'promoted', 'graduating', 'target_classes',
+               'graduates', 'balances', 'arrears', 'balance_errors', 'profile'}
+
+    Raises:
+        ValidationError: The rollover cannot start (see validate())
+    """
+    from core.models import RolloverJob
+    from core.services import current_period
+
+    phases = dict(RolloverJob.PHASE_CHOICES)
+    profile = []
+    with transaction.atomic():
+        counter = _QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            plan = validate(academic_year)
+        profile.append(_phase_profile('PLAN', 'Plan promotions', started, counter))
+
+        job = RolloverJob.objects.create(
+            from_year=plan.from_year,
+            to_year=plan.to_year,
+            plan=plan.to_json(),
+            summary=plan.summary(),
+            status='RUNNING',
+            worker='simulation',
+        )
+        for phase, apply in (('YEAR', _create_year), ('PROMOTE', _promote), ('BALANCES', _open_balances)):
+            counter = _QueryCounter()
+            started = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                apply(job)
+            profile.append(_phase_profile(phase, phases[phase], started, counter))
+
+        report = _simulation_report(job)
+        transaction.set_rollback(True)
+    # The phases may have cached the new year's terms
+    current_period.invalidate()
+
+    report['profile'] = profile
+    report['seconds'] = round(sum(phase['seconds'] for phase in profile), 3)
+    report['queries'] = sum(phase['queries'] for phase in profile)
+    return report
+
+
+def _phase_profile(phase, label, started, counter):
+    return {
+        'phase': phase,
+        'label': label,
+        'seconds': round(time.perf_counter() - started, 3),
+        'queries': counter.count,
+    }
+
+
+def _simulation_report(job):
+    """What a (not yet rolled back) simulated job changed, in JSON-ready values"""
+    from core.models import Class, StudentBalance, StudentMovement, TermFee
+
+    movements = StudentMovement.objects.filter(bulk_operation_id=str(job.pk))
+    classes = Class.objects.in_bulk(list(job.summary.get('class_sizes', {})))
+    target_classes = [
+        {
+            'class_id': row['to_class'],
+            'name': class_label(classes[row['to_class']].grade, classes[row['to_class']].section),
+            'grade': classes[row['to_class']].grade,
+            'section': classes[row['to_class']].section,
+            'students': row['students'],
+            'arrears': float(row['arrears'] or 0),
+        }
+        for row in movements.filter(movement_type='PROMOTION').values('to_class').annotate(
+            students=Count('id'), arrears=Sum('preserved_arrears'),
+        )
+    ]
+    graduates = movements.filter(movement_type='GRADUATION').aggregate(
+        students=Count('id'), arrears=Sum('preserved_arrears'),
+    )
+    balances = StudentBalance.objects.filter(term__academic_year=job.to_year, term__term=1).aggregate(
+        count=Count('id'), previous_arrears=Sum('previous_arrears'), total_due=Sum('total_due'),
+    )
+    promoted_arrears = sum(row['arrears'] for row in target_classes)
+
+    return {
+        'from_year': job.from_year,
+        'to_year': job.to_year,
+        'promoted': job.summary['promoted'],
+        'graduating': job.summary['graduating'],
+        'term_fees_created': TermFee.objects.filter(term__academic_year=job.to_year).count(),
+        'target_classes': sorted(target_classes, key=lambda row: (row['grade'].isdigit(), row['grade'], row['section'])),
+        'graduates': {'students': graduates['students'], 'arrears': float(graduates['arrears'] or 0)},
+        'balances': {
+            'created': job.summary.get('balances_created', 0),
+            'total_due': float(balances['total_due'] or 0),
+        },
+        'arrears': {
+            # Unpaid balances of the promoted students at the end of the year...
+            'to_carry': round(promoted_arrears, 2),
+            # ...and what their Term 1 balances open with (imported arrears included)
+            'carried': float(balances['previous_arrears'] or 0),
+        },
+        'balance_errors': job.summary.get('balance_errors', []),
+    }
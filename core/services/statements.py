@@ -0,0 +1,206 @@
+"""
+Term Statements
+
+End-of-term statements (the student payment history PDF) for every student
+with a balance in a term, written to one zip file.
+
+Instead of one export_student_payment_history call per student (each
+initialising a balance and running its own queries):
+1. collect() reads the term's balances (with students and classes) and
+   payments in two queries and turns them into plain, picklable Statement rows
+2. The rows are split into chunks (or one chunk per class when merging) and
+   rendered across a ProcessPoolExecutor; each worker renders its chunk with
+   ReportLab and returns the PDF bytes. Workers receive the school branding
+   up front, so they do not touch the database
+3. The parent writes the PDFs into the zip as chunks complete
+
+Zip layout:
+    <class>/<surname>_<first name>_<id>.pdf   one statement per student
+    <class>.pdf                               merge_by_class=True: the class's
+                                              statements in one PDF, each
+                                              student starting on a new page
+
+workers=1 renders in-process (used by tests and small classes).
+"""
+import os
+import re
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from django.db import connections
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 25
+
+StatementStudent = namedtuple('StatementStudent', 'id full_name date_of_birth current_class')
+
+
+class StatementPayment(namedtuple('StatementPayment', 'created_at amount payment_method_display reference_number')):
+    """A payment as the PDF renderer reads it"""
+    __slots__ = ()
+
+    def get_payment_method_display(self):
+        return self.payment_method_display
+
+
+# One student's statement: (student, payments, balance_info, class label, archive name)
+Statement = namedtuple('Statement', 'student payments balance_info class_label filename')
+
+
+def _safe(value):
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', str(value)).strip('_') or 'unassigned'
+
+
+def collect(term, class_ids=None):
+    """Statement rows for every student with a balance in the term (two queries)
+
+    Args:
+        term (AcademicTerm): Term the statements are for
+        class_ids (iterable): Only students currently in these classes
+
+    Returns:
+        list: Statement rows ordered by class, surname and first name
+    """
+    from core.models import Payment, StudentBalance
+
+    balances = StudentBalance.objects.filter(term=term).select_related('student__current_class')
+    if class_ids:
+        balances = balances.filter(student__current_class_id__in=list(class_ids))
+    balances = list(balances.order_by(
+        'student__current_class__grade', 'student__current_class__section', 'student__surname', 'student__first_name',
+    ))
+
+    methods = dict(Payment.PAYMENT_METHODS)
+    payments = {}
+    rows = Payment.objects.filter(
+        term=term, student_id__in=[balance.student_id for balance in balances]
+    ).order_by('student_id', '-created_at').values_list(
+        'student_id', 'created_at', 'amount', 'payment_method', 'reference_number',
+    )
+    for student_id, created_at, amount, method, reference in rows.iterator(chunk_size=2000):
+        payments.setdefault(student_id, []).append(
+            StatementPayment(created_at, amount, methods.get(method, method), reference)
+        )
+
+    statements = []
+    for balance in balances:
+        student = balance.student
+        class_label = str(student.current_class) if student.current_class else 'Unassigned'
+        statements.append(Statement(
+            student=StatementStudent(student.id, student.full_name, student.date_of_birth, class_label),
+            payments=payments.get(student.id, []),
+            balance_info={
+                'term_fee': float(balance.term_fee),
+                'amount_paid': float(balance.amount_paid),
+                'previous_arrears': float(balance.previous_arrears),
+                'current_balance': float(balance.current_balance),
+            },
+            class_label=class_label,
+            filename=f"{_safe(class_label)}/{_safe(student.surname)}_{_safe(student.first_name)}_{student.id}.pdf",
+        ))
+    return statements
+
+
+def render_chunk(statements, merge=False):
+    """Render statements to [(archive name, pdf bytes)] (runs in a worker process)"""
+    from core.utils.pdf_reports_modern import PaymentHistoryReport
+
+    if merge:
+        buffer = PaymentHistoryReport.generate_statements_pdf(
+            (s.student, s.payments, s.balance_info) for s in statements
+        )
+        return [(f"{_safe(statements[0].class_label)}.pdf", buffer.getvalue())]
+    return [
+        (s.filename, PaymentHistoryReport.generate_student_payment_pdf(s.student, s.payments, s.balance_info).getvalue())
+        for s in statements
+    ]
+
+
+def _init_worker(branding):
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    from core.utils import report_theme
+
+    report_theme.use_branding(branding)
+
+
+class StatementBatch:
+    """Render every statement of a term into a zip"""
+
+    def __init__(self, term=None, class_ids=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, merge_by_class=False):
+        """
+        Args:
+            term (AcademicTerm): Defaults to the current term
+            class_ids (iterable): Only these classes (default: the whole school)
+            workers (int): Render processes (default: one per CPU; 1 renders in-process)
+            chunk_size (int): Students per task when not merging
+            merge_by_class (bool): One PDF per class instead of one per student
+        """
+        from core.models import AcademicTerm
+
+        self.term = term or AcademicTerm.get_current_term()
+        self.class_ids = class_ids
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(chunk_size, 1)
+        self.merge_by_class = merge_by_class
+
+    def chunks(self, statements):
+        if self.merge_by_class:
+            groups = {}
+            for statement in statements:
+                groups.setdefault(statement.class_label, []).append(statement)
+            return list(groups.values())
+        return [statements[i:i + self.chunk_size] for i in range(0, len(statements), self.chunk_size)]
+
+    def write(self, output):
+        """Render into `output` (a path or a binary file object)
+
+        Returns:
+            dict: {'term', 'students', 'files', 'bytes', 'workers', 'seconds'}
+        """
+        from core.utils import report_theme
+
+        if not self.term:
+            raise ValueError('No current term is set')
+
+        started = time.perf_counter()
+        statements = collect(self.term, self.class_ids)
+        chunks = self.chunks(statements)
+        workers = min(self.workers, len(chunks)) or 1
+        result = {'term': str(self.term), 'students': len(statements), 'files': 0, 'bytes': 0, 'workers': workers}
+
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for rendered in self._render(chunks, workers, report_theme.branding()):
+                for name, content in rendered:
+                    archive.writestr(name, content)
+                    result['files'] += 1
+                    result['bytes'] += len(content)
+
+        result['seconds'] = round(time.perf_counter() - started, 2)
+        logger.info(
+            f"Statements for {self.term}: {result['students']} students, {result['files']} files, "
+            f"{result['bytes']} bytes with {workers} workers in {result['seconds']}s"
+        )
+        return result
+
+    def _render(self, chunks, workers, branding):
+        merge = [self.merge_by_class] * len(chunks)
+        if workers <= 1:
+            return map(render_chunk, chunks, merge)
+        # Forked workers must not inherit open database connections (left
+        # alone inside a transaction, where closing would abort it)
+        if not any(conn.in_atomic_block for conn in connections.all()):
+            connections.close_all()
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(branding,))
+        return self._results(executor, chunks, merge)
+
+    @staticmethod
+    def _results(executor, chunks, merge):
+        with executor:
+            yield from executor.map(render_chunk, chunks, merge)
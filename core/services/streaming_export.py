@@ -0,0 +1,477 @@
+"""
+Streaming Exports
+
+CSV and XLSX downloads of students, balances, payments, the arrears vault and
+ZIMSEC results that start sending immediately and hold one chunk of rows in
+memory at a time, whatever the size of the school.
+
+- Rows are read with values_list() (no model instances) through
+  QuerySet.iterator(chunk_size=...), which uses a server-side cursor on
+  PostgreSQL and fetchmany() on SQLite
+- Each chunk is encoded and yielded before the next one is fetched; the view
+  wraps the generator in a StreamingHttpResponse
+- CSV can be gzip-compressed on the fly (a .csv.gz download)
+- XLSX is written as a minimal SpreadsheetML package through zipfile on a
+  non-seekable sink, so the sheet is compressed and sent while it is written
+  (no openpyxl needed)
+
+Datasets declare their columns (key -> header and field path or expression)
+and the request filters they accept; callers pick columns by key.
+"""
+import csv
+import re
+import zipfile
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+from django.db.models import CharField, Q, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def _class_label(prefix=''):
+    return Concat(f'{prefix}current_class__grade', f'{prefix}current_class__section', output_field=CharField())
+
+
+def _term_label(prefix=''):
+    return Concat(
+        Cast(f'{prefix}term__academic_year', CharField()), Value(' Term '), Cast(f'{prefix}term__term', CharField()),
+        output_field=CharField(),
+    )
+
+
+def _truthy(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+class ExportDataset:
+    """Columns, base queryset and accepted filters of one export
+
+    columns: (key, header, field path or expression) in default order
+    filters: {request parameter: lookup string, or callable(value) -> Q}
+    """
+    name = None
+    title = None
+    columns = ()
+    filters = {}
+    ordering = ('pk',)
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def default_filters(self):
+        """Filters applied when the request gives none for that parameter"""
+        return {}
+
+    def column_keys(self):
+        return [key for key, _, _ in self.columns]
+
+    def filter_queryset(self, queryset, params):
+        values = dict(self.default_filters())
+        values.update({key: value for key, value in params.items() if key in self.filters and value not in ('', None)})
+        for key, value in values.items():
+            if value == 'all':
+                continue
+            spec = self.filters[key]
+            queryset = queryset.filter(spec(value) if callable(spec) else Q(**{spec: value}))
+        return queryset
+
+
+class StudentExport(ExportDataset):
+    name = 'students'
+    title = 'Students'
+    columns = (
+        ('id', 'ID', 'id'),
+        ('surname', 'Surname', 'surname'),
+        ('first_name', 'First Name', 'first_name'),
+        ('birth_entry_number', 'Birth Entry Number', 'birth_entry_number'),
+        ('sex', 'Sex', 'sex'),
+        ('date_of_birth', 'Date of Birth', 'date_of_birth'),
+        ('class', 'Class', _class_label()),
+        ('grade', 'Grade', 'current_class__grade'),
+        ('status', 'Status', 'status'),
+        ('is_active', 'Active', 'is_active'),
+        ('is_archived', 'Archived', 'is_archived'),
+        ('date_enrolled', 'Date Enrolled', 'date_enrolled'),
+    )
+    filters = {
+        'class_id': 'current_class_id',
+        'grade': 'current_class__grade',
+        'gender': 'sex',
+        'status': 'status',
+        'active': lambda value: Q(is_active=_truthy(value)),
+        'ids': lambda value: Q(id__in=[int(i) for i in str(value).split(',') if i.strip().isdigit()]),
+    }
+    ordering = ('surname', 'first_name', 'id')
+
+    def get_queryset(self):
+        from core.models import Student
+        return Student.objects.all()
+
+
+class BalanceExport(ExportDataset):
+    name = 'balances'
+    title = 'Balances'
+    columns = (
+        ('student_id', 'Student ID', 'student_id'),
+        ('surname', 'Surname', 'student__surname'),
+        ('first_name', 'First Name', 'student__first_name'),
+        ('birth_entry_number', 'Birth Entry Number', 'student__birth_entry_number'),
+        ('class', 'Class', _class_label('student__')),
+        ('term', 'Term', _term_label()),
+        ('term_fee', 'Term Fee', 'term_fee'),
+        ('previous_arrears', 'Previous Arrears', 'previous_arrears'),
+        ('total_due', 'Total Due', 'total_due'),
+        ('amount_paid', 'Amount Paid', 'amount_paid'),
+        ('current_balance', 'Current Balance', 'current_balance'),
+        ('last_payment_date', 'Last Payment Date', 'last_payment_date'),
+    )
+    filters = {
+        'term': 'term_id',
+        'class_id': 'student__current_class_id',
+        'grade': 'student__current_class__grade',
+        'outstanding': lambda value: Q(current_balance__gt=0) if _truthy(value) else Q(current_balance__lte=0),
+        'arrears': lambda value: Q(previous_arrears__gt=0) if _truthy(value) else Q(previous_arrears__lte=0),
+    }
+    ordering = ('term__academic_year', 'term__term', 'student__surname', 'student__first_name', 'id')
+
+    def get_queryset(self):
+        from core.models import StudentBalance
+        return StudentBalance.objects.all()
+
+    def default_filters(self):
+        from core.models import AcademicTerm
+        term = AcademicTerm.get_current_term()
+        return {'term': term.pk} if term else {}
+
+
+class PaymentExport(ExportDataset):
+    name = 'payments'
+    title = 'Payments'
+    columns = (
+        ('receipt_number', 'Receipt Number', 'receipt_number'),
+        ('reference_number', 'Reference', 'reference_number'),
+        ('payment_date', 'Payment Date', 'payment_date'),
+        ('amount', 'Amount', 'amount'),
+        ('payment_method', 'Method', 'payment_method'),
+        ('student_id', 'Student ID', 'student_id'),
+        ('surname', 'Surname', 'student__surname'),
+        ('first_name', 'First Name', 'student__first_name'),
+        ('birth_entry_number', 'Birth Entry Number', 'student__birth_entry_number'),
+        ('term', 'Term', _term_label()),
+        ('recorded_by', 'Recorded By', 'recorded_by__email'),
+        ('notes', 'Notes', 'notes'),
+    )
+    filters = {
+        'term': 'term_id',
+        'student': 'student_id',
+        'method': 'payment_method',
+        'date_from': 'payment_date__gte',
+        'date_to': 'payment_date__lte',
+    }
+    ordering = ('payment_date', 'id')
+
+    def get_queryset(self):
+        from core.models import Payment
+        return Payment.objects.all()
+
+
+class ArrearsVaultExport(ExportDataset):
+    name = 'arrears_vault'
+    title = 'Arrears Vault'
+    columns = (
+        ('student_id', 'Student ID', 'student_id'),
+        ('student_full_name', 'Student', 'student_full_name'),
+        ('student_birth_entry', 'Birth Entry Number', 'student_birth_entry'),
+        ('graduation_year', 'Graduation Year', 'graduation_year'),
+        ('graduation_date', 'Graduation Date', 'graduation_date'),
+        ('fixed_balance', 'Fixed Balance', 'fixed_balance'),
+        ('total_escrowed', 'Escrowed', 'total_escrowed'),
+        ('status', 'Status', 'status'),
+        ('parent_name', 'Parent', 'parent_name'),
+        ('parent_phone', 'Parent Phone', 'parent_phone'),
+        ('parent_email', 'Parent Email', 'parent_email'),
+        ('transition_date', 'Transition Date', 'transition_date'),
+    )
+    filters = {
+        'year': 'graduation_year',
+        'status': 'status',
+    }
+    ordering = ('graduation_year', 'student_full_name', 'id')
+
+    def get_queryset(self):
+        from core.models import ArrearsVault
+        return ArrearsVault.objects.all()
+
+
+class ZimsecResultsExport(ExportDataset):
+    name = 'zimsec_results'
+    title = 'ZIMSEC Results'
+    columns = (
+        ('student_id', 'Student ID', 'student_id'),
+        ('surname', 'Surname', 'student__surname'),
+        ('first_name', 'First Name', 'student__first_name'),
+        ('birth_entry_number', 'Birth Entry Number', 'student__birth_entry_number'),
+        ('academic_year', 'Year', 'academic_year'),
+        ('candidate_number', 'Candidate Number', 'candidate_number'),
+        ('exam_center', 'Exam Centre', 'exam_center'),
+        ('english_units', 'English', 'english_units'),
+        ('mathematics_units', 'Mathematics', 'mathematics_units'),
+        ('science_units', 'Science', 'science_units'),
+        ('social_studies_units', 'Social Studies', 'social_studies_units'),
+        ('indigenous_language_units', 'Indigenous Language', 'indigenous_language_units'),
+        ('agriculture_units', 'Agriculture', 'agriculture_units'),
+        ('total_aggregate', 'Aggregate', 'total_aggregate'),
+        ('overall_status', 'Status', 'overall_status'),
+        ('result_date', 'Result Date', 'result_date'),
+    )
+    filters = {
+        'year': 'academic_year',
+        'status': 'overall_status',
+    }
+    ordering = ('academic_year', 'student__surname', 'student__first_name', 'id')
+
+    def get_queryset(self):
+        from core.models import ZimsecResults
+        return ZimsecResults.objects.all()
+
+
+DATASETS = {
+    dataset.name: dataset
+    for dataset in (StudentExport, BalanceExport, PaymentExport, ArrearsVaultExport, ZimsecResultsExport)
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class StreamingExport:
+    """One export request: a dataset, its columns and filters, and an output format"""
+
+    def __init__(self, dataset, columns=None, params=None, file_format='csv', compress=False,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            dataset (str): Key of DATASETS
+            columns (list): Column keys to include (defaults to all, in dataset order)
+            params (dict): Request filters; keys the dataset does not accept are ignored
+            file_format (str): 'csv' or 'xlsx'
+            compress (bool): gzip the CSV stream (XLSX is already compressed)
+            chunk_size (int): Rows fetched and encoded per chunk
+
+        Raises:
+            ValueError: Unknown dataset, format or column
+        """
+        if dataset not in DATASETS:
+            raise ValueError(f"Unknown export '{dataset}'. Choose from: {', '.join(DATASETS)}")
+        if file_format not in FORMATS:
+            raise ValueError(f"Unknown format '{file_format}'. Choose from: {', '.join(FORMATS)}")
+
+        self.dataset = DATASETS[dataset]()
+        keys = self.dataset.column_keys()
+        columns = [c for c in (columns or keys) if c]
+        unknown = [c for c in columns if c not in keys]
+        if unknown:
+            raise ValueError(f"Unknown column(s) for {dataset}: {', '.join(unknown)}")
+
+        definitions = {key: (header, source) for key, header, source in self.dataset.columns}
+        self.columns = [(key,) + definitions[key] for key in columns]
+        self.params = params or {}
+        self.file_format = file_format
+        self.compress = compress and file_format == 'csv'
+        self.chunk_size = chunk_size
+
+    @property
+    def content_type(self):
+        return 'application/gzip' if self.compress else FORMATS[self.file_format]
+
+    @property
+    def filename(self):
+        stamp = timezone.now().strftime('%Y%m%d')
+        name = f'{self.dataset.name}_{stamp}.{self.file_format}'
+        return f'{name}.gz' if self.compress else name
+
+    @property
+    def headers(self):
+        return [header for _, header, _ in self.columns]
+
+    def queryset(self):
+        """values_list() query of the selected columns, filtered and ordered"""
+        queryset = self.dataset.filter_queryset(self.dataset.get_queryset(), self.params)
+        expressions = {
+            f'export_{key}': source for key, _, source in self.columns if not isinstance(source, str)
+        }
+        if expressions:
+            queryset = queryset.annotate(**expressions)
+        fields = [source if isinstance(source, str) else f'export_{key}' for key, _, source in self.columns]
+        return queryset.order_by(*self.dataset.ordering).values_list(*fields)
+
+    def chunks(self):
+        """Lists of at most chunk_size row tuples, fetched as they are consumed"""
+        chunk = []
+        for row in self.queryset().iterator(chunk_size=self.chunk_size):
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def stream(self):
+        """Byte chunks of the export file"""
+        parts = self._xlsx() if self.file_format == 'xlsx' else self._csv()
+        if self.compress:
+            parts = _gzip(parts)
+        return parts
+
+    def _csv(self):
+        buffer = _Echo()
+        writer = csv.writer(buffer)
+        yield writer.writerow(self.headers).encode('utf-8')
+        for chunk in self.chunks():
+            yield ''.join(writer.writerow([_csv_value(v) for v in row]) for row in chunk).encode('utf-8')
+
+    def _xlsx(self):
+        sink = _ZipSink()
+        with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as package:
+            for name, content in _xlsx_parts(self.dataset.title).items():
+                package.writestr(name, content)
+            with package.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+                letters = [_column_letter(i) for i in range(len(self.columns))]
+                sheet.write(
+                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                )
+                sheet.write(_xlsx_row(1, letters, self.headers))
+                row_number = 1
+                for chunk in self.chunks():
+                    rows = []
+                    for row in chunk:
+                        row_number += 1
+                        rows.append(_xlsx_row(row_number, letters, row))
+                    sheet.write(b''.join(rows))
+                    data = sink.drain()
+                    if data:
+                        yield data
+                sheet.write(b'</sheetData></worksheet>')
+        yield sink.drain()
+
+
+class _Echo:
+    """File-like object for csv.writer that hands back each written line"""
+
+    def write(self, value):
+        return value
+
+
+class _ZipSink:
+    """Write-only, non-seekable target for ZipFile; drain() returns what was written since"""
+
+    def __init__(self):
+        self._parts = []
+        self._offset = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _gzip(parts):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for part in parts:
+        data = compressor.compress(part)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M') if timezone.is_aware(value) else value.isoformat(' ')
+    return '' if value is None else value
+
+
+# Control characters XML 1.0 does not allow
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xlsx_row(number, letters, values):
+    cells = []
+    for letter, value in zip(letters, values):
+        ref = f'{letter}{number}'
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            cells.append(f'<c r="{ref}" t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, float, Decimal)):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            if isinstance(value, (date, datetime)):
+                value = _csv_value(value) if isinstance(value, datetime) else value.isoformat()
+            text = escape(_XML_ILLEGAL.sub('', str(value)))
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'.encode('utf-8')
+
+
+def _xlsx_parts(sheet_title):
+    """The fixed parts of a one-sheet workbook"""
+    main = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+    relationships = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    package_relationships = 'http://schemas.openxmlformats.org/package/2006/relationships'
+    header = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    return {
+        '[Content_Types].xml': (
+            f'{header}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '</Types>'
+        ),
+        '_rels/.rels': (
+            f'{header}<Relationships xmlns="{package_relationships}">'
+            f'<Relationship Id="rId1" Type="{relationships}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ),
+        'xl/workbook.xml': (
+            f'{header}<workbook xmlns="{main}" xmlns:r="{relationships}">'
+            f'<sheets><sheet name="{escape(sheet_title[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        ),
+        'xl/_rels/workbook.xml.rels': (
+            f'{header}<Relationships xmlns="{package_relationships}">'
+            f'<Relationship Id="rId1" Type="{relationships}/worksheet" Target="worksheets/sheet1.xml"/>'
+            '</Relationships>'
+        ),
+    }
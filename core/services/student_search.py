@@ -0,0 +1,415 @@
+"""
+Student Search
+
+Ranked student lookup over surname, first_name, birth_entry_number, class
+(grade and grade+section, e.g. "3A") and guardian details (the parent name and
+phone frozen in ArrearsVault), for the global search page, the student search
+filters and front desk autocomplete.
+
+Two backends, chosen by the database vendor:
+1. PostgreSQL - icontains filters served by pg_trgm GIN indexes (migration
+   0059), ranked by trigram word similarity; a similarity() pass catches
+   misspellings when nothing matches literally
+2. Everything else (SQLite) - an in-process token index: a sorted vocabulary
+   answers prefix lookups with bisect, a trigram map over the vocabulary answers
+   infix and misspelt terms. Built from one values() query on first use
+
+Every query term must match (AND). A term scores 3 for an exact token, 2 for a
+token prefix, 1.5 for an infix and up to 1 for a trigram near-miss; results
+are ordered by total score, then surname and first name.
+
+Freshness of the in-process index:
+- Student, Class and ArrearsVault receivers in core/signals.py call
+  refresh_students() / invalidate() on commit
+- refresh_students() patches the documents in place and bumps a version
+  number in Django's cache; an index built against another version, or older
+  than MAX_AGE seconds, is rebuilt on the next search. With locmem each worker
+  only sees its own bumps, so other workers catch up within MAX_AGE (the same
+  trade-off as current_period); a shared cache removes that lag
+- Code writing students with queryset.update() or bulk_create() calls
+  invalidate() itself
+"""
+import bisect
+import heapq
+import threading
+import time
+import unicodedata
+import re
+from django.core.cache import cache
+from django.db import connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'student_search:version'
+MAX_AGE = 300
+MIN_QUERY_LENGTH = 2
+FUZZY_THRESHOLD = 0.4
+
+# Words people type around a class name ("grade 3a") that carry no meaning
+STOPWORDS = {'grade', 'class', 'form'}
+
+SCORE_EXACT = 3.0
+SCORE_PREFIX = 2.0
+SCORE_INFIX = 1.5
+
+TOKEN = re.compile(r'[a-z0-9]+')
+
+# Document layout (tuples keep 50k students small in memory)
+ID, SURNAME, FIRST_NAME, BIRTH_ENTRY, CLASS_ID, GRADE, SECTION, SEX, DOB, IS_ACTIVE, IS_ARCHIVED, STATUS, GUARDIAN, GUARDIAN_PHONE = range(14)
+RESULT_FIELDS = (
+    'id', 'surname', 'first_name', 'birth_entry_number', 'class_id', 'grade', 'section',
+    'sex', 'date_of_birth', 'is_active', 'is_archived', 'status', 'guardian', 'guardian_phone',
+)
+
+_lock = threading.RLock()
+_index = None
+
+
+def normalize(text):
+    """Lowercase ASCII form used for both documents and queries"""
+    text = str(text or '')
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return text.lower()
+
+
+def tokenize(text):
+    return TOKEN.findall(normalize(text))
+
+
+def query_terms(query):
+    return [term for term in tokenize(query) if term not in STOPWORDS]
+
+
+def trigrams(token):
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StudentSearchIndex:
+    """In-process token index over every non-deleted student"""
+
+    def __init__(self, version=None):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.docs = {}
+        self.doc_tokens = {}
+        self.sort_keys = {}
+        self.postings = {}
+        self.vocab = []
+        self.trigram_tokens = {}
+
+    @classmethod
+    def build(cls, version=None):
+        index = cls(version)
+        rows = _document_rows()
+        tokens = {}
+        for doc in rows:
+            index.docs[doc[ID]] = doc
+            index.sort_keys[doc[ID]] = _sort_key(doc)
+            index.doc_tokens[doc[ID]] = doc_tokens = _document_tokens(doc)
+            for token in doc_tokens:
+                tokens.setdefault(token, set()).add(doc[ID])
+        index.postings = tokens
+        index.vocab = sorted(tokens)
+        for token in index.vocab:
+            for gram in trigrams(token):
+                index.trigram_tokens.setdefault(gram, set()).add(token)
+        return index
+
+    def __len__(self):
+        return len(self.docs)
+
+    # -- maintenance ---------------------------------------------------------
+
+    def remove(self, student_id):
+        doc = self.docs.pop(student_id, None)
+        if doc is None:
+            return
+        self.sort_keys.pop(student_id, None)
+        for token in self.doc_tokens.pop(student_id, ()):
+            ids = self.postings.get(token)
+            if ids is not None:
+                ids.discard(student_id)
+
+    def add(self, doc):
+        self.remove(doc[ID])
+        self.docs[doc[ID]] = doc
+        self.sort_keys[doc[ID]] = _sort_key(doc)
+        self.doc_tokens[doc[ID]] = doc_tokens = _document_tokens(doc)
+        for token in doc_tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                self.postings[token] = ids = set()
+                bisect.insort(self.vocab, token)
+                for gram in trigrams(token):
+                    self.trigram_tokens.setdefault(gram, set()).add(token)
+            ids.add(doc[ID])
+
+    # -- querying ------------------------------------------------------------
+
+    def search(self, query, limit=20):
+        """Ranked result dicts (RESULT_FIELDS plus 'score') for a free-text query"""
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        term_tokens = [self._term_tokens(term) for term in dict.fromkeys(terms)]
+        if not all(term_tokens):
+            return []
+        if len(term_tokens) > 1:
+            # Rarest term first: it bounds the candidates the others are checked against
+            term_tokens.sort(key=lambda tokens: sum(len(self.postings[t]) for t in tokens))
+
+        scores = {}
+        for token, score in term_tokens[0].items():
+            for student_id in self.postings[token]:
+                if scores.get(student_id, 0) < score:
+                    scores[student_id] = score
+
+        for tokens in term_tokens[1:]:
+            matched = {}
+            if sum(len(self.postings[t]) for t in tokens) <= 4 * len(scores):
+                # Walk the term's postings and keep the candidates among them
+                for token, score in tokens.items():
+                    for student_id in self.postings[token]:
+                        total = scores.get(student_id)
+                        if total is not None and matched.get(student_id, 0) < total + score:
+                            matched[student_id] = total + score
+            else:
+                # Few candidates: check each candidate's own tokens
+                for student_id, total in scores.items():
+                    best = max((tokens.get(t, 0) for t in self.doc_tokens[student_id]), default=0)
+                    if best:
+                        matched[student_id] = total + best
+            scores = matched
+            if not scores:
+                return []
+
+        top = heapq.nsmallest(
+            limit, scores.items(), key=lambda item: (-item[1], self.sort_keys[item[0]])
+        ) if limit else sorted(scores.items(), key=lambda item: (-item[1], self.sort_keys[item[0]]))
+        return [dict(zip(RESULT_FIELDS, self.docs[student_id]), score=score) for student_id, score in top]
+
+    def _term_tokens(self, term):
+        """{token: score} of the vocabulary tokens a query term matches"""
+        matches = {}
+        start = bisect.bisect_left(self.vocab, term)
+        for position in range(start, len(self.vocab)):
+            token = self.vocab[position]
+            if not token.startswith(term):
+                break
+            if self.postings[token]:
+                matches[token] = SCORE_EXACT if token == term else SCORE_PREFIX
+        if matches or len(term) < 3:
+            return matches
+
+        # No prefix hit: infix (e.g. the middle of a birth entry number) or a misspelling
+        term_grams = trigrams(term)
+        shared = {}
+        for gram in term_grams:
+            for token in self.trigram_tokens.get(gram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        for token, count in shared.items():
+            if not self.postings[token]:
+                continue
+            if term in token:
+                matches[token] = SCORE_INFIX
+                continue
+            similarity = count / (len(term_grams) + len(trigrams(token)) - count)
+            if similarity >= FUZZY_THRESHOLD:
+                matches[token] = similarity
+        return matches
+
+
+def _document_rows(student_ids=None):
+    """Document tuples for every non-deleted student (or just these ids)"""
+    from core.models import Student
+    from core.models.arrears_vault import ArrearsVault
+
+    students = Student.objects.all()
+    guardians = ArrearsVault.objects.all()
+    if student_ids is not None:
+        students = students.filter(id__in=student_ids)
+        guardians = guardians.filter(student_id__in=student_ids)
+    guardian_by_student = {
+        student_id: (name, phone)
+        for student_id, name, phone in guardians.values_list('student_id', 'parent_name', 'parent_phone')
+    }
+    rows = students.order_by().values_list(
+        'id', 'surname', 'first_name', 'birth_entry_number', 'current_class_id',
+        'current_class__grade', 'current_class__section', 'sex', 'date_of_birth',
+        'is_active', 'is_archived', 'status',
+    )
+    return [row + guardian_by_student.get(row[0], ('', '')) for row in rows]
+
+
+def _document_tokens(doc):
+    tokens = set(tokenize(doc[SURNAME]))
+    tokens.update(tokenize(doc[FIRST_NAME]))
+    tokens.update(tokenize(doc[BIRTH_ENTRY]))
+    tokens.add(''.join(tokenize(doc[BIRTH_ENTRY])))
+    if doc[GRADE]:
+        grade = normalize(doc[GRADE])
+        tokens.add(grade)
+        tokens.add(grade + normalize(doc[SECTION]))
+    tokens.update(tokenize(doc[GUARDIAN]))
+    phone = ''.join(tokenize(doc[GUARDIAN_PHONE]))
+    if phone:
+        tokens.add(phone)
+    tokens.discard('')
+    return tuple(tokens)
+
+
+def _sort_key(doc):
+    return (normalize(doc[SURNAME]), normalize(doc[FIRST_NAME]), doc[ID])
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 0
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def _bump_version():
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+        return 1
+
+
+def get_index():
+    """The process index, rebuilt when stale (see the module docstring)"""
+    global _index
+
+    version = _version()
+    with _lock:
+        index = _index
+        if index is None or index.version != version or time.monotonic() - index.built_at > MAX_AGE:
+            started = time.perf_counter()
+            index = _index = StudentSearchIndex.build(version)
+            logger.debug(
+                'Student search index built: %s students in %.0f ms',
+                len(index), (time.perf_counter() - started) * 1000,
+            )
+        return index
+
+
+def search(query, limit=20):
+    """Ranked students matching a free-text query
+
+    Returns dicts with RESULT_FIELDS plus 'score'. Queries shorter than
+    MIN_QUERY_LENGTH return nothing. limit=None returns every match.
+    """
+    if len(query.strip()) < MIN_QUERY_LENGTH:
+        return []
+    if connection.vendor == 'postgresql':
+        return _search_postgres(query, limit)
+    index = get_index()
+    with _lock:
+        return index.search(query, limit)
+
+
+def search_ids(query, limit=None):
+    """Ids of the matching students, best match first"""
+    return [result['id'] for result in search(query, limit)]
+
+
+def refresh_students(student_ids):
+    """Re-read these students into the process index (or drop them once deleted)"""
+    global _index
+
+    version = _bump_version()
+    with _lock:
+        index = _index
+        if index is None:
+            return
+        if index.version != version - 1:
+            _index = None
+            return
+        docs = {doc[ID]: doc for doc in _document_rows(student_ids)}
+        for student_id in student_ids:
+            if student_id in docs:
+                index.add(docs[student_id])
+            else:
+                index.remove(student_id)
+        index.version = version
+
+
+def invalidate():
+    """Rebuild the index on the next search (bulk writes, class renames)"""
+    global _index
+
+    _bump_version()
+    with _lock:
+        _index = None
+
+
+def _search_postgres(query, limit):
+    """Trigram-indexed search (pg_trgm GIN indexes from migration 0059)"""
+    from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+    from django.db.models import CharField, Exists, OuterRef, Q, Value
+    from django.db.models.functions import Concat, Greatest, Lower
+    from core.models import Student
+    from core.models.arrears_vault import ArrearsVault
+
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    students = Student.objects.annotate(
+        class_label=Lower(Concat('current_class__grade', 'current_class__section', output_field=CharField())),
+    )
+    literal = Q()
+    score = None
+    for term in terms:
+        guardian = ArrearsVault.objects.filter(student_id=OuterRef('pk')).filter(
+            Q(parent_name__icontains=term) | Q(parent_phone__contains=term)
+        )
+        literal &= (
+            Q(surname__icontains=term)
+            | Q(first_name__icontains=term)
+            | Q(birth_entry_number__icontains=term)
+            | Q(current_class__grade__iexact=term)
+            | Q(class_label=term)
+            | Exists(guardian)
+        )
+        term_score = Greatest(
+            TrigramWordSimilarity(Value(term), 'surname'),
+            TrigramWordSimilarity(Value(term), 'first_name'),
+            TrigramWordSimilarity(Value(term), 'birth_entry_number'),
+        )
+        score = term_score if score is None else score + term_score
+
+    fields = (
+        'id', 'surname', 'first_name', 'birth_entry_number', 'current_class_id',
+        'current_class__grade', 'current_class__section', 'sex', 'date_of_birth',
+        'is_active', 'is_archived', 'status',
+    )
+    ranked = students.annotate(score=score).order_by('-score', 'surname', 'first_name', 'id')
+    rows = list(ranked.filter(literal).values_list(*fields, 'score')[:limit])
+    if not rows:
+        # Misspellings: nothing matched literally, fall back to similarity
+        text = ' '.join(terms)
+        rows = list(ranked.annotate(
+            surname_similarity=TrigramSimilarity('surname', text),
+            first_name_similarity=TrigramSimilarity('first_name', text),
+        ).filter(
+            Q(surname_similarity__gte=FUZZY_THRESHOLD) | Q(first_name_similarity__gte=FUZZY_THRESHOLD)
+        ).values_list(*fields, 'score')[:limit])
+
+    guardians = {
+        student_id: (name, phone)
+        for student_id, name, phone in ArrearsVault.objects.filter(
+            student_id__in=[row[0] for row in rows]
+        ).values_list('student_id', 'parent_name', 'parent_phone')
+    }
+    return [
+        dict(zip(RESULT_FIELDS, row[:-1] + guardians.get(row[0], ('', ''))), score=row[-1])
+        for row in rows
+    ]
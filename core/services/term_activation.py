@@ -0,0 +1,218 @@
+"""
+Term Activation Service
+
+Opens a term for every active student in one pass: StudentBalance rows are
+created (or have their carried-forward arrears corrected) for the whole school
+using a fixed number of queries instead of one initialize_term_balance() call
+per student.
+
+The rules mirror StudentBalance.initialize_term_balance(), which remains the
+per-student reference implementation:
+1. Fee is the TermFee for the student's grade level (ECD or PRIMARY) plus any
+   ECD class extras
+2. previous_arrears = current_balance of the previous term (or the last term of
+   the previous year for Term 1) + imported arrears applied to this term
+3. Existing balances only ever have previous_arrears increased
+4. Grade 7 students entering Term 1 with an unpaid previous year carry forward
+   that balance only (no imported arrears are added)
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Sum
+from core.models import Student, StudentBalance, StudentLedgerEntry, TermFee
+from core.models.arrears_import import StudentArrearsRecord
+from core.services import financial_snapshots
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TermActivationService:
+    """Set-based creation of StudentBalance records when a term becomes current"""
+
+    def __init__(self, term, batch_size=500, progress_callback=None):
+        """
+        Args:
+            term (AcademicTerm): The term being opened
+            batch_size (int): Rows per bulk_create/bulk_update statement
+            progress_callback (callable): Called as progress_callback(processed, total)
+                after each batch of students has been resolved
+        """
+        self.term = term
+        self.batch_size = batch_size
+        self.progress_callback = progress_callback
+
+    def missing_students(self):
+        """Active students without a StudentBalance for the term (a single anti-join query)"""
+        return Student.objects.filter(is_active=True, is_deleted=False).exclude(balances__term=self.term)
+
+    def activate(self, missing_only=False, student_ids=None):
+        """
+        Create or correct balances for all active students in the term.
+
+        Args:
+            missing_only (bool): Only create balances for students that have
+                none yet; existing balances are not re-checked
+            student_ids (list): Only open the term for these students
+
+        Returns:
+            dict: {'students': int, 'created': int, 'updated': int, 'unchanged': int, 'errors': list}
+        """
+        if missing_only:
+            students = self.missing_students()
+        else:
+            students = Student.objects.filter(is_active=True, is_deleted=False)
+        if student_ids is not None:
+            students = students.filter(id__in=list(student_ids))
+        students = list(students.select_related('current_class'))
+        result = {
+            'students': len(students),
+            'created': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'errors': [],
+        }
+        if not students:
+            return result
+
+        fees = {fee.grade_level: fee for fee in TermFee.objects.filter(term=self.term)}
+        previous_balances = self._load_previous_balances()
+        applied_arrears = self._load_applied_arrears()
+        existing = {} if missing_only else {
+            balance.student_id: balance
+            for balance in StudentBalance.objects.filter(
+                term=self.term, student__is_active=True, student__is_deleted=False
+            )
+        }
+        profile_fees, class_fees = StudentBalance.load_ecd_fee_components(
+            [s.current_class_id for s in students if s.current_class_id], [self.term.id]
+        )
+
+        today = timezone.now().date()
+        to_create = []
+        to_update = []
+        for index, student in enumerate(students, start=1):
+            grade_level = self.grade_level_for(student)
+            previous = previous_balances.get(student.id)
+            carry_only = self._carries_unpaid_year_only(student, previous)
+
+            term_fee = fees.get(grade_level)
+            balance = existing.get(student.id)
+            error = None
+            if term_fee is None:
+                error = f"Term fee has not been set for {grade_level} students in this term"
+            elif balance is None:
+                error = self._enrollment_error(student, today)
+            if error:
+                result['errors'].append(f"{student.full_name}: {error}")
+            elif carry_only:
+                if balance is None:
+                    to_create.append(self._new_balance(student, term_fee, previous, profile_fees, class_fees))
+                else:
+                    result['unchanged'] += 1
+            else:
+                arrears = (previous or Decimal('0')) + applied_arrears.get(student.id, Decimal('0'))
+                if balance is None:
+                    to_create.append(self._new_balance(student, term_fee, arrears, profile_fees, class_fees))
+                elif arrears > (balance.previous_arrears or Decimal('0')):
+                    balance.previous_arrears = arrears
+                    balance.refresh_derived_totals()
+                    balance.updated_at = timezone.now()
+                    to_update.append(balance)
+                else:
+                    result['unchanged'] += 1
+
+            if self.progress_callback and (index % self.batch_size == 0 or index == len(students)):
+                self.progress_callback(index, len(students))
+
+        with transaction.atomic():
+            StudentBalance.objects.bulk_create(to_create, batch_size=self.batch_size)
+            StudentBalance.objects.bulk_update(
+                to_update,
+                ['previous_arrears', 'updated_at', *StudentBalance.MATERIALIZED_FIELDS],
+                batch_size=self.batch_size,
+            )
+            # bulk writes bypass StudentBalance.save(), so post the ledger entries here
+            StudentLedgerEntry.record_balances(
+                self.term, to_create + to_update,
+                description=f'{self.term} opened', batch_size=self.batch_size,
+            )
+            if to_create or to_update:
+                financial_snapshots.mark_terms([self.term.id])
+
+        result['created'] = len(to_create)
+        result['updated'] = len(to_update)
+        logger.info(
+            f'Opened {self.term}: {result["created"]} created, {result["updated"]} updated, '
+            f'{result["unchanged"]} unchanged, {len(result["errors"])} error(s)'
+        )
+        return result
+
+    @staticmethod
+    def grade_level_for(student):
+        """TermFee grade level for a student's current class"""
+        student_grade = str(student.current_class.grade) if student.current_class else ''
+        return 'ECD' if student_grade.startswith('ECD') else 'PRIMARY'
+
+    def _carries_unpaid_year_only(self, student, previous):
+        """Grade 7 rule: Term 1 with an unpaid balance from the previous year"""
+        if self.term.term != 1 or not student.current_class or previous is None:
+            return False
+        try:
+            grade_int = int(student.current_class.grade)
+        except (TypeError, ValueError):
+            return False
+        return grade_int >= 7 and previous > 0
+
+    def _enrollment_error(self, student, today):
+        """Same checks as StudentBalance._validate_enrollment_status() for a new balance"""
+        if not student.current_class:
+            return "Student must be enrolled in a class before billing"
+        if student.date_enrolled > self.term.start_date and today > self.term.end_date:
+            return "Cannot create fees for past terms"
+        return None
+
+    def _new_balance(self, student, term_fee, previous_arrears, profile_fees, class_fees):
+        balance = StudentBalance(
+            student=student,
+            term=self.term,
+            term_fee_record=term_fee,
+            previous_arrears=previous_arrears,
+            amount_paid=Decimal('0'),
+        )
+        # bulk_create bypasses save(), so fill the stored totals here
+        balance.term_fee = StudentBalance.resolve_term_fee(
+            term_fee.amount, student.current_class, self.term.id, profile_fees, class_fees
+        )
+        balance.refresh_derived_totals()
+        return balance
+
+    def _load_previous_balances(self):
+        """{student_id: current_balance} for the term each student carries forward from"""
+        balances = StudentBalance.objects.filter(student__is_active=True, student__is_deleted=False)
+        if self.term.term > 1:
+            balances = balances.filter(
+                term__academic_year=self.term.academic_year,
+                term__term=self.term.term - 1,
+            )
+        else:
+            balances = balances.filter(term__academic_year=self.term.academic_year - 1)
+
+        previous = {}
+        # Latest term first, so the first row seen per student wins
+        for student_id, current_balance in balances.order_by('student_id', '-term__term').values_list(
+            'student_id', 'current_balance'
+        ):
+            previous.setdefault(student_id, current_balance)
+        return previous
+
+    def _load_applied_arrears(self):
+        """{student_id: imported arrears applied to this term}"""
+        return {
+            row['student_id']: row['total'] or Decimal('0')
+            for row in StudentArrearsRecord.objects.filter(
+                is_applied_to_balance=True,
+                applied_to_term=self.term,
+            ).values('student_id').annotate(total=Sum('total_arrears'))
+        }
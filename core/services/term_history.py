@@ -0,0 +1,80 @@
+"""
+Term History Snapshots
+
+When a term is completed every student enrolled in it gets a
+StudentTermHistory row recording the class they were in, their status and
+their balance for the term. The rows are written with bulk_create and
+ignore_conflicts: a snapshot is append-only, so taking it again (the term is
+saved again, or the backfill command is re-run) only adds the students that
+were missing and never rewrites history, including rows written by
+StudentTermHistory.mark_term3_attendance().
+
+A student is enrolled in a term when they have a StudentBalance for it, or
+are active in a class of the term's year without one. Students already
+promoted into the next year's class are recorded in the class they left.
+"""
+from django.db import transaction
+from core.models import Student, StudentBalance, StudentMovement, StudentTermHistory
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_term(term, batch_size=500):
+    """Record the class, status and balance of every student enrolled in `term`
+
+    Returns:
+        int: History rows added
+    """
+    enrolled = {}
+    for row in StudentBalance.objects.filter(term=term, student__is_deleted=False).values(
+        'student_id', 'student__status', 'student__current_class_id',
+        'student__current_class__academic_year', 'term_fee', 'amount_paid', 'current_balance',
+    ):
+        enrolled[row['student_id']] = row
+    for row in Student.objects.filter(
+        is_active=True, current_class__academic_year=term.academic_year,
+    ).exclude(id__in=list(enrolled)).values('id', 'status', 'current_class_id'):
+        enrolled[row['id']] = {
+            'student_id': row['id'],
+            'student__status': row['status'],
+            'student__current_class_id': row['current_class_id'],
+            'student__current_class__academic_year': term.academic_year,
+            'term_fee': None,
+            'amount_paid': None,
+            'current_balance': None,
+        }
+    if not enrolled:
+        return 0
+
+    # Students already moved on to another year: the class they left
+    moved = [
+        student_id for student_id, row in enrolled.items()
+        if row['student__current_class__academic_year'] != term.academic_year
+    ]
+    left_class = {}
+    if moved:
+        for student_id, from_class in StudentMovement.objects.filter(
+            student_id__in=moved, from_class__academic_year=term.academic_year,
+        ).order_by('student_id', '-movement_date').values_list('student_id', 'from_class_id'):
+            left_class.setdefault(student_id, from_class)
+
+    history = [
+        StudentTermHistory(
+            student_id=student_id,
+            academic_year=term.academic_year,
+            academic_term=term,
+            class_enrolled_id=left_class.get(student_id) if student_id in moved else row['student__current_class_id'],
+            status=row['student__status'],
+            term_fee=row['term_fee'],
+            amount_paid=row['amount_paid'],
+            balance=row['current_balance'],
+        )
+        for student_id, row in enrolled.items()
+    ]
+    before = StudentTermHistory.objects.filter(academic_term=term).count()
+    with transaction.atomic():
+        StudentTermHistory.objects.bulk_create(history, batch_size=batch_size, ignore_conflicts=True)
+    added = StudentTermHistory.objects.filter(academic_term=term).count() - before
+    logger.info(f'Term history for {term}: {added} of {len(history)} students recorded')
+    return added
@@ -0,0 +1,304 @@
+"""
+ZIMSEC Results Import Service
+
+Saves a cohort's Grade 7 results in bulk instead of one Student.objects.get
+and update_or_create (and one ZimsecResults.save()) per candidate.
+
+Rows are handled in chunks:
+1. Parse and range-check the unit values (1-9, blank for not yet entered)
+2. One query for the chunk's students and one for their existing results
+   (by student or candidate number)
+3. total_aggregate and overall_status are computed with
+   ZimsecResults.outcome(), the rule save() uses
+4. bulk_create the new results and bulk_update the existing ones, inside
+   one transaction
+
+bulk_create/bulk_update skip the ZimsecResults post_save receivers, so the
+year's ZimsecYearStats rows are marked for refresh once at the end.
+
+Two row shapes are accepted:
+- save_entries(entries) - the entry form and batch save API: dicts with
+  student_id and the six *_units values
+- import_csv(file) / import_xlsx(file) - the official ZIMSEC results sheet,
+  keyed by candidate_number. A candidate number already on a result updates
+  that result; a new one needs birth_entry_number to find the student.
+
+Sheet columns (header names are case-insensitive, spaces allowed):
+    candidate_number    - required
+    birth_entry_number  - required for candidates not imported before
+    exam_center         - optional
+    english, mathematics, science, social_studies,
+    indigenous_language, agriculture
+                        - units 1-9 (the *_units field names also work)
+"""
+import csv
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from core.models import Student, ZimsecResults
+from core.services import zimsec_stats
+from core.utils.lazy_imports import is_available, lazy
+import logging
+
+logger = logging.getLogger(__name__)
+
+load_workbook = lazy('openpyxl', 'load_workbook')
+
+SHEET_COLUMNS = {
+    'candidate_number': ('candidate_number', 'candidate_no', 'candidate'),
+    'birth_entry_number': ('birth_entry_number', 'birth_entry_no', 'birth_entry'),
+    'exam_center': ('exam_center', 'exam_centre', 'centre', 'center'),
+    'english_units': ('english', 'english_units'),
+    'mathematics_units': ('mathematics', 'maths', 'mathematics_units'),
+    'science_units': ('science', 'general_science', 'science_units'),
+    'social_studies_units': ('social_studies', 'social_studies_units'),
+    'indigenous_language_units': ('indigenous_language', 'language', 'indigenous_language_units'),
+    'agriculture_units': ('agriculture', 'agriculture_units'),
+}
+HEADER_ALIASES = {alias: column for column, aliases in SHEET_COLUMNS.items() for alias in aliases}
+
+
+def _header(name):
+    name = str(name or '').strip().lower().replace(' ', '_').replace('-', '_')
+    return HEADER_ALIASES.get(name, name)
+
+
+def _sheet_rows(header, rows):
+    """Dicts keyed by the canonical column names, blank rows skipped"""
+    columns = [_header(name) for name in header]
+    for row in rows:
+        values = {column: value for column, value in zip(columns, row)}
+        if any(str(value).strip() for value in values.values() if value is not None):
+            yield values
+
+
+class ZimsecImportService:
+    """Chunked upsert of one academic year's ZIMSEC results"""
+
+    def __init__(self, academic_year, chunk_size=1000, dry_run=False):
+        """
+        Args:
+            academic_year (int): Year the results are for
+            chunk_size (int): Rows looked up and written per batch
+            dry_run (bool): Validate and report only; nothing is written
+        """
+        self.academic_year = int(academic_year)
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+
+    def save_entries(self, entries):
+        """Upsert entry form rows ({'student_id', '<subject>_units', ...})"""
+        return self._run(entries, keyed_by_candidate=False)
+
+    def import_rows(self, rows):
+        """Upsert results sheet rows (dicts keyed by SHEET_COLUMNS names)"""
+        return self._run(rows, keyed_by_candidate=True)
+
+    def import_csv(self, file_obj):
+        """Import a results sheet from a CSV file object (text mode)"""
+        reader = csv.reader(file_obj)
+        header = next(reader, [])
+        return self.import_rows(_sheet_rows(header, reader))
+
+    def import_xlsx(self, file_obj):
+        """Import a results sheet from the first worksheet of an XLSX workbook"""
+        if not is_available('openpyxl'):
+            raise ValueError('openpyxl is not installed; upload the results sheet as CSV')
+        workbook = load_workbook(file_obj, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, ())
+            return self.import_rows(_sheet_rows(header, rows))
+        finally:
+            workbook.close()
+
+    def _run(self, rows, keyed_by_candidate):
+        """
+        Returns:
+            dict: {'rows', 'created', 'updated', 'failed',
+                   'errors': [{'row', 'student', 'candidate_number', 'error'}]}
+        """
+        self._keyed_by_candidate = keyed_by_candidate
+        self._seen_students = set()
+        self._seen_candidates = set()
+        result = {'rows': 0, 'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+
+        with transaction.atomic():
+            chunk = []
+            for row in rows:
+                result['rows'] += 1
+                chunk.append((result['rows'], row))
+                if len(chunk) >= self.chunk_size:
+                    self._import_chunk(chunk, result)
+                    chunk = []
+            if chunk:
+                self._import_chunk(chunk, result)
+
+            result['failed'] = len(result['errors'])
+            if (result['created'] or result['updated']) and not self.dry_run:
+                zimsec_stats.mark_years([self.academic_year])
+
+        logger.info(
+            f"ZIMSEC import for {self.academic_year}: {result['created']} created, "
+            f"{result['updated']} updated, {result['failed']} failed"
+            + (' (dry run)' if self.dry_run else '')
+        )
+        return result
+
+    def _import_chunk(self, chunk, result):
+        parsed = []
+        for row_number, row in chunk:
+            try:
+                parsed.append((row_number, row, self._parse(row)))
+            except ValueError as e:
+                self._error(result, row_number, row, str(e))
+
+        students = self._match_students([values for _, _, values in parsed])
+        existing = ZimsecResults.objects.filter(
+            Q(student_id__in=[s.id for s in students.values()])
+            | Q(candidate_number__in=[v['candidate_number'] for _, _, v in parsed if v['candidate_number']])
+        )
+        by_student = {r.student_id: r for r in existing}
+        by_candidate = {r.candidate_number: r for r in by_student.values() if r.candidate_number}
+
+        now = timezone.now()
+        to_create, to_update, update_fields = [], [], set()
+        for row_number, row, values in parsed:
+            try:
+                student_id = self._student_for(values, students, by_candidate)
+                record = self._check(values, student_id, by_student, by_candidate)
+            except ValueError as e:
+                self._error(result, row_number, row, str(e))
+                continue
+
+            self._seen_students.add(student_id)
+            if values['candidate_number']:
+                self._seen_candidates.add(values['candidate_number'])
+            if record is None:
+                record = ZimsecResults(student_id=student_id, academic_year=self.academic_year)
+                to_create.append(record)
+            else:
+                record.updated_at = now
+                to_update.append(record)
+                update_fields.update(values['fields'])
+            for field, value in values['fields'].items():
+                setattr(record, field, value)
+            record.calculate_outcome()
+
+        result['created'] += len(to_create)
+        result['updated'] += len(to_update)
+        if self.dry_run:
+            return
+        if to_create:
+            ZimsecResults.objects.bulk_create(to_create, batch_size=self.chunk_size)
+        if to_update:
+            update_fields.update(['total_aggregate', 'overall_status', 'updated_at'])
+            ZimsecResults.objects.bulk_update(to_update, sorted(update_fields), batch_size=self.chunk_size)
+
+    def _parse(self, row):
+        fields = {}
+        for field in ZimsecResults.UNIT_FIELDS:
+            if self._keyed_by_candidate and field not in row:
+                continue
+            fields[field] = self._units(row.get(field), field)
+
+        values = {
+            'student_id': None,
+            'birth_entry_number': str(row.get('birth_entry_number') or '').strip().upper(),
+            'candidate_number': str(row.get('candidate_number') or '').strip(),
+            'fields': fields,
+        }
+        if self._keyed_by_candidate:
+            if not values['candidate_number']:
+                raise ValueError('No candidate_number')
+            if len(values['candidate_number']) > 20:
+                raise ValueError(f"Candidate number {values['candidate_number']} is longer than 20 characters")
+            fields['candidate_number'] = values['candidate_number']
+            exam_center = str(row.get('exam_center') or '').strip()
+            if exam_center:
+                fields['exam_center'] = exam_center[:100]
+        else:
+            try:
+                values['student_id'] = int(row.get('student_id'))
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid student_id '{row.get('student_id')}'")
+        return values
+
+    @staticmethod
+    def _units(value, field):
+        if value is None or str(value).strip() == '':
+            return None
+        try:
+            units = float(str(value).strip())
+        except ValueError:
+            units = None
+        if units is None or units != int(units) or not 1 <= units <= 9:
+            raise ValueError(f"Invalid {field.replace('_', ' ')} '{value}' (expected 1-9)")
+        return int(units)
+
+    def _match_students(self, parsed):
+        """One query for the chunk's student ids and birth entry numbers, keyed both ways"""
+        ids = {values['student_id'] for values in parsed if values['student_id']}
+        numbers = {values['birth_entry_number'] for values in parsed if values['birth_entry_number']}
+        students = {}
+        for student in Student.objects.filter(Q(id__in=ids) | Q(birth_entry_number__in=numbers)).only(
+            'id', 'birth_entry_number'
+        ):
+            students[student.id] = student
+            students[student.birth_entry_number] = student
+        return students
+
+    def _student_for(self, values, students, by_candidate):
+        if not self._keyed_by_candidate:
+            if values['student_id'] not in students:
+                raise ValueError(f"Student {values['student_id']} not found")
+            return values['student_id']
+
+        record = by_candidate.get(values['candidate_number'])
+        student = students.get(values['birth_entry_number']) if values['birth_entry_number'] else None
+        if record is not None:
+            if values['birth_entry_number'] and (student is None or student.id != record.student_id):
+                raise ValueError(
+                    f"Candidate number {values['candidate_number']} belongs to another student"
+                )
+            return record.student_id
+        if student is None:
+            if values['birth_entry_number']:
+                raise ValueError(f"No student with birth entry number {values['birth_entry_number']}")
+            raise ValueError(
+                f"Candidate number {values['candidate_number']} is new; a birth_entry_number is needed"
+            )
+        return student.id
+
+    def _check(self, values, student_id, by_student, by_candidate):
+        """The existing result to update (None to create one), or ValueError"""
+        if student_id in self._seen_students:
+            raise ValueError('Student appears more than once in this import')
+        candidate = values['candidate_number']
+        if candidate and candidate in self._seen_candidates:
+            raise ValueError(f"Candidate number {candidate} appears more than once in this import")
+
+        record = by_student.get(student_id)
+        if candidate:
+            owner = by_candidate.get(candidate)
+            if owner is not None and owner.student_id != student_id:
+                raise ValueError(f"Candidate number {candidate} belongs to another student")
+        if record is not None and record.academic_year != self.academic_year:
+            raise ValueError(f"Student already has ZIMSEC results for {record.academic_year}")
+        return record
+
+    @staticmethod
+    def _error(result, row_number, row, message):
+        result['errors'].append({
+            'row': row_number,
+            'student': str(row.get('student_id') or row.get('birth_entry_number') or ''),
+            'candidate_number': str(row.get('candidate_number') or ''),
+            'error': message,
+        })
+
+    @staticmethod
+    def write_error_report(errors, file_obj):
+        """Write the per-row error report as CSV"""
+        writer = csv.DictWriter(file_obj, fieldnames=['row', 'student', 'candidate_number', 'error'])
+        writer.writeheader()
+        writer.writerows(errors)
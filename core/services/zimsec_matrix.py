@@ -0,0 +1,155 @@
+"""
+ZIMSEC Result Matrix
+
+Columnar view of a year's ZimsecResults for the advanced analytics views
+(class, subject and gender comparisons and the statistical tests).
+
+Before, each panel loaded the results as model instances and filtered them
+again per class, gender and subject with list comprehensions. ResultMatrix
+reads the year once through values_list into a single NumPy structured array
+(one int column per subject plus aggregate, status, class id and sex), and the
+group-by kernels below run vectorised over it:
+
+- group_summary(key) - counts, passes, aggregate sums and distinctions per
+  class or sex (np.unique + np.bincount)
+- groups(key) - the aggregates of each class or sex, as arrays for scipy
+- subject_summary() - per-subject counts and unit bands over the 6 columns
+- crosstab(row, column) - contingency table of two coded columns
+
+Missing values are stored as 0 (units are 1-9 and aggregates at least 6);
+status, sex and class use -1 / 0 for unknown. NumPy is optional: the module
+only imports it when a matrix is built, and the views using it check
+is_available('numpy') first.
+
+benchmark_zimsec_analytics times the matrix against the list comprehensions.
+"""
+from core.utils.lazy_imports import lazy
+
+np = lazy('numpy')
+
+SUBJECT_FIELDS = [
+    'english_units',
+    'mathematics_units',
+    'science_units',
+    'social_studies_units',
+    'indigenous_language_units',
+    'agriculture_units',
+]
+SEX_CODES = {'M': 0, 'F': 1}
+STATUS_CODES = {'FAIL': 0, 'PASS': 1}
+COLUMNS = SUBJECT_FIELDS + ['total_aggregate', 'overall_status', 'student__current_class_id', 'student__sex']
+
+
+def result_dtype():
+    return np.dtype(
+        [(field, 'i1') for field in SUBJECT_FIELDS]
+        + [('aggregate', 'i2'), ('status', 'i1'), ('class_id', 'i8'), ('sex', 'i1')]
+    )
+
+
+class ResultMatrix:
+    """One structured array row per candidate"""
+
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from values_list(*COLUMNS) tuples"""
+        records = [
+            tuple(value or 0 for value in row[:7])
+            + (STATUS_CODES.get(row[7], -1), row[8] or 0, SEX_CODES.get(row[9], -1))
+            for row in rows
+        ]
+        return cls(np.array(records, dtype=result_dtype()))
+
+    @classmethod
+    def load(cls, year):
+        """All results of an academic year (one query)"""
+        from core.models.zimsec import ZimsecResults
+
+        rows = ZimsecResults.objects.filter(academic_year=year).order_by().values_list(*COLUMNS)
+        return cls.from_rows(rows.iterator(chunk_size=2000))
+
+    def __len__(self):
+        return len(self.data)
+
+    def sex_code(self, sex):
+        return SEX_CODES.get(sex, -1)
+
+    def aggregates(self, mask=None):
+        """Aggregates present (optionally within a boolean mask)"""
+        aggregate = self.data['aggregate'] if mask is None else self.data['aggregate'][mask]
+        return aggregate[aggregate > 0]
+
+    def pass_flags(self, mask=None):
+        """1 for a pass and 0 otherwise, per candidate"""
+        status = self.data['status'] if mask is None else self.data['status'][mask]
+        return (status == STATUS_CODES['PASS']).astype(np.int64)
+
+    def group_summary(self, key):
+        """{key value: {'total', 'passed', 'aggregate_count', 'aggregate_sum', 'distinctions'}}
+
+        distinctions counts aggregates of 13 or better.
+        """
+        data = self.data
+        if not len(data):
+            return {}
+        values, index = np.unique(data[key], return_inverse=True)
+        index = index.ravel()
+        size = len(values)
+        aggregate = data['aggregate'].astype(np.int64)
+        present = aggregate > 0
+
+        columns = {
+            'total': np.bincount(index, minlength=size),
+            'passed': np.bincount(index, weights=data['status'] == STATUS_CODES['PASS'], minlength=size),
+            'aggregate_count': np.bincount(index, weights=present, minlength=size),
+            'aggregate_sum': np.bincount(index, weights=aggregate, minlength=size),
+            'distinctions': np.bincount(index, weights=present & (aggregate <= 13), minlength=size),
+        }
+        return {
+            int(value): {name: int(column[i]) for name, column in columns.items()}
+            for i, value in enumerate(values.tolist())
+        }
+
+    def groups(self, key, column='aggregate'):
+        """{key value: array of the column's values present}, for scipy tests"""
+        data = self.data
+        present = data[column] > 0
+        keys = data[key][present]
+        values = data[column][present].astype(np.int64)
+        if not len(keys):
+            return {}
+        order = np.argsort(keys, kind='stable')
+        keys, values = keys[order], values[order]
+        splits = np.flatnonzero(np.diff(keys)) + 1
+        starts = np.concatenate(([0], splits))
+        return dict(zip(keys[starts].tolist(), np.split(values, splits)))
+
+    def subject_summary(self, fields=SUBJECT_FIELDS):
+        """{field: {'count', 'total', 'units_4_up', 'units_6_7', 'units_8_up'}}"""
+        if not len(self.data):
+            return {field: dict(count=0, total=0, units_4_up=0, units_6_7=0, units_8_up=0) for field in fields}
+        units = np.column_stack([self.data[field].astype(np.int64) for field in fields])
+        present = units > 0
+        columns = {
+            'count': present.sum(axis=0),
+            'total': units.sum(axis=0),
+            'units_4_up': (units >= 4).sum(axis=0),
+            'units_6_7': ((units >= 6) & (units < 8)).sum(axis=0),
+            'units_8_up': (units >= 8).sum(axis=0),
+        }
+        return {
+            field: {name: int(column[i]) for name, column in columns.items()}
+            for i, field in enumerate(fields)
+        }
+
+    def crosstab(self, row, column):
+        """Counts of each (row, column) code pair, unknown (-1) codes left out"""
+        valid = (self.data[row] >= 0) & (self.data[column] >= 0)
+        row_values, row_index = np.unique(self.data[row][valid], return_inverse=True)
+        column_values, column_index = np.unique(self.data[column][valid], return_inverse=True)
+        table = np.zeros((len(row_values), len(column_values)), dtype=np.int64)
+        np.add.at(table, (row_index.ravel(), column_index.ravel()), 1)
+        return table
@@ -0,0 +1,300 @@
+"""
+ZIMSEC Statistics
+
+Year statistics for the Grade 7 dashboards, read from ZimsecYearStats rows
+instead of loading every ZimsecResults row of a year.
+
+Refresh (same scheme as financial_snapshots): writers only mark what changed
+and the affected (year, class) rows are rebuilt once when the surrounding
+transaction commits.
+- mark_result(year, student_id) - one result saved
+- mark_students(student_ids) - every year of these students (class or
+  gender changes)
+- mark_years(years) - whole years (deletes, class deletes)
+
+Reading:
+- year_stats(year, sections, gender) - YearStats for a year, optionally only
+  some class sections and one gender (a few dozen rows)
+- YearStats.from_results(results) - the same figures for an already filtered
+  list of results (dashboard filters on individual results)
+- Distribution - mean, variance, pass rate, percentiles and skewness of one
+  subject, computed from the count, sums and histogram
+
+Percentiles interpolate linearly between values like numpy.percentile, and
+skewness is the population skewness like scipy.stats.skew, so the dashboards
+give the figures they gave before without numpy or scipy.
+"""
+import math
+import threading
+from django.db import transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+_pending = threading.local()
+
+
+def _state():
+    if not hasattr(_pending, 'results'):
+        _pending.results = set()
+        _pending.students = set()
+        _pending.years = set()
+    return _pending
+
+
+def mark_result(year, student_id):
+    _state().results.add((year, student_id))
+    transaction.on_commit(flush)
+
+
+def mark_students(student_ids):
+    _state().students.update(student_ids)
+    transaction.on_commit(flush)
+
+
+def mark_years(years):
+    _state().years.update(years)
+    transaction.on_commit(flush)
+
+
+def flush():
+    """Rebuild the statistics rows for everything marked so far"""
+    from core.models.student import Student
+    from core.models.zimsec import ZimsecResults, ZimsecYearStats
+
+    state = _state()
+    if not (state.results or state.students or state.years):
+        return 0
+
+    results, students, years = state.results, state.students, state.years
+    state.results, state.students, state.years = set(), set(), set()
+
+    years = set(years)
+    if students:
+        years.update(
+            ZimsecResults.objects.filter(student_id__in=students).values_list('academic_year', flat=True).distinct()
+        )
+
+    buckets = {}
+    if results:
+        classes = dict(
+            Student.all_students.filter(id__in={s for _, s in results}).values_list('id', 'current_class_id')
+        )
+        for year, student_id in results:
+            buckets.setdefault(year, set()).add(classes.get(student_id))
+
+    try:
+        return ZimsecYearStats.refresh(years, buckets)
+    except Exception as e:
+        logger.error(f"Error refreshing ZIMSEC statistics: {e}")
+        return 0
+
+
+class Distribution:
+    """Count, sums and histogram of one subject's values (units or aggregates)"""
+
+    __slots__ = ('candidates', 'count', 'total', 'total_squares', 'passed', 'distinctions', 'histogram')
+
+    def __init__(self):
+        self.candidates = 0
+        self.count = 0
+        self.total = 0
+        self.total_squares = 0
+        self.passed = 0
+        self.distinctions = 0
+        self.histogram = {}
+
+    @classmethod
+    def of(cls, values):
+        distribution = cls()
+        for value in values:
+            distribution.add(value)
+        return distribution
+
+    def add(self, value, n=1):
+        self.count += n
+        self.total += value * n
+        self.total_squares += value * value * n
+        self.histogram[value] = self.histogram.get(value, 0) + n
+
+    def merge(self, row):
+        """Add a ZimsecYearStats row (a model instance or a values() dict)"""
+        get = row.get if isinstance(row, dict) else lambda field: getattr(row, field)
+        self.candidates += get('candidates')
+        self.count += get('count')
+        self.total += get('total')
+        self.total_squares += get('total_squares')
+        self.passed += get('passed')
+        self.distinctions += get('distinctions')
+        for value, n in get('histogram').items():
+            value = int(value)
+            self.histogram[value] = self.histogram.get(value, 0) + n
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    @property
+    def variance(self):
+        """Sample variance (n - 1)"""
+        if self.count < 2:
+            return 0
+        return max(self.total_squares - self.total * self.total / self.count, 0) / (self.count - 1)
+
+    @property
+    def std_dev(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def pass_rate(self):
+        return self.passed / self.count * 100 if self.count else 0
+
+    @property
+    def minimum(self):
+        return min(self.histogram) if self.histogram else None
+
+    @property
+    def maximum(self):
+        return max(self.histogram) if self.histogram else None
+
+    @property
+    def mode(self):
+        """(value, frequency) of the most common value, the lowest on ties"""
+        if not self.histogram:
+            return None, 0
+        value = min(self.histogram, key=lambda v: (-self.histogram[v], v))
+        return value, self.histogram[value]
+
+    def _nth(self, index):
+        seen = 0
+        for value in sorted(self.histogram):
+            seen += self.histogram[value]
+            if index < seen:
+                return value
+        raise IndexError(index)
+
+    def percentile(self, p):
+        """The p-th percentile, interpolated linearly between values"""
+        if not self.count:
+            return 0
+        position = (self.count - 1) * p / 100
+        lower = math.floor(position)
+        low = self._nth(lower)
+        high = self._nth(min(lower + 1, self.count - 1))
+        return low + (high - low) * (position - lower)
+
+    @property
+    def skewness(self):
+        """Population skewness (third standardised moment)"""
+        if not self.count:
+            return 0
+        mean = self.mean
+        m2 = sum(n * (v - mean) ** 2 for v, n in self.histogram.items()) / self.count
+        m3 = sum(n * (v - mean) ** 3 for v, n in self.histogram.items()) / self.count
+        return m3 / m2 ** 1.5 if m2 else 0
+
+    def values_outside(self, lower, upper):
+        """Every value below lower or above upper, ascending"""
+        return [v for v in sorted(self.histogram) if v < lower or v > upper for _ in range(self.histogram[v])]
+
+    def count_between(self, low, high):
+        return sum(n for v, n in self.histogram.items() if low <= v <= high)
+
+
+class YearStats:
+    """Distributions of every subject for a whole year and per class section
+
+    subjects[subject] covers everything read; sections[section][subject]
+    splits it by class section (None for students without a class).
+    """
+
+    def __init__(self):
+        from core.models.zimsec import ZimsecYearStats
+
+        self.subject_fields = [field for field, _ in ZimsecYearStats.SUBJECT_CHOICES]
+        self.subjects = self._empty()
+        self.sections = {}
+
+    def _empty(self):
+        return {field: Distribution() for field in self.subject_fields}
+
+    def _section(self, section):
+        if section not in self.sections:
+            self.sections[section] = self._empty()
+        return self.sections[section]
+
+    @property
+    def aggregate(self):
+        from core.models.zimsec import ZimsecYearStats
+
+        return self.subjects[ZimsecYearStats.AGGREGATE]
+
+    @property
+    def candidates(self):
+        return self.aggregate.candidates
+
+    def section_aggregate(self, section):
+        from core.models.zimsec import ZimsecYearStats
+
+        return self.sections[section][ZimsecYearStats.AGGREGATE] if section in self.sections else None
+
+    def add_row(self, row, section):
+        self.subjects[row['subject']].merge(row)
+        self._section(section)[row['subject']].merge(row)
+
+    def add_result(self, result):
+        from core.models.zimsec import ZimsecYearStats
+
+        current_class = result.student.current_class
+        targets = (self.subjects, self._section(current_class.section if current_class else None))
+        distinction = True
+        for field in self.subject_fields:
+            value = getattr(result, field)
+            if field == ZimsecYearStats.AGGREGATE:
+                continue
+            distinction = distinction and bool(value) and value <= 2
+            for subjects in targets:
+                subjects[field].candidates += 1
+                if value:
+                    subjects[field].add(value)
+                    subjects[field].passed += value <= 5
+                    subjects[field].distinctions += value == 1
+        for subjects in targets:
+            aggregate = subjects[ZimsecYearStats.AGGREGATE]
+            aggregate.candidates += 1
+            aggregate.passed += result.overall_status == 'PASS'
+            aggregate.distinctions += distinction
+            if result.total_aggregate:
+                aggregate.add(result.total_aggregate)
+
+    @classmethod
+    def from_results(cls, results):
+        stats = cls()
+        for result in results:
+            stats.add_result(result)
+        return stats
+
+
+def year_stats(year, sections=None, gender=None):
+    """YearStats for an academic year from ZimsecYearStats rows
+
+    Args:
+        year (int): Academic year
+        sections (iterable): Only students currently in classes with these sections
+        gender (str): Only this gender ('M' or 'F')
+    """
+    from core.models.zimsec import ZimsecYearStats
+
+    rows = ZimsecYearStats.objects.filter(academic_year=year)
+    if sections:
+        rows = rows.filter(student_class__section__in=list(sections))
+    if gender:
+        rows = rows.filter(gender__iexact=gender)
+
+    stats = YearStats()
+    for row in rows.values(
+        'student_class__section', 'subject', 'candidates', 'count', 'total', 'total_squares',
+        'passed', 'distinctions', 'histogram',
+    ).order_by():
+        stats.add_row(row, row['student_class__section'])
+    return stats
@@ -1,7 +1,11 @@
-from django.db.models.signals import post_save, pre_save, post_delete
+from django.db.models.signals import post_save, pre_save, post_delete, pre_delete
 from django.dispatch import receiver
+from django.db import transaction
 from .models import TeacherAssignmentHistory, Class, Student
 from .models.academic import Payment, AcademicTerm
+from .models.academic_year import AcademicYear
+from .models.fee import TermFee, StudentBalance
+from .models.ecd import ECDClassProfile, ECDClassFee
 
 @receiver(post_save, sender=Student)
 def create_student_balance_on_enrollment(sender, instance, created, **kwargs):
@@ -29,8 +33,10 @@ def update_student_balance_on_payment(sender, instance, created, **kwargs):
     term = instance.term
     
     try:
-        # Get or initialize the student's balance for this term
-        balance = StudentBalance.initialize_term_balance(student, term)
+        # Get the student's balance for this term, initializing it if this is the first charge
+        balance = StudentBalance.objects.filter(student=student, term=term).first()
+        if balance is None:
+            balance = StudentBalance.initialize_term_balance(student, term)
         
         if balance:
             # Recalculate total paid from ALL payments for this student/term
@@ -40,8 +46,11 @@ def update_student_balance_on_payment(sender, instance, created, **kwargs):
                 term=term
             ).aggregate(Sum('amount'))['amount__sum'] or 0
             
+            # Saving posts the change to the student ledger, which also shifts
+            # previous_arrears of any later terms that already have balances
+            # (no balances are created for future terms here)
             balance.amount_paid = total_paid
-            balance.save(update_fields=['amount_paid'])
+            balance.save(update_fields=['amount_paid'], ledger_description=f'Payment {instance.receipt_number}')
         
         # CHECK FOR GRADE 7 TERM 3 ALUMNI CONVERSION
         # If this is a Grade 7 student in Term 3 with zero/negative balance, convert to alumni
@@ -59,32 +68,6 @@ def update_student_balance_on_payment(sender, instance, created, **kwargs):
                                 print(f"✅ {student.first_name} {student.surname} converted to Alumni (Balance: {balance.current_balance})")
                     except Exception as e:
                         print(f"⚠️ Error converting {student.first_name} {student.surname} to alumni: {e}")
-        
-        # ONLY cascade to next terms if student is NOT graduating
-        # When a payment changes the balance for the current term,
-        # we need to recalculate arrears for NEXT term(s) ONLY IF THEY ALREADY EXIST
-        # This prevents creating future term fees prematurely
-        if term and balance:
-            # Get all subsequent terms in the same year that ALREADY HAVE balances for this student
-            next_terms = AcademicTerm.objects.filter(
-                academic_year=term.academic_year,
-                term__gt=term.term
-            ).order_by('term')
-            
-            for next_term in next_terms:
-                # Only update if balance already exists - don't create new ones
-                if StudentBalance.objects.filter(student=student, term=next_term).exists():
-                    StudentBalance.initialize_term_balance(student, next_term)
-            
-            # Also check if there are terms in the next year (but only if they have balances)
-            next_year_terms = AcademicTerm.objects.filter(
-                academic_year=term.academic_year + 1
-            ).order_by('term')
-            
-            for next_year_term in next_year_terms:
-                # Only update if balance already exists - don't create new ones
-                if StudentBalance.objects.filter(student=student, term=next_year_term).exists():
-                    StudentBalance.initialize_term_balance(student, next_year_term)
     except Exception as e:
         print(f"Error updating StudentBalance for payment {instance.id}: {e}")
 
@@ -109,7 +92,7 @@ def recalculate_balance_on_payment_delete(sender, instance, **kwargs):
             ).aggregate(Sum('amount'))['amount__sum'] or 0
             
             balance.amount_paid = total_paid
-            balance.save(update_fields=['amount_paid'])
+            balance.save(update_fields=['amount_paid'], ledger_description=f'Payment {instance.receipt_number} deleted')
             
     except Exception as e:
         print(f"Error recalculating balance after payment delete: {e}")
@@ -197,6 +180,22 @@ def check_alumni_status_on_payment_delete(sender, instance, **kwargs):
     except Exception as e:
         print(f"Error rechecking alumni status after payment delete: {e}")
 
+@receiver(post_save, sender=AcademicTerm)
+@receiver(post_delete, sender=AcademicTerm)
+@receiver(post_save, sender=AcademicYear)
+@receiver(post_delete, sender=AcademicYear)
+def invalidate_current_period_cache(sender, instance, **kwargs):
+    """Drop the cached current term/year when a term or year changes
+    
+    Registered before the balance receivers so they see the new current term.
+    Invalidated again on commit in case another request re-cached the old
+    value while this transaction was open.
+    """
+    from .services import current_period
+    
+    current_period.invalidate()
+    transaction.on_commit(current_period.invalidate)
+
 @receiver(post_save, sender=AcademicTerm)
 def initialize_balances_on_term_activation(sender, instance, **kwargs):
     """Initialize StudentBalance for all active students when a term becomes current
@@ -287,13 +286,32 @@ def initialize_balances_on_term_activation(sender, instance, **kwargs):
                     )
         
         # Initialize balances for remaining active students in the current term
-        active_students = Student.objects.filter(is_active=True, is_deleted=False)
+        # (set-based; StudentBalance.initialize_term_balance is the per-student equivalent)
+        from .services.term_activation import TermActivationService
         
-        for student in active_students:
-            try:
-                StudentBalance.initialize_term_balance(student, instance)
-            except Exception as e:
-                print(f"Warning: Could not initialize balance for {student.full_name} in {instance}: {e}")
+        try:
+            result = TermActivationService(instance).activate()
+            # Read by the view that made the term current, to report the counts
+            instance._activation_result = result
+            for error in result['errors']:
+                print(f"Warning: Could not initialize balance in {instance}: {error}")
+        except Exception as e:
+            print(f"Error initializing balances for {instance}: {e}")
+
+@receiver(post_save, sender=AcademicTerm)
+def snapshot_term_history_on_completion(sender, instance, **kwargs):
+    """Record every enrolled student's class, status and balance when a term is completed
+    
+    Append-only (see services/term_history.py), so saving a completed term again
+    only adds students that are missing.
+    """
+    if instance.is_completed:
+        from .services.term_history import snapshot_term
+        
+        try:
+            snapshot_term(instance)
+        except Exception as e:
+            print(f"Error recording term history for {instance}: {e}")
 
 @receiver(post_save, sender=Student)
 def create_student_balance_on_enrollment(sender, instance, created, **kwargs):
@@ -362,3 +380,194 @@ def clear_class_teacher_on_deactivation(sender, instance, **kwargs):
             class_obj = instance.class_assigned
             class_obj.teacher = None
             class_obj.save(update_fields=['teacher'])
+
+
+# ---------------------------------------------------------------------------
+# Materialized StudentBalance totals
+# StudentBalance stores term_fee/total_due/current_balance as real columns.
+# These receivers refresh them when the inputs to the effective fee change.
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=TermFee)
+def refresh_balance_totals_on_term_fee_change(sender, instance, created, **kwargs):
+    """Re-derive stored balance totals when a TermFee amount is edited"""
+    if created:
+        return  # No balance can reference a brand new fee record yet
+
+    try:
+        StudentBalance.refresh_materialized_totals(
+            StudentBalance.objects.filter(term_fee_record=instance)
+        )
+    except Exception as e:
+        print(f"Error refreshing balances for {instance}: {e}")
+
+
+@receiver(post_save, sender=ECDClassProfile)
+@receiver(post_delete, sender=ECDClassProfile)
+def refresh_balance_totals_on_ecd_profile_change(sender, instance, **kwargs):
+    """ECD profile fees apply to every balance of the pupils in that class"""
+    try:
+        StudentBalance.refresh_materialized_totals(
+            StudentBalance.objects.filter(student__current_class_id=instance.cls_id)
+        )
+    except Exception as e:
+        print(f"Error refreshing balances for ECD profile {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=ECDClassFee)
+@receiver(post_delete, sender=ECDClassFee)
+def refresh_balance_totals_on_ecd_fee_change(sender, instance, **kwargs):
+    """ECD class fees apply to one term of the pupils in that class"""
+    try:
+        StudentBalance.refresh_materialized_totals(
+            StudentBalance.objects.filter(
+                term_id=instance.term_id,
+                student__current_class_id=instance.cls_id
+            )
+        )
+    except Exception as e:
+        print(f"Error refreshing balances for ECD fee {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=Student)
+def refresh_balance_totals_on_class_change(sender, instance, created, update_fields=None, **kwargs):
+    """The effective fee depends on the student's class (ECD extras)"""
+    if created:
+        return
+    if update_fields is not None and 'current_class' not in update_fields:
+        return
+
+    try:
+        StudentBalance.refresh_for_class_change([instance.pk])
+    except Exception as e:
+        print(f"Error refreshing balances for {instance}: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Term financial snapshots
+# Dashboard rollups are refreshed on commit for whatever balances changed.
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=StudentBalance)
+def mark_financial_snapshot_on_balance_save(sender, instance, **kwargs):
+    """Refresh the (term, class) rollup row this balance belongs to"""
+    from .services import financial_snapshots
+
+    financial_snapshots.mark_balance(instance.term_id, instance.student_id)
+
+
+@receiver(post_delete, sender=StudentBalance)
+def mark_financial_snapshot_on_balance_delete(sender, instance, **kwargs):
+    """The student (and so their class) may be gone too, so refresh the whole term"""
+    from .services import financial_snapshots
+
+    financial_snapshots.mark_terms([instance.term_id])
+
+
+@receiver(post_save, sender=Student)
+def mark_financial_snapshots_on_class_change(sender, instance, created, update_fields=None, **kwargs):
+    """A class move shifts the student's balances between rollup rows"""
+    if created:
+        return
+    if update_fields is not None and 'current_class' not in update_fields:
+        return
+
+    from .services import financial_snapshots
+
+    financial_snapshots.mark_students([instance.pk])
+
+
+# ---------------------------------------------------------------------------
+# ZIMSEC year statistics
+# Dashboard rollups are refreshed on commit for whatever results changed.
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender='core.ZimsecResults')
+def mark_zimsec_stats_on_result_save(sender, instance, **kwargs):
+    """Refresh the (year, class) statistics rows this result belongs to"""
+    from .services import zimsec_stats
+
+    zimsec_stats.mark_result(instance.academic_year, instance.student_id)
+
+
+@receiver(post_delete, sender='core.ZimsecResults')
+def mark_zimsec_stats_on_result_delete(sender, instance, **kwargs):
+    """The student (and so their class) may be gone too, so refresh the whole year"""
+    from .services import zimsec_stats
+
+    zimsec_stats.mark_years([instance.academic_year])
+
+
+@receiver(post_save, sender=Student)
+def mark_zimsec_stats_on_student_change(sender, instance, created, update_fields=None, **kwargs):
+    """A class move or gender correction shifts the student's results between rows"""
+    if created:
+        return
+    if update_fields is not None and not {'current_class', 'sex'} & set(update_fields):
+        return
+
+    from .services import zimsec_stats
+
+    zimsec_stats.mark_students([instance.pk])
+
+
+@receiver(pre_delete, sender=Class)
+def mark_zimsec_stats_on_class_delete(sender, instance, **kwargs):
+    """The class's rows are deleted with it and its students end up without a class"""
+    from .models.zimsec import ZimsecYearStats
+    from .services import zimsec_stats
+
+    zimsec_stats.mark_years(
+        ZimsecYearStats.objects.filter(student_class=instance).values_list('academic_year', flat=True).distinct()
+    )
+
+
+# ---------------------------------------------------------------------------
+# Student search index
+# The in-process index is patched once the write commits.
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def refresh_student_search_on_student_change(sender, instance, **kwargs):
+    """Re-read the student into the search index (dropped once soft/hard deleted)"""
+    from .services import student_search
+
+    student_id = instance.pk
+    transaction.on_commit(lambda: student_search.refresh_students([student_id]))
+
+
+@receiver(post_save, sender=Class)
+@receiver(post_delete, sender=Class)
+def invalidate_student_search_on_class_change(sender, instance, created=False, **kwargs):
+    """Class labels are indexed on every student of the class"""
+    if created:
+        return
+
+    from .services import student_search
+
+    transaction.on_commit(student_search.invalidate)
+
+
+@receiver(post_save, sender='core.ArrearsVault')
+def refresh_student_search_on_vault_save(sender, instance, **kwargs):
+    """Guardian details are indexed from the vault record"""
+    from .services import student_search
+
+    student_id = instance.student_id
+    transaction.on_commit(lambda: student_search.refresh_students([student_id]))
+
+
+# ---------------------------------------------------------------------------
+# Report branding
+# PDF reports cache the school details in-process (core/utils/report_theme.py).
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender='core.SchoolDetails')
+@receiver(post_delete, sender='core.SchoolDetails')
+def invalidate_report_branding_on_school_change(sender, instance, **kwargs):
+    """Reports read the school name again after SchoolDetails changes"""
+    from .utils import report_theme
+
+    report_theme.invalidate()
+    transaction.on_commit(report_theme.invalidate)
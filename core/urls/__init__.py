@@ -16,7 +16,8 @@ from core.views.student_views import (
 from core.views.payment_views import (
     PaymentCreateView, PaymentListView,
     StudentPaymentHistoryView, FeeDashboardView, student_payment_details_api,
-    export_student_payment_history, export_fee_dashboard, arrears_report_pdf
+    export_student_payment_history, export_fee_dashboard, arrears_report_pdf,
+    materialize_missing_balances, import_payments,
 )
 from core.views.settings_views import (
     AdminSettingsView, AdminProfileUpdateView,
@@ -30,7 +31,9 @@ from core.views.student_movement import (
     demote_student, bulk_promote_students, class_transfers
 )
 from core.views.step10_academic_management import (
-    update_term_fee_api, update_term_dates_api, FeeConfigurationView, create_terms_api, activate_first_term_api
+    update_term_fee_api, update_term_dates_api, FeeConfigurationView, create_terms_api, activate_first_term_api,
+    execute_rollover, rollover_job_status, resume_rollover, RolloverWizardView,
+    verify_arrears_before_rollover, simulate_rollover,
 )
 from core.views.school_views import SchoolDetailsUpdateView, school_details_view
 from core.views.superuser_views import (
@@ -58,7 +61,13 @@ from core.views.zimsec_views import (
     ExportGrade7CompletionView,
     ExportHTMLView,
     ZimsecResultsBatchSaveAPI,
+    ZimsecResultsImportAPI,
 )
+from core.views.step11_search_filtering import (
+    GlobalSearchView, StudentSearchFilterView, search_autocomplete, export_search_results,
+)
+from core.views.export_views import stream_export, export_catalogue
+from core.views.report_views import request_report, report_job_page, report_job_status, report_job_download
 from core.views.advanced_analytics import (
     ComparisonView,
     PredictionView,
@@ -113,9 +122,11 @@ urlpatterns = [
     # Payment and Fee Management URLs
     path('fees/', FeeDashboardView.as_view(), name='fee_dashboard'),
     path('fees/export/', export_fee_dashboard, name='export_fee_dashboard'),
+    path('fees/materialize-missing/', materialize_missing_balances, name='materialize_missing_balances'),
     path('fees/arrears-report/', arrears_report_pdf, name='arrears_report_pdf'),
     path('payments/', PaymentListView.as_view(), name='payment_list'),
     path('payments/create/', PaymentCreateView.as_view(), name='payment_create'),
+    path('payments/import/', import_payments, name='import_payments'),
     path('student/<int:pk>/payments/', StudentPaymentHistoryView.as_view(), name='student_payment_history'),
     path('student/<int:student_id>/payments/export/', export_student_payment_history, name='export_student_payment_history'),
     
@@ -133,6 +144,23 @@ urlpatterns = [
     path('settings/fees/create/', create_fee, name='create_fee'),
     path('settings/fees/update/', update_term_fee, name='update_term_fee'),
     path('settings/fees/configuration/', FeeConfigurationView.as_view(), name='fee_configuration'),
+    path('settings/years/rollover/', RolloverWizardView.as_view(), name='rollover_wizard'),
+    
+    # Search URLs
+    path('search/', GlobalSearchView.as_view(), name='global_search'),
+    path('search/students/', StudentSearchFilterView.as_view(), name='student_search'),
+    path('api/search/autocomplete/', search_autocomplete, name='search_autocomplete'),
+    path('search/export/', export_search_results, name='export_search_results'),
+    
+    # Streaming CSV/XLSX exports
+    path('exports/', export_catalogue, name='export_catalogue'),
+    path('exports/<str:dataset>/', stream_export, name='stream_export'),
+    
+    # Background PDF reports
+    path('reports/jobs/<uuid:job_id>/', report_job_page, name='report_job_page'),
+    path('reports/jobs/<uuid:job_id>/status/', report_job_status, name='report_job_status'),
+    path('reports/jobs/<uuid:job_id>/download/', report_job_download, name='report_job_download'),
+    path('reports/<str:report_type>/', request_report, name='request_report'),
     
     # API URLs
     path('api/classes/', get_available_classes, name='get_available_classes'),
@@ -143,6 +171,11 @@ urlpatterns = [
     path('admin/api/term/<int:term_id>/update-dates/', update_term_dates_api, name='update_term_dates_api'),
     path('admin/api/create-terms/', create_terms_api, name='create_terms_api'),
     path('admin/api/activate-first-term/', activate_first_term_api, name='activate_first_term_api'),
+    path('admin/api/year/<int:year_id>/verify-arrears/', verify_arrears_before_rollover, name='verify_arrears_before_rollover'),
+    path('admin/api/year/<int:year_id>/simulate-rollover/', simulate_rollover, name='simulate_rollover'),
+    path('admin/api/year/<int:year_id>/execute-rollover/', execute_rollover, name='execute_rollover'),
+    path('admin/api/rollover/<uuid:job_id>/', rollover_job_status, name='rollover_job_status'),
+    path('admin/api/rollover/<uuid:job_id>/resume/', resume_rollover, name='resume_rollover'),
     
     # Superuser Management URLs
     path('superuser/', PremiumSuperuserDashboardView.as_view(), name='superuser_dashboard'),
@@ -168,6 +201,7 @@ urlpatterns = [
     path('zimsec/statistics/', Grade7StatisticsView.as_view(), name='grade7_statistics'),
     path('zimsec/year-comparison/', YearComparisonView.as_view(), name='year_comparison'),
     path('api/zimsec/batch-save/', ZimsecResultsBatchSaveAPI.as_view(), name='zimsec_batch_save'),
+    path('api/zimsec/import/', ZimsecResultsImportAPI.as_view(), name='zimsec_import'),
     
     # ZIMSEC Export URLs
     path('zimsec/export/powerpoint/', ExportPowerPointView.as_view(), name='export_powerpoint'),
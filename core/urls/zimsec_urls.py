@@ -11,6 +11,7 @@ from core.views.zimsec_views import (
     YearComparisonView,
     ZimsecResultsListView,
     ZimsecResultsBatchSaveAPI,
+    ZimsecResultsImportAPI,
 )
 
 urlpatterns = [
@@ -22,6 +23,7 @@ urlpatterns = [
     
     # ZIMSEC API Endpoints
     path('api/zimsec/batch-save/', ZimsecResultsBatchSaveAPI.as_view(), name='zimsec_batch_save'),
+    path('api/zimsec/import/', ZimsecResultsImportAPI.as_view(), name='zimsec_import'),
     
     # ZIMSEC Statistics and Reports
     path('zimsec/statistics/', Grade7StatisticsView.as_view(), name='grade7_statistics'),
@@ -0,0 +1,77 @@
+"""
+Lazy Imports
+
+Facades for the heavy, partly optional libraries behind the export endpoints
+(numpy, scipy, python-pptx, openpyxl). core/urls imports every view module, so
+a module-level `import numpy` in a view is paid by every gunicorn worker at
+boot even though only a few analytics and export requests use it.
+
+- lazy(module) - proxy for a module, imported on first attribute access
+- lazy(module, name) - proxy for one name in a module (a class, function or
+  constant), imported on first call or attribute access
+- is_available(module) - whether a module is installed, without importing it
+
+    np = lazy('numpy')
+    Workbook = lazy('openpyxl', 'Workbook')
+
+    np.mean(values)          # numpy is imported here
+    wb = Workbook()          # openpyxl is imported here
+
+A missing library raises ImportError where it is first used rather than at
+import time. tests/test_import_time.py checks that importing the URLconf loads
+none of these libraries.
+"""
+import importlib
+import importlib.util
+import threading
+
+HEAVY_MODULES = ('numpy', 'scipy', 'pandas', 'reportlab', 'pptx', 'openpyxl', 'matplotlib')
+
+_lock = threading.Lock()
+
+
+def is_available(module):
+    """True when `module` can be imported (its top-level package is not imported)"""
+    try:
+        return importlib.util.find_spec(module.split('.')[0]) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyImport:
+    """Stands in for a module, or a name inside one, until it is first used"""
+
+    __slots__ = ('_module', '_name', '_target')
+
+    def __init__(self, module, name=None):
+        self._module = module
+        self._name = name
+        self._target = None
+
+    def _load(self):
+        target = self._target
+        if target is None:
+            with _lock:
+                target = self._target
+                if target is None:
+                    target = importlib.import_module(self._module)
+                    if self._name is not None:
+                        target = getattr(target, self._name)
+                    self._target = target
+        return target
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        state = 'loaded' if self._target is not None else 'not loaded'
+        name = f'{self._module}.{self._name}' if self._name else self._module
+        return f'<lazy {name} ({state})>'
+
+
+def lazy(module, name=None):
+    """A LazyImport for `module`, or for `name` inside it"""
+    return LazyImport(module, name)
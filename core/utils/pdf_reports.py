@@ -17,18 +17,12 @@ from reportlab.platypus import (
 )
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT, TA_JUSTIFY
-from core.models.school_details import SchoolDetails
+from core.utils import report_theme
 
 
 def get_school_name():
-    """Get school name from settings"""
-    try:
-        school = SchoolDetails.objects.first()
-        if school and school.school_name:
-            return school.school_name
-    except:
-        pass
-    return "EDEN PRIMARY SCHOOL"
+    """Get school name from settings (cached by report_theme)"""
+    return report_theme.school_name()
 
 
 class SchoolHeaderFooter:
@@ -37,13 +31,13 @@ class SchoolHeaderFooter:
     @staticmethod
     def add_header(story, title, subtitle=""):
         """Add school header to report"""
-        styles = getSampleStyleSheet()
         school_name = get_school_name()
         
         # School name - Bold, Dark Blue
-        school_title = ParagraphStyle(
+        school_title = report_theme.paragraph_style(
+            'pdf_reports.school_title',
             'SchoolTitle',
-            parent=styles['Heading1'],
+            parent='Heading1',
             fontSize=28,
             textColor=colors.HexColor('#1a365d'),
             spaceAfter=2,
@@ -54,9 +48,10 @@ class SchoolHeaderFooter:
         story.append(Paragraph(school_name.upper(), school_title))
         
         # Report title - Professional Blue
-        title_style = ParagraphStyle(
+        title_style = report_theme.paragraph_style(
+            'pdf_reports.report_title',
             'ReportTitle',
-            parent=styles['Heading2'],
+            parent='Heading2',
             fontSize=18,
             textColor=colors.HexColor('#2d5a8c'),
             spaceAfter=2,
@@ -68,9 +63,10 @@ class SchoolHeaderFooter:
         
         # Subtitle if provided
         if subtitle:
-            subtitle_style = ParagraphStyle(
+            subtitle_style = report_theme.paragraph_style(
+                'pdf_reports.subtitle',
                 'Subtitle',
-                parent=styles['Normal'],
+                parent='Normal',
                 fontSize=12,
                 textColor=colors.HexColor('#4a5568'),
                 spaceAfter=2,
@@ -83,9 +79,10 @@ class SchoolHeaderFooter:
         story.append(Spacer(1, 0.1 * inch))
         
         # Report date - Right aligned, subtle
-        date_style = ParagraphStyle(
+        date_style = report_theme.paragraph_style(
+            'pdf_reports.date',
             'Date',
-            parent=styles['Normal'],
+            parent='Normal',
             fontSize=9,
             textColor=colors.HexColor('#718096'),
             spaceAfter=20,
@@ -104,15 +101,15 @@ class PaymentHistoryReport:
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.7*inch, bottomMargin=0.7*inch)
         story = []
-        styles = getSampleStyleSheet()
         
         # Add header
         SchoolHeaderFooter.add_header(story, "Payment History Report", f"Student: {student.full_name}")
         
         # ===== STUDENT INFORMATION SECTION =====
-        section_header_style = ParagraphStyle(
+        section_header_style = report_theme.paragraph_style(
+            'pdf_reports.section_header',
             'SectionHeader',
-            parent=styles['Heading3'],
+            parent='Heading3',
             fontSize=13,
             textColor=colors.white,
             spaceAfter=12,
@@ -131,7 +128,7 @@ class PaymentHistoryReport:
         ]
         
         student_table = Table(student_data, colWidths=[1.2*inch, 1.8*inch, 1.2*inch, 1.8*inch])
-        student_table.setStyle(TableStyle([
+        student_table.setStyle(report_theme.table_style('pdf_reports.student_info', lambda: [
             ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f4f8')),
             ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#f0f4f8')),
             ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#1a365d')),
@@ -163,7 +160,7 @@ class PaymentHistoryReport:
             ]
             
             balance_table = Table(balance_data, colWidths=[1.5*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-            balance_table.setStyle(TableStyle([
+            balance_table.setStyle(report_theme.table_style(('pdf_reports.balance_summary', balance <= 0), lambda: [
                 ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f4f8')),
                 ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#f0f4f8')),
                 ('BACKGROUND', (1, 1), (1, 1), status_bg),
@@ -203,7 +200,7 @@ class PaymentHistoryReport:
                 ])
             
             payment_table = Table(payment_data, colWidths=[1.0*inch, 1.0*inch, 1.1*inch, 1.3*inch, 1.6*inch])
-            payment_table.setStyle(TableStyle([
+            payment_table.setStyle(report_theme.table_style('pdf_reports.payments', lambda: [
                 ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2d5a8c')),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
                 ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
@@ -218,9 +215,10 @@ class PaymentHistoryReport:
             ]))
             story.append(payment_table)
         else:
-            no_payment_style = ParagraphStyle(
+            no_payment_style = report_theme.paragraph_style(
+                'pdf_reports.no_payments',
                 'NoData',
-                parent=styles['Normal'],
+                parent='Normal',
                 fontSize=11,
                 textColor=colors.HexColor('#718096'),
                 spaceAfter=12,
@@ -233,9 +231,10 @@ class PaymentHistoryReport:
         
         # Footer
         story.append(Spacer(1, 0.3*inch))
-        footer_style = ParagraphStyle(
+        footer_style = report_theme.paragraph_style(
+            'pdf_reports.footer',
             'Footer',
-            parent=styles['Normal'],
+            parent='Normal',
             fontSize=8,
             textColor=colors.HexColor('#a0aec0'),
             spaceAfter=12,
@@ -255,15 +254,15 @@ class PaymentHistoryReport:
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.7*inch, bottomMargin=0.7*inch, leftMargin=0.6*inch, rightMargin=0.6*inch)
         story = []
-        styles = getSampleStyleSheet()
         
         # Add header
         SchoolHeaderFooter.add_header(story, "Fee Collection Report", f"Term: {current_term}")
         
         # ===== SUMMARY STATISTICS =====
-        section_header_style = ParagraphStyle(
+        section_header_style = report_theme.paragraph_style(
+            'pdf_reports.section_header',
             'SectionHeader',
-            parent=styles['Heading3'],
+            parent='Heading3',
             fontSize=13,
             textColor=colors.white,
             spaceAfter=12,
@@ -292,7 +291,7 @@ class PaymentHistoryReport:
         ]
         
         summary_table = Table(summary_data, colWidths=[1.8*inch, 1.8*inch, 1.8*inch, 1.8*inch])
-        summary_table.setStyle(TableStyle([
+        summary_table.setStyle(report_theme.table_style('pdf_reports.fee_summary', lambda: [
             ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e0eaf8')),
             ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#e0eaf8')),
             ('BACKGROUND', (1, 1), (1, 1), colors.HexColor('#d1fae5')),  # Green for collections
@@ -379,9 +378,10 @@ class PaymentHistoryReport:
         
         # Footer
         story.append(Spacer(1, 0.2*inch))
-        footer_style = ParagraphStyle(
+        footer_style = report_theme.paragraph_style(
+            'pdf_reports.footer',
             'Footer',
-            parent=styles['Normal'],
+            parent='Normal',
             fontSize=8,
             textColor=colors.HexColor('#a0aec0'),
             spaceAfter=12,
@@ -405,16 +405,16 @@ class ArrearsReport:
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.7*inch, bottomMargin=0.7*inch)
         story = []
-        styles = getSampleStyleSheet()
         
         # Add header
         subtitle = f"Academic Term: {term}" if term else "Outstanding Balance Summary"
         SchoolHeaderFooter.add_header(story, "Arrears Collection Report", subtitle)
         
         # ===== SUMMARY STATISTICS =====
-        section_header_style = ParagraphStyle(
+        section_header_style = report_theme.paragraph_style(
+            'pdf_reports.arrears_section_header',
             'SectionHeader',
-            parent=styles['Heading3'],
+            parent='Heading3',
             fontSize=13,
             textColor=colors.white,
             spaceAfter=12,
@@ -439,7 +439,7 @@ class ArrearsReport:
         ]
         
         summary_table = Table(summary_data, colWidths=[3.5*inch, 2.5*inch])
-        summary_table.setStyle(TableStyle([
+        summary_table.setStyle(report_theme.table_style('pdf_reports.arrears_summary', lambda: [
             ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#fee2e2')),
             ('BACKGROUND', (1, 0), (1, -1), colors.HexColor('#fecaca')),
             ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#7f1d1d')),
@@ -521,9 +521,10 @@ class ArrearsReport:
             arrears_table.setStyle(TableStyle(table_style))
             story.append(arrears_table)
         else:
-            no_data_style = ParagraphStyle(
+            no_data_style = report_theme.paragraph_style(
+                'pdf_reports.no_arrears',
                 'NoData',
-                parent=styles['Normal'],
+                parent='Normal',
                 fontSize=12,
                 textColor=colors.HexColor('#15803d'),
                 spaceAfter=12,
@@ -536,9 +537,10 @@ class ArrearsReport:
         
         # ===== COLLECTION NOTES =====
         story.append(Spacer(1, 0.2*inch))
-        notes_header_style = ParagraphStyle(
+        notes_header_style = report_theme.paragraph_style(
+            'pdf_reports.notes_header',
             'NotesHeader',
-            parent=styles['Heading3'],
+            parent='Heading3',
             fontSize=11,
             textColor=colors.HexColor('#1f2937'),
             spaceAfter=8,
@@ -546,9 +548,10 @@ class ArrearsReport:
         )
         story.append(Paragraph("📝 COLLECTION NOTES", notes_header_style))
         
-        notes_style = ParagraphStyle(
+        notes_style = report_theme.paragraph_style(
+            'pdf_reports.notes',
             'Notes',
-            parent=styles['Normal'],
+            parent='Normal',
             fontSize=9,
             textColor=colors.HexColor('#4b5563'),
             spaceAfter=4,
@@ -561,9 +564,10 @@ class ArrearsReport:
         
         # Footer
         story.append(Spacer(1, 0.2*inch))
-        footer_style = ParagraphStyle(
+        footer_style = report_theme.paragraph_style(
+            'pdf_reports.footer',
             'Footer',
-            parent=styles['Normal'],
+            parent='Normal',
             fontSize=8,
             textColor=colors.HexColor('#a0aec0'),
             spaceAfter=12,
@@ -5,6 +5,7 @@ Matches the modern, beautiful UI of forms and dashboards
 
 from io import BytesIO
 from datetime import datetime
+from itertools import chain
 from decimal import Decimal
 from django.http import HttpResponse
 from reportlab.lib.pagesizes import letter, A4
@@ -12,23 +13,87 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
 from reportlab.platypus import (
     SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, 
-    KeepTogether, PageTemplate, Frame, PageBreak
+    KeepTogether, PageTemplate, Frame, PageBreak, Flowable
 )
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 from reportlab.pdfgen import canvas
-from core.models.school_details import SchoolDetails
+from core.utils import report_theme
 
 
 def get_school_name():
-    """Get school name from database"""
-    try:
-        school = SchoolDetails.objects.first()
-        if school and school.school_name:
-            return school.school_name
-    except:
-        pass
-    return "EDEN PRIMARY SCHOOL"
+    """Get school name from database (cached by report_theme)"""
+    return report_theme.school_name()
+
+
+class PagedTable(Flowable):
+    """A table laid out one page at a time from a row iterator
+    
+    A single Table of thousands of rows is split again at every page break,
+    re-measuring all remaining rows each time, so layout cost grows with the
+    square of the row count and every row is held in memory. PagedTable never
+    draws itself: whenever ReportLab places it, it takes just the rows that
+    fit the space left on the page from the iterator, returns them as an
+    ordinary Table (with the header row repeated), and puts itself back for
+    the rest.
+    """
+    
+    def __init__(self, header, rows, colWidths, style):
+        super().__init__()
+        self.header = header
+        self.rows = iter(rows)
+        self.colWidths = colWidths
+        self.style = style
+        self._pending = []
+        self._heights = None
+        self._page_broken = False
+    
+    def _take(self, count):
+        """The next `count` rows, read ahead from the iterator as needed"""
+        while len(self._pending) < count:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self._pending.append(row)
+        return self._pending[:count]
+    
+    def _table(self, rows):
+        table = Table([self.header] + rows, colWidths=self.colWidths)
+        table.setStyle(self.style)
+        return table
+    
+    def wrap(self, availWidth, availHeight):
+        # Always taller than the space left, so the frame asks for a split
+        self.width = sum(self.colWidths)
+        return self.width, availHeight + 1
+    
+    def split(self, availWidth, availHeight):
+        if self._heights is None:
+            probe = self._table(self._take(1))
+            probe.wrap(availWidth, availHeight)
+            header_height = probe._rowHeights[0]
+            row_height = probe._rowHeights[1] if len(probe._rowHeights) > 1 else header_height
+            self._heights = header_height, row_height
+        header_height, row_height = self._heights
+        
+        fit = max(int((availHeight - header_height) // row_height), 0)
+        rows = self._take(fit)
+        while True:
+            table = self._table(rows)
+            if table.wrap(availWidth, availHeight)[1] <= availHeight or not rows:
+                break
+            rows = rows[:-1]
+        if not rows and self._take(1):
+            if not self._page_broken:
+                # Not even one row fits: continue on the next page
+                self._page_broken = True
+                return [PageBreak(), self]
+            # Not even on a fresh page: place one row and let ReportLab report it
+            rows = self._take(1)
+            table = self._table(rows)
+        self._page_broken = False
+        del self._pending[:len(rows)]
+        return [table, self] if self._take(1) else [table]
 
 
 class BeautifulPDFReport:
@@ -49,9 +114,19 @@ class BeautifulPDFReport:
     WHITE = '#ffffff'        # White
     
     @staticmethod
-    def build_pdf(title, subtitle, sections, filename="report"):
-        """Build beautiful, contemporary PDF"""
-        buffer = BytesIO()
+    def build_pdf(title, subtitle, sections, filename="report", output=None):
+        """Build beautiful, contemporary PDF (into output, a file object, when given)"""
+        return BeautifulPDFReport.build_merged_pdf([(title, subtitle, sections)], output=output)
+    
+    @staticmethod
+    def build_merged_pdf(documents, output=None):
+        """Build several reports into one PDF, each starting on a new page
+        
+        Args:
+            documents: iterable of (title, subtitle, sections) as for build_pdf
+            output: binary file object to write to (default: a new BytesIO)
+        """
+        buffer = output if output is not None else BytesIO()
         doc = SimpleDocTemplate(
             buffer,
             pagesize=letter,
@@ -61,11 +136,25 @@ class BeautifulPDFReport:
             rightMargin=0.5*inch,
         )
         story = []
+        for title, subtitle, sections in documents:
+            if story:
+                story.append(PageBreak())
+            story.extend(BeautifulPDFReport.build_story(title, subtitle, sections))
+        
+        doc.build(story)
+        buffer.seek(0)
+        return buffer
+    
+    @staticmethod
+    def build_story(title, subtitle, sections):
+        """Flowables for one report: header, sections and footer"""
+        story = []
         school_name = get_school_name()
         
         # ===== BEAUTIFUL HEADER =====
         # School name as a proper title (not a bar header)
-        school_style = ParagraphStyle(
+        school_style = report_theme.paragraph_style(
+            'pdf_reports_modern.school_name',
             'SchoolName',
             fontSize=18,
             textColor=colors.HexColor(BeautifulPDFReport.PRIMARY),
@@ -78,7 +167,8 @@ class BeautifulPDFReport:
         story.append(Spacer(1, 0.15*inch))
         
         # Title with strong styling
-        title_style = ParagraphStyle(
+        title_style = report_theme.paragraph_style(
+            'pdf_reports_modern.title',
             'Title',
             fontSize=20,
             textColor=colors.HexColor(BeautifulPDFReport.PRIMARY),
@@ -91,7 +181,8 @@ class BeautifulPDFReport:
         
         # Subtitle with accent cyan color
         if subtitle:
-            subtitle_style = ParagraphStyle(
+            subtitle_style = report_theme.paragraph_style(
+                'pdf_reports_modern.subtitle',
                 'Subtitle',
                 fontSize=10,
                 textColor=colors.HexColor(BeautifulPDFReport.ACCENT),
@@ -115,7 +206,8 @@ class BeautifulPDFReport:
         
         # Footer
         story.append(Spacer(1, 0.25*inch))
-        footer_style = ParagraphStyle(
+        footer_style = report_theme.paragraph_style(
+            'pdf_reports_modern.footer',
             'Footer',
             fontSize=7.5,
             textColor=colors.HexColor(BeautifulPDFReport.TEXT_LIGHT),
@@ -127,10 +219,7 @@ class BeautifulPDFReport:
             f"© {datetime.now().year} {school_name} | Official School Document",
             footer_style
         ))
-        
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
+        return story
     
     @staticmethod
     def _add_info_card(story, title, data):
@@ -138,7 +227,7 @@ class BeautifulPDFReport:
         # Card header with bright blue
         header_data = [[title]]
         header_table = Table(header_data, colWidths=[7.5*inch])
-        header_table.setStyle(TableStyle([
+        header_table.setStyle(report_theme.table_style('pdf_reports_modern.card_header', lambda: [
             ('BACKGROUND', (0, 0), (0, 0), colors.HexColor(BeautifulPDFReport.PRIMARY)),
             ('TEXTCOLOR', (0, 0), (0, 0), colors.HexColor(BeautifulPDFReport.WHITE)),
             ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
@@ -151,7 +240,7 @@ class BeautifulPDFReport:
         
         # Card content with very light background
         content_table = Table(data, colWidths=[2.8*inch, 4.7*inch])
-        content_table.setStyle(TableStyle([
+        content_table.setStyle(report_theme.table_style('pdf_reports_modern.card_content', lambda: [
             # Very light blue/white background
             ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f0f9ff')),
             # Alternating row backgrounds - subtle difference
@@ -191,29 +280,32 @@ class BeautifulPDFReport:
             stat_table = Table([row_data], colWidths=[3.75*inch for _ in row_data])
             
             # Apply beautiful styling with light background
-            style_list = [
-                ('BACKGROUND', (0, 0), (len(row_data)-1, 0), colors.HexColor('#f0f9ff')),
-                ('TEXTCOLOR', (0, 0), (len(row_data)-1, 0), colors.HexColor(BeautifulPDFReport.TEXT_DARK)),
-                ('ALIGN', (0, 0), (len(row_data)-1, 0), 'CENTER'),
-                ('VALIGN', (0, 0), (len(row_data)-1, 0), 'MIDDLE'),
-                ('GRID', (0, 0), (len(row_data)-1, 0), 0.5, colors.HexColor('#d1e7f0')),
-                ('FONTSIZE', (0, 0), (len(row_data)-1, 0), 10),
-                ('PADDING', (0, 0), (len(row_data)-1, 0), 14),
-                ('TOPPADDING', (0, 0), (len(row_data)-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (len(row_data)-1, 0), 12),
-            ]
-            
-            stat_table.setStyle(TableStyle(style_list))
+            last = len(row_data) - 1
+            stat_table.setStyle(report_theme.table_style(('pdf_reports_modern.stat_row', last), lambda: [
+                ('BACKGROUND', (0, 0), (last, 0), colors.HexColor('#f0f9ff')),
+                ('TEXTCOLOR', (0, 0), (last, 0), colors.HexColor(BeautifulPDFReport.TEXT_DARK)),
+                ('ALIGN', (0, 0), (last, 0), 'CENTER'),
+                ('VALIGN', (0, 0), (last, 0), 'MIDDLE'),
+                ('GRID', (0, 0), (last, 0), 0.5, colors.HexColor('#d1e7f0')),
+                ('FONTSIZE', (0, 0), (last, 0), 10),
+                ('PADDING', (0, 0), (last, 0), 14),
+                ('TOPPADDING', (0, 0), (last, 0), 12),
+                ('BOTTOMPADDING', (0, 0), (last, 0), 12),
+            ]))
             story.append(stat_table)
         
         story.append(Spacer(1, 0.15*inch))
     
     @staticmethod
     def _add_data_table(story, title, data):
-        """Add beautiful data table with enhanced styling"""
+        """Add beautiful data table with enhanced styling
+        
+        data is the header row followed by the data rows, as a list or any
+        iterable; rows are read and laid out a page at a time (see PagedTable).
+        """
         # Table header - more prominent with bright blue
         header_table = Table([[title]], colWidths=[7.5*inch])
-        header_table.setStyle(TableStyle([
+        header_table.setStyle(report_theme.table_style('pdf_reports_modern.table_header', lambda: [
             ('BACKGROUND', (0, 0), (0, 0), colors.HexColor(BeautifulPDFReport.PRIMARY)),
             ('TEXTCOLOR', (0, 0), (0, 0), colors.HexColor(BeautifulPDFReport.WHITE)),
             ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
@@ -224,16 +316,15 @@ class BeautifulPDFReport:
         story.append(header_table)
         
         # Data table
-        if len(data) > 1:
-            headers = data[0]
-            rows = data[1:]
+        rows = iter(data)
+        headers = next(rows, None)
+        first_row = next(rows, None)
+        if headers is not None and first_row is not None:
             num_cols = len(headers)
             col_width = 7.5 / num_cols
             
-            table = Table(data, colWidths=[col_width*inch for _ in range(num_cols)])
-            
             # Beautiful table styling with light theme
-            table_style = [
+            table_style = report_theme.table_style('pdf_reports_modern.data_table', lambda: [
                 # Header row - bright blue
                 ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0284c7')),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor(BeautifulPDFReport.WHITE)),
@@ -258,10 +349,12 @@ class BeautifulPDFReport:
                 ('RIGHTPADDING', (0, 0), (-1, -1), 9),
                 ('TOPPADDING', (0, 0), (-1, -1), 8),
                 ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ]
-            
-            table.setStyle(TableStyle(table_style))
-            story.append(table)
+            ])
+            story.append(PagedTable(
+                headers, chain([first_row], rows),
+                colWidths=[col_width*inch for _ in range(num_cols)],
+                style=table_style,
+            ))
         
         story.append(Spacer(1, 0.18*inch))
 
@@ -272,6 +365,24 @@ class PaymentHistoryReport(BeautifulPDFReport):
     @staticmethod
     def generate_student_payment_pdf(student, payments, balance_info=None):
         """Generate modern payment history PDF"""
+        return BeautifulPDFReport.build_pdf(
+            *PaymentHistoryReport.student_payment_document(student, payments, balance_info)
+        )
+    
+    @staticmethod
+    def generate_statements_pdf(statements):
+        """One PDF holding the payment history of several students (e.g. a class)
+        
+        Args:
+            statements: iterable of (student, payments, balance_info)
+        """
+        return BeautifulPDFReport.build_merged_pdf(
+            PaymentHistoryReport.student_payment_document(*statement) for statement in statements
+        )
+    
+    @staticmethod
+    def student_payment_document(student, payments, balance_info=None):
+        """(title, subtitle, sections) of a student's payment history"""
         sections = []
         
         # Student Information Card
@@ -305,23 +416,32 @@ class PaymentHistoryReport(BeautifulPDFReport):
                 ])
             sections.append(('Payment Transactions', table_data, 'table'))
         
-        buffer = BeautifulPDFReport.build_pdf(
-            'Payment History Report',
-            f'Student: {student.full_name}',
-            sections
-        )
-        return buffer
+        return 'Payment History Report', f'Student: {student.full_name}', sections
     
     @staticmethod
-    def generate_fee_dashboard_pdf(current_term, students_data):
-        """Generate beautiful fee dashboard PDF"""
+    def generate_fee_dashboard_pdf(current_term, students_data, totals=None, output=None):
+        """Generate beautiful fee dashboard PDF
+        
+        students_data may be any iterable (e.g. over a queryset iterator) when
+        totals are given as {'students', 'term_fee', 'amount_paid',
+        'current_balance'}; the rows are then formatted and laid out a page at
+        a time instead of being held in memory.
+        """
         sections = []
         
         # Calculate statistics
-        total_students = len(students_data)
-        total_collected = sum(Decimal(str(s.get('amount_paid', 0))) for s in students_data)
-        total_balance = sum(Decimal(str(s.get('current_balance', 0))) for s in students_data)
-        total_term_fee = sum(Decimal(str(s.get('term_fee', 0))) for s in students_data)
+        if totals is None:
+            students_data = list(students_data)
+            totals = {
+                'students': len(students_data),
+                'amount_paid': sum(Decimal(str(s.get('amount_paid', 0))) for s in students_data),
+                'current_balance': sum(Decimal(str(s.get('current_balance', 0))) for s in students_data),
+                'term_fee': sum(Decimal(str(s.get('term_fee', 0))) for s in students_data),
+            }
+        total_students = totals['students']
+        total_collected = totals['amount_paid'] or 0
+        total_balance = totals['current_balance'] or 0
+        total_term_fee = totals['term_fee'] or 0
         collection_pct = (float(total_collected) / float(total_term_fee) * 100) if float(total_term_fee) > 0 else 0
         
         # Summary statistics
@@ -335,40 +455,57 @@ class PaymentHistoryReport(BeautifulPDFReport):
         sections.append(('Fee Collection Summary', summary_data, 'info_card'))
         
         # Student Details Table
-        if students_data:
-            table_data = [['Student Name', 'Class', 'Term Fee', 'Paid', 'Balance', 'Status']]
-            for student in students_data:
-                balance = float(student.get('current_balance', 0))
-                status = '✓ PAID' if balance <= 0 else '○ PENDING'
-                table_data.append([
-                    student.get('name', 'N/A')[:18],
-                    str(student.get('class', 'N/A'))[:10],
-                    f"${float(student.get('term_fee', 0)):,.0f}",
-                    f"${float(student.get('amount_paid', 0)):,.0f}",
-                    f"${balance:,.0f}",
-                    status
-                ])
-            sections.append(('Student Fee Details', table_data, 'table'))
+        if total_students:
+            header = ['Student Name', 'Class', 'Term Fee', 'Paid', 'Balance', 'Status']
+            sections.append((
+                'Student Fee Details',
+                chain([header], map(PaymentHistoryReport._fee_row, students_data)),
+                'table',
+            ))
         
         buffer = BeautifulPDFReport.build_pdf(
             'Fee Collection Report',
             f'Term: {current_term}',
-            sections
+            sections,
+            output=output,
         )
         return buffer
+    
+    @staticmethod
+    def _fee_row(student):
+        balance = float(student.get('current_balance', 0))
+        status = '✓ PAID' if balance <= 0 else '○ PENDING'
+        return [
+            student.get('name', 'N/A')[:18],
+            str(student.get('class', 'N/A'))[:10],
+            f"${float(student.get('term_fee', 0)):,.0f}",
+            f"${float(student.get('amount_paid', 0)):,.0f}",
+            f"${balance:,.0f}",
+            status
+        ]
 
 
 class ArrearsReport(BeautifulPDFReport):
     """Generate beautiful arrears reports"""
     
     @staticmethod
-    def generate_arrears_pdf(students_with_arrears, term=None):
-        """Generate beautiful arrears collection report"""
+    def generate_arrears_pdf(students_with_arrears, term=None, totals=None, output=None):
+        """Generate beautiful arrears collection report
+        
+        students_with_arrears may be any iterable when totals are given as
+        {'students', 'balance'}; rows are then laid out a page at a time.
+        """
         sections = []
         
         # Summary
-        total_arrears = sum(Decimal(str(s.get('balance', 0))) for s in students_with_arrears)
-        num_students = len(students_with_arrears)
+        if totals is None:
+            students_with_arrears = list(students_with_arrears)
+            totals = {
+                'students': len(students_with_arrears),
+                'balance': sum(Decimal(str(s.get('balance', 0))) for s in students_with_arrears),
+            }
+        total_arrears = totals['balance'] or 0
+        num_students = totals['students']
         avg_arrears = float(total_arrears) / num_students if num_students > 0 else 0
         
         summary_data = [
@@ -380,32 +517,39 @@ class ArrearsReport(BeautifulPDFReport):
         sections.append(('Arrears Summary', summary_data, 'info_card'))
         
         # Arrears List
-        if students_with_arrears:
-            table_data = [['Student Name', 'ID', 'Class', 'Outstanding', 'Priority']]
-            for student in students_with_arrears:
-                balance = float(student.get('balance', 0))
-                if balance > 10000:
-                    priority = '🔴 CRITICAL'
-                elif balance > 5000:
-                    priority = '🟠 HIGH'
-                else:
-                    priority = '🟡 MEDIUM'
-                
-                table_data.append([
-                    student.get('name', 'Unknown')[:18],
-                    str(student.get('id', 'N/A')),
-                    str(student.get('current_class', 'N/A')),
-                    f"${balance:,.2f}",
-                    priority
-                ])
-            sections.append(('Students with Outstanding Balances', table_data, 'table'))
+        if num_students:
+            header = ['Student Name', 'ID', 'Class', 'Outstanding', 'Priority']
+            sections.append((
+                'Students with Outstanding Balances',
+                chain([header], map(ArrearsReport._arrears_row, students_with_arrears)),
+                'table',
+            ))
         
         buffer = BeautifulPDFReport.build_pdf(
             'Arrears Collection Report',
             f'Term: {term}' if term else 'Outstanding Balance Summary',
-            sections
+            sections,
+            output=output,
         )
         return buffer
+    
+    @staticmethod
+    def _arrears_row(student):
+        balance = float(student.get('balance', 0))
+        if balance > 10000:
+            priority = '🔴 CRITICAL'
+        elif balance > 5000:
+            priority = '🟠 HIGH'
+        else:
+            priority = '🟡 MEDIUM'
+        
+        return [
+            student.get('name', 'Unknown')[:18],
+            str(student.get('id', 'N/A')),
+            str(student.get('current_class', 'N/A')),
+            f"${balance:,.2f}",
+            priority
+        ]
 
 
 def create_pdf_response(pdf_buffer, filename):
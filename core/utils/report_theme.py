@@ -0,0 +1,173 @@
+"""
+Report Theme Registry
+
+Process-level cache of everything a PDF report sets up before it draws a row:
+ReportLab style sheets, paragraph styles, constant table styles and the school
+branding read from SchoolDetails.
+
+Before, every report call rebuilt getSampleStyleSheet(), a dozen or more
+ParagraphStyles and TableStyle command lists, and queried SchoolDetails once
+per get_school_name() call. Styles do not depend on data, so they are now built
+on first use and shared by every later report in the process.
+
+- stylesheet(key, build) - a sample style sheet extended once by build(sheet)
+- paragraph_style(key, name, parent, **attributes) - one ParagraphStyle
+- table_style(key, commands) - a TableStyle for commands that never vary
+- school_name() / branding() - SchoolDetails, cached until it changes
+
+Keys are namespaced by module ('pdf_reports.footer', 'grade7.section_header')
+because the same style name means different things in different reports.
+Cached styles must be treated as read only.
+
+Branding freshness: receivers in core/signals.py call invalidate() when
+SchoolDetails is saved or deleted. invalidate() bumps a version number in
+Django's cache; a process whose branding was read under another version, or
+more than BRANDING_MAX_AGE seconds ago, reads SchoolDetails again (the same
+scheme as student_search, so report workers pick up a renamed school too).
+
+ReportLab is imported by the first style build, not by this module: the
+SchoolDetails signal receivers import it in web workers that never draw a PDF.
+"""
+import threading
+import time
+from django.core.cache import cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'report_theme:branding_version'
+BRANDING_MAX_AGE = 300
+DEFAULT_SCHOOL_NAME = 'EDEN PRIMARY SCHOOL'
+
+_lock = threading.RLock()
+_styles = {}
+_branding = None
+
+_stats = {
+    'style_builds': 0,
+    'style_hits': 0,
+    'branding_reads': 0,
+}
+
+
+def _cached(key, factory):
+    style = _styles.get(key)
+    if style is not None:
+        _stats['style_hits'] += 1
+        return style
+    with _lock:
+        style = _styles.get(key)
+        if style is None:
+            style = _styles[key] = factory()
+            _stats['style_builds'] += 1
+        return style
+
+
+def base_stylesheet():
+    """ReportLab's sample style sheet, built once (parents for paragraph_style)"""
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    return _cached('reportlab.sample', getSampleStyleSheet)
+
+
+def stylesheet(key, build=None):
+    """A sample style sheet extended by build(sheet), built once per key"""
+    def factory():
+        from reportlab.lib.styles import getSampleStyleSheet
+
+        sheet = getSampleStyleSheet()
+        if build is not None:
+            build(sheet)
+        return sheet
+    return _cached(('stylesheet', key), factory)
+
+
+def paragraph_style(key, name, parent=None, **attributes):
+    """A ParagraphStyle built once per key; parent names a sample style ('Normal')"""
+    def factory():
+        from reportlab.lib.styles import ParagraphStyle
+
+        if parent is not None:
+            attributes['parent'] = base_stylesheet()[parent]
+        return ParagraphStyle(name, **attributes)
+    return _cached(('paragraph', key), factory)
+
+
+def table_style(key, commands):
+    """A TableStyle built once per key; commands is a list or a callable returning one"""
+    def factory():
+        from reportlab.platypus import TableStyle
+
+        return TableStyle(commands() if callable(commands) else commands)
+    return _cached(('table', key), factory)
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 0
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def branding():
+    """School details used on reports: {'name', 'motto', 'address'}"""
+    global _branding
+
+    version = _version()
+    current = _branding
+    if current is not None and current['version'] == version and time.monotonic() - current['read_at'] <= BRANDING_MAX_AGE:
+        return current
+
+    from core.models.school_details import SchoolDetails
+
+    _stats['branding_reads'] += 1
+    current = {'version': version, 'read_at': time.monotonic(), 'name': DEFAULT_SCHOOL_NAME, 'motto': '', 'address': ''}
+    try:
+        school = SchoolDetails.objects.first()
+        if school:
+            current.update(
+                name=school.school_name or DEFAULT_SCHOOL_NAME,
+                motto=school.school_motto,
+                address=school.get_full_address(),
+            )
+    except Exception as e:
+        logger.error(f"Error reading school details for reports: {e}")
+        return current
+    _branding = current
+    return current
+
+
+def school_name():
+    return branding()['name']
+
+
+def use_branding(values):
+    """Install branding read by another process (statement render workers), so
+    the process does not query SchoolDetails itself"""
+    global _branding
+
+    _branding = {
+        'name': values['name'], 'motto': values.get('motto', ''), 'address': values.get('address', ''),
+        'version': _version(), 'read_at': time.monotonic(),
+    }
+
+
+def invalidate():
+    """Re-read SchoolDetails on the next report (every process, via the cache version)"""
+    global _branding
+
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+    _branding = None
+
+
+def clear():
+    """Drop every cached style and the branding (benchmarks and tests)"""
+    global _branding
+
+    with _lock:
+        _styles.clear()
+    _branding = None
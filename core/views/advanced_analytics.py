@@ -8,23 +8,18 @@ from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.contrib import messages
 
-# Try to import scipy and numpy, but make them optional
-try:
-    from scipy import stats as scipy_stats
-    SCIPY_AVAILABLE = True
-except ImportError:
-    SCIPY_AVAILABLE = False
-    scipy_stats = None
+# scipy and numpy are optional and only imported when an analysis runs
+from core.utils.lazy_imports import is_available, lazy
 
-try:
-    import numpy as np
-    NUMPY_AVAILABLE = True
-except ImportError:
-    NUMPY_AVAILABLE = False
-    np = None
+SCIPY_AVAILABLE = is_available('scipy')
+NUMPY_AVAILABLE = is_available('numpy')
+scipy_stats = lazy('scipy.stats')
+np = lazy('numpy')
 
 from core.models.zimsec import ZimsecResults
 from core.models import Class
+from core.services import zimsec_stats
+from core.services.zimsec_matrix import ResultMatrix
 import json
 
 
@@ -55,43 +50,46 @@ class ComparisonView(LoginRequiredMixin, TemplateView):
         ]
         
         # Get comparison data based on type
-        results_current = list(ZimsecResults.objects.filter(academic_year=year).select_related('student', 'student__current_class'))
+        if comparison_type == 'year':
+            context['comparison_data'] = self._get_year_comparison(year)
+            return context
+        
+        matrix = ResultMatrix.load(year)
         
         if comparison_type == 'class':
-            context['comparison_data'] = self._get_class_comparison(results_current)
+            context['comparison_data'] = self._get_class_comparison(matrix)
         elif comparison_type == 'subject':
-            context['comparison_data'] = self._get_subject_comparison(results_current)
-        elif comparison_type == 'gender':
-            context['comparison_data'] = self._get_gender_comparison(results_current)
-        else:  # year
-            results_previous = list(ZimsecResults.objects.filter(academic_year=year-1).select_related('student', 'student__current_class'))
-            context['comparison_data'] = self._get_year_comparison(results_current, results_previous, year)
+            context['comparison_data'] = self._get_subject_comparison(matrix)
+        else:  # gender
+            context['comparison_data'] = self._get_gender_comparison(matrix)
         
         return context
     
-    def _get_year_comparison(self, current, previous, year):
-        """Compare current year with previous year"""
-        def calc_stats(results):
-            if not results:
+    def _get_year_comparison(self, year):
+        """Compare current year with previous year (from ZimsecYearStats)"""
+        def calc_stats(stats):
+            total = stats.candidates
+            if not total:
                 return {}
-            passed = sum(1 for r in results if r.overall_status == 'PASS')
-            aggregates = [r.total_aggregate for r in results if r.total_aggregate]
+            passed = stats.aggregate.passed
             return {
-                'total': len(results),
-                'pass_rate': passed / len(results) * 100 if results else 0,
+                'total': total,
+                'pass_rate': passed / total * 100,
                 'passed': passed,
-                'failed': len(results) - passed,
-                'avg_aggregate': sum(aggregates) / len(aggregates) if aggregates else 0,
+                'failed': total - passed,
+                'avg_aggregate': stats.aggregate.mean,
             }
         
+        current = zimsec_stats.year_stats(year)
+        previous = zimsec_stats.year_stats(year - 1)
         current_stats = calc_stats(current)
         previous_stats = calc_stats(previous)
         
-        # Statistical significance
-        if current and previous:
-            t_stat, p_value = scipy_stats.ttest_ind(
-                [r.total_aggregate for r in current if r.total_aggregate],
-                [r.total_aggregate for r in previous if r.total_aggregate],
+        # Statistical significance (Welch's t-test from the means and variances)
+        if current.candidates and previous.candidates:
+            t_stat, p_value = scipy_stats.ttest_ind_from_stats(
+                current.aggregate.mean, current.aggregate.std_dev, current.aggregate.count,
+                previous.aggregate.mean, previous.aggregate.std_dev, previous.aggregate.count,
                 equal_var=False
             )
         else:
@@ -107,36 +105,31 @@ class ComparisonView(LoginRequiredMixin, TemplateView):
                 'p_value': float(p_value),
                 'significant': p_value < 0.05,
                 'interpretation': 'Statistically significant difference' if p_value < 0.05 else 'No significant difference',
-                'effect_size': self._calculate_cohens_d(current, previous),
+                'effect_size': self._calculate_cohens_d(current.aggregate, previous.aggregate),
             }
         }
     
-    def _get_class_comparison(self, results):
+    def _get_class_comparison(self, matrix):
         """Compare classes side-by-side"""
         classes = Class.objects.filter(grade=7)
         class_stats = {}
+        summary = matrix.group_summary('class_id')
         
         for cls in classes:
-            class_results = [r for r in results if r.student.current_class == cls]
-            if class_results:
-                passed = sum(1 for r in class_results if r.overall_status == 'PASS')
-                aggregates = [r.total_aggregate for r in class_results if r.total_aggregate]
-                
+            stats = summary.get(cls.id)
+            if stats:
                 class_stats[f'Grade 7{cls.section}'] = {
-                    'total': len(class_results),
-                    'pass_rate': passed / len(class_results) * 100,
-                    'passed': passed,
-                    'failed': len(class_results) - passed,
-                    'avg_aggregate': sum(aggregates) / len(aggregates) if aggregates else 0,
-                    'distinction_count': sum(1 for r in class_results if r.total_aggregate and r.total_aggregate <= 13),
+                    'total': stats['total'],
+                    'pass_rate': stats['passed'] / stats['total'] * 100,
+                    'passed': stats['passed'],
+                    'failed': stats['total'] - stats['passed'],
+                    'avg_aggregate': stats['aggregate_sum'] / stats['aggregate_count'] if stats['aggregate_count'] else 0,
+                    'distinction_count': stats['distinctions'],
                 }
         
         # ANOVA test for significance
-        class_lists = [
-            [r.total_aggregate for r in results if r.student.current_class == cls and r.total_aggregate]
-            for cls in classes
-        ]
-        class_lists = [c for c in class_lists if len(c) > 0]
+        class_aggregates = matrix.groups('class_id')
+        class_lists = [class_aggregates[cls.id] for cls in classes if cls.id in class_aggregates]
         
         if len(class_lists) > 1:
             f_stat, p_value = scipy_stats.f_oneway(*class_lists)
@@ -155,7 +148,7 @@ class ComparisonView(LoginRequiredMixin, TemplateView):
             }
         }
     
-    def _get_subject_comparison(self, results):
+    def _get_subject_comparison(self, matrix):
         """Compare subjects side-by-side"""
         subjects = {
             'English': 'english_units',
@@ -166,27 +159,27 @@ class ComparisonView(LoginRequiredMixin, TemplateView):
         }
         
         subject_stats = {}
-        subject_lists = []
+        pass_counts = []
+        summary = matrix.subject_summary(list(subjects.values()))
         
         for subject_name, field_name in subjects.items():
-            values = [getattr(r, field_name) for r in results if getattr(r, field_name) is not None]
+            stats = summary[field_name]
+            count = stats['count']
             
-            if values:
-                passed = sum(1 for v in values if v >= 4)
+            if count:
+                passed = stats['units_4_up']
                 subject_stats[subject_name] = {
-                    'avg_units': sum(values) / len(values),
-                    'pass_rate': passed / len(values) * 100,
-                    'distinction_rate': sum(1 for v in values if v >= 8) / len(values) * 100,
-                    'credit_rate': sum(1 for v in values if 6 <= v < 8) / len(values) * 100,
-                    'count': len(values),
+                    'avg_units': stats['total'] / count,
+                    'pass_rate': passed / count * 100,
+                    'distinction_rate': stats['units_8_up'] / count * 100,
+                    'credit_rate': stats['units_6_7'] / count * 100,
+                    'count': count,
                 }
-                subject_lists.append(values)
+                pass_counts.append([passed, count - passed])
         
         # Chi-square test for pass rates
-        if len(subject_lists) > 1:
-            chi2, p_value, dof, expected = scipy_stats.chi2_contingency(
-                [[sum(1 for v in s if v >= 4), sum(1 for v in s if v < 4)] for s in subject_lists]
-            )
+        if len(pass_counts) > 1:
+            chi2, p_value, dof, expected = scipy_stats.chi2_contingency(pass_counts)
         else:
             chi2, p_value, dof, expected = 0, 1.0, 0, None
         
@@ -202,33 +195,31 @@ class ComparisonView(LoginRequiredMixin, TemplateView):
             }
         }
     
-    def _get_gender_comparison(self, results):
+    def _get_gender_comparison(self, matrix):
         """Compare male vs female students"""
-        male_results = [r for r in results if r.student.sex == 'M']
-        female_results = [r for r in results if r.student.sex == 'F']
+        summary = matrix.group_summary('sex')
         
-        def get_gender_stats(gender_results):
-            if not gender_results:
+        def get_gender_stats(stats):
+            if not stats:
                 return {}
-            passed = sum(1 for r in gender_results if r.overall_status == 'PASS')
-            aggregates = [r.total_aggregate for r in gender_results if r.total_aggregate]
             return {
-                'total': len(gender_results),
-                'pass_rate': passed / len(gender_results) * 100 if gender_results else 0,
-                'passed': passed,
-                'failed': len(gender_results) - passed,
-                'avg_aggregate': sum(aggregates) / len(aggregates) if aggregates else 0,
-                'distinction_count': sum(1 for r in gender_results if r.total_aggregate and r.total_aggregate <= 13),
+                'total': stats['total'],
+                'pass_rate': stats['passed'] / stats['total'] * 100,
+                'passed': stats['passed'],
+                'failed': stats['total'] - stats['passed'],
+                'avg_aggregate': stats['aggregate_sum'] / stats['aggregate_count'] if stats['aggregate_count'] else 0,
+                'distinction_count': stats['distinctions'],
             }
         
-        male_stats = get_gender_stats(male_results)
-        female_stats = get_gender_stats(female_results)
+        male_stats = get_gender_stats(summary.get(matrix.sex_code('M')))
+        female_stats = get_gender_stats(summary.get(matrix.sex_code('F')))
         
         # T-test
-        male_aggs = [r.total_aggregate for r in male_results if r.total_aggregate]
-        female_aggs = [r.total_aggregate for r in female_results if r.total_aggregate]
+        gender_aggregates = matrix.groups('sex')
+        male_aggs = gender_aggregates.get(matrix.sex_code('M'), [])
+        female_aggs = gender_aggregates.get(matrix.sex_code('F'), [])
         
-        if male_aggs and female_aggs:
+        if len(male_aggs) and len(female_aggs):
             t_stat, p_value = scipy_stats.ttest_ind(male_aggs, female_aggs, equal_var=False)
         else:
             t_stat, p_value = 0, 1.0
@@ -247,19 +238,24 @@ class ComparisonView(LoginRequiredMixin, TemplateView):
             }
         }
     
-    def _calculate_cohens_d(self, group1, group2):
-        """Calculate Cohen's d effect size"""
-        agg1 = [r.total_aggregate for r in group1 if r.total_aggregate]
-        agg2 = [r.total_aggregate for r in group2 if r.total_aggregate]
+    def _calculate_cohens_d(self, distribution1, distribution2):
+        """Calculate Cohen's d effect size for two aggregate Distributions"""
+        n1, n2 = distribution1.count, distribution2.count
+        if not n1 or not n2 or n1 + n2 <= 2:
+            return 0
         
-        if not agg1 or not agg2:
+        # Pooled standard deviation
+        pooled_std = (((n1-1)*distribution1.variance + (n2-1)*distribution2.variance) / (n1 + n2 - 2)) ** 0.5
+        
+        if pooled_std == 0:
             return 0
         
-        return self._calculate_cohens_d_for_groups(agg1, agg2)
+        cohens_d = (distribution1.mean - distribution2.mean) / pooled_std
+        return round(float(cohens_d), 3)
     
     def _calculate_cohens_d_for_groups(self, group1, group2):
         """Calculate Cohen's d for two groups"""
-        if not group1 or not group2:
+        if not len(group1) or not len(group2):
             return 0
         
         mean1 = np.mean(group1)
@@ -323,25 +319,17 @@ class PredictionView(LoginRequiredMixin, TemplateView):
             }
             return context
         
-        # Get results for actual years
-        historical_results = {}
-        for year in all_years:
-            historical_results[year] = list(ZimsecResults.objects.filter(academic_year=year))
+        # Get statistics for actual years
+        historical_stats = {year: zimsec_stats.year_stats(year) for year in all_years}
         
-        def get_pass_rate(results):
-            if not results:
+        def get_pass_rate(stats):
+            if not stats.candidates:
                 return 0
-            return sum(1 for r in results if r.overall_status == 'PASS') / len(results) * 100
-        
-        def get_avg_agg(results):
-            if not results:
-                return 0
-            aggs = [r.total_aggregate for r in results if r.total_aggregate]
-            return sum(aggs) / len(aggs) if aggs else 0
+            return stats.aggregate.passed / stats.candidates * 100
         
         # Get pass rates and averages for all historical years
-        pass_rates_dict = {year: get_pass_rate(historical_results[year]) for year in all_years}
-        avg_aggs_dict = {year: get_avg_agg(historical_results[year]) for year in all_years}
+        pass_rates_dict = {year: get_pass_rate(historical_stats[year]) for year in all_years}
+        avg_aggs_dict = {year: historical_stats[year].aggregate.mean for year in all_years}
         
         # For display, show 2025, 2026, 2027 (use 0 if not available)
         pass_rate_2025 = pass_rates_dict.get(2025, 0)
@@ -468,7 +456,7 @@ class StatisticalTestsView(LoginRequiredMixin, TemplateView):
             test_type = request.POST.get('test_type', 'ttest')
             year = int(request.POST.get('year', 2027))
             
-            results = list(ZimsecResults.objects.filter(academic_year=year).select_related('student'))
+            results = ResultMatrix.load(year)
             
             if test_type == 'ttest':
                 return self._perform_ttest(request, results)
@@ -492,7 +480,7 @@ class StatisticalTestsView(LoginRequiredMixin, TemplateView):
         group1 = self._get_group_data(results, group1_type, metric)
         group2 = self._get_group_data(results, group2_type, metric)
         
-        if not group1 or not group2:
+        if not len(group1) or not len(group2):
             return JsonResponse({'error': 'Insufficient data for comparison'}, status=400)
         
         t_stat, p_value = scipy_stats.ttest_ind(group1, group2, equal_var=False)
@@ -516,10 +504,9 @@ class StatisticalTestsView(LoginRequiredMixin, TemplateView):
         classes = Class.objects.filter(grade=7)
         groups = []
         
-        for cls in classes:
-            class_data = self._get_class_data(results, cls, metric)
-            if class_data:
-                groups.append(class_data)
+        if metric == 'aggregate':
+            class_aggregates = results.groups('class_id')
+            groups = [class_aggregates[cls.id] for cls in classes if cls.id in class_aggregates]
         
         if len(groups) < 2:
             return JsonResponse({'error': 'Insufficient groups for ANOVA'}, status=400)
@@ -536,32 +523,22 @@ class StatisticalTestsView(LoginRequiredMixin, TemplateView):
         })
     
     def _get_group_data(self, results, group_type, metric):
-        """Get data for a specific group"""
+        """Get data for a specific group (an array from the ResultMatrix)"""
+        mask = None
         if group_type.startswith('gender_'):
             gender = group_type.split('_')[1]
-            group_results = [r for r in results if r.student.sex == gender]
-        else:
-            group_results = results
+            mask = results.data['sex'] == results.sex_code(gender)
         
         if metric == 'aggregate':
-            return [r.total_aggregate for r in group_results if r.total_aggregate]
+            return results.aggregates(mask)
         elif metric == 'pass_status':
-            return [1 if r.overall_status == 'PASS' else 0 for r in group_results]
-        else:
-            return []
-    
-    def _get_class_data(self, results, cls, metric):
-        """Get data for a specific class"""
-        class_results = [r for r in results if r.student.current_class == cls]
-        
-        if metric == 'aggregate':
-            return [r.total_aggregate for r in class_results if r.total_aggregate]
+            return results.pass_flags(mask)
         else:
             return []
     
     def _calculate_cohens_d_for_groups(self, group1, group2):
         """Calculate Cohen's d for two groups"""
-        if not group1 or not group2:
+        if not len(group1) or not len(group2):
             return 0
         
         mean1 = np.mean(group1)
@@ -584,13 +561,14 @@ class StatisticalTestsView(LoginRequiredMixin, TemplateView):
             return JsonResponse({'error': 'Insufficient data for correlation analysis'}, status=400)
         
         # Get aggregate and distinction rate data
-        aggregates = [r.total_aggregate for r in results if r.total_aggregate]
+        with_aggregate = results.data['aggregate'] > 0
+        aggregates = results.aggregates()
         
         if len(aggregates) < 3:
             return JsonResponse({'error': 'Insufficient aggregate data for correlation'}, status=400)
         
         # Simple correlation: pass rate vs aggregate
-        pass_status = [1 if r.overall_status == 'PASS' else 0 for r in results if r.total_aggregate]
+        pass_status = results.pass_flags(with_aggregate)
         
         # Pearson correlation
         correlation, p_value = scipy_stats.pearsonr(aggregates, pass_status)
@@ -609,23 +587,11 @@ class StatisticalTestsView(LoginRequiredMixin, TemplateView):
             return JsonResponse({'error': 'Insufficient data for chi-square test'}, status=400)
         
         # Create contingency table: Gender vs Pass/Fail status
-        from pandas import crosstab
-        
-        data = []
-        for r in results:
-            if r.student:
-                data.append({
-                    'gender': r.student.sex,
-                    'status': r.overall_status
-                })
+        contingency = results.crosstab('sex', 'status')
         
-        if len(data) < 4:
+        if contingency.sum() < 4:
             return JsonResponse({'error': 'Insufficient data for chi-square test'}, status=400)
         
-        import pandas as pd
-        df = pd.DataFrame(data)
-        contingency = crosstab(df['gender'], df['status'])
-        
         # Perform chi-square test
         chi2, p_value, dof, expected = scipy_stats.chi2_contingency(contingency)
         
@@ -4,7 +4,7 @@ from django.db.models import Count, Sum, F, Q
 from django.utils import timezone
 from datetime import timedelta
 import json
-from ..models import Student, Class, AcademicTerm, Payment, TermFee, Administrator
+from ..models import Student, Class, AcademicTerm, Payment, TermFee, Administrator, TermFinancialSnapshot
 from ..models.fee import StudentBalance
 from decimal import Decimal
 
@@ -35,14 +35,12 @@ class AdminDashboardView(LoginRequiredMixin, TemplateView):
         context['assigned_teachers'] = teacher_stats['active'] or 0
         context['unassigned_teachers'] = context['total_teachers'] - context['assigned_teachers']
 
-        # Fee Collection Statistics - use StudentBalance (including arrears)
-        current_balances = StudentBalance.objects.filter(term=current_term)
-        context['current_term_fee'] = current_balances.aggregate(total=Sum('term_fee'))['total'] or Decimal('0')
-        context['current_term_collected'] = current_balances.aggregate(total=Sum('amount_paid'))['total'] or Decimal('0')
-        context['current_term_outstanding'] = current_balances.aggregate(
-            total=Sum(F('term_fee') + F('previous_arrears') - F('amount_paid'))
-        )['total'] or Decimal('0')
-        context['total_arrears'] = current_balances.aggregate(total=Sum('previous_arrears'))['total'] or Decimal('0')
+        # Fee Collection Statistics - summed from the per-class TermFinancialSnapshot rows
+        term_totals = TermFinancialSnapshot.totals(current_term)
+        context['current_term_fee'] = term_totals['term_fees']
+        context['current_term_collected'] = term_totals['collected']
+        context['current_term_outstanding'] = term_totals['net_balance']
+        context['total_arrears'] = term_totals['arrears']
 
         # Collection rate
         total_due = context['current_term_fee'] + context['total_arrears']
@@ -58,13 +56,8 @@ class AdminDashboardView(LoginRequiredMixin, TemplateView):
         ).select_related('student').order_by('-previous_arrears')[:5]
         context['students_with_arrears'] = students_with_arrears
         
-        # Get counts in single query
-        arrears_counts = StudentBalance.objects.filter(term=current_term).aggregate(
-            arrears_count=Count('id', filter=Q(previous_arrears__gt=0)),
-            no_payment_count=Count('id', filter=Q(amount_paid=0))
-        )
-        context['students_in_arrears_count'] = arrears_counts['arrears_count'] or 0
-        context['no_payment_count'] = arrears_counts['no_payment_count'] or 0
+        context['students_in_arrears_count'] = term_totals['arrears_count']
+        context['no_payment_count'] = term_totals['no_payment_count']
         
         # Students with no payment (highest priority)
         no_payment_students = StudentBalance.objects.filter(
@@ -82,20 +75,13 @@ class AdminDashboardView(LoginRequiredMixin, TemplateView):
         term_due = []
         
         all_terms = list(AcademicTerm.objects.order_by('-academic_year', '-term')[:6])
-        # Pre-fetch all balances for these terms in ONE query with aggregation
-        term_aggregates = StudentBalance.objects.filter(
-            term__in=all_terms
-        ).values('term').annotate(
-            total_collected=Sum('amount_paid'),
-            total_due=Sum(F('term_fee') + F('previous_arrears'))
-        )
-        # Create lookup dict for O(1) access
-        term_data = {agg['term']: agg for agg in term_aggregates}
+        # One indexed read of the snapshot rows for these terms
+        term_data = TermFinancialSnapshot.totals_by_term(all_terms)
         
         for term_obj in reversed(all_terms):
             agg = term_data.get(term_obj.id, {})
-            collected = Decimal(str(agg.get('total_collected') or 0))
-            due = Decimal(str(agg.get('total_due') or 0))
+            collected = Decimal(str(agg.get('collected') or 0))
+            due = Decimal(str(agg.get('expected') or 0))
             
             term_labels.append(f"{term_obj.academic_year} T{term_obj.term}")
             term_collected.append(float(collected))
@@ -116,23 +102,9 @@ class AdminDashboardView(LoginRequiredMixin, TemplateView):
         context['class_distribution_data'] = json.dumps([c['student_count'] for c in class_stats])
 
         # Outstanding Balance Distribution (for pie chart)
-        # Calculate in Python since current_balance is a property
-        all_balances = StudentBalance.objects.filter(term=current_term)
-        paid_count = 0
-        partial_count = 0
-        unpaid_count = 0
-        
-        for balance in all_balances:
-            if balance.current_balance <= 0:
-                paid_count += 1
-            elif balance.amount_paid > 0:
-                partial_count += 1
-            else:
-                unpaid_count += 1
-        
-        context['balance_paid_count'] = paid_count
-        context['balance_partial_count'] = partial_count
-        context['balance_unpaid_count'] = unpaid_count
+        context['balance_paid_count'] = term_totals['paid_count']
+        context['balance_partial_count'] = term_totals['partial_count']
+        context['balance_unpaid_count'] = term_totals['unpaid_count']
         
         return context
 
@@ -147,13 +119,13 @@ class ClassDashboardView(LoginRequiredMixin, TemplateView):
         current_term = AcademicTerm.get_current_term()
         
         try:
-            class_obj = Class.objects.prefetch_related('students').get(id=class_id)
+            class_obj = Class.objects.get(id=class_id)
         except Class.DoesNotExist:
             context['error'] = 'Class not found'
             return context
         
         context['class_obj'] = class_obj
-        students = class_obj.students.all()
+        students = class_obj.students.with_financials(current_term)
         context['students'] = students
         context['total_students'] = students.count()
         
@@ -163,18 +135,19 @@ class ClassDashboardView(LoginRequiredMixin, TemplateView):
             student__current_class=class_obj
         )
         
-        context['class_fee_collected'] = class_balances.aggregate(
-            total=Sum('amount_paid')
-        )['total'] or Decimal('0')
-        context['class_fee_due'] = class_balances.aggregate(
-            total=Sum(F('term_fee') + F('previous_arrears'))
-        )['total'] or Decimal('0')
-        context['class_fee_outstanding'] = class_balances.aggregate(
-            total=Sum(F('term_fee') + F('previous_arrears') - F('amount_paid'))
-        )['total'] or Decimal('0')
-        context['class_total_arrears'] = class_balances.aggregate(
-            total=Sum('previous_arrears')
-        )['total'] or Decimal('0')
+        class_totals = class_balances.aggregate(
+            collected=Sum('amount_paid'),
+            due=Sum('total_due'),
+            outstanding=Sum('current_balance'),
+            arrears=Sum('previous_arrears'),
+            fully_paid=Count('id', filter=Q(current_balance__lte=0)),
+            partial_paid=Count('id', filter=Q(current_balance__gt=0, amount_paid__gt=0)),
+            unpaid=Count('id', filter=Q(current_balance__gt=0, amount_paid__lte=0)),
+        )
+        context['class_fee_collected'] = class_totals['collected'] or Decimal('0')
+        context['class_fee_due'] = class_totals['due'] or Decimal('0')
+        context['class_fee_outstanding'] = class_totals['outstanding'] or Decimal('0')
+        context['class_total_arrears'] = class_totals['arrears'] or Decimal('0')
         
         # Collection rate for class
         context['class_collection_rate'] = (
@@ -229,22 +202,10 @@ class ClassDashboardView(LoginRequiredMixin, TemplateView):
             Q(amount_paid=0) | Q(previous_arrears__gte=100)
         ).select_related('student').order_by('-previous_arrears')[:5]
         
-        # Payment progress - calculate in Python since current_balance is a property
-        fully_paid = 0
-        partial_paid = 0
-        unpaid = 0
-        
-        for balance in class_balances:
-            if balance.current_balance <= 0:
-                fully_paid += 1
-            elif balance.amount_paid > 0:
-                partial_paid += 1
-            else:
-                unpaid += 1
-        
-        context['fully_paid'] = fully_paid
-        context['partial_paid'] = partial_paid
-        context['unpaid'] = unpaid
+        # Payment progress
+        context['fully_paid'] = class_totals['fully_paid'] or 0
+        context['partial_paid'] = class_totals['partial_paid'] or 0
+        context['unpaid'] = class_totals['unpaid'] or 0
         
         return context
 
@@ -302,9 +263,7 @@ class StudentDashboardView(LoginRequiredMixin, TemplateView):
         context['all_payments'] = all_payments
         
         # Historical summary
-        total_due = all_balances.aggregate(
-            total=Sum(F('term_fee') + F('previous_arrears'))
-        )['total'] or Decimal('0')
+        total_due = all_balances.aggregate(total=Sum('total_due'))['total'] or Decimal('0')
         total_paid = all_payments.aggregate(total=Sum('amount'))['total'] or Decimal('0')
         
         context['total_ever_due'] = total_due
@@ -0,0 +1,55 @@
+"""
+Streaming CSV/XLSX exports (see core/services/streaming_export.py)
+"""
+from django.http import JsonResponse, StreamingHttpResponse
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_http_methods
+
+from ..services.streaming_export import DATASETS, StreamingExport
+
+
+def streaming_export_response(dataset, params):
+    """StreamingHttpResponse for an export, configured from request parameters
+
+    params: format (csv/xlsx), columns (comma separated keys), gzip (1/true)
+    and the dataset's own filters. Raises ValueError for unknown values.
+    """
+    columns = [c.strip() for c in params.get('columns', '').split(',') if c.strip()]
+    export = StreamingExport(
+        dataset,
+        columns=columns or None,
+        params=params,
+        file_format=params.get('format', 'csv').lower(),
+        compress=params.get('gzip', '').lower() in ('1', 'true', 'yes'),
+    )
+    response = StreamingHttpResponse(export.stream(), content_type=export.content_type)
+    response['Content-Disposition'] = f'attachment; filename="{export.filename}"'
+    return response
+
+
+@login_required
+@require_http_methods(['GET'])
+def stream_export(request, dataset):
+    """Download a whole dataset as CSV/XLSX: /exports/<dataset>/?format=xlsx&columns=surname,amount_paid"""
+    try:
+        return streaming_export_response(dataset, request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@login_required
+@require_http_methods(['GET'])
+def export_catalogue(request):
+    """Datasets, their columns and accepted filters, for building export forms"""
+    return JsonResponse({
+        'formats': ['csv', 'xlsx'],
+        'datasets': [
+            {
+                'name': name,
+                'title': dataset.title,
+                'columns': [{'key': key, 'header': header} for key, header, _ in dataset.columns],
+                'filters': list(dataset.filters),
+            }
+            for name, dataset in DATASETS.items()
+        ],
+    })
@@ -1,5 +1,6 @@
 from django.views.generic import ListView, CreateView, DetailView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.decorators import login_required
 from django.urls import reverse_lazy
 from django.shortcuts import redirect, get_object_or_404
 from django.contrib import messages
@@ -11,13 +12,17 @@ from django.core.exceptions import ValidationError
 from decimal import Decimal
 from ..models.academic import Payment, AcademicTerm
 from ..models.fee import TermFee, StudentBalance
+from ..models.financial_snapshot import TermFinancialSnapshot
 from ..models.student import Student
 from ..forms.payment_form import PaymentForm
-from ..utils.pdf_reports_modern import PaymentHistoryReport, ArrearsReport, create_pdf_response
+from ..services.term_activation import TermActivationService
+from ..services.payment_import import PaymentImportService
+from .report_views import queue_report
 from datetime import datetime
 from django.http import JsonResponse, HttpResponse
 from decimal import Decimal
 import csv
+import io
 from datetime import datetime
 
 @csrf_exempt
@@ -426,143 +431,109 @@ class FeeDashboardView(LoginRequiredMixin, ListView):
     context_object_name = 'balances'
 
     def get_queryset(self):
+        # Read only: missing balances are reported in the context and created
+        # through materialize_missing_balances (or `manage.py open_term --missing-only`)
         current_term = AcademicTerm.get_current_term()
-        
-        # Auto-initialize balances for all active students if not yet created for this term
-        if current_term:
-            from core.models import Student
-            for student in Student.objects.filter(is_active=True):
-                StudentBalance.initialize_term_balance(student, current_term)
-        
-        return StudentBalance.objects.filter(term=current_term).select_related('student')
+        return StudentBalance.objects.filter(term=current_term).select_related(
+            'student__current_class', 'term'
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         current_term = AcademicTerm.get_current_term()
         
-        # Payment statistics (using Python since term_fee is a property)
-        balances = list(StudentBalance.objects.filter(term=current_term))
-        total_expected = sum(b.term_fee + b.previous_arrears for b in balances) or 0
+        # Payment statistics from the per-class snapshot rows (amount_paid is
+        # the sum of the term's payments, so collected matches Payment totals)
+        totals = TermFinancialSnapshot.totals(current_term)
+        total_expected = totals['expected']
+        total_collected = totals['collected']
         
-        total_collected = Payment.objects.filter(term=current_term).aggregate(
-            total=Sum('amount'))['total'] or 0
-        
-        # Total outstanding = sum of all current_balance amounts from StudentBalance model
-        total_outstanding = sum(b.current_balance for b in balances if b.current_balance > 0) or 0
+        missing_balances = 0
+        if current_term:
+            missing_balances = TermActivationService(current_term).missing_students().count()
         
         context.update({
             'current_term': current_term,
+            'missing_balances': missing_balances,
             'total_expected': total_expected,
             'total_collected': total_collected,
             'collection_rate': (total_collected / total_expected * 100) if total_expected else 0,
-            'total_arrears': total_outstanding
+            'total_arrears': totals['outstanding']
         })
         
         return context
 
 
+@login_required
+@require_http_methods(["POST"])
+def materialize_missing_balances(request):
+    """Create current-term balances for active students that have none yet"""
+    current_term = AcademicTerm.get_current_term()
+    if not current_term:
+        messages.error(request, 'No current term set')
+        return redirect('fee_dashboard')
+    
+    result = TermActivationService(current_term).activate(missing_only=True)
+    messages.success(request, f"Created {result['created']} missing balance(s) for {current_term}")
+    for error in result['errors'][:5]:
+        messages.warning(request, error)
+    return redirect('fee_dashboard')
+
+
+@login_required
+@require_http_methods(["POST"])
+def import_payments(request):
+    """Import an uploaded payment CSV (bank statement / mobile money export)
+    
+    Form fields: payments_file (CSV), dry_run (optional), payment_method (optional default).
+    Responds with the import summary and the per-row error report as JSON.
+    """
+    upload = request.FILES.get('payments_file')
+    if not upload:
+        return JsonResponse({'error': 'No payments_file uploaded'}, status=400)
+    
+    service = PaymentImportService(
+        recorded_by=request.user,
+        dry_run=bool(request.POST.get('dry_run')),
+        default_method=request.POST.get('payment_method', 'BANK').upper(),
+    )
+    if not service.term:
+        return JsonResponse({'error': 'No current term set'}, status=400)
+    
+    try:
+        result = service.import_csv(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''))
+    except (UnicodeDecodeError, csv.Error) as e:
+        return JsonResponse({'error': f'Could not read the file: {e}'}, status=400)
+    
+    return JsonResponse({
+        'term': str(service.term),
+        'dry_run': service.dry_run,
+        'rows': result['rows'],
+        'imported': result['imported'],
+        'failed': result['failed'],
+        'total_amount': float(result['total_amount']),
+        'students': result['students'],
+        'errors': result['errors'],
+    })
+
+
+@login_required
 @require_http_methods(["GET"])
 def export_student_payment_history(request, student_id):
-    """Export a student's complete payment history as PDF"""
-    try:
-        student = get_object_or_404(Student, id=student_id)
-        
-        # Get all payments
-        all_payments = Payment.objects.filter(student=student).order_by('-created_at')
-        
-        # Get balance info
-        current_term = AcademicTerm.get_current_term()
-        balance = StudentBalance.initialize_term_balance(student, current_term)
-        
-        balance_info = {}
-        if balance:
-            balance_info = {
-                'term_fee': float(balance.term_fee),
-                'amount_paid': float(balance.amount_paid),
-                'previous_arrears': float(balance.previous_arrears),
-                'current_balance': float(balance.current_balance),
-            }
-        
-        # Generate PDF
-        pdf_buffer = PaymentHistoryReport.generate_student_payment_pdf(student, all_payments, balance_info)
-        
-        # Create response
-        filename = f"payment_history_{student.id}_{datetime.now().strftime('%Y%m%d')}.pdf"
-        return create_pdf_response(pdf_buffer, filename)
-        
-    except Exception as e:
-        return HttpResponse(f'Error exporting payment history: {str(e)}', status=400)
+    """Export a student's complete payment history as PDF (rendered by the report worker)"""
+    get_object_or_404(Student, id=student_id)
+    return queue_report(request, 'student_payment_history', {'student': student_id})
 
 
+@login_required
 @require_http_methods(["GET"])
 def export_fee_dashboard(request):
-    """Export current term fee dashboard data as PDF"""
-    try:
-        current_term = AcademicTerm.get_current_term()
-        if not current_term:
-            return HttpResponse('No current term set', status=400)
-        
-        # Get all balances for the term
-        balances = StudentBalance.objects.filter(term=current_term).select_related('student')
-        
-        # Prepare student data
-        students_data = []
-        for balance in balances:
-            students_data.append({
-                'name': balance.student.get_full_name(),
-                'class': str(balance.student.current_class) if balance.student.current_class else 'N/A',
-                'term_fee': float(balance.term_fee),
-                'amount_paid': float(balance.amount_paid),
-                'current_balance': float(balance.current_balance),
-                'arrears_remaining': float(balance.arrears_remaining),
-            })
-        
-        # Generate PDF
-        pdf_buffer = PaymentHistoryReport.generate_fee_dashboard_pdf(str(current_term), students_data)
-        
-        # Create response
-        filename = f"fee_dashboard_{datetime.now().strftime('%Y%m%d')}.pdf"
-        return create_pdf_response(pdf_buffer, filename)
-        
-    except Exception as e:
-        return HttpResponse(f'Error exporting fee dashboard: {str(e)}', status=400)
+    """Export current term fee dashboard data as PDF (rendered by the report worker)"""
+    return queue_report(request, 'fee_dashboard', {'term': request.GET.get('term')})
 
 
+@login_required
 @require_http_methods(["GET"])
 def arrears_report_pdf(request):
-    """Export arrears report as PDF"""
-    try:
-        current_term = AcademicTerm.get_current_term()
-        if not current_term:
-            return HttpResponse('No current term set', status=400)
-        
-        # Get all balances for the term
-        balances = StudentBalance.objects.filter(
-            term=current_term
-        ).select_related('student').order_by('-amount_paid')
-        
-        # Prepare arrears data - filter for those with outstanding balance
-        students_with_arrears = []
-        for balance in balances:
-            # Use the property to calculate current_balance
-            outstanding = balance.current_balance
-            if outstanding > 0:
-                students_with_arrears.append({
-                    'name': balance.student.get_full_name(),
-                    'id': balance.student.id,
-                    'current_class': str(balance.student.current_class) if balance.student.current_class else 'N/A',
-                    'balance': float(outstanding),
-                })
-        
-        # Sort by balance descending
-        students_with_arrears.sort(key=lambda x: x['balance'], reverse=True)
-        
-        # Generate PDF
-        pdf_buffer = ArrearsReport.generate_arrears_pdf(students_with_arrears, term=str(current_term))
-        
-        # Create response
-        filename = f"arrears_report_{datetime.now().strftime('%Y%m%d')}.pdf"
-        return create_pdf_response(pdf_buffer, filename)
-        
-    except Exception as e:
-        return HttpResponse(f'Error exporting arrears report: {str(e)}', status=400)
+    """Export arrears report as PDF (rendered by the report worker)"""
+    return queue_report(request, 'arrears', {'term': request.GET.get('term')})
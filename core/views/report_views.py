@@ -0,0 +1,93 @@
+"""
+Background PDF reports: request, poll and download (see core/services/report_jobs.py)
+"""
+import mimetypes
+
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods
+
+from ..models import ReportJob
+from ..services import report_jobs
+
+
+def _job_status(job):
+    data = {
+        'id': str(job.pk),
+        'report_type': job.report_type,
+        'title': report_jobs.REPORTS[job.report_type].title if job.report_type in report_jobs.REPORTS else job.report_type,
+        'status': job.status,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'status_url': reverse('report_job_status', args=[job.pk]),
+        'download_url': None,
+    }
+    if job.status == 'DONE':
+        data['download_url'] = reverse('report_job_download', args=[job.pk])
+        data['size'] = job.size
+    return data
+
+
+def queue_report(request, report_type, params):
+    """Enqueue a report and send the browser on: straight to the PDF when
+    it is already cached, otherwise to the page that polls for it.
+    JSON clients (?format=json) get the job status instead."""
+    try:
+        job, _ = report_jobs.enqueue(report_type, params, requested_by=request.user)
+    except ValueError as e:
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'error': str(e)}, status=400)
+        return HttpResponse(f'Error exporting report: {e}', status=400)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse(_job_status(job), status=200 if job.status == 'DONE' else 202)
+    if job.status == 'DONE':
+        return redirect('report_job_download', job_id=job.pk)
+    return redirect('report_job_page', job_id=job.pk)
+
+
+@login_required
+@require_http_methods(['GET'])
+def request_report(request, report_type):
+    """/reports/<report_type>/?<params> - queue any registered report"""
+    params = {key: value for key, value in request.GET.items() if key != 'format'}
+    return queue_report(request, report_type, params)
+
+
+@login_required
+@require_http_methods(['GET'])
+def report_job_page(request, job_id):
+    """Waiting page that polls the job status and starts the download when ready"""
+    job = get_object_or_404(ReportJob.objects.defer('content'), pk=job_id)
+    return render(request, 'reports/report_status.html', {'job': job, 'job_status': _job_status(job)})
+
+
+@login_required
+@require_http_methods(['GET'])
+def report_job_status(request, job_id):
+    job = get_object_or_404(ReportJob.objects.defer('content'), pk=job_id)
+    return JsonResponse(_job_status(job))
+
+
+@login_required
+@require_http_methods(['GET'])
+def report_job_download(request, job_id):
+    """The stored PDF (or zip); the content hash is the ETag so browsers can revalidate cheaply"""
+    job = get_object_or_404(ReportJob.objects.defer('content'), pk=job_id)
+    if job.status != 'DONE':
+        return redirect('report_job_page', job_id=job.pk)
+
+    etag = f'"{job.content_hash}"'
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified()
+
+    content = ReportJob.objects.filter(pk=job.pk).values_list('content', flat=True).get()
+    job.mark_downloaded()
+    content_type = mimetypes.guess_type(job.filename)[0] or 'application/pdf'
+    response = HttpResponse(bytes(content), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{job.filename}"'
+    response['ETag'] = etag
+    return response
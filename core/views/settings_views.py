@@ -13,6 +13,7 @@ from ..models.academic import AcademicTerm
 from ..models.academic_year import AcademicYear
 from ..models.fee import TermFee
 from ..models import Administrator
+from ..services import current_period
 from django.shortcuts import get_object_or_404
 import json
 
@@ -322,6 +323,8 @@ def create_academic_year(request):
         # If setting this year as active, deactivate all others
         if is_active:
             AcademicYear.objects.all().update(is_active=False)
+            # Bulk update skips the model signals that clear the cached current year
+            current_period.invalidate()
         
         academic_year, created = AcademicYear.objects.get_or_create(
             year=year,
@@ -8,7 +8,10 @@ from django.views.generic import TemplateView, ListView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
 from django.http import JsonResponse, HttpResponse
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 from django.db.models import Sum, F, Count
 from django.utils import timezone
@@ -17,10 +20,12 @@ import json
 import csv
 from io import StringIO
 
-from core.models import AcademicYear, AcademicTerm, TermFee, Student, Class
+from core.models import AcademicYear, AcademicTerm, TermFee, Student, Class, RolloverJob
 from core.models.fee import StudentBalance
 from core.models.academic import Payment
 from core.models.student_movement import StudentMovement
+from core.services import rollover
+from core.services.promotion import class_label
 
 class AcademicCalendarView(LoginRequiredMixin, TemplateView):
     """Interactive timeline view of academic calendar"""
@@ -172,20 +177,8 @@ class RolloverWizardView(LoginRequiredMixin, TemplateView):
             # Pre-rollover checks
             new_year_num = context['current_year'].year + 1
             new_year_exists = AcademicYear.objects.filter(year=new_year_num).exists()
-            
-            # Count students to be promoted
-            students_to_promote = Student.objects.filter(
-                is_active=True,
-                current_class__isnull=False,
-                current_class__grade__lt=7
-            ).count()
-            
-            # Calculate total arrears
-            total_arrears = StudentBalance.objects.filter(
-                term__academic_year=context['current_year'].year
-            ).aggregate(
-                arrears=Sum(F('term_fee') + F('previous_arrears') - F('amount_paid'))
-            )['arrears'] or 0
+            plan = rollover.RolloverPlanner(context['current_year']).plan()
+            arrears = _year_end_arrears(context['current_year'].year)
             
             # Get fee structure from current year
             current_fee_structure = []
@@ -196,49 +189,30 @@ class RolloverWizardView(LoginRequiredMixin, TemplateView):
                     'fee': float(term_fee.amount) if term_fee else 0,
                 })
             
-            # Get required classes for new year
-            classes_by_grade = {}
-            for student in Student.objects.filter(
-                is_active=True,
-                current_class__isnull=False,
-                current_class__grade__lt=8
-            ):
-                next_grade = student.current_class.grade + 1
-                section = student.current_class.section
-                key = f"{next_grade}{section}"
-                
-                if key not in classes_by_grade:
-                    classes_by_grade[key] = {
-                        'grade': next_grade,
-                        'section': section,
-                        'exists': False,
-                        'count': 0
-                    }
-                classes_by_grade[key]['count'] += 1
-            
-            # Check which classes exist in new year
-            if not new_year_exists:
-                for key, class_info in classes_by_grade.items():
-                    exists = Class.objects.filter(
-                        grade=class_info['grade'],
-                        section=class_info['section'],
-                        academic_year=new_year_num
-                    ).exists()
-                    class_info['exists'] = exists
+            # Classes of the new year the students move into, then those still missing
+            target_classes = Class.objects.in_bulk(list(plan.class_sizes))
+            required_classes = [
+                {
+                    'name': class_label(cls.grade, cls.section),
+                    'exists': True,
+                    'count': plan.class_sizes[class_id],
+                }
+                for class_id, cls in sorted(target_classes.items(), key=lambda item: str(item[1]))
+            ]
+            required_classes += [
+                {'name': name, 'exists': False, 'count': count}
+                for name, count in sorted(plan.missing.items())
+            ]
             
             context['rollover_info'] = {
                 'new_year': new_year_num,
                 'new_year_exists': new_year_exists,
-                'students_to_promote': students_to_promote,
-                'students_graduating': Student.objects.filter(
-                    is_active=True,
-                    current_class__isnull=False,
-                    current_class__grade=8
-                ).count(),
-                'total_arrears': float(total_arrears),
+                'students_to_promote': len(plan.moves) + sum(plan.missing.values()),
+                'students_graduating': len(plan.graduates),
+                'total_arrears': float(arrears['total_arrears']),
                 'fee_structure': current_fee_structure,
-                'required_classes': list(classes_by_grade.values()),
-                'all_classes_ready': all(c['exists'] for c in classes_by_grade.values()) or new_year_exists,
+                'required_classes': required_classes,
+                'all_classes_ready': plan.is_complete or new_year_exists,
                 'balances_count': StudentBalance.objects.filter(
                     term__academic_year=context['current_year'].year
                 ).count(),
@@ -311,23 +285,12 @@ def set_current_term_api(request, term_id):
         term = AcademicTerm.objects.get(id=term_id)
         AcademicTerm.objects.all().update(is_current=False)
         term.is_current = True
+        # Saving a current term opens it for every active student with
+        # TermActivationService (initialize_balances_on_term_activation signal)
         term.save()
         
-        # IMPORTANT: Initialize StudentBalance for all active students in this term
-        # This ensures they have their arrears carried forward when a new term becomes current
-        from core.models.fee import StudentBalance
-        from core.models import Student
-        
-        active_students = Student.objects.filter(is_active=True, is_deleted=False)
-        balances_initialized = 0
-        
-        for student in active_students:
-            try:
-                balance = StudentBalance.initialize_term_balance(student, term)
-                if balance:
-                    balances_initialized += 1
-            except Exception as e:
-                print(f"Warning: Could not initialize balance for {student.full_name} in {term}: {e}")
+        result = getattr(term, '_activation_result', None) or {'created': 0, 'updated': 0}
+        balances_initialized = result['created'] + result['updated']
         
         return JsonResponse({
             'status': 'success',
@@ -438,95 +401,148 @@ def rollover_year_api(request, year_id):
         }, status=400)
 
 
+def _year_end_arrears(year, top=10):
+    """Unpaid balances at the end of `year` - what a rollover carries forward
+    
+    A student's arrears are the current_balance of their last balance of the
+    year (see rollover._promote_batch).
+    """
+    last_balances = {}
+    for student_id, term, current_balance in StudentBalance.objects.filter(
+        term__academic_year=year, student__is_active=True, student__is_deleted=False
+    ).order_by('student_id', '-term__term').values_list('student_id', 'term__term', 'current_balance'):
+        last_balances.setdefault(student_id, (term, current_balance))
+    
+    owing = {
+        student_id: (term, balance)
+        for student_id, (term, balance) in last_balances.items() if balance > 0
+    }
+    top_ids = sorted(owing, key=lambda student_id: owing[student_id][1], reverse=True)[:top]
+    students = Student.objects.in_bulk(top_ids)
+    return {
+        'total_arrears': sum((balance for _, balance in owing.values()), 0),
+        'students_with_arrears': len(owing),
+        'total_students': len(last_balances),
+        'top_arrears': [{
+            'student': str(students[student_id]),
+            'arrears': float(owing[student_id][1]),
+            'term': f"{year} T{owing[student_id][0]}",
+        } for student_id in top_ids if student_id in students],
+    }
+
+
+@login_required
 @require_http_methods(["POST"])
 def verify_arrears_before_rollover(request, year_id):
     """Verify and report arrears before rollover"""
     try:
         year = AcademicYear.objects.get(id=year_id)
-        
-        # Get arrears details
-        balances = StudentBalance.objects.filter(term__academic_year=year.year)
-        
-        total_arrears = balances.aggregate(
-            arrears=Sum(F('term_fee') + F('previous_arrears') - F('amount_paid'))
-        )['arrears'] or 0
-        
-        # Count students with arrears
-        students_with_arrears = balances.filter(
-            Q(term_fee__gt=0) | Q(previous_arrears__gt=0)
-        ).values('student').distinct().count()
-        
-        # Get top arrears students
-        from django.db.models import Q
-        top_arrears = balances.filter(
-            Q(term_fee__gt=F('amount_paid')) | Q(previous_arrears__gt=0)
-        ).select_related('student').order_by(
-            F('term_fee') + F('previous_arrears') - F('amount_paid'), ascending=False
-        )[:10]
-        
-        arrears_list = [{
-            'student': str(b.student),
-            'arrears': float((b.term_fee + b.previous_arrears - b.amount_paid)),
-            'term': f"{b.term.academic_year} T{b.term.term}"
-        } for b in top_arrears]
-        
+    except AcademicYear.DoesNotExist:
         return JsonResponse({
-            'status': 'success',
-            'total_arrears': float(total_arrears),
-            'students_with_arrears': students_with_arrears,
-            'total_students': balances.values('student').distinct().count(),
-            'top_arrears': arrears_list
-        })
-    except Exception as e:
+            'status': 'error',
+            'message': 'Academic year not found'
+        }, status=404)
+    
+    arrears = _year_end_arrears(year.year)
+    return JsonResponse({
+        'status': 'success',
+        'total_arrears': float(arrears['total_arrears']),
+        'students_with_arrears': arrears['students_with_arrears'],
+        'total_students': arrears['total_students'],
+        'top_arrears': arrears['top_arrears'],
+    })
+
+
+@login_required
+@require_http_methods(['POST'])
+def simulate_rollover(request, year_id):
+    """Dry run of the rollover: every phase runs and is rolled back
+    
+    Returns what the rollover would change and how long each phase took
+    (see rollover.simulate).
+    """
+    try:
+        year = AcademicYear.objects.get(id=year_id)
+        report = rollover.simulate(year)
+    except AcademicYear.DoesNotExist:
         return JsonResponse({
             'status': 'error',
-            'message': str(e)
+            'message': 'Academic year not found'
+        }, status=404)
+    except ValidationError as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': '; '.join(e.messages)
         }, status=400)
-
-
+    
+    report['status'] = 'success'
+    return JsonResponse(report)
+
+
+def _rollover_job_status(job):
+    return {
+        'id': str(job.pk),
+        'status': job.status,
+        'phase': job.phase,
+        'phase_display': job.get_phase_display(),
+        'processed': job.processed,
+        'total': job.total,
+        'percent': job.percent,
+        'from_year': job.from_year,
+        'to_year': job.to_year,
+        'summary': job.summary,
+        'error': job.error,
+        'status_url': reverse('rollover_job_status', args=[job.pk]),
+    }
+
+
+@login_required
 @require_http_methods(['POST'])
 def execute_rollover(request, year_id):
-    """Execute year rollover with arrears preservation"""
+    """Queue the year rollover for the background worker
+    
+    The promotion plan is checked first, so missing classes are reported
+    straight away; the browser then polls status_url for progress.
+    """
     try:
         year = AcademicYear.objects.get(id=year_id)
-        
-        # Validate rollover can proceed
-        validation_error = year._validate_rollover()
-        if validation_error:
-            return JsonResponse({
-                'status': 'error',
-                'message': validation_error
-            }, status=400)
-        
-        # Execute rollover (atomic transaction)
-        year.rollover_to_new_year()
-        
-        # Get new year that was created
-        new_year = AcademicYear.objects.get(year=year.year + 1)
-        
-        # Count students promoted
-        promoted_count = StudentMovement.objects.filter(
-            from_year=year,
-            to_year=new_year
-        ).count()
-        
-        return JsonResponse({
-            'status': 'success',
-            'message': f'✓ Successfully rolled over to Academic Year {new_year.year}',
-            'new_year_id': new_year.id,
-            'students_promoted': promoted_count,
-            'redirect_url': f'/admin/academic/calendar/'
-        })
+        job, created = rollover.enqueue(year, requested_by=request.user)
     except AcademicYear.DoesNotExist:
         return JsonResponse({
             'status': 'error',
             'message': 'Academic year not found'
         }, status=404)
-    except Exception as e:
+    except ValidationError as e:
         return JsonResponse({
             'status': 'error',
-            'message': f'Rollover failed: {str(e)}'
+            'message': '; '.join(e.messages)
         }, status=400)
+    
+    data = _rollover_job_status(job)
+    if created:
+        data['message'] = (
+            f"Rollover to Academic Year {job.to_year} queued: {job.summary.get('promoted', 0)} students "
+            f"to promote, {job.summary.get('graduating', 0)} graduating"
+        )
+    else:
+        data['message'] = f'A rollover of {job.from_year} is already in progress'
+    return JsonResponse(data, status=202)
+
+
+@login_required
+@require_http_methods(['GET'])
+def rollover_job_status(request, job_id):
+    """Progress of a queued rollover"""
+    job = get_object_or_404(RolloverJob, pk=job_id)
+    return JsonResponse(_rollover_job_status(job))
+
+
+@login_required
+@require_http_methods(['POST'])
+def resume_rollover(request, job_id):
+    """Queue a failed rollover again; it continues from the phase it stopped in"""
+    job = rollover.resume(get_object_or_404(RolloverJob, pk=job_id))
+    return JsonResponse(_rollover_job_status(job), status=202)
 
 
 def export_academic_calendar(request, year_id):
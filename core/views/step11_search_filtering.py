@@ -5,6 +5,7 @@ Provides comprehensive search, filtering, and bulk actions on students, teachers
 
 from django.views.generic import TemplateView, ListView
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
@@ -16,7 +17,8 @@ import json
 from decimal import Decimal
 
 from core.models import Student, Class, Administrator, AcademicYear, AcademicTerm
-from core.models.fee import StudentBalance, Payment
+from core.models.fee import StudentBalance
+from core.services import student_search
 
 
 class GlobalSearchView(LoginRequiredMixin, TemplateView):
@@ -37,28 +39,22 @@ class GlobalSearchView(LoginRequiredMixin, TemplateView):
             context['total_results'] = 0
             return context
         
-        # Search students
-        students = Student.objects.filter(
-            Q(name__icontains=query) |
-            Q(student_id__icontains=query) |
-            Q(parent_phone__icontains=query)
-        ).select_related('student_class').values(
-            'id', 'name', 'student_id', 'student_class__grade', 
-            'student_class__section', 'gender', 'date_of_birth'
-        )[:20]
+        # Search students (ranked, see core/services/student_search.py)
+        students = student_search.search(query, limit=20)
         
         # Search teachers
         teachers = Administrator.objects.filter(
             Q(email__icontains=query) |
-            Q(full_name__icontains=query)
-        ).values('id', 'email', 'full_name')[:20]
+            Q(first_name__icontains=query) |
+            Q(last_name__icontains=query)
+        ).values('id', 'email', 'first_name', 'last_name')[:20]
         
         # Search classes
         classes = Class.objects.filter(
             Q(grade__icontains=query) |
             Q(section__icontains=query)
-        ).select_related('class_teacher').values(
-            'id', 'grade', 'section', 'class_teacher__full_name', 'class_teacher__email'
+        ).values(
+            'id', 'grade', 'section', 'teacher__first_name', 'teacher__last_name', 'teacher__email'
         )[:20]
         
         context['students'] = students
@@ -73,53 +69,48 @@ class GlobalSearchView(LoginRequiredMixin, TemplateView):
 class StudentSearchFilterView(LoginRequiredMixin, TemplateView):
     """Advanced student search with multiple filter options"""
     template_name = 'search/student_search.html'
+    
+    # Best text matches considered before the filters below are applied
+    SEARCH_LIMIT = 1000
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
         # Base query
         query = self.request.GET.get('q', '').strip()
-        students = Student.objects.select_related('student_class').annotate(
-            current_balance=F('studentbalance__term_fee') - F('studentbalance__amount_paid') + F('studentbalance__previous_arrears')
-        )
+        students = Student.objects.select_related('current_class')
         
-        # Text search
+        # Text search: ranked ids from the search index, filtered further in SQL
+        ranked_ids = None
         if query:
-            students = students.filter(
-                Q(name__icontains=query) |
-                Q(student_id__icontains=query) |
-                Q(parent_phone__icontains=query)
-            )
+            ranked_ids = student_search.search_ids(query, limit=self.SEARCH_LIMIT)
+            students = students.filter(id__in=ranked_ids)
         
         # Filter by class
         class_id = self.request.GET.get('class_id')
         if class_id:
-            students = students.filter(student_class_id=class_id)
-            context['selected_class'] = Class.objects.get(id=class_id) if class_id else None
+            students = students.filter(current_class_id=class_id)
+            context['selected_class'] = Class.objects.filter(id=class_id).first()
         
         # Filter by grade
         grade = self.request.GET.get('grade')
         if grade:
-            students = students.filter(student_class__grade=grade)
+            students = students.filter(current_class__grade=grade)
             context['selected_grade'] = grade
         
         # Filter by gender
         gender = self.request.GET.get('gender')
         if gender:
-            students = students.filter(gender=gender)
+            students = students.filter(sex=gender)
             context['selected_gender'] = gender
         
         # Filter by payment status (current term)
         payment_status = self.request.GET.get('payment_status')
         if payment_status:
-            current_year = AcademicYear.objects.filter(is_active=True).first()
             current_term = AcademicTerm.objects.filter(is_current=True).first()
             
-            if current_year and current_term:
-                balance_query = StudentBalance.objects.filter(
-                    term__academic_year_id=current_year.pk,
-                    term_id=current_term.pk
-                )
+            if current_term:
+                balance_query = StudentBalance.objects.filter(term=current_term)
                 
                 if payment_status == 'paid':
                     students = students.filter(
@@ -147,14 +138,14 @@ class StudentSearchFilterView(LoginRequiredMixin, TemplateView):
                 if arrears_status == 'has_arrears':
                     students = students.filter(
                         id__in=StudentBalance.objects.filter(
-                            term__academic_year_id=current_year.pk,
+                            term__academic_year=current_year.year,
                             previous_arrears__gt=0
                         ).values('student_id').distinct()
                     )
                 elif arrears_status == 'no_arrears':
                     students = students.exclude(
                         id__in=StudentBalance.objects.filter(
-                            term__academic_year_id=current_year.pk,
+                            term__academic_year=current_year.year,
                             previous_arrears__gt=0
                         ).values('student_id').distinct()
                     )
@@ -163,9 +154,7 @@ class StudentSearchFilterView(LoginRequiredMixin, TemplateView):
         min_balance = self.request.GET.get('min_balance')
         max_balance = self.request.GET.get('max_balance')
         if min_balance or max_balance:
-            balance_query = StudentBalance.objects.annotate(
-                current_balance=F('term_fee') - F('amount_paid') + F('previous_arrears')
-            )
+            balance_query = StudentBalance.objects.all()
             if min_balance:
                 balance_query = balance_query.filter(current_balance__gte=Decimal(min_balance))
             if max_balance:
@@ -185,15 +174,24 @@ class StudentSearchFilterView(LoginRequiredMixin, TemplateView):
                 max_dob = today - timedelta(days=int(min_age)*365)
                 students = students.filter(date_of_birth__gte=max_dob)
         
-        # Distinct and order
-        students = students.distinct().order_by('name')
+        # Distinct and order (best search match first when searching)
+        students = students.distinct()
+        if ranked_ids is not None:
+            rank = {student_id: position for position, student_id in enumerate(ranked_ids)}
+            page = sorted(students, key=lambda student: rank[student.id])
+            total_count = len(page)
+            page = page[:100]
+        else:
+            students = students.order_by('surname', 'first_name')
+            total_count = students.count()
+            page = students[:100]  # Limit to 100 for performance
         
         # Get filter options for sidebar
         context['classes'] = Class.objects.all().order_by('grade', 'section')
         context['grades'] = Class.objects.values_list('grade', flat=True).distinct().order_by('grade')
-        context['genders'] = [('M', 'Male'), ('F', 'Female'), ('O', 'Other')]
-        context['students'] = students[:100]  # Limit to 100 for performance
-        context['total_count'] = len(students)
+        context['genders'] = Student.GENDER_CHOICES
+        context['students'] = page
+        context['total_count'] = total_count
         context['query'] = query
         context['selected_payment_status'] = payment_status
         context['selected_arrears_status'] = arrears_status
@@ -237,7 +235,10 @@ class FinancialSearchView(LoginRequiredMixin, TemplateView):
         )
         
         if year_id:
-            balances = balances.filter(term__academic_year_id=year_id)
+            # AcademicTerm.academic_year holds the year number, not an AcademicYear id
+            balances = balances.filter(
+                term__academic_year__in=AcademicYear.objects.filter(pk=year_id).values('year')
+            )
         
         if term_id:
             balances = balances.filter(term_id=term_id)
@@ -289,6 +290,7 @@ class SavedFilterView(LoginRequiredMixin, TemplateView):
 # API ENDPOINTS
 # ============================================================================
 
+@login_required
 @require_http_methods(['GET'])
 def search_autocomplete(request):
     """Real-time search suggestions as user types"""
@@ -302,27 +304,25 @@ def search_autocomplete(request):
         suggestions = []
         
         if search_type in ['all', 'students']:
-            students = Student.objects.filter(
-                Q(name__icontains=query) | Q(student_id__icontains=query)
-            ).values('id', 'name', 'student_id').order_by('name')[:10]
+            students = student_search.search(query, limit=10)
             
             suggestions.extend([{
                 'type': 'student',
                 'id': s['id'],
-                'text': f"{s['name']} ({s['student_id']})",
-                'url': f'/admin/students/{s["id"]}/'
+                'text': f"{s['surname']}, {s['first_name']} ({s['birth_entry_number']})",
+                'url': f'/students/{s["id"]}/'
             } for s in students])
         
         if search_type in ['all', 'teachers']:
             teachers = Administrator.objects.filter(
-                Q(full_name__icontains=query) | Q(email__icontains=query)
-            ).values('id', 'full_name', 'email').order_by('full_name')[:10]
+                Q(first_name__icontains=query) | Q(last_name__icontains=query) | Q(email__icontains=query)
+            ).values('id', 'first_name', 'last_name', 'email').order_by('first_name', 'last_name')[:10]
             
             suggestions.extend([{
                 'type': 'teacher',
                 'id': t['id'],
-                'text': f"{t['full_name']} ({t['email']})",
-                'url': f'/admin/teachers/{t["id"]}/'
+                'text': f"{t['first_name']} {t['last_name']} ({t['email']})",
+                'url': f'/teachers/{t["id"]}/'
             } for t in teachers])
         
         if search_type in ['all', 'classes']:
@@ -334,7 +334,7 @@ def search_autocomplete(request):
                 'type': 'class',
                 'id': c['id'],
                 'text': f"Grade {c['grade']}, {c['section']}",
-                'url': f'/admin/classes/{c["id"]}/'
+                'url': f'/classes/{c["id"]}/'
             } for c in classes])
         
         return JsonResponse({'suggestions': suggestions})
@@ -373,39 +373,27 @@ def get_filter_options(request):
         return JsonResponse({'error': str(e)}, status=400)
 
 
+@login_required
 @require_http_methods(['GET'])
 def export_search_results(request):
-    """Export filtered search results as CSV"""
-    try:
-        import csv
-        from django.http import HttpResponse
-        
-        search_type = request.GET.get('type', 'students')
-        
-        if search_type == 'students':
-            students = Student.objects.all().select_related('student_class')
-            
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename="students_export.csv"'
-            
-            writer = csv.writer(response)
-            writer.writerow(['ID', 'Name', 'Student ID', 'Class', 'Gender', 'DOB', 'Phone'])
-            
-            for student in students:
-                writer.writerow([
-                    student.id,
-                    student.name,
-                    student.student_id,
-                    f"{student.student_class.grade}-{student.student_class.section}" if student.student_class else '',
-                    student.gender,
-                    student.date_of_birth,
-                    student.parent_phone
-                ])
-            
-            return response
-        
+    """Export filtered search results as CSV/XLSX (streamed, see core/services/streaming_export.py)"""
+    from core.views.export_views import streaming_export_response
+
+    search_type = request.GET.get('type', 'students')
+    if search_type != 'students':
         return JsonResponse({'error': 'Invalid search type'}, status=400)
-    except Exception as e:
+    
+    params = request.GET.dict()
+    query = params.pop('q', '').strip()
+    if query:
+        # Keep the matches of the text search, as on the search page. An empty
+        # ids value is ignored by the export, so no matches is passed as 'none'
+        ids = student_search.search_ids(query, limit=None)
+        params['ids'] = ','.join(str(i) for i in ids) or 'none'
+    
+    try:
+        return streaming_export_response('students', params)
+    except ValueError as e:
         return JsonResponse({'error': str(e)}, status=400)
 
 
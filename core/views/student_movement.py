@@ -11,6 +11,7 @@ from ..models.student_movement import StudentMovement, BulkMovement
 from ..models.student import Student
 from ..models.class_model import Class
 from ..models import AcademicTerm
+from ..services.promotion import BALANCED_GRADE, NEXT_GRADE, BulkPromotionService, target_year
 import uuid
 import json
 
@@ -264,25 +265,15 @@ def bulk_promote_students(request):
         else:
             classes = Class.objects.none()
 
-        # Calculate next class for each student
+        # Describe the next class for each student (no queries)
         for student in students:
-            if student.current_class and student.current_class.grade:
-                try:
-                    # Grade is now a string, convert to int for comparison
-                    current_grade = int(student.current_class.grade) if student.current_class.grade != 'ECD' else 0
-                    next_grade = current_grade + 1
-                    class_year = student.current_class.academic_year
-                    next_year = class_year + 1
-                    
-                    if next_grade < 8:
-                        # Show the next grade they will move to with the actual next year
-                        student.next_class = f"Grade {next_grade}{student.current_class.section} ({next_year})"
-                    else:
-                        student.next_class = "Graduating"
-                except (ValueError, TypeError):
-                    student.next_class = "No class assigned"
+            next_grade = NEXT_GRADE.get(str(student.current_class.grade))
+            if next_grade is None:
+                student.next_class = "Graduating"
             else:
-                student.next_class = "No class assigned"
+                label = next_grade if next_grade.startswith('ECD') else f"Grade {next_grade}"
+                section = '' if student.current_class.grade == BALANCED_GRADE else student.current_class.section
+                student.next_class = f"{label}{section} ({target_year(student.current_class)})"
 
         return render(request, 'students/bulk_promote.html', {
             'students': students,
@@ -296,267 +287,18 @@ def bulk_promote_students(request):
             messages.error(request, 'Please select at least one student to promote')
             return redirect('bulk_promote_students')
             
-        successful = 0
-        failed = 0
-        errors = []
-
         try:
-            for student_id in student_ids:
-                try:
-                    student = Student.objects.get(id=student_id)
-                    
-                    # Validate student is active
-                    if not student.is_active:
-                        failed += 1
-                        errors.append(f'{student.full_name} - Already graduated/inactive')
-                        continue
-                    
-                    # Validate student has a class
-                    if not student or not student.current_class:
-                        failed += 1
-                        errors.append(f'Student {student_id} - No assigned class')
-                        continue
-                    
-                    old_class = student.current_class
-                    
-                    # Validate class data
-                    if not old_class or old_class.grade is None or old_class.academic_year is None:
-                        failed += 1
-                        errors.append(f'{student.full_name} - Invalid class data')
-                        continue
-                    
-                    # Handle ECDA/ECDB students with special progression logic
-                    # ECDA → ECDB (same year) → Grade 1 (next year with random section)
-                    if old_class.grade in ['ECDA', 'ECDB']:
-                        try:
-                            # ECDA → ECDB transition (same year)
-                            if old_class.grade == 'ECDA':
-                                next_class = Class.objects.filter(
-                                    grade='ECDB',
-                                    section=old_class.section,  # Keep same section for ECDA→ECDB
-                                    academic_year=old_class.academic_year
-                                ).first()
-                                
-                                if not next_class:
-                                    failed += 1
-                                    errors.append(f'{student.full_name} - No ECDB class found for same section')
-                                    continue
-                            
-                            # ECDB → Grade 1 transition (next year, RANDOM section)
-                            elif old_class.grade == 'ECDB':
-                                next_year = old_class.academic_year + 1
-                                
-                                # Auto-create next year if needed
-                                from ..models.academic_year import AcademicYear
-                                next_year_obj, _ = AcademicYear.objects.get_or_create(
-                                    year=next_year,
-                                    defaults={
-                                        'is_active': False,
-                                        'start_date': f'{next_year}-01-01',
-                                        'end_date': f'{next_year}-12-31'
-                                    }
-                                )
-                                
-                                # Get all available Grade 1 classes for random selection
-                                grade_1_classes = Class.objects.filter(
-                                    grade='1',
-                                    academic_year=next_year
-                                ).order_by('section')
-                                
-                                if not grade_1_classes.exists():
-                                    failed += 1
-                                    errors.append(f'{student.full_name} - No Grade 1 classes available for {next_year}')
-                                    continue
-                                
-                                # Randomly select one of the available Grade 1 sections
-                                import random
-                                next_class = random.choice(list(grade_1_classes))
-                            
-                            # Create movement record for ECD progression
-                            with transaction.atomic():
-                                current_arrears = student.previous_term_arrears + student.current_term_balance
-                                
-                                movement = StudentMovement(
-                                    student=student,
-                                    from_class=old_class,
-                                    to_class=next_class,
-                                    movement_type='PROMOTION',
-                                    moved_by=request.user,
-                                    previous_arrears=current_arrears,
-                                    preserved_arrears=current_arrears
-                                )
-                                
-                                # Validate movement
-                                try:
-                                    movement.full_clean()
-                                except ValidationError as e:
-                                    failed += 1
-                                    errors.append(f'{student.full_name} - {", ".join(e.messages)}')
-                                    continue
-                                
-                                # Save movement
-                                movement.save()
-                                
-                                # Update student's class
-                                student.current_class = next_class
-                                student.save()
-                                
-                                # Initialize balance for Grade 1 first term if transitioning from ECDB
-                                if old_class.grade == 'ECDB':
-                                    from ..models.fee import StudentBalance
-                                    first_term = AcademicTerm.objects.filter(
-                                        academic_year=next_year,
-                                        term=1
-                                    ).first()
-                                    
-                                    if first_term:
-                                        try:
-                                            StudentBalance.initialize_term_balance(student, first_term)
-                                        except Exception as e:
-                                            print(f"Warning: Could not initialize balance for {student.full_name}: {e}")
-                                
-                                successful += 1
-                        
-                        except Exception as e:
-                            failed += 1
-                            errors.append(f'{student.full_name} - ECD progression error: {str(e)}')
-                        
-                        continue  # Skip regular promotion logic for ECD students
-                    
-                    # Check if student is already in Grade 7 (highest grade) - GRADUATE them
-                    if int(old_class.grade) >= 7:
-                        # Graduate the student instead of promoting
-                        with transaction.atomic():
-                            movement = StudentMovement(
-                                student=student,
-                                from_class=old_class,
-                                to_class=None,
-                                movement_type='GRADUATION',
-                                moved_by=request.user,
-                                previous_arrears=Decimal('0'),
-                                preserved_arrears=Decimal('0')
-                            )
-                            
-                            try:
-                                movement.full_clean()
-                            except ValidationError as e:
-                                failed += 1
-                                errors.append(f'{student.full_name} - Cannot graduate: {", ".join(e.messages)}')
-                                continue
-                            
-                            movement.save()
-                            
-                            # Mark as graduated and archived (alumni)
-                            student.is_active = False
-                            student.status = 'GRADUATED'
-                            student.is_archived = True
-                            student.save()
-                            
-                            successful += 1
-                        continue
-                    
-                    next_grade = int(old_class.grade) + 1
-                    next_year = old_class.academic_year + 1
-                    
-                    # Auto-create the next year if it doesn't exist
-                    from ..models.academic_year import AcademicYear
-                    next_year_obj, _ = AcademicYear.objects.get_or_create(
-                        year=next_year,
-                        defaults={
-                            'is_active': False,
-                            'start_date': f'{next_year}-01-01',
-                            'end_date': f'{next_year}-12-31'
-                        }
-                    )
-                    
-                    # Find the next grade class in the next academic year
-                    # Convert next_grade int back to string for lookup
-                    next_class = Class.objects.filter(
-                        grade=str(next_grade),
-                        section=old_class.section,
-                        academic_year=next_year
-                    ).first()
-                    
-                    # If same section doesn't exist, auto-create it
-                    if not next_class:
-                        next_class, _ = Class.objects.get_or_create(
-                            grade=str(next_grade),
-                            section=old_class.section,
-                            academic_year=next_year
-                        )
-                    
-                    # Create movement record and update student
-                    with transaction.atomic():
-                        current_arrears = student.previous_term_arrears + student.current_term_balance
-                        
-                        movement = StudentMovement(
-                            student=student,
-                            from_class=old_class,
-                            to_class=next_class,
-                            movement_type='PROMOTION',
-                            moved_by=request.user,
-                            previous_arrears=current_arrears,
-                            preserved_arrears=current_arrears
-                        )
-                        
-                        # Validate movement using model validations
-                        try:
-                            movement.full_clean()
-                        except ValidationError as e:
-                            failed += 1
-                            errors.append(f'{student.full_name} - {", ".join(e.messages)}')
-                            continue
-                        
-                        # Save movement
-                        movement.save()
-                        
-                        student.current_class = next_class
-                        
-                        # IMPORTANT: Grade 7 students are GRADUATING
-                        # They should NOT be registered for any 2027 terms
-                        # They only track their 2026 debt and can become alumni after payment
-                        
-                        if next_grade == 8:  # Grade 8 is graduation (after Grade 7)
-                            movement.movement_type = 'GRADUATION'
-                            movement.save()
-                            # Note: Do NOT create any 2027 balance for graduating students
-                        
-                        student.save()
-                        
-                        # Initialize balance for the first term of the new year (only for non-graduating students)
-                        if next_grade < 8:
-                            from ..models.fee import StudentBalance, TermFee
-                            
-                            first_term = AcademicTerm.objects.filter(
-                                academic_year=next_year,
-                                term=1
-                            ).first()
-                            
-                            if first_term:
-                                # Use initialize_term_balance which properly calculates arrears from previous year
-                                try:
-                                    StudentBalance.initialize_term_balance(student, first_term)
-                                except Exception as e:
-                                    print(f"Warning: Could not initialize balance for {student.full_name}: {e}")
-                        
-                        successful += 1
-                        
-                except Student.DoesNotExist:
-                    failed += 1
-                    errors.append(f'Student {student_id} - Not found')
-                    continue
-                except Exception as e:
-                    failed += 1
-                    errors.append(f'Student {student_id} - {str(e)}')
-                    continue
-                    
+            result = BulkPromotionService(
+                student_ids, moved_by=request.user, create_missing_classes=True,
+                balance_sex=request.POST.get('balance_sex') == 'on',
+            ).run()
+            successful = result['promoted'] + result['graduated']
             if successful > 0:
                 messages.success(request, f'Successfully promoted {successful} student(s).')
-            if failed > 0:
-                messages.warning(request, f'Failed to promote {failed} student(s):')
-                for error in errors:
-                    messages.error(request, f'  • {error}')
-                
+            if result['failed'] > 0:
+                messages.warning(request, f'Failed to promote {result["failed"]} student(s):')
+            for error in result['errors']:
+                messages.error(request, f'  • {error}')
         except Exception as e:
             messages.error(request, f'Error during bulk promotion: {str(e)}')
         
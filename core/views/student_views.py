@@ -18,7 +18,7 @@ class StudentListView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         # Optimize queryset with select_related to prevent N+1 queries
-        queryset = Student.objects.filter(is_archived=False).select_related('current_class')  # Exclude archived/alumni students
+        queryset = Student.objects.filter(is_archived=False).select_related('current_class').with_financials()  # Exclude archived/alumni students
         search_query = self.request.GET.get('search', '')
         class_filter = self.request.GET.get('class', '')
         sex_filter = self.request.GET.get('sex', '')
@@ -37,44 +37,9 @@ class StudentListView(LoginRequiredMixin, ListView):
         if sex_filter:
             queryset = queryset.filter(sex=sex_filter)
 
-        # Balance filtering - use StudentBalance model
+        # Balance filtering - evaluated in SQL on the with_financials() annotations
         if balance_filter:
-            current_term = AcademicTerm.get_current_term()
-            if current_term:
-                # Get all StudentBalance records for current term
-                balances = list(StudentBalance.objects.filter(term=current_term))
-                
-                if balance_filter == 'paid':
-                    # Students with zero balance: (term_fee + previous_arrears - amount_paid) <= 0
-                    paid_student_ids = [
-                        b.student_id for b in balances 
-                        if (b.amount_paid >= (b.term_fee + b.previous_arrears))
-                    ]
-                    queryset = queryset.filter(id__in=paid_student_ids)
-                    
-                elif balance_filter == 'partial':
-                    # Students with partial payment (some paid but not all)
-                    partial_student_ids = [
-                        b.student_id for b in balances 
-                        if (0 < b.amount_paid < (b.term_fee + b.previous_arrears))
-                    ]
-                    queryset = queryset.filter(id__in=partial_student_ids)
-                    
-                elif balance_filter == 'unpaid':
-                    # Students with no payments
-                    unpaid_student_ids = [
-                        b.student_id for b in balances 
-                        if b.amount_paid == 0 and (b.term_fee + b.previous_arrears) > 0
-                    ]
-                    queryset = queryset.filter(id__in=unpaid_student_ids)
-                    
-                elif balance_filter == 'arrears':
-                    # Students with arrears (previous_arrears > 0)
-                    arrears_student_ids = [
-                        b.student_id for b in balances 
-                        if b.previous_arrears > 0
-                    ]
-                    queryset = queryset.filter(id__in=arrears_student_ids)
+            queryset = queryset.filter_balance_status(balance_filter)
 
         return queryset
 
@@ -272,7 +237,7 @@ class GraduatedWithArrearsListView(LoginRequiredMixin, ListView):
         queryset = Student.objects.filter(
             status='GRADUATED',
             is_archived=False
-        ).select_related('current_class').order_by('-date_enrolled')
+        ).select_related('current_class').with_financials().order_by('-date_enrolled')
         
         search_query = self.request.GET.get('search', '')
         
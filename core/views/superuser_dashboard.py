@@ -11,6 +11,7 @@ from core.models.student import Student
 from core.models.administrator import Administrator
 from core.models.fee import StudentBalance
 from core.models.academic import Payment
+from core.models.financial_snapshot import TermFinancialSnapshot
 
 
 class SuperuserOnlyMixin(UserPassesTestMixin):
@@ -76,17 +77,11 @@ class SuperuserDashboardView(SuperuserOnlyMixin, TemplateView):
                 # Last resort: just get most recent term
                 current_term = AcademicTerm.objects.order_by('-end_date').first()
         
-        # Get balances for current term only
-        balances = StudentBalance.objects.filter(term=current_term) if current_term else StudentBalance.objects.none()
-        
-        total_fees = Decimal('0')
-        total_paid = Decimal('0')
-        total_outstanding = Decimal('0')
-        
-        for balance in balances:
-            total_fees += balance.term_fee
-            total_paid += balance.amount_paid
-            total_outstanding += max(0, balance.current_balance)
+        # Current term totals from the per-class snapshot rows
+        totals = TermFinancialSnapshot.totals(current_term)
+        total_fees = totals['term_fees']
+        total_paid = totals['collected']
+        total_outstanding = totals['outstanding']
         
         collection_rate = (float(total_paid) / float(total_fees) * 100) if total_fees > 0 else 0
         
@@ -101,8 +96,8 @@ class SuperuserDashboardView(SuperuserOnlyMixin, TemplateView):
             'total_outstanding': float(total_outstanding),
             'collection_rate': round(collection_rate, 1),
             'students_in_arrears': students_in_arrears,
-            'students_paid': balances.filter(amount_paid__gt=0).count(),
-            'balance_records': balances.count(),
+            'students_paid': totals['student_count'] - totals['no_payment_count'],
+            'balance_records': totals['student_count'],
             'term_name': term_name,
         }
     
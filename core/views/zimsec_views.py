@@ -2,18 +2,22 @@
 Views for ZIMSEC Grade 7 Examination Management
 """
 
-from django.views.generic import TemplateView, FormView, DetailView, ListView
+from django.views.generic import TemplateView, FormView, DetailView, ListView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Q, Avg, Min, Max
+from django.db.models import F, Q, Avg, Min, Max
 from django.http import JsonResponse
 from decimal import Decimal
+import io
 import json
 
 from core.models.student import Student
 from core.models import Class, AcademicTerm, StudentTermHistory
 from core.models.zimsec import ZimsecResults, Grade7Statistics
+from core.services import zimsec_stats
+from core.services.zimsec_import import ZimsecImportService
+from core.services.zimsec_stats import Distribution
 from core.forms.zimsec_forms import ZimsecResultsForm, BulkZimsecEntryForm, ZimsecComparisonForm
 
 
@@ -59,25 +63,11 @@ class ZimsecResultsEntryView(LoginRequiredMixin, TemplateView):
         
         # Get all Grade 7 students who reached Term 3 in this year
         # This includes ARCHIVED/ALUMNI students - they still need results entered
-        # Use StudentTermHistory to find who reached Term 3 (across all Grade 7 classes)
+        # Use StudentTermHistory to find who reached Term 3 (across all Grade 7 classes);
+        # years from before the snapshots are filled in with: manage.py snapshot_term_history --completed
         student_ids = StudentTermHistory.get_zimsec_candidates(academic_year)
         students = Student.objects.filter(id__in=student_ids).order_by('surname', 'first_name')
         
-        # If no term history records exist, fall back to all Grade 7 students
-        # (for data migration/backward compatibility)
-        if not students.exists():
-            # Try by current_class first
-            students = Student.objects.filter(
-                current_class__grade=7,
-                is_deleted=False
-            ).order_by('surname', 'first_name')
-            
-            # If still no students, get ALL Grade 7 students (even deleted/archived)
-            if not students.exists():
-                students = Student.objects.filter(
-                    current_class__grade=7
-                ).order_by('surname', 'first_name')
-        
         context = {
             'academic_year': academic_year,
             'class_name': 'All Grade 7 Classes',
@@ -105,40 +95,12 @@ class ZimsecResultsEntryView(LoginRequiredMixin, TemplateView):
                 # messages.error(request, 'No results data provided')
                 return redirect('zimsec_entry')
             
-            saved_count = 0
-            failed_count = 0
-            failed_students = []
-            
-            for result_data in results_data:
-                try:
-                    student_id = result_data.get('student_id')
-                    logger.debug(f'Processing student {student_id}')
-                    
-                    student = Student.objects.get(id=student_id)
-                    
-                    # Get or create ZIMSEC result
-                    result, created = ZimsecResults.objects.update_or_create(
-                        student=student,
-                        academic_year=academic_year,
-                        defaults={
-                            'english_units': result_data.get('english_units'),
-                            'mathematics_units': result_data.get('mathematics_units'),
-                            'science_units': result_data.get('science_units'),
-                            'social_studies_units': result_data.get('social_studies_units'),
-                            'indigenous_language_units': result_data.get('indigenous_language_units'),
-                            'agriculture_units': result_data.get('agriculture_units'),
-                        }
-                    )
-                    saved_count += 1
-                    logger.debug(f'Saved result for student {student_id}')
-                except Student.DoesNotExist:
-                    failed_count += 1
-                    failed_students.append(str(student_id))
-                    logger.warning(f'Student {student_id} not found')
-                except Exception as e:
-                    failed_count += 1
-                    failed_students.append(str(student_id))
-                    logger.error(f'Error saving student {student_id}: {str(e)}')
+            result = ZimsecImportService(academic_year).save_entries(results_data)
+            saved_count = result['created'] + result['updated']
+            failed_count = result['failed']
+            failed_students = [error['student'] for error in result['errors']]
+            for error in result['errors']:
+                logger.warning(f"Student {error['student']} not saved: {error['error']}")
             
             # Recalculate statistics for the year
             Grade7Statistics.calculate_for_year(academic_year)
@@ -180,39 +142,12 @@ class ZimsecResultsBatchSaveAPI(LoginRequiredMixin, TemplateView):
             
             logger.info(f'Saving ZIMSEC batch {batch_number + 1}/{total_batches}: {len(results_batch)} results')
             
-            saved_count = 0
-            failed_count = 0
-            failed_students = []
-            
-            # Process this batch of results
-            for result_data in results_batch:
-                try:
-                    student_id = result_data.get('student_id')
-                    
-                    student = Student.objects.get(id=student_id)
-                    
-                    # Get or create ZIMSEC result
-                    result, created = ZimsecResults.objects.update_or_create(
-                        student=student,
-                        academic_year=academic_year,
-                        defaults={
-                            'english_units': result_data.get('english_units'),
-                            'mathematics_units': result_data.get('mathematics_units'),
-                            'science_units': result_data.get('science_units'),
-                            'social_studies_units': result_data.get('social_studies_units'),
-                            'indigenous_language_units': result_data.get('indigenous_language_units'),
-                            'agriculture_units': result_data.get('agriculture_units'),
-                        }
-                    )
-                    saved_count += 1
-                except Student.DoesNotExist:
-                    failed_count += 1
-                    failed_students.append(str(student_id))
-                    logger.warning(f'Student {student_id} not found')
-                except Exception as e:
-                    failed_count += 1
-                    failed_students.append(str(student_id))
-                    logger.error(f'Error saving student {student_id}: {str(e)}')
+            result = ZimsecImportService(academic_year).save_entries(results_batch)
+            saved_count = result['created'] + result['updated']
+            failed_count = result['failed']
+            failed_students = [error['student'] for error in result['errors']]
+            for error in result['errors']:
+                logger.warning(f"Student {error['student']} not saved: {error['error']}")
             
             # If this is the last batch, recalculate statistics
             is_final_batch = (batch_number + 1 >= total_batches)
@@ -238,6 +173,47 @@ class ZimsecResultsBatchSaveAPI(LoginRequiredMixin, TemplateView):
             }, status=400)
 
 
+class ZimsecResultsImportAPI(LoginRequiredMixin, View):
+    """Upload the official ZIMSEC results sheet (CSV or XLSX) for a whole cohort
+    
+    Form fields: results_file, academic_year, dry_run (optional).
+    Rows are matched by candidate_number (birth_entry_number for new candidates);
+    responds with the import summary and the per-row error report as JSON.
+    """
+    
+    def post(self, request):
+        upload = request.FILES.get('results_file')
+        if not upload:
+            return JsonResponse({'error': 'No results_file uploaded'}, status=400)
+        try:
+            academic_year = int(request.POST.get('academic_year'))
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'A valid academic_year is required'}, status=400)
+        
+        service = ZimsecImportService(academic_year, dry_run=bool(request.POST.get('dry_run')))
+        try:
+            if upload.name.lower().endswith(('.xlsx', '.xlsm')):
+                result = service.import_xlsx(upload.file)
+            else:
+                result = service.import_csv(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''))
+        except Exception as e:
+            # Undecodable CSV, a file openpyxl cannot open, or openpyxl not installed
+            return JsonResponse({'error': f'Could not read the file: {e}'}, status=400)
+        
+        if not service.dry_run and (result['created'] or result['updated']):
+            Grade7Statistics.calculate_for_year(academic_year)
+        
+        return JsonResponse({
+            'academic_year': academic_year,
+            'dry_run': service.dry_run,
+            'rows': result['rows'],
+            'created': result['created'],
+            'updated': result['updated'],
+            'failed': result['failed'],
+            'errors': result['errors'],
+        })
+
+
 class ZimsecResultDetailView(LoginRequiredMixin, DetailView):
     """View and edit individual ZIMSEC result"""
     model = ZimsecResults
@@ -337,53 +313,141 @@ class ZimsecResultEditView(LoginRequiredMixin, DetailView):
         return self.render_to_response(context)
 
 
+ZIMSEC_SUBJECTS = [
+    ('English', 'english_units'),
+    ('Mathematics', 'mathematics_units'),
+    ('Science', 'science_units'),
+    ('Social Studies', 'social_studies_units'),
+    ('Indigenous Language', 'indigenous_language_units'),
+    ('Agriculture', 'agriculture_units'),
+]
+
+
+def _ranked_results(year, sections=None, gender=None):
+    """A year's results, best aggregate first and results without one last"""
+    results = ZimsecResults.objects.filter(academic_year=year).select_related('student', 'student__current_class')
+    if sections:
+        results = results.filter(student__current_class__section__in=sections)
+    if gender:
+        results = results.filter(student__sex__iexact=gender)
+    return results.order_by(F('total_aggregate').asc(nulls_last=True), 'student__surname', 'id')
+
+
+def _top_and_bottom(ranked, count):
+    """The first and last `count` results of a ranked queryset (two queries)"""
+    return list(ranked[:count]), list(ranked.reverse()[:count])[::-1]
+
+
+def _performer(rank, result, class_label):
+    return {
+        'rank': rank,
+        'name': f"{result.student.surname}, {result.student.first_name}",
+        'class': class_label(result.student),
+        'aggregate': result.total_aggregate,
+        'status': result.overall_status,
+        'percentage': (result.total_aggregate / 54 * 100) if result.total_aggregate else 0
+    }
+
+
+def _overview_stats(stats, top_results, class_label):
+    total_students = stats.candidates
+    aggregate = stats.aggregate
+    overall_pass_rate = aggregate.passed / total_students * 100
+    average_aggregate = aggregate.mean
+    
+    # Top student (lowest aggregate)
+    top_student = None
+    if top_results and top_results[0].total_aggregate:
+        best = top_results[0]
+        top_student = {
+            'name': f"{best.student.surname}, {best.student.first_name}",
+            'aggregate': best.total_aggregate,
+            'class': class_label(best.student),
+        }
+    
+    return {
+        'total_students': total_students,
+        'overall_pass_rate': round(overall_pass_rate, 1),
+        'average_aggregate': round(average_aggregate, 1),
+        'passed_students': aggregate.passed,
+        'failed_students': total_students - aggregate.passed,
+        'top_student': top_student,
+        'pass_rate_color': 'green' if overall_pass_rate >= 85 else ('orange' if overall_pass_rate >= 70 else 'red'),
+        'aggregate_color': 'green' if average_aggregate <= 15 else ('orange' if average_aggregate <= 20 else 'red')
+    }
+
+
+def _subject_stats(stats):
+    subject_stats = []
+    for subject_name, field_name in ZIMSEC_SUBJECTS:
+        subject = stats.subjects[field_name]
+        if subject.count:
+            pass_rate = subject.pass_rate
+            subject_stats.append({
+                'name': subject_name,
+                'field': field_name,
+                'avg_units': round(subject.mean, 2),
+                'pass_rate': round(pass_rate, 1),
+                'pass_count': subject.passed,
+                'distinction_count': subject.distinctions,
+                'total_count': subject.count,
+                'color': 'green' if pass_rate >= 90 else ('orange' if pass_rate >= 75 else 'red')
+            })
+    return subject_stats
+
+
+def _class_stats(stats, classes):
+    class_stats = []
+    for cls in classes:
+        aggregate = stats.section_aggregate(cls.section)
+        if aggregate and aggregate.candidates:
+            class_pass_rate = aggregate.passed / aggregate.candidates * 100
+            class_stats.append({
+                'name': f"Grade {cls.grade} Section {cls.section}",
+                'section': cls.section,
+                'student_count': aggregate.candidates,
+                'avg_aggregate': round(aggregate.mean, 1),
+                'pass_rate': round(class_pass_rate, 1),
+                'passed_count': aggregate.passed,
+                'failed_count': aggregate.candidates - aggregate.passed,
+                'top_aggregate': aggregate.minimum,
+                'bottom_aggregate': aggregate.maximum,
+                'color': 'green' if class_pass_rate >= 85 else ('orange' if class_pass_rate >= 70 else 'red')
+            })
+    return class_stats
+
+
 class Grade7StatisticsView(LoginRequiredMixin, TemplateView):
     """ZIMSEC Statistics Dashboard - Display comprehensive statistics and analytics"""
     template_name = 'zimsec/statistics.html'
     
-    def calculate_advanced_statistics(self, aggregates):
-        """Calculate advanced statistical metrics"""
-        import numpy as np
-        from scipy import stats as scipy_stats
-        
-        if not aggregates or len(aggregates) < 2:
+    def calculate_advanced_statistics(self, distribution):
+        """Calculate advanced statistical metrics from the aggregate Distribution"""
+        if distribution.count < 2:
             return None
         
-        agg_array = np.array(aggregates)
-        
         # Central Tendency
-        mean = float(np.mean(agg_array))
-        median = float(np.median(agg_array))
-        
-        # Calculate mode (most frequent value)
-        from collections import Counter
-        mode_counter = Counter(aggregates)
-        mode_value = mode_counter.most_common(1)[0][0]
-        mode_freq = mode_counter.most_common(1)[0][1]
+        mean = distribution.mean
+        median = distribution.percentile(50)
+        mode_value, mode_freq = distribution.mode
         
         # Dispersion
-        std_dev = float(np.std(agg_array, ddof=1))
-        variance = float(np.var(agg_array, ddof=1))
-        range_val = int(max(aggregates) - min(aggregates))
-        min_val = int(min(aggregates))
-        max_val = int(max(aggregates))
+        std_dev = distribution.std_dev
+        variance = distribution.variance
+        min_val = distribution.minimum
+        max_val = distribution.maximum
+        range_val = max_val - min_val
         
         # Quartiles and IQR
-        q1 = float(np.percentile(agg_array, 25))
-        q3 = float(np.percentile(agg_array, 75))
-        iqr = float(q3 - q1)
+        q1 = distribution.percentile(25)
+        q3 = distribution.percentile(75)
+        iqr = q3 - q1
         
         # Percentiles
-        percentiles = {
-            'p10': float(np.percentile(agg_array, 10)),
-            'p25': float(np.percentile(agg_array, 25)),
-            'p50': float(np.percentile(agg_array, 50)),
-            'p75': float(np.percentile(agg_array, 75)),
-            'p90': float(np.percentile(agg_array, 90)),
-        }
+        percentiles = {f'p{p}': distribution.percentile(p) for p in (10, 25, 50, 75, 90)}
         
-        # Skewness and Kurtosis
-        skewness = float(scipy_stats.skew(agg_array))
+        # Skewness
+        skewness = distribution.skewness
         
         # Determine distribution shape
         if abs(skewness) < 0.5:
@@ -399,7 +463,7 @@ class Grade7StatisticsView(LoginRequiredMixin, TemplateView):
         # Outlier detection using 1.5×IQR rule
         lower_bound = q1 - (1.5 * iqr)
         upper_bound = q3 + (1.5 * iqr)
-        outliers = [agg for agg in aggregates if agg < lower_bound or agg > upper_bound]
+        outliers = distribution.values_outside(lower_bound, upper_bound)
         
         # Color coding for metrics
         def get_mean_color(val):
@@ -440,6 +504,17 @@ class Grade7StatisticsView(LoginRequiredMixin, TemplateView):
             'std_dev_color': get_std_dev_color(std_dev),
         }
     
+    def has_result_filters(self, filters):
+        """Whether any filter applies to individual results rather than to classes or gender"""
+        if filters.get('aggregate_min') is not None or filters.get('aggregate_max') is not None:
+            return True
+        if filters.get('subject') and filters.get('subject_performance'):
+            return True
+        return any(
+            filters.get(name) and filters[name] != 'all'
+            for name in ('pass_status', 'percentile', 'outlier_filter')
+        )
+    
     def apply_filters(self, results, filters):
         """Apply all filters to ZIMSEC results"""
         filtered_results = results
@@ -498,11 +573,11 @@ class Grade7StatisticsView(LoginRequiredMixin, TemplateView):
         if filters.get('percentile'):
             aggregates = [r.total_aggregate for r in filtered_results if r.total_aggregate]
             if aggregates:
-                import numpy as np
-                p10 = float(np.percentile(aggregates, 10))
-                p25 = float(np.percentile(aggregates, 25))
-                p75 = float(np.percentile(aggregates, 75))
-                p90 = float(np.percentile(aggregates, 90))
+                distribution = Distribution.of(aggregates)
+                p10 = distribution.percentile(10)
+                p25 = distribution.percentile(25)
+                p75 = distribution.percentile(75)
+                p90 = distribution.percentile(90)
                 
                 percentile = filters['percentile']
                 if percentile == 'top10':
@@ -520,9 +595,9 @@ class Grade7StatisticsView(LoginRequiredMixin, TemplateView):
         if filters.get('outlier_filter') and filters['outlier_filter'] != 'all':
             aggregates = [r.total_aggregate for r in filtered_results if r.total_aggregate]
             if aggregates and len(aggregates) > 1:
-                import numpy as np
-                q1 = float(np.percentile(aggregates, 25))
-                q3 = float(np.percentile(aggregates, 75))
+                distribution = Distribution.of(aggregates)
+                q1 = distribution.percentile(25)
+                q3 = distribution.percentile(75)
                 iqr = q3 - q1
                 lower_bound = q1 - (1.5 * iqr)
                 upper_bound = q3 + (1.5 * iqr)
@@ -575,31 +650,20 @@ class Grade7StatisticsView(LoginRequiredMixin, TemplateView):
         return summaries
     
     def calculate_year_stats(self, academic_year):
-        """Calculate statistics for a given academic year"""
-        results = list(ZimsecResults.objects.filter(academic_year=academic_year).select_related('student', 'student__current_class'))
+        """Calculate statistics for a given academic year (from ZimsecYearStats)"""
+        stats = zimsec_stats.year_stats(academic_year)
+        total_students = stats.candidates
         
-        if not results:
+        if not total_students:
             return None
         
-        total_students = len(results)
-        passed_students = sum(1 for r in results if r.overall_status == 'PASS')
-        pass_rate = (passed_students / total_students * 100) if total_students > 0 else 0
-        
-        # Aggregates
-        aggregates = [r.total_aggregate for r in results if r.total_aggregate]
-        average_aggregate = sum(aggregates) / len(aggregates) if aggregates else 0
-        top_aggregate = min(aggregates) if aggregates else None
+        aggregate = stats.aggregate
+        passed_students = aggregate.passed
+        pass_rate = passed_students / total_students * 100
         
         # Distinction rate (all subjects 1-2 units)
-        distinction_count = sum(1 for r in results if all([
-            r.english_units and r.english_units <= 2,
-            r.mathematics_units and r.mathematics_units <= 2,
-            r.science_units and r.science_units <= 2,
-            r.social_studies_units and r.social_studies_units <= 2,
-            r.indigenous_language_units and r.indigenous_language_units <= 2,
-            r.agriculture_units and r.agriculture_units <= 2,
-        ]))
-        distinction_rate = (distinction_count / total_students * 100) if total_students > 0 else 0
+        distinction_count = aggregate.distinctions
+        distinction_rate = distinction_count / total_students * 100
         
         # Subject averages
         subjects = [
@@ -610,20 +674,18 @@ class Grade7StatisticsView(LoginRequiredMixin, TemplateView):
             ('language', 'indigenous_language_units'),
             ('agriculture', 'agriculture_units'),
         ]
-        
-        subject_averages = {}
-        for subject_key, field_name in subjects:
-            units_list = [getattr(r, field_name) for r in results if getattr(r, field_name)]
-            avg = sum(units_list) / len(units_list) if units_list else 0
-            subject_averages[subject_key] = round(avg, 2)
+        subject_averages = {
+            subject_key: round(stats.subjects[field_name].mean, 2)
+            for subject_key, field_name in subjects
+        }
         
         return {
             'year': academic_year,
             'total_students': total_students,
             'passed_students': passed_students,
             'pass_rate': round(pass_rate, 1),
-            'average_aggregate': round(average_aggregate, 1),
-            'top_aggregate': top_aggregate,
+            'average_aggregate': round(aggregate.mean, 1),
+            'top_aggregate': aggregate.minimum,
             'distinction_count': distinction_count,
             'distinction_rate': round(distinction_rate, 1),
             'subject_averages': subject_averages,
@@ -773,19 +835,24 @@ class Grade7StatisticsView(LoginRequiredMixin, TemplateView):
             'outlier_filter': self.request.GET.get('outlier_filter', 'all'),
         }
         
-        # Get students with ZIMSEC results
-        results_query = ZimsecResults.objects.filter(academic_year=selected_year).select_related('student', 'student__current_class')
-        results = list(results_query)
-        
-        # Apply filters
-        if any(v and v != 'all' for v in filters.values() if v is not None):
-            results = self.apply_filters(results, filters)
-            context['active_filters'] = self.get_active_filters_summary(filters)
+        # Class and gender filters are answered from the ZimsecYearStats rows;
+        # filters on individual results (aggregate range, pass status, subject
+        # performance, percentiles, outliers) need the results themselves
+        sections = None if 'all' in filters['classes'] else filters['classes']
+        gender = filters['gender'] if filters['gender'] != 'all' else None
+        ranked = _ranked_results(selected_year, sections, gender)
+        context['active_filters'] = self.get_active_filters_summary(filters)
+        
+        if self.has_result_filters(filters):
+            results = self.apply_filters(list(ranked), filters)
+            stats = zimsec_stats.YearStats.from_results(results)
+            top_results, bottom_results = results[:10], results[-10:]
         else:
-            context['active_filters'] = []
+            stats = zimsec_stats.year_stats(selected_year, sections, gender)
+            top_results, bottom_results = _top_and_bottom(ranked, 10)
         
-        total_students = len(results)
-        original_total = len(list(results_query))
+        total_students = stats.candidates
+        original_total = ZimsecResults.objects.filter(academic_year=selected_year).count()
         
         if total_students == 0:
             context['no_data'] = True
@@ -798,128 +865,29 @@ class Grade7StatisticsView(LoginRequiredMixin, TemplateView):
         context['total_students_unfiltered'] = original_total
         context['total_students_filtered'] = total_students
         
-        # ============ OVERVIEW STATISTICS ============
-        passed_students = sum(1 for r in results if r.overall_status == 'PASS')
-        overall_pass_rate = (passed_students / total_students * 100) if total_students > 0 else 0
-        
-        # Calculate average aggregate
-        aggregates = [r.total_aggregate for r in results if r.total_aggregate]
-        average_aggregate = sum(aggregates) / len(aggregates) if aggregates else 0
-        
-        # Find top student (lowest aggregate)
-        top_student = None
-        min_aggregate = float('inf')
-        for r in results:
-            if r.total_aggregate and r.total_aggregate < min_aggregate:
-                min_aggregate = r.total_aggregate
-                top_student = {
-                    'name': f"{r.student.surname}, {r.student.first_name}",
-                    'aggregate': r.total_aggregate,
-                    'class': f"Grade {r.student.current_class.grade} Section {r.student.current_class.section}" if r.student.current_class else 'N/A'
-                }
+        def class_label(student):
+            return f"Grade {student.current_class.grade} Section {student.current_class.section}" if student.current_class else 'N/A'
         
-        context['overview_stats'] = {
-            'total_students': total_students,
-            'overall_pass_rate': round(overall_pass_rate, 1),
-            'average_aggregate': round(average_aggregate, 1),
-            'passed_students': passed_students,
-            'failed_students': total_students - passed_students,
-            'top_student': top_student,
-            'pass_rate_color': 'green' if overall_pass_rate >= 85 else ('orange' if overall_pass_rate >= 70 else 'red'),
-            'aggregate_color': 'green' if average_aggregate <= 15 else ('orange' if average_aggregate <= 20 else 'red')
-        }
+        # ============ OVERVIEW STATISTICS ============
+        aggregate = stats.aggregate
+        passed_students = aggregate.passed
+        context['overview_stats'] = _overview_stats(stats, top_results, class_label)
         
         # ============ SUBJECT STATISTICS ============
-        subjects = [
-            ('English', 'english_units'),
-            ('Mathematics', 'mathematics_units'),
-            ('Science', 'science_units'),
-            ('Social Studies', 'social_studies_units'),
-            ('Indigenous Language', 'indigenous_language_units'),
-            ('Agriculture', 'agriculture_units'),
-        ]
-        
-        subject_stats = []
-        for subject_name, field_name in subjects:
-            units_list = [getattr(r, field_name) for r in results if getattr(r, field_name)]
-            
-            if units_list:
-                avg_units = sum(units_list) / len(units_list)
-                pass_count = sum(1 for u in units_list if u <= 5)
-                pass_rate = (pass_count / len(units_list) * 100) if units_list else 0
-                distinction_count = sum(1 for u in units_list if u == 1)
-                
-                subject_stats.append({
-                    'name': subject_name,
-                    'field': field_name,
-                    'avg_units': round(avg_units, 2),
-                    'pass_rate': round(pass_rate, 1),
-                    'pass_count': pass_count,
-                    'distinction_count': distinction_count,
-                    'total_count': len(units_list),
-                    'color': 'green' if pass_rate >= 90 else ('orange' if pass_rate >= 75 else 'red')
-                })
-        
+        subject_stats = _subject_stats(stats)
         context['subject_stats'] = subject_stats
         
         # ============ CLASS STATISTICS ============
-        class_stats = []
-        for cls in all_classes:
-            class_results = [r for r in results if r.student.current_class and r.student.current_class.section == cls.section]
-            
-            if class_results:
-                class_passed = sum(1 for r in class_results if r.overall_status == 'PASS')
-                class_pass_rate = (class_passed / len(class_results) * 100) if class_results else 0
-                
-                class_aggregates = [r.total_aggregate for r in class_results if r.total_aggregate]
-                class_avg_aggregate = sum(class_aggregates) / len(class_aggregates) if class_aggregates else 0
-                
-                top_agg = min(class_aggregates) if class_aggregates else None
-                bottom_agg = max(class_aggregates) if class_aggregates else None
-                
-                class_stats.append({
-                    'name': f"Grade {cls.grade} Section {cls.section}",
-                    'section': cls.section,
-                    'student_count': len(class_results),
-                    'avg_aggregate': round(class_avg_aggregate, 1),
-                    'pass_rate': round(class_pass_rate, 1),
-                    'passed_count': class_passed,
-                    'failed_count': len(class_results) - class_passed,
-                    'top_aggregate': top_agg,
-                    'bottom_aggregate': bottom_agg,
-                    'color': 'green' if class_pass_rate >= 85 else ('orange' if class_pass_rate >= 70 else 'red')
-                })
-        
+        class_stats = _class_stats(stats, all_classes)
         context['class_stats'] = class_stats
         
         # ============ TOP 10 & BOTTOM 10 STUDENTS ============
-        # Sort by aggregate
-        sorted_results = sorted(results, key=lambda r: r.total_aggregate if r.total_aggregate else float('inf'))
-        
-        top_performers = []
-        for rank, result in enumerate(sorted_results[:10], 1):
-            top_performers.append({
-                'rank': rank,
-                'name': f"{result.student.surname}, {result.student.first_name}",
-                'class': f"Grade {result.student.current_class.grade} Section {result.student.current_class.section}" if result.student.current_class else 'N/A',
-                'aggregate': result.total_aggregate,
-                'status': result.overall_status,
-                'percentage': (result.total_aggregate / 54 * 100) if result.total_aggregate else 0
-            })
-        
-        bottom_performers = []
-        for rank, result in enumerate(sorted_results[-10:], total_students - 9):
-            bottom_performers.append({
-                'rank': rank,
-                'name': f"{result.student.surname}, {result.student.first_name}",
-                'class': f"Grade {result.student.current_class.grade} Section {result.student.current_class.section}" if result.student.current_class else 'N/A',
-                'aggregate': result.total_aggregate,
-                'status': result.overall_status,
-                'percentage': (result.total_aggregate / 54 * 100) if result.total_aggregate else 0
-            })
-        
-        context['top_performers'] = top_performers
-        context['bottom_performers'] = bottom_performers
+        context['top_performers'] = [
+            _performer(rank, result, class_label) for rank, result in enumerate(top_results, 1)
+        ]
+        context['bottom_performers'] = [
+            _performer(rank, result, class_label) for rank, result in enumerate(bottom_results, total_students - 9)
+        ]
         
         # ============ CHART DATA (JSON FORMAT) ============
         import json
@@ -952,16 +920,12 @@ class Grade7StatisticsView(LoginRequiredMixin, TemplateView):
         })
         
         # Aggregate distribution
-        aggregate_ranges = [0, 0, 0, 0]
-        for agg in aggregates:
-            if agg <= 12:
-                aggregate_ranges[0] += 1
-            elif agg <= 18:
-                aggregate_ranges[1] += 1
-            elif agg <= 24:
-                aggregate_ranges[2] += 1
-            else:
-                aggregate_ranges[3] += 1
+        aggregate_ranges = [
+            aggregate.count_between(0, 12),
+            aggregate.count_between(13, 18),
+            aggregate.count_between(19, 24),
+            aggregate.count_between(25, aggregate.maximum or 25),
+        ]
         
         context['aggregate_json'] = json.dumps({
             'labels': ['Excellent (≤12)', 'Good (13-18)', 'Average (19-24)', 'Below Avg (25+)'],
@@ -998,7 +962,7 @@ class Grade7StatisticsView(LoginRequiredMixin, TemplateView):
                 pass
         
         # ============ ADVANCED STATISTICS ============
-        advanced_stats = self.calculate_advanced_statistics(aggregates)
+        advanced_stats = self.calculate_advanced_statistics(aggregate)
         context['advanced_stats'] = advanced_stats
         
         return context
@@ -1124,167 +1088,53 @@ class ZimsecStatisticsView(LoginRequiredMixin, TemplateView):
         context['all_classes'] = all_classes
         context['selected_class'] = selected_class
         
-        # Get students with ZIMSEC results
-        results_query = ZimsecResults.objects.filter(academic_year=selected_year).select_related('student', 'student__current_class')
-        
-        if selected_class != 'all':
-            results_query = results_query.filter(student__current_class__section=selected_class)
-        
-        results = list(results_query)
-        total_students = len(results)
+        # Figures come from the ZimsecYearStats rows; only the top and bottom
+        # ten results are loaded
+        sections = [selected_class] if selected_class != 'all' else None
+        stats = zimsec_stats.year_stats(selected_year, sections)
+        total_students = stats.candidates
         
         if total_students == 0:
             context['no_data'] = True
             context['message'] = f"No ZIMSEC results found for {selected_year}"
             return context
         
-        # ============ OVERVIEW STATISTICS ============
-        passed_students = sum(1 for r in results if r.overall_status == 'PASS')
-        overall_pass_rate = (passed_students / total_students * 100) if total_students > 0 else 0
-        
-        # Calculate average aggregate
-        aggregates = [r.total_aggregate for r in results if r.total_aggregate]
-        average_aggregate = sum(aggregates) / len(aggregates) if aggregates else 0
-        
-        # Find top student (lowest aggregate)
-        top_student = None
-        min_aggregate = float('inf')
-        for r in results:
-            if r.total_aggregate and r.total_aggregate < min_aggregate:
-                min_aggregate = r.total_aggregate
-                top_student = {
-                    'name': f"{r.student.surname}, {r.student.first_name}",
-                    'aggregate': r.total_aggregate,
-                    'class': r.student.current_class.name if r.student.current_class else 'N/A'
-                }
+        def class_label(student):
+            return student.current_class.name if student.current_class else 'N/A'
         
-        context['overview_stats'] = {
-            'total_students': total_students,
-            'overall_pass_rate': round(overall_pass_rate, 1),
-            'average_aggregate': round(average_aggregate, 1),
-            'passed_students': passed_students,
-            'failed_students': total_students - passed_students,
-            'top_student': top_student,
-            'pass_rate_color': 'green' if overall_pass_rate >= 85 else ('orange' if overall_pass_rate >= 70 else 'red'),
-            'aggregate_color': 'green' if average_aggregate <= 15 else ('orange' if average_aggregate <= 20 else 'red')
-        }
-        
-        # ============ SUBJECT STATISTICS ============
-        subjects = [
-            ('English', 'english_units'),
-            ('Mathematics', 'mathematics_units'),
-            ('Science', 'science_units'),
-            ('Social Studies', 'social_studies_units'),
-            ('Indigenous Language', 'indigenous_language_units'),
-            ('Agriculture', 'agriculture_units'),
-        ]
+        top_results, bottom_results = _top_and_bottom(_ranked_results(selected_year, sections), 10)
         
-        subject_stats = []
-        for subject_name, field_name in subjects:
-            units_list = [getattr(r, field_name) for r in results if getattr(r, field_name)]
-            
-            if units_list:
-                avg_units = sum(units_list) / len(units_list)
-                pass_count = sum(1 for u in units_list if u <= 5)
-                pass_rate = (pass_count / len(units_list) * 100) if units_list else 0
-                distinction_count = sum(1 for u in units_list if u == 1)
-                
-                subject_stats.append({
-                    'name': subject_name,
-                    'field': field_name,
-                    'avg_units': round(avg_units, 2),
-                    'pass_rate': round(pass_rate, 1),
-                    'pass_count': pass_count,
-                    'distinction_count': distinction_count,
-                    'total_count': len(units_list),
-                    'color': 'green' if pass_rate >= 90 else ('orange' if pass_rate >= 75 else 'red')
-                })
+        # ============ OVERVIEW STATISTICS ============
+        aggregate = stats.aggregate
+        passed_students = aggregate.passed
+        context['overview_stats'] = _overview_stats(stats, top_results, class_label)
         
+        # ============ SUBJECT STATISTICS ============
+        subject_stats = _subject_stats(stats)
         context['subject_stats'] = subject_stats
         
         # ============ CLASS STATISTICS ============
-        class_stats = []
-        for cls in all_classes:
-            class_results = [r for r in results if r.student.current_class and r.student.current_class.section == cls.section]
-            
-            if class_results:
-                class_passed = sum(1 for r in class_results if r.overall_status == 'PASS')
-                class_pass_rate = (class_passed / len(class_results) * 100) if class_results else 0
-                
-                class_aggregates = [r.total_aggregate for r in class_results if r.total_aggregate]
-                class_avg_aggregate = sum(class_aggregates) / len(class_aggregates) if class_aggregates else 0
-                
-                top_agg = min(class_aggregates) if class_aggregates else None
-                bottom_agg = max(class_aggregates) if class_aggregates else None
-                
-                class_stats.append({
-                    'name': f"Grade {cls.grade} Section {cls.section}",
-                    'section': cls.section,
-                    'student_count': len(class_results),
-                    'avg_aggregate': round(class_avg_aggregate, 1),
-                    'pass_rate': round(class_pass_rate, 1),
-                    'passed_count': class_passed,
-                    'failed_count': len(class_results) - class_passed,
-                    'top_aggregate': top_agg,
-                    'bottom_aggregate': bottom_agg,
-                    'color': 'green' if class_pass_rate >= 85 else ('orange' if class_pass_rate >= 70 else 'red')
-                })
-        
+        class_stats = _class_stats(stats, all_classes)
         context['class_stats'] = class_stats
         
         # ============ TOP 10 & BOTTOM 10 STUDENTS ============
-        # Sort by aggregate
-        sorted_results = sorted(results, key=lambda r: r.total_aggregate if r.total_aggregate else float('inf'))
-        
-        top_performers = []
-        for rank, result in enumerate(sorted_results[:10], 1):
-            top_performers.append({
-                'rank': rank,
-                'name': f"{result.student.surname}, {result.student.first_name}",
-                'class': result.student.current_class.name if result.student.current_class else 'N/A',
-                'aggregate': result.total_aggregate,
-                'status': result.overall_status,
-                'percentage': (result.total_aggregate / 54 * 100) if result.total_aggregate else 0
-            })
-        
-        bottom_performers = []
-        for rank, result in enumerate(sorted_results[-10:], total_students - 9):
-            bottom_performers.append({
-                'rank': rank,
-                'name': f"{result.student.surname}, {result.student.first_name}",
-                'class': result.student.current_class.name if result.student.current_class else 'N/A',
-                'aggregate': result.total_aggregate,
-                'status': result.overall_status,
-                'percentage': (result.total_aggregate / 54 * 100) if result.total_aggregate else 0
-            })
-        
-        context['top_performers'] = top_performers
-        context['bottom_performers'] = bottom_performers
+        context['top_performers'] = [
+            _performer(rank, result, class_label) for rank, result in enumerate(top_results, 1)
+        ]
+        context['bottom_performers'] = [
+            _performer(rank, result, class_label) for rank, result in enumerate(bottom_results, total_students - 9)
+        ]
         
         # ============ DISTRIBUTION & CHARTS DATA ============
         # Aggregate distribution (6-12, 13-18, 19-24, 25-30, 31+)
         distribution = {
-            '6-12': 0,
-            '13-18': 0,
-            '19-24': 0,
-            '25-30': 0,
-            '31+': 0
+            '6-12': aggregate.count_between(6, 12),
+            '13-18': aggregate.count_between(13, 18),
+            '19-24': aggregate.count_between(19, 24),
+            '25-30': aggregate.count_between(25, 30),
+            '31+': aggregate.count - aggregate.count_between(6, 30),
         }
         
-        for result in results:
-            if result.total_aggregate:
-                agg = result.total_aggregate
-                if 6 <= agg <= 12:
-                    distribution['6-12'] += 1
-                elif 13 <= agg <= 18:
-                    distribution['13-18'] += 1
-                elif 19 <= agg <= 24:
-                    distribution['19-24'] += 1
-                elif 25 <= agg <= 30:
-                    distribution['25-30'] += 1
-                else:
-                    distribution['31+'] += 1
-        
         context['distribution'] = distribution
         context['distribution_json'] = json.dumps({
             'labels': list(distribution.keys()),
@@ -1434,160 +1284,47 @@ class ExportExcelView(LoginRequiredMixin, ExportMixin, TemplateView):
 
 
 class ExportPDFView(LoginRequiredMixin, ExportMixin, TemplateView):
-    """Export statistics as PDF report"""
+    """Export statistics as PDF report (rendered by the report worker)"""
     
     def get(self, request, *args, **kwargs):
-        from core.services.export_service import PDFExporter, generate_statistics_snapshot
-        from core.models.school_details import SchoolDetails
-        from django.http import FileResponse
-        from tempfile import NamedTemporaryFile
+        from core.views.report_views import queue_report
         
         year = int(request.GET.get('year', 2027))
         
-        # Get results
-        results = list(ZimsecResults.objects.filter(academic_year=year).select_related('student', 'student__current_class'))
-        
-        if not results:
+        if not ZimsecResults.objects.filter(academic_year=year).exists():
             # messages.error(request, f"No ZIMSEC results found for {year}")
             return redirect('grade7_statistics')
         
-        # Generate statistics
-        stats = generate_statistics_snapshot(results, year)
-        
-        # Get school details
-        school = SchoolDetails.get_or_create_default()
-        school_name = school.school_name
-        
-        # Create PDF
-        pdf_exporter = PDFExporter(
-            title=f"ZIMSEC {year} Examination Report",
-            school_name=school_name
-        )
-        
-        content_data = {
-            'summary': [
-                f"This report provides a comprehensive analysis of ZIMSEC examination results for {year}.",
-                f"A total of {stats['total_students']} students were examined across all Grade 7 classes.",
-                f"The overall pass rate achieved was {stats['pass_rate']:.1f}%, with an average aggregate of {stats['avg_aggregate']:.1f}.",
-            ],
-            'pass_rate': stats['pass_rate'],
-            'avg_aggregate': stats['avg_aggregate'],
-            'distinction_rate': stats['distinction_rate'],
-            'total_students': stats['total_students'],
-        }
-        
-        # Save to temporary file
-        # Generate PDF to BytesIO
-        from io import BytesIO
-        file_buffer = BytesIO()
-        pdf_exporter.generate_report_to_buffer(file_buffer, content_data)
-        file_buffer.seek(0)
-        
-        # Serve file from memory
-        response = FileResponse(file_buffer, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="ZIMSEC_{year}_Report.pdf"'
-        return response
+        return queue_report(request, 'zimsec_report', {'year': year})
 
 
 class ExportDetailedResultsView(LoginRequiredMixin, ExportMixin, TemplateView):
-    """Export detailed ZIMSEC results by class and student"""
+    """Export detailed ZIMSEC results by class and student (rendered by the report worker)"""
     
     def get(self, request, *args, **kwargs):
-        from core.services.export_service import DetailedResultsPDFExporter
-        from core.models.school_details import SchoolDetails
-        from django.http import FileResponse
-        from io import BytesIO
-        from django.db.models import Prefetch
+        from core.views.report_views import queue_report
         
         year = int(request.GET.get('year', 2027))
         
-        # Get results with related student and class data
-        results = list(ZimsecResults.objects.filter(
-            academic_year=year
-        ).select_related('student', 'student__current_class'))
-        
-        if not results:
+        if not ZimsecResults.objects.filter(academic_year=year).exists():
             messages.error(request, f"No ZIMSEC results found for {year}")
             return redirect('grade7_statistics')
         
-        # Group results by class
-        results_by_class = {}
-        for result in results:
-            # Use str() on the class object which calls __str__ method: "Grade X[A|B]"
-            class_name = str(result.student.current_class) if result.student.current_class else "Unassigned"
-            if class_name not in results_by_class:
-                results_by_class[class_name] = []
-            results_by_class[class_name].append(result)
-        
-        # Get school details
-        school = SchoolDetails.get_or_create_default()
-        school_name = school.school_name
-        
-        # Create PDF
-        pdf_exporter = DetailedResultsPDFExporter(
-            title=f"ZIMSEC {year} Detailed Results",
-            school_name=school_name
-        )
-        
-        # Generate PDF to BytesIO
-        file_buffer = BytesIO()
-        pdf_exporter.export_to_buffer(file_buffer, results_by_class)
-        file_buffer.seek(0)
-        
-        # Serve file from memory
-        response = FileResponse(file_buffer, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="ZIMSEC_{year}_Detailed_Results.pdf"'
-        return response
+        return queue_report(request, 'zimsec_detailed_results', {'year': year})
 
 
 class ExportGrade7CompletionView(LoginRequiredMixin, ExportMixin, TemplateView):
-    """Export Grade 7 Completion Report"""
+    """Export Grade 7 Completion Report (rendered by the report worker)"""
     
     def get(self, request, *args, **kwargs):
-        from core.services.grade7_exporter import Grade7CompletionPDFExporter
-        from core.models.school_details import SchoolDetails
-        from django.http import FileResponse
-        from io import BytesIO
-        from core.models import ZimsecResults
+        from core.views.report_views import queue_report
         
-        # Get all students with ZIMSEC results (completed Grade 7)
-        students_with_results = ZimsecResults.objects.values_list('student_id', flat=True).distinct()
-        students = Student.objects.filter(
-            id__in=students_with_results
-        ).select_related('current_class').order_by('surname', 'first_name')
-        
-        if not students.exists():
+        # Students with ZIMSEC results (completed Grade 7)
+        if not ZimsecResults.objects.exists():
             messages.error(request, "No students with ZIMSEC results found in the system")
             return redirect('grade7_statistics')
         
-        # Group students by class (use their class when they had results, or current class)
-        students_by_class = {}
-        for student in students:
-            # Try to get the class from their first ZIMSEC result, fall back to current class
-            try:
-                result = student.zimsec_results.first()
-                class_name = result.class_name if hasattr(result, 'class_name') and result.class_name else str(student.current_class) if student.current_class else "Grade 7 (2026)"
-            except:
-                class_name = str(student.current_class) if student.current_class else "Grade 7 (2026)"
-            
-            if class_name not in students_by_class:
-                students_by_class[class_name] = []
-            students_by_class[class_name].append(student)
-        
-        # Get school details
-        school = SchoolDetails.get_or_create_default()
-        school_name = school.school_name
-        
-        # Create PDF
-        pdf_exporter = Grade7CompletionPDFExporter(school_name=school_name)
-        
-        # Generate PDF to BytesIO
-        file_buffer = pdf_exporter.export_to_buffer(students_by_class)
-        
-        # Serve file from memory
-        response = FileResponse(file_buffer, content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename="Grade7_Completion_Report.pdf"'
-        return response
+        return queue_report(request, 'grade7_completion', {})
 
 
 class ExportHTMLView(LoginRequiredMixin, ExportMixin, TemplateView):
@@ -95,6 +95,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'school_management.middleware.SessionErrorHandlerMiddleware',  # Graceful session error handling
     'core.middleware.FreshSystemMiddleware',  # Detect fresh system state
+    'core.middleware.CurrentPeriodMiddleware',  # Per-request memo of current term/year
 ]
 
 ROOT_URLCONF = 'school_management.urls'
@@ -0,0 +1,85 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Sum
+from django.test import TestCase
+
+from core.models import (
+    AcademicTerm, AcademicYear, Class, ECDClassFee, ECDClassProfile,
+    Student, StudentBalance, TermFee,
+)
+
+
+class MaterializedBalanceTotalsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        cls.term = AcademicTerm.objects.create(academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-12-31', is_current=True)
+
+        cls.grade_class = Class.objects.create(grade=3, section='A', academic_year=2026)
+        cls.ecd_class = Class.objects.create(grade='ECDA', section='A', academic_year=2026)
+        cls.grade_fee = TermFee.objects.create(term=cls.term, grade_level='PRIMARY', amount=Decimal('200.00'))
+        cls.ecd_fee = TermFee.objects.create(term=cls.term, grade_level='ECD', amount=Decimal('100.00'))
+        ECDClassProfile.objects.create(cls=cls.ecd_class, capacity=10, meal_plan_fee=Decimal('10.00'))
+
+        cls.student = Student.objects.create(surname='Moyo', first_name='Tariro', sex='F', date_of_birth='2017-01-01', birth_entry_number='BT1', current_class=cls.grade_class)
+        cls.ecd_student = Student.objects.create(surname='Ncube', first_name='Tapiwa', sex='M', date_of_birth='2021-01-01', birth_entry_number='BT2', current_class=cls.ecd_class)
+
+    def _balance(self, student, fee, **kwargs):
+        # Enrolment already opens a balance for the current term
+        balance = StudentBalance.objects.get(student=student, term=self.term)
+        self.assertEqual(balance.term_fee_record, fee)
+        for field, value in kwargs.items():
+            setattr(balance, field, value)
+        balance.save()
+        return balance
+
+    def test_save_stores_totals(self):
+        balance = self._balance(self.student, self.grade_fee, previous_arrears=Decimal('50.00'), amount_paid=Decimal('30.00'))
+        balance.refresh_from_db()
+        self.assertEqual(balance.term_fee, Decimal('200.00'))
+        self.assertEqual(balance.total_due, Decimal('250.00'))
+        self.assertEqual(balance.current_balance, Decimal('220.00'))
+
+    def test_update_fields_save_refreshes_balance(self):
+        balance = self._balance(self.student, self.grade_fee)
+        balance.amount_paid = Decimal('200.00')
+        balance.save(update_fields=['amount_paid'])
+        balance.refresh_from_db()
+        self.assertEqual(balance.current_balance, Decimal('0.00'))
+
+    def test_totals_are_aggregatable(self):
+        self._balance(self.student, self.grade_fee, amount_paid=Decimal('20.00'))
+        self._balance(self.ecd_student, self.ecd_fee)
+        totals = StudentBalance.objects.filter(term=self.term).aggregate(
+            due=Sum('total_due'), outstanding=Sum('current_balance')
+        )
+        self.assertEqual(totals['due'], Decimal('310.00'))
+        self.assertEqual(totals['outstanding'], Decimal('290.00'))
+
+    def test_ecd_fee_change_refreshes_balances(self):
+        balance = self._balance(self.ecd_student, self.ecd_fee)
+        ECDClassFee.objects.create(cls=self.ecd_class, term=self.term, amount=Decimal('25.00'), description='Materials')
+        balance.refresh_from_db()
+        self.assertEqual(balance.term_fee, Decimal('135.00'))
+
+    def test_term_fee_change_refreshes_balances(self):
+        balance = self._balance(self.student, self.grade_fee)
+        self.grade_fee.amount = Decimal('220.00')
+        self.grade_fee.save()
+        balance.refresh_from_db()
+        self.assertEqual(balance.current_balance, Decimal('220.00'))
+
+    def test_sync_command_repairs_stale_rows(self):
+        balance = self._balance(self.student, self.grade_fee)
+        StudentBalance.objects.filter(pk=balance.pk).update(current_balance=Decimal('0'))
+
+        with self.assertRaises(CommandError):
+            call_command('sync_balance_totals', '--verify', stdout=StringIO())
+
+        call_command('sync_balance_totals', stdout=StringIO())
+        balance.refresh_from_db()
+        self.assertEqual(balance.current_balance, Decimal('200.00'))
+        call_command('sync_balance_totals', '--verify', stdout=StringIO())
@@ -0,0 +1,135 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import (
+    AcademicTerm, AcademicYear, Administrator, Class, ECDClassProfile, Student, StudentBalance, StudentMovement,
+    TermFee,
+)
+from core.services import current_period
+from core.services.promotion import BulkPromotionService, SectionBalancer
+
+
+class BulkPromotionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        AcademicYear.objects.create(year=2027, start_date='2027-01-01', end_date='2027-12-31')
+        term = AcademicTerm.objects.create(
+            academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-12-31', is_current=True,
+        )
+        TermFee.objects.create(term=term, grade_level='PRIMARY', amount=Decimal('100.00'))
+        TermFee.objects.create(term=term, grade_level='ECD', amount=Decimal('60.00'))
+        next_term = AcademicTerm.objects.create(
+            academic_year=2027, term=1, start_date='2027-01-01', end_date='2027-04-30',
+        )
+        TermFee.objects.create(term=next_term, grade_level='PRIMARY', amount=Decimal('110.00'))
+
+        cls.classes = {
+            f'{grade}{section}{year}': Class.objects.create(grade=grade, section=section, academic_year=year)
+            for grade, section, year in [
+                ('ECDA', 'A', 2026), ('ECDB', 'A', 2026), ('ECDB', 'B', 2026), ('3', 'B', 2026), ('7', 'A', 2026),
+                ('1', 'A', 2027), ('1', 'B', 2027), ('4', 'B', 2027),
+            ]
+        }
+
+        def student(name, key):
+            return Student.objects.create(
+                surname=name, first_name='Test', sex='M', date_of_birth='2016-01-01',
+                birth_entry_number=f'BP-{name.upper()}', current_class=cls.classes[key], date_enrolled='2025-01-01',
+            )
+
+        cls.infant = student('Infant', 'ECDAA2026')
+        cls.reception = student('Reception', 'ECDBB2026')
+        cls.third = student('Third', '3B2026')
+        cls.senior = student('Senior', '7A2026')
+        StudentBalance.objects.filter(student=cls.third).update(amount_paid=Decimal('30.00'))
+        StudentBalance.refresh_materialized_totals()
+
+    def setUp(self):
+        current_period.invalidate()
+
+    def test_promotes_graduates_and_carries_arrears(self):
+        ids = [self.infant.id, self.reception.id, self.third.id, self.senior.id]
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(30):
+                result = BulkPromotionService(ids).run()
+
+        self.assertEqual(
+            (result['promoted'], result['graduated'], result['failed'], result['balances_created']), (3, 1, 0, 2),
+        )
+        students = {s.id: s for s in Student.all_students.select_related('current_class')}
+        self.assertEqual(students[self.infant.id].current_class, self.classes['ECDBA2026'])
+        self.assertIn(students[self.reception.id].current_class, [self.classes['1A2027'], self.classes['1B2027']])
+        self.assertEqual(students[self.third.id].current_class, self.classes['4B2027'])
+        self.assertEqual((students[self.senior.id].is_active, students[self.senior.id].status), (False, 'GRADUATED'))
+
+        movement = StudentMovement.objects.get(student=self.third)
+        self.assertEqual((movement.movement_type, movement.preserved_arrears), ('PROMOTION', Decimal('70.00')))
+        self.assertEqual(StudentMovement.objects.get(student=self.senior).movement_type, 'GRADUATION')
+        opened = StudentBalance.objects.get(student=self.third, term__academic_year=2027)
+        self.assertEqual(opened.previous_arrears, Decimal('70.00'))
+
+    def test_bulk_move_reprices_balances_like_save(self):
+        ECDClassProfile.objects.create(cls=self.classes['ECDBA2026'], meal_plan_fee=Decimal('50.00'))
+        twin = Student.objects.create(
+            surname='Twin', first_name='Test', sex='M', date_of_birth='2016-01-01',
+            birth_entry_number='BP-TWIN', current_class=self.classes['ECDAA2026'], date_enrolled='2025-01-01',
+        )
+
+        BulkPromotionService([self.infant.id]).run()
+        twin.current_class = self.classes['ECDBA2026']
+        twin.save()
+
+        fees = dict(StudentBalance.objects.filter(student__in=[self.infant, twin]).values_list('student_id', 'term_fee'))
+        self.assertEqual(fees, {self.infant.id: Decimal('110.00'), twin.id: Decimal('110.00')})
+        self.assertEqual(StudentBalance.refresh_materialized_totals(dry_run=True), [])
+
+    def test_reports_students_that_cannot_move(self):
+        Class.objects.filter(grade='4').delete()
+        result = BulkPromotionService([self.third.id, 999999], graduate=False).run()
+        self.assertEqual(result['failed'], 2)
+        self.assertEqual(result['errors'], ['Third, Test - No Grade 4 class for 2027', 'Student 999999 - Not found'])
+
+        result = BulkPromotionService([self.third.id], create_missing_classes=True).run()
+        self.assertEqual(result['promoted'], 1)
+        self.assertTrue(Class.objects.filter(grade='4', section='B', academic_year=2027).exists())
+
+    def test_get_next_class_and_view(self):
+        self.assertEqual(self.third.get_next_class(), self.classes['4B2027'])
+        self.assertIsNone(self.senior.get_next_class())
+
+        self.client.force_login(Administrator.objects.create_superuser('promote@school.com', 'testpass123'))
+        response = self.client.post(reverse('bulk_promote_students'), {'student_ids': [self.infant.id, self.third.id]})
+        self.assertRedirects(response, reverse('bulk_promote_students'), fetch_redirect_response=False)
+        self.assertEqual(StudentMovement.objects.filter(is_bulk_operation=True).count(), 2)
+        self.assertEqual(Student.objects.get(pk=self.third.pk).current_class, self.classes['4B2027'])
+
+    def test_section_balancer(self):
+        grade_1 = [self.classes['1A2027'], self.classes['1B2027']]
+        Student.objects.filter(pk=self.third.pk).update(current_class=self.classes['1A2027'])
+        # Unsaved pupils: the balancer only needs their id and sex
+        pupils = [Student(id=1000 + i, sex='F' if i % 2 else 'M') for i in range(9)]
+
+        def counts(placement, sex=None):
+            return [
+                sum(1 for pupil in pupils if placement[pupil.id] == cls and sex in (None, pupil.sex))
+                for cls in grade_1
+            ]
+
+        placement = SectionBalancer(grade_1, seed=7).assign(pupils)
+        # Section A already holds one student
+        self.assertEqual(counts(placement), [4, 5])
+        self.assertEqual(SectionBalancer(grade_1, seed=7).assign(pupils), placement)
+
+        placement = SectionBalancer(grade_1, balance_sex=True, seed=7).assign(pupils)
+        self.assertEqual((counts(placement, 'F'), counts(placement, 'M')), ([2, 2], [2, 3]))
+
+        capacities = {self.classes['1A2027'].id: 10, self.classes['1B2027'].id: 20}
+        balancer = SectionBalancer(grade_1, capacities=capacities, seed=7)
+        self.assertEqual(counts(balancer.assign(pupils)), [3, 6])
+        self.assertEqual(balancer.over_capacity, [])
+
+        # A single ECDB pupil goes to the section with the most free places
+        self.assertEqual(self.reception.get_next_class(), self.classes['1B2027'])
@@ -0,0 +1,55 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from core.middleware import CurrentPeriodMiddleware
+from core.models import AcademicTerm, AcademicYear
+from core.services import current_period
+
+
+class CurrentPeriodCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        cls.term1 = AcademicTerm.objects.create(academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-04-30', is_current=True)
+        cls.term2 = AcademicTerm.objects.create(academic_year=2026, term=2, start_date='2026-05-01', end_date='2026-08-31')
+
+    def setUp(self):
+        current_period.invalidate()
+        current_period.reset_stats()
+
+    def test_process_cache_avoids_queries(self):
+        self.assertEqual(AcademicTerm.get_current_term(), self.term1)
+        self.assertEqual(AcademicYear.get_current_year(), self.year)
+        with self.assertNumQueries(0):
+            self.assertEqual(AcademicTerm.get_current_term(), self.term1)
+            self.assertEqual(AcademicYear.get_current_year(), self.year)
+
+        stats = current_period.get_stats()
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['cache_hits'], 2)
+        self.assertEqual(stats['queries_saved'], 2)
+
+    def test_switching_term_invalidates(self):
+        AcademicTerm.get_current_term()
+        self.term2.is_current = True
+        self.term2.save()
+        self.assertEqual(AcademicTerm.get_current_term(), self.term2)
+
+    def test_activating_year_invalidates(self):
+        AcademicYear.get_current_year()
+        next_year = AcademicYear.objects.create(year=2027, start_date='2027-01-01', end_date='2027-12-31')
+        next_year.activate()
+        self.assertEqual(AcademicYear.get_current_year(), next_year)
+
+    def test_request_memo_returns_same_instance(self):
+        seen = []
+
+        def view(request):
+            seen.append(AcademicTerm.get_current_term())
+            seen.append(AcademicTerm.get_current_term())
+            return HttpResponse()
+
+        CurrentPeriodMiddleware(view)(RequestFactory().get('/'))
+
+        self.assertIs(seen[0], seen[1])
+        self.assertEqual(current_period.get_stats()['request_hits'], 1)
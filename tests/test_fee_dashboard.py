@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from core.models import AcademicTerm, AcademicYear, Administrator, Class, Student, StudentBalance, TermFee
+from core.services import current_period
+from core.services.term_activation import TermActivationService
+
+
+class FeeDashboardReadPathTests(TestCase):
+    # Session, user, balances, snapshot totals and the missing-balances count
+    # (with the current term cached); independent of the number of students
+    MAX_QUERIES = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        cls.term = AcademicTerm.objects.create(academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-12-31', is_current=True)
+        TermFee.objects.create(term=cls.term, grade_level='PRIMARY', amount=Decimal('100.00'))
+        cls.grade4 = Class.objects.create(grade=4, section='A', academic_year=2026)
+        cls.admin = Administrator.objects.create_superuser('fees@school.com', 'testpass123')
+
+    def setUp(self):
+        current_period.invalidate()
+        self.client.force_login(self.admin)
+
+    def _enrol(self, count, start=0):
+        students = [
+            Student.objects.create(
+                surname=f'Fee{index}', first_name='Test', sex='M', date_of_birth='2016-01-01',
+                birth_entry_number=f'FEE-{index}', current_class=self.grade4, date_enrolled='2025-01-01',
+            )
+            for index in range(start, start + count)
+        ]
+        return students
+
+    def _get_dashboard(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/fees/')
+        self.assertEqual(response.status_code, 200)
+        return response, queries
+
+    def test_dashboard_is_a_bounded_pure_read(self):
+        self._enrol(3)
+        self._get_dashboard()  # warm the session and current-term cache
+        _, small = self._get_dashboard()
+        self._enrol(12, start=3)
+        StudentBalance.objects.filter(student__surname='Fee5').delete()
+
+        balances_before = StudentBalance.objects.count()
+        response, large = self._get_dashboard()
+
+        self.assertEqual(len(large), len(small))
+        self.assertLessEqual(len(large), self.MAX_QUERIES)
+        self.assertFalse(any(q['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')) for q in large))
+        self.assertEqual(StudentBalance.objects.count(), balances_before)
+        self.assertEqual(response.context['missing_balances'], 1)
+
+    def test_missing_balances_are_materialized_on_request(self):
+        students = self._enrol(4)
+        StudentBalance.objects.filter(student__in=students[:2]).delete()
+        service = TermActivationService(self.term)
+        self.assertEqual(service.missing_students().count(), 2)
+
+        response = self.client.post('/fees/materialize-missing/')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(service.missing_students().count(), 0)
+        self.assertEqual(StudentBalance.objects.get(student=students[0], term=self.term).term_fee, Decimal('100.00'))
@@ -0,0 +1,93 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import (
+    AcademicTerm, Administrator, AcademicYear, Class, Payment, Student, StudentBalance,
+    TermFee, TermFinancialSnapshot,
+)
+
+
+class TermFinancialSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        cls.term = AcademicTerm.objects.create(academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-12-31', is_current=True)
+        TermFee.objects.create(term=cls.term, grade_level='PRIMARY', amount=Decimal('100.00'))
+        cls.grade2 = Class.objects.create(grade=2, section='A', academic_year=2026)
+        cls.grade3 = Class.objects.create(grade=3, section='A', academic_year=2026)
+
+        cls.students = []
+        for index, (cls_obj, arrears) in enumerate([(cls.grade2, '0'), (cls.grade2, '30'), (cls.grade3, '0')]):
+            student = Student.objects.create(
+                surname=f'Snap{index}', first_name='Test', sex='F', date_of_birth='2017-01-01',
+                birth_entry_number=f'SNAP-{index}', current_class=cls_obj, date_enrolled='2025-01-01',
+            )
+            balance = StudentBalance.objects.get(student=student, term=cls.term)
+            balance.previous_arrears = Decimal(arrears)
+            balance.save()
+            cls.students.append(student)
+        TermFinancialSnapshot.rebuild()
+
+    def _direct_totals(self, **filters):
+        """What the dashboards used to compute straight from StudentBalance"""
+        balances = list(StudentBalance.objects.filter(term=self.term, **filters))
+        return {
+            'student_count': len(balances),
+            'expected': sum(b.total_due for b in balances),
+            'collected': sum(b.amount_paid for b in balances),
+            'outstanding': sum(max(Decimal('0'), b.current_balance) for b in balances),
+            'paid_count': sum(1 for b in balances if b.current_balance <= 0),
+            'partial_count': sum(1 for b in balances if b.current_balance > 0 and b.amount_paid > 0),
+        }
+
+    def _snapshot_totals(self, student_class=None):
+        totals = TermFinancialSnapshot.totals(self.term, student_class)
+        return {key: totals[key] for key in self._direct_totals()}
+
+    def test_rebuild_matches_balances(self):
+        self.assertEqual(TermFinancialSnapshot.objects.filter(term=self.term).count(), 2)
+        self.assertEqual(self._snapshot_totals(), self._direct_totals())
+        self.assertEqual(
+            self._snapshot_totals(self.grade2),
+            self._direct_totals(student__current_class=self.grade2),
+        )
+
+    def test_payment_refreshes_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(student=self.students[1], term=self.term, amount=Decimal('50.00'))
+            Payment.objects.create(student=self.students[2], term=self.term, amount=Decimal('100.00'))
+
+        self.assertEqual(self._snapshot_totals(), self._direct_totals())
+        self.assertEqual(self._snapshot_totals()['collected'], Decimal('150.00'))
+
+    def test_class_move_refreshes_both_classes(self):
+        student = self.students[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            student.current_class = self.grade3
+            student.save()
+
+        self.assertEqual(TermFinancialSnapshot.totals(self.term, self.grade2)['student_count'], 1)
+        self.assertEqual(TermFinancialSnapshot.totals(self.term, self.grade3)['student_count'], 2)
+
+    def test_dashboards_read_snapshots(self):
+        summary = self.year.get_financial_summary()
+        self.assertEqual(summary['total_expected'], Decimal('330.00'))
+
+        TermFinancialSnapshot.objects.all().delete()
+        call_command('rebuild_financial_snapshots', stdout=StringIO())
+        self.assertEqual(self._snapshot_totals(), self._direct_totals())
+
+        with self.assertNumQueries(2):
+            TermFinancialSnapshot.totals(self.term)
+            TermFinancialSnapshot.totals_by_term([self.term])
+
+    def test_superuser_dashboard_uses_snapshot_totals(self):
+        user = Administrator.objects.create_superuser('snap@school.com', 'testpass123')
+        self.client.force_login(user)
+        financial = self.client.get('/superuser/').context['financial']
+        self.assertEqual(financial['total_fees'], 300.0)
+        self.assertEqual(financial['total_outstanding'], 330.0)
+        self.assertEqual(financial['balance_records'], 3)
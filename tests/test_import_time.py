@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from core.utils.lazy_imports import HEAVY_MODULES, is_available, lazy
+
+# Cold start of a web worker: settings, apps and the whole URLconf (every view
+# module). Measured at about 0.55s with -X importtime on a single-CPU machine;
+# the budget leaves room for slower CI machines but not for numpy or ReportLab.
+IMPORT_BUDGET_SECONDS = 2.5
+
+WORKER_BOOT = """
+import json, sys
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps(sorted(name for name in sys.modules if name.split('.')[0] in %r)))
+""" % (HEAVY_MODULES,)
+
+
+def boot_worker():
+    """Import the URLconf in a fresh interpreter: (heavy modules loaded, {module: cumulative us})"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='school_management.settings')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', WORKER_BOOT],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    if result.returncode:
+        raise AssertionError(f'Worker boot failed:\n{result.stderr[-2000:]}')
+
+    top_level = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            top_level[name.strip()] = int(cumulative)
+    return json.loads(result.stdout.strip().splitlines()[-1]), top_level
+
+
+class WorkerImportTimeTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.heavy, cls.imports = boot_worker()
+
+    def test_urlconf_does_not_import_heavy_libraries(self):
+        self.assertEqual(self.heavy, [])
+
+    def test_urlconf_imports_within_budget(self):
+        self.assertIn('core.views.zimsec_views', self.imports)
+        total = sum(self.imports.values()) / 1_000_000
+        slowest = sorted(self.imports.items(), key=lambda item: -item[1])[:5]
+        self.assertLess(
+            total, IMPORT_BUDGET_SECONDS,
+            f'Worker imports took {total:.2f}s (budget {IMPORT_BUDGET_SECONDS}s); slowest: {slowest}',
+        )
+
+
+class LazyImportTests(SimpleTestCase):
+    def test_module_is_imported_on_first_use(self):
+        sys.modules.pop('colorsys', None)
+        colorsys = lazy('colorsys')
+        self.assertNotIn('colorsys', sys.modules)
+        self.assertEqual(colorsys.rgb_to_hsv(0, 0, 0), (0.0, 0.0, 0.0))
+        self.assertIn('colorsys', sys.modules)
+
+    def test_name_is_imported_on_first_call(self):
+        sys.modules.pop('colorsys', None)
+        rgb_to_hsv = lazy('colorsys', 'rgb_to_hsv')
+        self.assertNotIn('colorsys', sys.modules)
+        self.assertEqual(rgb_to_hsv(1, 1, 1), (0.0, 0.0, 1.0))
+
+    def test_missing_module_fails_where_used(self):
+        missing = lazy('no_such_module_for_tests')
+        self.assertFalse(is_available('no_such_module_for_tests'))
+        self.assertTrue(is_available('json'))
+        with self.assertRaises(ImportError):
+            missing.anything
@@ -0,0 +1,61 @@
+from io import BytesIO
+
+from django.test import SimpleTestCase
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+from core.utils import report_theme
+from core.utils.pdf_reports_modern import ArrearsReport, PagedTable, PaymentHistoryReport
+
+
+class RecordingDoc(SimpleDocTemplate):
+    """Records each placed table's page and row count, and how many rows had
+    been read from the source at that point"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.placed = []
+        self.consumed = []
+        self.read_ahead = []
+
+    def afterFlowable(self, flowable):
+        if isinstance(flowable, Table):
+            self.placed.append((self.page, len(flowable._cellvalues) - 1))
+            self.read_ahead.append(len(self.consumed) - sum(count for _, count in self.placed))
+
+
+class PagedTableTests(SimpleTestCase):
+    def setUp(self):
+        report_theme.use_branding({'name': 'Paged School'})
+
+    def tearDown(self):
+        report_theme.clear()
+
+    def test_rows_are_read_and_placed_a_page_at_a_time(self):
+        doc = RecordingDoc(BytesIO(), pagesize=letter)
+
+        def rows():
+            for index in range(500):
+                doc.consumed.append(index)
+                yield [f'Student {index}', '3A', '$100']
+
+        doc.build([PagedTable(['Name', 'Class', 'Fee'], rows(), colWidths=[200, 100, 100], style=TableStyle([]))])
+
+        pages = [page for page, _ in doc.placed]
+        self.assertEqual(pages, list(range(1, len(pages) + 1)))
+        self.assertEqual(sum(count for _, count in doc.placed), 500)
+        # Never more than one row read ahead of what has been placed
+        self.assertLessEqual(max(doc.read_ahead), 1)
+
+    def test_large_reports_accept_iterators_with_totals(self):
+        students = ({'name': f'Pupil {i}', 'class': '4B', 'term_fee': 100, 'amount_paid': 40, 'current_balance': 60} for i in range(120))
+        buffer = PaymentHistoryReport.generate_fee_dashboard_pdf(
+            'Term 1', students, totals={'students': 120, 'term_fee': 12000, 'amount_paid': 4800, 'current_balance': 7200},
+        )
+        self.assertTrue(buffer.getvalue().startswith(b'%PDF'))
+
+        output = BytesIO()
+        arrears = ({'name': f'Pupil {i}', 'id': i, 'current_class': '4B', 'balance': 60} for i in range(120))
+        ArrearsReport.generate_arrears_pdf(arrears, 'Term 1', totals={'students': 120, 'balance': 7200}, output=output)
+        self.assertTrue(output.getvalue().startswith(b'%PDF'))
+        self.assertEqual(list(arrears), [])
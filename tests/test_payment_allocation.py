@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+from django.db.models import F
+from django.test import TestCase
+
+from core.models import (
+    AcademicTerm, AcademicYear, Class, Payment, PaymentAllocation,
+    PaymentAllocationLog, Student, StudentBalance, StudentCredit, TermFee,
+)
+from core.services import BatchPaymentAllocationService, PaymentAllocationService
+
+
+class BatchPaymentAllocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        cls.term1 = AcademicTerm.objects.create(academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-04-30')
+        cls.term2 = AcademicTerm.objects.create(academic_year=2026, term=2, start_date='2026-05-01', end_date='2026-12-31')
+        fees = {term: TermFee.objects.create(term=term, grade_level='PRIMARY', amount=Decimal('100.00')) for term in (cls.term1, cls.term2)}
+        grade5 = Class.objects.create(grade=5, section='A', academic_year=2026)
+
+        cls.students = []
+        for index in range(3):
+            student = Student.objects.create(
+                surname=f'Alloc{index}', first_name='Test', sex='F', date_of_birth='2015-01-01',
+                birth_entry_number=f'ALLOC-{index}', current_class=grade5, date_enrolled='2025-01-01',
+            )
+            StudentBalance.objects.filter(student=student).delete()
+            for term in (cls.term1, cls.term2):
+                StudentBalance.objects.create(student=student, term=term, term_fee_record=fees[term])
+            cls.students.append(student)
+        cls.credit = StudentCredit.objects.create(student=cls.students[0], amount=Decimal('30.00'), source='GOODWILL')
+
+    def _payments(self, *amounts):
+        """Payments without the balance signals, so balances stay as set up"""
+        return Payment.objects.bulk_create([
+            Payment(student=student, term=self.term2, amount=Decimal(amount), receipt_number=f'R{index}')
+            for index, (student, amount) in enumerate(amounts)
+        ])
+
+    def test_batch_matches_sequential_allocation(self):
+        a, b, _ = self.students
+        payments = self._payments((a, '150'), (b, '250'), (a, '60'))
+
+        def summary(results):
+            return [
+                (r['total_allocated'], r['credit_created'], [(x['term'], x['amount']) for x in r['allocations']])
+                for r in results
+            ]
+
+        plan = summary(BatchPaymentAllocationService(payments, dry_run=True).allocate())
+        sequential = []
+        for payment in payments:
+            result = PaymentAllocationService(payment).allocate()
+            # What the payment signals do between two separately saved payments
+            for allocation in result['allocations']:
+                if allocation['term'] is not None:
+                    StudentBalance.objects.filter(student_id=payment.student_id, term=allocation['term']).update(
+                        current_balance=F('current_balance') - allocation['amount'],
+                    )
+            sequential.append(result)
+        self.assertEqual(plan, summary(sequential))
+
+        # 30 of existing credit, then 100 + 20 to terms 1 and 2
+        self.assertEqual(plan[0][2], [(self.term1, Decimal('100')), (self.term2, Decimal('20'))])
+        # Both terms, 50 excess becomes a credit
+        self.assertEqual(plan[1][1], Decimal('50'))
+        # The credit was used up and Term 1 paid by the first payment
+        self.assertEqual(plan[2][2], [(self.term2, Decimal('60'))])
+
+    def test_dry_run_writes_nothing(self):
+        payments = self._payments((self.students[1], '500'))
+        with self.assertNumQueries(2):
+            BatchPaymentAllocationService(payments, dry_run=True).allocate()
+        self.assertFalse(PaymentAllocation.objects.exists())
+        self.assertEqual(StudentCredit.objects.count(), 1)
+
+    def test_batch_writes_are_bulk(self):
+        payments = self._payments(*[(student, '250') for student in self.students])
+        with self.assertNumQueries(8):
+            results = BatchPaymentAllocationService(payments).allocate()
+
+        self.assertEqual(PaymentAllocation.objects.count(), 6)
+        self.assertEqual(PaymentAllocationLog.objects.filter(payment=payments[1]).count(), 3)
+        self.credit.refresh_from_db()
+        self.assertEqual(self.credit.applied_amount, Decimal('30.00'))
+        new_credits = StudentCredit.objects.filter(source='OVERPAYMENT').order_by('id')
+        self.assertEqual([c.amount for c in new_credits], [Decimal('20.00'), Decimal('50.00'), Decimal('50.00')])
+        self.assertIn(f'Credit ID: {new_credits[0].id}', results[0]['log'][-1])
@@ -0,0 +1,111 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.test import TestCase
+
+from core.models import (
+    AcademicTerm, AcademicYear, Class, Payment, Student, StudentBalance,
+    StudentLedgerEntry, TermFee,
+)
+from core.services.payment_import import PaymentImportService
+
+
+class PaymentImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        cls.term1 = AcademicTerm.objects.create(academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-04-30')
+        cls.term2 = AcademicTerm.objects.create(academic_year=2026, term=2, start_date='2026-05-01', end_date='2026-12-31', is_current=True)
+        cls.fees = {term: TermFee.objects.create(term=term, grade_level='PRIMARY', amount=Decimal('100.00')) for term in (cls.term1, cls.term2)}
+        grade6 = Class.objects.create(grade=6, section='A', academic_year=2026)
+
+        cls.students = []
+        for index in range(3):
+            student = Student.objects.create(
+                surname=f'Import{index}', first_name='Test', sex='M', date_of_birth='2014-01-01',
+                birth_entry_number=f'IMP-{index}', current_class=grade6, date_enrolled='2025-01-01',
+            )
+            cls.students.append(student)
+        # Give the first student a term 1 balance too, so the import cascades into term 2
+        StudentBalance.objects.filter(student=cls.students[0]).delete()
+        StudentLedgerEntry.objects.filter(student=cls.students[0]).delete()
+        for term in (cls.term1, cls.term2):
+            StudentBalance.objects.create(
+                student=cls.students[0], term=term, term_fee_record=cls.fees[term],
+                previous_arrears=StudentLedgerEntry.previous_arrears_for(cls.students[0], term),
+            )
+
+    CSV = (
+        'Birth_Entry_Number,Amount,Reference,Payment_Date\n'
+        'imp-1,60.00,BANK-001,2026-05-03\n'
+        ',40,ECOCASH IMP-1 fees,2026-05-04\n'
+        'IMP-2,"1,000.00",BANK-002,\n'
+        'IMP-9,50,BANK-003,\n'
+        'IMP-2,abc,BANK-004,\n'
+        'IMP-2,10,BANK-001,\n'
+        ',25,no pupil here,\n'
+    )
+
+    def test_import_matches_validates_and_reports(self):
+        result = PaymentImportService(term=self.term2, chunk_size=2).import_csv(StringIO(self.CSV))
+
+        self.assertEqual((result['rows'], result['imported'], result['failed']), (7, 3, 4))
+        self.assertEqual(result['total_amount'], Decimal('1100.00'))
+        self.assertEqual([e['row'] for e in sorted(result['errors'], key=lambda e: e['row'])], [4, 5, 6, 7])
+        self.assertIn('already been recorded', next(e['error'] for e in result['errors'] if e['row'] == 6))
+
+        # Deferred balance work: one recompute per student
+        balance1 = StudentBalance.objects.get(student=self.students[1], term=self.term2)
+        self.assertEqual(balance1.amount_paid, Decimal('100.00'))
+        self.assertEqual(balance1.current_balance, Decimal('0.00'))
+        self.assertEqual(StudentLedgerEntry.balance_after(self.students[1], self.term2), Decimal('0'))
+        self.assertEqual(
+            StudentBalance.objects.get(student=self.students[2], term=self.term2).current_balance,
+            Decimal('-900.00'),
+        )
+        self.assertEqual(len({p.receipt_number for p in Payment.objects.all()}), 3)
+
+    def test_cascade_and_ledger_for_earlier_term(self):
+        csv_file = StringIO('birth_entry_number,amount,reference\nIMP-0,150,BANK-100\n')
+        PaymentImportService(term=self.term1).import_csv(csv_file)
+
+        term2 = StudentBalance.objects.get(student=self.students[0], term=self.term2)
+        self.assertEqual(term2.previous_arrears, Decimal('-50.00'))
+        self.assertEqual(term2.current_balance, Decimal('50.00'))
+        self.assertEqual(StudentLedgerEntry.balance_after(self.students[0], self.term2), Decimal('50.00'))
+
+    def test_dry_run_writes_nothing(self):
+        result = PaymentImportService(term=self.term2, dry_run=True).import_csv(StringIO(self.CSV))
+        self.assertEqual(result['imported'], 3)
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(StudentBalance.objects.get(student=self.students[1], term=self.term2).amount_paid, Decimal('0'))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def run(count):
+            rows = ''.join(f'IMP-{i % 2 + 1},1,REF-{count}-{i}\n' for i in range(count))
+            with CaptureQueriesContext(connection) as queries:
+                result = PaymentImportService(term=self.term2).import_csv(
+                    StringIO('birth_entry_number,amount,reference\n' + rows)
+                )
+            self.assertEqual(result['imported'], count)
+            return len(queries)
+
+        # A receipt number collision costs one extra lookup, so allow a little slack
+        self.assertLessEqual(run(200), run(5) + 2)
+
+    def test_upload_view_reports_rows(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from core.models import Administrator
+
+        AcademicTerm.objects.filter(pk=self.term2.pk).update(is_current=True)
+        self.client.force_login(Administrator.objects.create_superuser('bursar@school.com', 'testpass123'))
+        upload = SimpleUploadedFile('statement.csv', self.CSV.encode('utf-8'), content_type='text/csv')
+        response = self.client.post('/payments/import/', {'payments_file': upload, 'dry_run': '1'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['imported'], 3)
+        self.assertEqual(len(response.json()['errors']), 4)
+        self.assertFalse(Payment.objects.exists())
@@ -0,0 +1,98 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import AcademicTerm, AcademicYear, Administrator, Class, ReportJob, Student, StudentBalance, TermFee
+from core.services import current_period, report_jobs
+from core.services.payment_import import PaymentImportService
+
+
+class ReportJobQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        cls.term = AcademicTerm.objects.create(academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-12-31', is_current=True)
+        TermFee.objects.create(term=cls.term, grade_level='PRIMARY', amount=Decimal('100.00'))
+        grade6 = Class.objects.create(grade=6, section='A', academic_year=2026)
+        for index in range(3):
+            Student.objects.create(
+                surname=f'Report{index}', first_name='Pupil', sex='M', date_of_birth='2015-01-01',
+                birth_entry_number=f'RPT-{index}', current_class=grade6, date_enrolled='2025-01-01',
+            )
+
+    def setUp(self):
+        current_period.invalidate()
+        self.client.force_login(Administrator.objects.create_superuser('reports@school.com', 'testpass123'))
+
+    def test_jobs_are_rendered_once_and_served_from_cache(self):
+        job, created = report_jobs.enqueue('fee_dashboard')
+        self.assertTrue(created)
+        self.assertEqual(job.status, 'PENDING')
+        # An identical request while queued shares the job
+        self.assertEqual(report_jobs.enqueue('fee_dashboard')[0].pk, job.pk)
+
+        done = report_jobs.run_next('test-worker')
+        self.assertEqual(done.status, 'DONE')
+        job.refresh_from_db()
+        self.assertTrue(bytes(job.content).startswith(b'%PDF'))
+        self.assertEqual(len(job.content_hash), 64)
+        self.assertIsNone(report_jobs.run_next('test-worker'))
+
+        cached, created = report_jobs.enqueue('fee_dashboard')
+        self.assertFalse(created)
+        self.assertEqual(cached.pk, job.pk)
+
+        # New source data, new render
+        balance = StudentBalance.objects.filter(term=self.term).first()
+        balance.amount_paid = Decimal('30.00')
+        balance.save()
+        fresh, created = report_jobs.enqueue('fee_dashboard')
+        self.assertTrue(created)
+        self.assertNotEqual(fresh.cache_key, job.cache_key)
+
+    def test_payment_import_invalidates_the_cached_report(self):
+        job, _ = report_jobs.enqueue('fee_dashboard')
+        report_jobs.run_next('test-worker')
+        self.assertEqual(report_jobs.enqueue('fee_dashboard')[0].pk, job.pk)
+
+        # The import writes balances with set-based UPDATEs, not StudentBalance.save()
+        result = PaymentImportService(term=self.term).import_csv(
+            StringIO('Birth_Entry_Number,Amount,Reference\nRPT-1,40.00,BANK-RPT-1\n')
+        )
+        self.assertEqual(result['imported'], 1)
+        fresh, created = report_jobs.enqueue('fee_dashboard')
+        self.assertTrue(created)
+        self.assertNotEqual(fresh.cache_key, job.cache_key)
+
+    def test_a_job_is_claimed_by_one_worker(self):
+        report_jobs.enqueue('arrears')
+        self.assertIsNotNone(report_jobs.claim_next('worker-1'))
+        self.assertIsNone(report_jobs.claim_next('worker-2'))
+        self.assertEqual(ReportJob.objects.get().worker, 'worker-1')
+
+    def test_request_poll_and_download(self):
+        response = self.client.get('/fees/export/')
+        job = ReportJob.objects.get()
+        self.assertRedirects(response, f'/reports/jobs/{job.pk}/', fetch_redirect_response=False)
+        self.assertEqual(self.client.get(f'/reports/jobs/{job.pk}/status/').json()['status'], 'PENDING')
+
+        call_command('run_report_worker', '--once', stdout=open('/dev/null', 'w'))
+
+        status = self.client.get(f'/reports/jobs/{job.pk}/status/').json()
+        self.assertEqual(status['status'], 'DONE')
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download['Content-Type'], 'application/pdf')
+        self.assertTrue(download.content.startswith(b'%PDF'))
+        self.assertEqual(self.client.get(status['download_url'], HTTP_IF_NONE_MATCH=download['ETag']).status_code, 304)
+
+        # Repeat request goes straight to the cached PDF
+        self.assertRedirects(self.client.get('/fees/export/'), status['download_url'], fetch_redirect_response=False)
+        self.assertEqual(ReportJob.objects.count(), 1)
+
+    def test_invalid_requests_are_rejected(self):
+        self.client.get('/student/999999/payments/export/')
+        response = self.client.get('/reports/payroll/', {'format': 'json'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ReportJob.objects.exists())
@@ -0,0 +1,38 @@
+from django.test import TestCase
+
+from core.models.school_details import SchoolDetails
+from core.utils import pdf_reports, pdf_reports_modern, report_theme
+
+
+class ReportThemeTests(TestCase):
+    def setUp(self):
+        report_theme.clear()
+        report_theme.invalidate()
+
+    def test_styles_are_built_once_per_process(self):
+        pdf_reports_modern.ArrearsReport.generate_arrears_pdf([{'name': 'Moyo', 'id': 1, 'current_class': '3A', 'balance': 60}])
+        builds = report_theme._stats['style_builds']
+        buffer = pdf_reports_modern.ArrearsReport.generate_arrears_pdf([{'name': 'Dube', 'id': 2, 'current_class': '4B', 'balance': 80}])
+        self.assertEqual(report_theme._stats['style_builds'], builds)
+        self.assertTrue(buffer.getvalue().startswith(b'%PDF'))
+
+        sheet = report_theme.stylesheet('test.sheet', lambda styles: styles.add(report_theme.paragraph_style('test.body', 'TestBody', parent='Normal')))
+        self.assertIs(report_theme.stylesheet('test.sheet'), sheet)
+        self.assertEqual(sheet['TestBody'].parent.name, 'Normal')
+
+    def test_school_name_is_cached_until_school_details_change(self):
+        school = SchoolDetails.get_or_create_default()
+        self.assertEqual(report_theme.school_name(), 'Your School Name')
+        with self.assertNumQueries(0):
+            pdf_reports.get_school_name()
+            buffer = pdf_reports.ArrearsReport.generate_arrears_pdf([])
+        self.assertTrue(buffer.getvalue().startswith(b'%PDF'))
+
+        school.school_name = 'Eden Primary'
+        with self.captureOnCommitCallbacks(execute=True):
+            school.save()
+        self.assertEqual(pdf_reports_modern.get_school_name(), 'Eden Primary')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            school.delete()
+        self.assertEqual(report_theme.school_name(), report_theme.DEFAULT_SCHOOL_NAME)
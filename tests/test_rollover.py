@@ -0,0 +1,178 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import (
+    AcademicTerm, AcademicYear, Administrator, Class, RolloverJob, Student, StudentBalance,
+    StudentMovement, StudentTermHistory, TermFee,
+)
+from core.services import current_period, rollover
+from core.services.term_history import snapshot_term
+
+
+class RolloverTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        for term_num, start, end in [(1, '2026-01-01', '2026-04-30'), (2, '2026-05-01', '2026-08-31'), (3, '2026-09-01', '2026-12-31')]:
+            term = AcademicTerm.objects.create(
+                academic_year=2026, term=term_num, start_date=start, end_date=end, is_current=term_num == 3,
+            )
+            TermFee.objects.create(term=term, grade_level='PRIMARY', amount=Decimal('100.00'))
+            TermFee.objects.create(term=term, grade_level='ECD', amount=Decimal('60.00'))
+
+        cls.classes = {
+            key: Class.objects.create(grade=grade, section=section, academic_year=2026)
+            for key, grade, section in [('ECDA', 'ECDA', 'A'), ('1A', '1', 'A'), ('1B', '1', 'B'), ('7A', '7', 'A')]
+        }
+        # Next year's classes are prepared ahead of the rollover (no AcademicYear row yet)
+        cls.next_classes = {
+            f'{c.grade}{c.section}': c for c in Class.objects.bulk_create([
+                Class(grade='ECDB', section='A', academic_year=2027),
+                Class(grade='2', section='A', academic_year=2027),
+            ])
+        }
+
+        def student(name, key):
+            return Student.objects.create(
+                surname=name, first_name='Test', sex='F', date_of_birth='2016-01-01',
+                birth_entry_number=f'RO-{name.upper()}', current_class=cls.classes[key], date_enrolled='2025-01-01',
+            )
+
+        cls.infant = student('Infant', 'ECDA')
+        cls.first_a = student('FirstA', '1A')
+        cls.first_b = student('FirstB', '1B')
+        cls.senior = student('Senior', '7A')
+        StudentBalance.objects.filter(student=cls.first_a).update(amount_paid=Decimal('40.00'))
+        StudentBalance.refresh_materialized_totals()
+
+    def setUp(self):
+        current_period.invalidate()
+
+    def _rollover(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return rollover.run_now(self.year)
+
+    def test_plan_and_missing_classes(self):
+        plan = rollover.RolloverPlanner(self.year).plan()
+        self.assertEqual(sorted(plan.moves), sorted([
+            (self.infant.id, self.classes['ECDA'].id, self.next_classes['ECDBA'].id),
+            (self.first_a.id, self.classes['1A'].id, self.next_classes['2A'].id),
+            # No 2B next year: the first Grade 2 section takes the student
+            (self.first_b.id, self.classes['1B'].id, self.next_classes['2A'].id),
+        ]))
+        self.assertEqual(plan.graduates, [(self.senior.id, self.classes['7A'].id)])
+
+        Class.objects.filter(academic_year=2027, grade='2').delete()
+        with self.assertRaisesMessage(ValidationError, 'Grade 2 (for Grade 1A)'):
+            rollover.enqueue(self.year)
+        self.assertFalse(RolloverJob.objects.exists())
+
+    def test_rollover_promotes_graduates_and_carries_arrears(self):
+        job = self._rollover()
+
+        self.assertEqual((job.status, job.phase, job.percent), ('DONE', 'DONE', 100))
+        new_year = AcademicYear.objects.get(year=2027)
+        self.assertFalse(new_year.is_active)
+        self.assertEqual(
+            sorted(TermFee.objects.filter(term__academic_year=2027).values_list('term__term', 'grade_level')),
+            [(term, level) for term in (1, 2, 3) for level in ('ECD', 'PRIMARY')],
+        )
+
+        students = {s.id: s for s in Student.all_students.all()}
+        self.assertEqual(students[self.infant.id].current_class, self.next_classes['ECDBA'])
+        self.assertEqual(students[self.first_b.id].current_class, self.next_classes['2A'])
+        # Same end state as BulkPromotionService graduates
+        senior = students[self.senior.id]
+        self.assertEqual((senior.is_active, senior.status, senior.is_archived), (False, 'GRADUATED', True))
+        # Term 3 recorded after the rollover: graduates as GRADUATED, promoted pupils in the class they left
+        snapshot_term(AcademicTerm.objects.get(academic_year=2026, term=3))
+        history = {h.student_id: h for h in StudentTermHistory.objects.all()}
+        self.assertEqual(history[self.senior.id].status, 'GRADUATED')
+        self.assertEqual(history[self.first_b.id].class_enrolled, self.classes['1B'])
+        self.assertEqual(
+            StudentMovement.objects.filter(bulk_operation_id=str(job.pk), movement_type='PROMOTION').count(), 3,
+        )
+
+        first_term = AcademicTerm.objects.get(academic_year=2027, term=1)
+        opened = {b.student_id: b for b in StudentBalance.objects.filter(term=first_term)}
+        self.assertEqual(set(opened), {self.infant.id, self.first_a.id, self.first_b.id})
+        self.assertEqual(opened[self.first_a.id].previous_arrears, Decimal('60.00'))
+        self.assertEqual(opened[self.infant.id].term_fee, Decimal('60.00'))
+
+        with self.assertRaisesMessage(ValidationError, 'already exists'):
+            rollover.enqueue(self.year)
+
+    def test_interrupted_job_resumes_without_repeating_work(self):
+        job, _ = rollover.enqueue(self.year)
+        self.assertTrue(rollover.claim(job))
+        with mock.patch.object(rollover, '_open_balances', side_effect=RuntimeError('worker killed')):
+            with self.captureOnCommitCallbacks(execute=True):
+                job = rollover.run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.phase, job.error), ('PENDING', 'BALANCES', 'worker killed'))
+        self.assertEqual(Student.objects.get(pk=self.first_a.pk).current_class, self.next_classes['2A'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job = rollover.run_next()
+        self.assertEqual(job.status, 'DONE')
+        # Promoted once only, and the balances were opened on the second attempt
+        self.assertEqual(Student.objects.get(pk=self.first_a.pk).current_class, self.next_classes['2A'])
+        self.assertEqual(StudentMovement.objects.filter(bulk_operation_id=str(job.pk)).count(), 4)
+        self.assertEqual(StudentBalance.objects.filter(term__academic_year=2027).count(), 3)
+
+    def test_execute_view_queues_and_reports_progress(self):
+        self.client.force_login(Administrator.objects.create_superuser('rollover@school.com', 'testpass123'))
+
+        response = self.client.post(reverse('execute_rollover', args=[self.year.id]))
+        self.assertEqual(response.status_code, 202)
+        queued = response.json()
+        self.assertEqual((queued['status'], queued['summary']['promoted']), ('PENDING', 3))
+        self.assertFalse(AcademicYear.objects.filter(year=2027).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rollover.run_next()
+        status = self.client.get(queued['status_url']).json()
+        self.assertEqual((status['status'], status['percent'], status['summary']['balances_created']), ('DONE', 100, 3))
+
+    def test_simulation_reports_and_rolls_back(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            report = rollover.simulate(self.year)
+
+        self.assertEqual(callbacks, [])
+        self.assertFalse(AcademicYear.objects.filter(year=2027).exists())
+        self.assertFalse(RolloverJob.objects.exists())
+        self.assertFalse(StudentMovement.objects.exists())
+        self.assertEqual(Student.objects.get(pk=self.first_a.pk).current_class, self.classes['1A'])
+
+        self.assertEqual(
+            [(row['name'], row['students'], row['arrears']) for row in report['target_classes']],
+            [('ECDB A', 1, 60.0), ('Grade 2A', 2, 160.0)],
+        )
+        self.assertEqual(report['graduates'], {'students': 1, 'arrears': 100.0})
+        self.assertEqual((report['balances']['created'], report['term_fees_created']), (3, 6))
+        self.assertEqual(report['arrears'], {'to_carry': 220.0, 'carried': 220.0})
+        self.assertEqual([phase['phase'] for phase in report['profile']], ['PLAN', 'YEAR', 'PROMOTE', 'BALANCES'])
+        self.assertTrue(all(phase['queries'] > 0 for phase in report['profile']))
+
+    def test_wizard_verify_and_simulate_views(self):
+        self.client.force_login(Administrator.objects.create_superuser('wizard@school.com', 'testpass123'))
+
+        info = self.client.get(reverse('rollover_wizard')).context['rollover_info']
+        self.assertEqual((info['students_to_promote'], info['students_graduating']), (3, 1))
+        self.assertTrue(info['all_classes_ready'])
+        self.assertEqual(info['total_arrears'], 320.0)
+
+        verified = self.client.post(reverse('verify_arrears_before_rollover', args=[self.year.id])).json()
+        self.assertEqual((verified['total_arrears'], verified['students_with_arrears']), (320.0, 4))
+        self.assertEqual(
+            [(row['arrears'], row['term']) for row in verified['top_arrears']][-1], (60.0, '2026 T3'),
+        )
+
+        simulated = self.client.post(reverse('simulate_rollover', args=[self.year.id])).json()
+        self.assertEqual((simulated['status'], simulated['promoted']), ('success', 3))
+        self.assertFalse(AcademicYear.objects.filter(year=2027).exists())
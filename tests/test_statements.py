@@ -0,0 +1,80 @@
+import zipfile
+from decimal import Decimal
+from io import BytesIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import AcademicTerm, AcademicYear, Administrator, Class, Payment, ReportJob, Student, TermFee
+from core.services import current_period, report_jobs
+from core.services.statements import StatementBatch, collect
+
+
+class TermStatementTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        current_period.invalidate()
+        AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        cls.term = AcademicTerm.objects.create(academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-12-31', is_current=True)
+        TermFee.objects.create(term=cls.term, grade_level='PRIMARY', amount=Decimal('100.00'))
+        cls.classes = [
+            Class.objects.create(grade=3, section='A', academic_year=2026),
+            Class.objects.create(grade=4, section='B', academic_year=2026),
+        ]
+        cls.students = [
+            Student.objects.create(
+                surname=f'Statement{index}', first_name='Pupil', sex='F', date_of_birth='2017-01-01',
+                birth_entry_number=f'STM-{index}', current_class=cls.classes[index % 2], date_enrolled='2025-01-01',
+            )
+            for index in range(5)
+        ]
+        Payment.objects.create(student=cls.students[0], term=cls.term, amount=Decimal('40.00'), payment_method='CASH')
+
+    def setUp(self):
+        current_period.invalidate()
+
+    def test_collect_reads_a_term_in_two_queries(self):
+        with self.assertNumQueries(2):
+            statements = collect(self.term)
+        self.assertEqual(len(statements), 5)
+        first = next(s for s in statements if s.student.id == self.students[0].id)
+        self.assertEqual(first.balance_info['amount_paid'], 40.0)
+        self.assertEqual(first.payments[0].get_payment_method_display(), 'Cash')
+        self.assertTrue(first.filename.endswith(f'/Statement0_Pupil_{self.students[0].id}.pdf'))
+
+        self.assertEqual(len(collect(self.term, class_ids=[self.classes[1].pk])), 2)
+
+    def test_one_pdf_per_student_or_per_class(self):
+        buffer = BytesIO()
+        result = StatementBatch(term=self.term, workers=1, chunk_size=2).write(buffer)
+        self.assertEqual((result['students'], result['files']), (5, 5))
+        with zipfile.ZipFile(buffer) as archive:
+            names = archive.namelist()
+            self.assertEqual(len({name.split('/')[0] for name in names}), 2)
+            self.assertTrue(archive.read(names[0]).startswith(b'%PDF'))
+
+        buffer = BytesIO()
+        result = StatementBatch(term=self.term, workers=1, merge_by_class=True).write(buffer)
+        self.assertEqual(result['files'], 2)
+
+    def test_rendering_in_a_process_pool(self):
+        buffer = BytesIO()
+        result = StatementBatch(term=self.term, workers=2, chunk_size=2).write(buffer)
+        self.assertEqual(result['workers'], 2)
+        with zipfile.ZipFile(buffer) as archive:
+            self.assertEqual(len(archive.namelist()), 5)
+
+    def test_admin_action_queues_a_statement_job(self):
+        self.client.force_login(Administrator.objects.create_superuser('statements@school.com', 'testpass123'))
+        response = self.client.post('/django-admin/core/class/', {
+            'action': 'generate_class_statements', '_selected_action': [self.classes[0].pk],
+        })
+        job = ReportJob.objects.get()
+        self.assertRedirects(response, f'/reports/jobs/{job.pk}/', fetch_redirect_response=False)
+        self.assertEqual(job.params['classes'], [self.classes[0].pk])
+
+        report_jobs.run_next('test-worker')
+        download = self.client.get(f'/reports/jobs/{job.pk}/download/')
+        self.assertEqual(download['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(BytesIO(download.content)) as archive:
+            self.assertEqual(len(archive.namelist()), 1)
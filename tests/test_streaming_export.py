@@ -0,0 +1,87 @@
+import csv
+import gzip
+import io
+import zipfile
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+
+from core.models import AcademicTerm, AcademicYear, Administrator, Class, Student, StudentBalance, TermFee
+from core.services import current_period
+from core.services.streaming_export import StreamingExport
+
+
+class StreamingExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        cls.term = AcademicTerm.objects.create(academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-12-31', is_current=True)
+        TermFee.objects.create(term=cls.term, grade_level='PRIMARY', amount=Decimal('100.00'))
+        cls.grade4 = Class.objects.create(grade=4, section='B', academic_year=2026)
+        for index, paid in enumerate(['0', '60', '100']):
+            student = Student.objects.create(
+                surname=f'Export{index}', first_name='Pupil', sex='F', date_of_birth='2016-01-01',
+                birth_entry_number=f'EXP-{index}', current_class=cls.grade4, date_enrolled='2025-01-01',
+            )
+            balance = StudentBalance.objects.get(student=student, term=cls.term)
+            balance.amount_paid = Decimal(paid)
+            balance.save()
+
+    def setUp(self):
+        current_period.invalidate()
+        self.client.force_login(Administrator.objects.create_superuser('exports@school.com', 'testpass123'))
+
+    def _rows(self, response):
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+
+    def test_balances_csv_with_selected_columns_and_filters(self):
+        response = self.client.get('/exports/balances/', {
+            'columns': 'surname,class,term,current_balance', 'outstanding': '1',
+        })
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(self._rows(response), [
+            ['Surname', 'Class', 'Term', 'Current Balance'],
+            ['Export0', '4B', '2026 Term 1', '100.00'],
+            ['Export1', '4B', '2026 Term 1', '40.00'],
+        ])
+
+    def test_gzip_csv(self):
+        response = self.client.get('/exports/students/', {'columns': 'birth_entry_number', 'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.csv.gz', response['Content-Disposition'])
+        text = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8')
+        self.assertEqual(text.split(), ['Birth', 'Entry', 'Number', 'EXP-0', 'EXP-1', 'EXP-2'])
+
+    def test_xlsx_is_a_valid_workbook(self):
+        response = self.client.get('/exports/balances/', {'format': 'xlsx', 'columns': 'surname,amount_paid'})
+        package = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(package.testzip())
+        sheet = package.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertIn('<t xml:space="preserve">Export1</t>', sheet)
+        self.assertIn('<c r="B3"><v>60.00</v></c>', sheet)
+        self.assertEqual(sheet.count('<row '), 4)
+
+    def test_rows_are_fetched_chunk_by_chunk(self):
+        export = StreamingExport('students', columns=['surname'], chunk_size=2)
+        self.assertEqual([len(chunk) for chunk in export.chunks()], [2, 1])
+        stream = export.stream()
+        self.assertEqual(next(stream), b'Surname\r\n')
+
+    def test_unknown_dataset_or_column_is_rejected(self):
+        self.assertEqual(self.client.get('/exports/teachers/').status_code, 400)
+        response = self.client.get('/exports/students/', {'columns': 'surname,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_search_export_keeps_text_matches(self):
+        from core.services import student_search
+
+        student_search.invalidate()
+        response = self.client.get('/search/export/', {'q': 'export1', 'columns': 'surname'})
+        self.assertEqual(self._rows(response), [['Surname'], ['Export1']])
+
+        # A search with no matches exports no students, not all of them
+        response = self.client.get('/search/export/', {'q': 'zzzzqqq', 'columns': 'surname'})
+        self.assertEqual(self._rows(response), [['Surname']])
@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import AcademicTerm, AcademicYear, Class, Student, StudentBalance, TermFee
+from core.services import current_period
+
+
+class StudentFinancialsAnnotationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        cls.term = AcademicTerm.objects.create(academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-12-31', is_current=True)
+        TermFee.objects.create(term=cls.term, grade_level='PRIMARY', amount=Decimal('100.00'))
+        grade5 = Class.objects.create(grade=5, section='A', academic_year=2026)
+
+        for index, (paid, arrears) in enumerate([('0', '0'), ('40', '0'), ('100', '0'), ('0', '25'), ('150', '0')]):
+            student = Student.objects.create(
+                surname=f'Pupil{index}', first_name='Test', sex='M', date_of_birth='2015-01-01',
+                birth_entry_number=f'FIN-{index}', current_class=grade5, date_enrolled='2025-01-01',
+            )
+            balance = StudentBalance.objects.get(student=student, term=cls.term)
+            balance.amount_paid = Decimal(paid)
+            balance.previous_arrears = Decimal(arrears)
+            balance.save()
+
+    def setUp(self):
+        current_period.invalidate()
+
+    def _properties(self, student):
+        return (
+            student.overall_balance,
+            student.payment_status,
+            student.current_term_balance,
+            student.previous_term_arrears,
+            student.total_due,
+            student.has_arrears,
+        )
+
+    def test_annotated_properties_match_per_student_queries(self):
+        expected = [self._properties(s) for s in Student.objects.order_by('id')]
+        actual = [self._properties(s) for s in Student.objects.with_financials(self.term).order_by('id')]
+        self.assertEqual(actual, expected)
+        self.assertEqual([row[1] for row in actual], ['red', 'yellow', 'green', 'red', 'green'])
+
+    def test_rendering_rows_costs_one_query(self):
+        AcademicTerm.get_current_term()
+        with self.assertNumQueries(1):
+            for student in Student.objects.with_financials():
+                self._properties(student)
+
+    def test_balance_status_filters(self):
+        def surnames(status):
+            return sorted(Student.objects.filter_balance_status(status, self.term).values_list('surname', flat=True))
+
+        self.assertEqual(surnames('paid'), ['Pupil2', 'Pupil4'])
+        self.assertEqual(surnames('partial'), ['Pupil1'])
+        self.assertEqual(surnames('unpaid'), ['Pupil0', 'Pupil3'])
+        self.assertEqual(surnames('arrears'), ['Pupil3'])
+        self.assertEqual(Student.objects.filter_balance_status('bogus', self.term).count(), 5)
+
+    def test_balance_filter_and_pagination_cost_two_queries(self):
+        from django.core.paginator import Paginator
+
+        AcademicTerm.get_current_term()
+        queryset = Student.objects.with_financials(self.term).filter_balance_status('unpaid')
+        with self.assertNumQueries(2):
+            page = Paginator(queryset, 12).page(1)
+            rows = [(s.surname, s.payment_status) for s in page.object_list]
+        self.assertEqual(page.paginator.count, 2)
+        self.assertEqual(rows, [('Pupil0', 'red'), ('Pupil3', 'red')])
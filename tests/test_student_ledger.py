@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import (
+    AcademicTerm, AcademicYear, Class, Payment, Student, StudentBalance,
+    StudentLedgerEntry, TermFee,
+)
+from core.services import report_jobs
+
+
+class StudentLedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        cls.term1 = AcademicTerm.objects.create(academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-04-30')
+        cls.term2 = AcademicTerm.objects.create(academic_year=2026, term=2, start_date='2026-05-01', end_date='2026-08-31')
+        cls.term3 = AcademicTerm.objects.create(academic_year=2026, term=3, start_date='2026-09-01', end_date='2026-12-31')
+        cls.fees = {
+            term: TermFee.objects.create(term=term, grade_level='PRIMARY', amount=Decimal('100.00'))
+            for term in (cls.term1, cls.term2, cls.term3)
+        }
+        grade4 = Class.objects.create(grade=4, section='A', academic_year=2026)
+        cls.student = Student.objects.create(
+            surname='Dube', first_name='Rudo', sex='F', date_of_birth='2016-01-01',
+            birth_entry_number='LEDGER-1', current_class=grade4, date_enrolled='2025-01-01',
+        )
+        # Enrolment opens the latest term; build the year term by term instead
+        StudentBalance.objects.filter(student=cls.student).delete()
+        StudentLedgerEntry.objects.filter(student=cls.student).delete()
+        for term in (cls.term1, cls.term2, cls.term3):
+            StudentBalance.objects.create(
+                student=cls.student, term=term, term_fee_record=cls.fees[term],
+                previous_arrears=StudentLedgerEntry.previous_arrears_for(cls.student, term),
+            )
+
+    def _balance(self, term):
+        return StudentBalance.objects.get(student=self.student, term=term)
+
+    def test_previous_arrears_is_ledger_prefix(self):
+        self.assertEqual(self._balance(self.term3).previous_arrears, Decimal('200.00'))
+        for term in (self.term1, self.term2, self.term3):
+            self.assertEqual(
+                StudentLedgerEntry.previous_arrears_for(self.student, term),
+                self._balance(term).previous_arrears,
+            )
+            self.assertEqual(
+                StudentLedgerEntry.balance_after(self.student, term),
+                self._balance(term).current_balance,
+            )
+
+    def test_payment_shifts_later_terms(self):
+        Payment.objects.create(student=self.student, term=self.term1, amount=Decimal('120.00'))
+
+        self.assertEqual(self._balance(self.term1).current_balance, Decimal('-20.00'))
+        term2 = self._balance(self.term2)
+        self.assertEqual(term2.previous_arrears, Decimal('-20.00'))
+        self.assertEqual(term2.current_balance, Decimal('80.00'))
+        term3 = self._balance(self.term3)
+        self.assertEqual(term3.previous_arrears, Decimal('80.00'))
+        self.assertEqual(term3.current_balance, Decimal('180.00'))
+        self.assertEqual(StudentLedgerEntry.balance_after(self.student, self.term3), Decimal('180.00'))
+
+    def test_shifted_later_terms_invalidate_cached_reports(self):
+        job, _ = report_jobs.enqueue('fee_dashboard', {'term': self.term2.pk})
+        report_jobs.run_next('test-worker')
+        self.assertEqual(report_jobs.enqueue('fee_dashboard', {'term': self.term2.pk})[0].pk, job.pk)
+
+        Payment.objects.create(student=self.student, term=self.term1, amount=Decimal('60.00'))
+        self.assertEqual(self._balance(self.term2).total_due, Decimal('140.00'))
+        fresh, created = report_jobs.enqueue('fee_dashboard', {'term': self.term2.pk})
+        self.assertTrue(created)
+        self.assertNotEqual(fresh.cache_key, job.cache_key)
+
+    def test_deleted_payment_is_reversed(self):
+        payment = Payment.objects.create(student=self.student, term=self.term2, amount=Decimal('50.00'))
+        payment.delete()
+
+        self.assertEqual(self._balance(self.term3).previous_arrears, Decimal('200.00'))
+        entries = StudentLedgerEntry.objects.filter(student=self.student, entry_type=StudentLedgerEntry.PAYMENT)
+        self.assertEqual([e.amount for e in entries], [Decimal('-50.00'), Decimal('50.00')])
+
+    def test_payment_cost_does_not_depend_on_later_terms(self):
+        balance = self._balance(self.term1)
+        balance.amount_paid = Decimal('30.00')
+        # full_clean lookups, the UPDATE, one ledger read, the later-balance lookup and
+        # one statement per shifted table
+        with self.assertNumQueries(17):
+            balance.save(update_fields=['amount_paid'])
@@ -0,0 +1,103 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import AcademicTerm, AcademicYear, Administrator, Class, Student, StudentBalance, TermFee
+from core.services import current_period, student_search
+
+
+class StudentSearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        cls.grade3 = Class.objects.create(grade=3, section='A', academic_year=2026)
+        grade5 = Class.objects.create(grade=5, section='B', academic_year=2026)
+        people = [
+            ('Moyo', 'Tendai', 'SRCH-1001', cls.grade3),
+            ('Moyo', 'Rudo', 'SRCH-1002', grade5),
+            ('Ncube', 'Tendai', 'SRCH-2001', grade5),
+            ('Mpofu', 'Chipo', 'SRCH-2002', cls.grade3),
+        ]
+        for surname, first_name, birth_entry, student_class in people:
+            Student.objects.create(
+                surname=surname, first_name=first_name, sex='F', date_of_birth='2016-01-01',
+                birth_entry_number=birth_entry, current_class=student_class, date_enrolled='2025-01-01',
+            )
+
+    def setUp(self):
+        student_search.invalidate()
+
+    def _names(self, query, limit=20):
+        return [f"{r['surname']} {r['first_name']}" for r in student_search.search(query, limit)]
+
+    def test_prefix_and_multi_term_queries_are_ranked(self):
+        self.assertEqual(self._names('moy'), ['Moyo Rudo', 'Moyo Tendai'])
+        self.assertEqual(self._names('tendai moyo'), ['Moyo Tendai'])
+        # An exact token outranks a prefix match
+        self.assertEqual(self._names('ten')[0:2], ['Moyo Tendai', 'Ncube Tendai'])
+        self.assertEqual(self._names('m', 20), [])
+
+    def test_birth_entry_class_and_typo_matches(self):
+        self.assertEqual(self._names('SRCH-2002'), ['Mpofu Chipo'])
+        self.assertEqual(self._names('200'), ['Mpofu Chipo', 'Ncube Tendai'])
+        self.assertEqual(self._names('grade 3a'), ['Moyo Tendai', 'Mpofu Chipo'])
+        self.assertEqual(self._names('ncubbe'), ['Ncube Tendai'])
+
+    def test_index_follows_student_writes_on_commit(self):
+        self.assertEqual(self._names('chipo'), ['Mpofu Chipo'])
+        index = student_search.get_index()
+
+        student = Student.objects.get(birth_entry_number='SRCH-2002')
+        with self.captureOnCommitCallbacks(execute=True):
+            student.surname = 'Sibanda'
+            student.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.create(
+                surname='Dube', first_name='Chipo', sex='F', date_of_birth='2016-01-01',
+                birth_entry_number='SRCH-3001', current_class=self.grade3, date_enrolled='2025-01-01',
+            )
+
+        # Patched in place, not rebuilt
+        self.assertIs(student_search.get_index(), index)
+        self.assertEqual(self._names('chipo'), ['Dube Chipo', 'Sibanda Chipo'])
+        self.assertEqual(self._names('mpofu'), [])
+
+    def test_search_from_a_warm_index_runs_no_queries(self):
+        student_search.get_index()
+        with self.assertNumQueries(0):
+            student_search.search('moyo')
+
+    def test_autocomplete_endpoint(self):
+        self.client.force_login(Administrator.objects.create_superuser('desk@school.com', 'testpass123'))
+        response = self.client.get('/api/search/autocomplete/', {'q': 'ncu', 'type': 'students'})
+        self.assertEqual(response.status_code, 200)
+        suggestions = response.json()['suggestions']
+        self.assertEqual([s['text'] for s in suggestions], ['Ncube, Tendai (SRCH-2001)'])
+        self.assertEqual(suggestions[0]['url'], f"/students/{suggestions[0]['id']}/")
+
+        response = self.client.get('/search/students/', {'q': 'moyo', 'grade': '5'})
+        self.assertEqual([s.first_name for s in response.context['students']], ['Rudo'])
+
+    def test_payment_and_arrears_filters(self):
+        term = AcademicTerm.objects.create(
+            academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-12-31', is_current=True,
+        )
+        TermFee.objects.create(term=term, grade_level='PRIMARY', amount=Decimal('100.00'))
+        current_period.invalidate()
+        for student in Student.objects.all():
+            StudentBalance.objects.create(student=student, term=term, term_fee=Decimal('100.00'))
+        StudentBalance.objects.filter(student__birth_entry_number='SRCH-1001').update(amount_paid=Decimal('100.00'))
+        StudentBalance.objects.filter(student__birth_entry_number='SRCH-2001').update(previous_arrears=Decimal('40.00'))
+        StudentBalance.refresh_materialized_totals()
+
+        self.client.force_login(Administrator.objects.create_superuser('filter@school.com', 'testpass123'))
+
+        def first_names(**params):
+            response = self.client.get('/search/students/', params)
+            self.assertEqual(response.status_code, 200)
+            return sorted(s.first_name for s in response.context['students'])
+
+        self.assertEqual(first_names(payment_status='paid'), ['Tendai'])
+        self.assertEqual(first_names(payment_status='unpaid'), ['Chipo', 'Rudo', 'Tendai'])
+        self.assertEqual(first_names(arrears_status='has_arrears'), ['Tendai'])
+        self.assertEqual(first_names(arrears_status='no_arrears', q='moyo'), ['Rudo', 'Tendai'])
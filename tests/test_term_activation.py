@@ -0,0 +1,122 @@
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.db import transaction
+from django.test import RequestFactory, TestCase
+
+from core.models import (
+    AcademicTerm, AcademicYear, Class, ECDClassFee, ECDClassProfile,
+    Student, StudentBalance, TermFee,
+)
+from core.models.arrears_import import StudentArrearsRecord
+from core.services.term_activation import TermActivationService
+from core.views.step10_academic_management import set_current_term_api
+
+
+class TermActivationServiceTests(TestCase):
+    """The set-based service must produce the same balances as initialize_term_balance()"""
+
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2025, start_date='2025-01-01', end_date='2025-12-31')
+        AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        for term_num, start, end in [(1, '2025-01-01', '2025-04-30'), (2, '2025-05-01', '2025-08-31'), (3, '2025-09-01', '2025-12-31')]:
+            AcademicTerm.objects.create(academic_year=2025, term=term_num, start_date=start, end_date=end)
+        cls.last_term = AcademicTerm.objects.get(academic_year=2025, term=3)
+        cls.term = AcademicTerm.objects.create(academic_year=2026, term=1, start_date='2026-01-01', end_date='2026-12-31')
+
+        grade3 = Class.objects.create(grade=3, section='A', academic_year=2026)
+        grade7 = Class.objects.create(grade=7, section='A', academic_year=2026)
+        ecd = Class.objects.create(grade='ECDA', section='A', academic_year=2026)
+        ECDClassProfile.objects.create(cls=ecd, capacity=10, meal_plan_fee=Decimal('10.00'))
+        ECDClassFee.objects.create(cls=ecd, term=cls.term, amount=Decimal('5.00'), description='Materials')
+
+        old_fee = TermFee.objects.create(term=cls.last_term, grade_level='PRIMARY', amount=Decimal('100.00'))
+        TermFee.objects.create(term=cls.term, grade_level='PRIMARY', amount=Decimal('150.00'))
+        TermFee.objects.create(term=cls.term, grade_level='ECD', amount=Decimal('80.00'))
+
+        def student(name, cls_obj):
+            return Student.objects.create(
+                surname=name, first_name='Test', sex='F', date_of_birth='2018-01-01',
+                birth_entry_number=f'BE-{name.upper()}', current_class=cls_obj, date_enrolled='2024-01-01',
+            )
+
+        cls.debtor = student('Debtor', grade3)
+        cls.credited = student('Credited', grade3)
+        cls.grade7 = student('Senior', grade7)
+        cls.infant = student('Infant', ecd)
+        cls.imported = student('Imported', grade3)
+        cls.existing = student('Existing', grade3)
+
+        for pupil, paid in [(cls.debtor, '60.00'), (cls.credited, '130.00'), (cls.grade7, '40.00'), (cls.existing, '0.00')]:
+            StudentBalance.objects.create(student=pupil, term=cls.last_term, term_fee_record=old_fee, amount_paid=Decimal(paid))
+
+        # Enrolment opens the latest term automatically; start from a clean slate
+        StudentBalance.objects.filter(term=cls.term).delete()
+        StudentArrearsRecord.objects.create(
+            student=cls.imported, total_arrears=Decimal('25.00'),
+            is_applied_to_balance=True, applied_to_term=cls.term,
+        )
+        StudentBalance.objects.create(
+            student=cls.existing, term=cls.term,
+            term_fee_record=TermFee.objects.get(term=cls.term, grade_level='PRIMARY'),
+            previous_arrears=Decimal('10.00'),
+        )
+
+    def _snapshot(self, run):
+        """Run an activation inside a savepoint and return the resulting balances"""
+        sid = transaction.savepoint()
+        run()
+        snapshot = {
+            b.student_id: (b.term_fee_record_id, b.previous_arrears, b.term_fee, b.total_due, b.current_balance)
+            for b in StudentBalance.objects.filter(term=self.term)
+        }
+        transaction.savepoint_rollback(sid)
+        return snapshot
+
+    def _reference(self):
+        for pupil in Student.objects.filter(is_active=True, is_deleted=False):
+            try:
+                StudentBalance.initialize_term_balance(pupil, self.term)
+            except Exception:
+                pass
+
+    def test_matches_reference_implementation(self):
+        expected = self._snapshot(self._reference)
+        actual = self._snapshot(lambda: TermActivationService(self.term).activate())
+        self.assertEqual(actual, expected)
+
+    def test_carry_forward_rules(self):
+        result = TermActivationService(self.term).activate()
+        balances = {b.student_id: b for b in StudentBalance.objects.filter(term=self.term)}
+
+        self.assertEqual(balances[self.debtor.id].previous_arrears, Decimal('40.00'))
+        self.assertEqual(balances[self.credited.id].current_balance, Decimal('120.00'))
+        self.assertEqual(balances[self.grade7.id].previous_arrears, Decimal('60.00'))
+        self.assertEqual(balances[self.infant.id].term_fee, Decimal('95.00'))
+        self.assertEqual(balances[self.imported.id].previous_arrears, Decimal('25.00'))
+        self.assertEqual(balances[self.existing.id].previous_arrears, Decimal('100.00'))
+
+        self.assertEqual(result['created'], 5)
+        self.assertEqual(result['updated'], 1)
+        self.assertEqual(result['errors'], [])
+
+    def test_query_count_is_independent_of_student_count(self):
+        with self.assertNumQueries(17):
+            TermActivationService(self.term).activate()
+
+    def test_progress_is_reported(self):
+        progress = []
+        TermActivationService(self.term, batch_size=3, progress_callback=lambda done, total: progress.append(done)).activate()
+        self.assertEqual(progress, [3, 6])
+
+    def test_set_current_term_api_reports_the_activation(self):
+        request = RequestFactory().post(f'/api/terms/{self.term.pk}/set-current/')
+        with mock.patch.object(StudentBalance, 'initialize_term_balance') as per_student:
+            response = set_current_term_api(request, self.term.pk)
+
+        per_student.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['balances_initialized'], 6)
+        self.assertEqual(StudentBalance.objects.filter(term=self.term).count(), 6)
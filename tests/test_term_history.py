@@ -0,0 +1,83 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import (
+    AcademicTerm, AcademicYear, Class, Student, StudentBalance, StudentTermHistory, TermFee,
+)
+from core.services import current_period
+from core.services.promotion import BulkPromotionService
+
+
+class TermHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2026, start_date='2026-01-01', end_date='2026-12-31', is_active=True)
+        cls.terms = {}
+        for term_num, start, end in [(1, '2026-01-01', '2026-04-30'), (2, '2026-05-01', '2026-08-31'), (3, '2026-09-01', '2026-12-31')]:
+            cls.terms[term_num] = AcademicTerm.objects.create(
+                academic_year=2026, term=term_num, start_date=start, end_date=end, is_current=term_num == 3,
+            )
+            TermFee.objects.create(term=cls.terms[term_num], grade_level='PRIMARY', amount=Decimal('100.00'))
+
+        cls.fifth = Class.objects.create(grade='5', section='B', academic_year=2026)
+        cls.seventh = Class.objects.create(grade='7', section='A', academic_year=2026)
+        Class.objects.bulk_create([Class(grade='6', section='B', academic_year=2027)])
+
+        def student(name, cls_obj):
+            return Student.objects.create(
+                surname=name, first_name='Test', sex='F', date_of_birth='2014-01-01',
+                birth_entry_number=f'TH-{name.upper()}', current_class=cls_obj, date_enrolled='2025-01-01',
+            )
+
+        cls.pupil = student('Pupil', cls.fifth)
+        cls.leaver = student('Leaver', cls.seventh)
+        StudentBalance.objects.filter(student=cls.pupil).update(amount_paid=Decimal('30.00'))
+        StudentBalance.refresh_materialized_totals()
+
+    def setUp(self):
+        current_period.invalidate()
+
+    def _complete(self, term):
+        term.is_completed = True
+        term.save()
+
+    def test_completing_a_term_records_class_status_and_balance(self):
+        self._complete(self.terms[3])
+
+        history = {h.student_id: h for h in StudentTermHistory.objects.filter(academic_term=self.terms[3])}
+        self.assertEqual(set(history), {self.pupil.id, self.leaver.id})
+        self.assertEqual(history[self.pupil.id].class_enrolled, self.fifth)
+        self.assertEqual(
+            (history[self.pupil.id].status, history[self.pupil.id].amount_paid, history[self.pupil.id].balance),
+            ('ENROLLED', Decimal('30.00'), Decimal('70.00')),
+        )
+
+        # Append-only: later payments and re-saves leave the snapshot alone
+        StudentBalance.objects.filter(student=self.pupil).update(amount_paid=Decimal('100.00'))
+        self._complete(self.terms[3])
+        self.assertEqual(StudentTermHistory.objects.count(), 2)
+        self.assertEqual(StudentTermHistory.objects.get(student=self.pupil).balance, Decimal('70.00'))
+
+    def test_promoted_students_are_recorded_in_the_class_they_left(self):
+        BulkPromotionService([self.pupil.id]).run()
+        self.assertEqual(Student.objects.get(pk=self.pupil.pk).current_class.academic_year, 2027)
+
+        call_command('snapshot_term_history', term=self.terms[3].id, stdout=StringIO())
+        self.assertEqual(StudentTermHistory.objects.get(student=self.pupil).class_enrolled, self.fifth)
+
+        # No balances in Term 1: the students still in a 2026 class are recorded without one
+        call_command('snapshot_term_history', term=self.terms[1].id, stdout=StringIO())
+        history = StudentTermHistory.objects.get(academic_term=self.terms[1])
+        self.assertEqual((history.student_id, history.class_enrolled, history.balance), (self.leaver.id, self.seventh, None))
+
+    def test_zimsec_candidates(self):
+        # Term 3 still open: the Grade 7 students billed for it
+        self.assertEqual(list(StudentTermHistory.get_zimsec_candidates(2026)), [self.leaver.id])
+
+        self._complete(self.terms[3])
+        Student.objects.filter(pk=self.leaver.pk).update(current_class=self.fifth)
+        self.assertEqual(list(StudentTermHistory.get_zimsec_candidates(2026)), [self.leaver.id])
+        self.assertEqual(list(StudentTermHistory.get_zimsec_candidates(2026, grade7_class=self.fifth)), [])
@@ -0,0 +1,117 @@
+import json
+from decimal import Decimal
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import (
+    AcademicTerm, Administrator, AcademicYear, Class, Student, TermFee, ZimsecResults,
+)
+from core.services import current_period, zimsec_stats
+from core.services.zimsec_import import ZimsecImportService
+
+PASSING = [1, 2, 3, 4, 5, 2]
+FAILING = [6, 2, 3, 4, 5, 2]
+
+
+class ZimsecImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2027, start_date='2027-01-01', end_date='2027-12-31', is_active=True)
+        term = AcademicTerm.objects.create(academic_year=2027, term=1, start_date='2027-01-01', end_date='2027-12-31', is_current=True)
+        TermFee.objects.create(term=term, grade_level='PRIMARY', amount=Decimal('100.00'))
+        grade7 = Class.objects.create(grade=7, section='A', academic_year=2027)
+        cls.students = [
+            Student.objects.create(
+                surname=f'Cand{index}', first_name='Test', sex='MF'[index % 2], date_of_birth='2014-01-01',
+                birth_entry_number=f'CAND-{index}', current_class=grade7, date_enrolled='2021-01-01',
+            )
+            for index in range(4)
+        ]
+        # Already entered by hand: updated by the import, matched by candidate number
+        ZimsecResults.objects.create(
+            student=cls.students[0], academic_year=2027, candidate_number='070001',
+            **dict(zip(ZimsecResults.UNIT_FIELDS, FAILING)),
+        )
+        # Last year's result: the student cannot get a second one
+        ZimsecResults.objects.create(
+            student=cls.students[3], academic_year=2026, **dict(zip(ZimsecResults.UNIT_FIELDS, PASSING)),
+        )
+
+    def setUp(self):
+        current_period.invalidate()
+
+    def _entry(self, student, units):
+        return {'student_id': student.id, **dict(zip(ZimsecResults.UNIT_FIELDS, units))}
+
+    def test_save_entries_creates_updates_and_reports(self):
+        entries = [
+            self._entry(self.students[0], PASSING),
+            self._entry(self.students[1], FAILING),
+            self._entry(self.students[2], [1, 1, 1, None, 1, 1]),
+            self._entry(self.students[3], PASSING),
+            {'student_id': 999999, 'english_units': 1},
+            self._entry(self.students[1], [10, 1, 1, 1, 1, 1]),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            result = ZimsecImportService(2027, chunk_size=4).save_entries(entries)
+
+        self.assertEqual((result['rows'], result['created'], result['updated'], result['failed']), (6, 2, 1, 3))
+        self.assertEqual(sorted(e['row'] for e in result['errors']), [4, 5, 6])
+
+        saved = {r.student_id: r for r in ZimsecResults.objects.filter(academic_year=2027)}
+        self.assertEqual((saved[self.students[0].id].total_aggregate, saved[self.students[0].id].overall_status), (17, 'PASS'))
+        self.assertEqual(saved[self.students[0].id].candidate_number, '070001')
+        self.assertEqual(saved[self.students[1].id].overall_status, 'FAIL')
+        self.assertIsNone(saved[self.students[2].id].total_aggregate)
+
+        # bulk writes skip the post_save receivers; the year is refreshed once instead
+        stats = zimsec_stats.year_stats(2027)
+        self.assertEqual(stats.candidates, 3)
+        self.assertEqual(stats.aggregate.histogram, {17: 1, 22: 1})
+
+    def test_results_sheet_keyed_by_candidate_number(self):
+        sheet = (
+            'Candidate Number,Birth Entry Number,Exam Centre,English,Mathematics,Science,Social Studies,Indigenous Language,Agriculture\n'
+            '070001,,Harare 01,1,1,1,1,1,1\n'
+            '070002,cand-1,Harare 01,2,2,2,2,2,2\n'
+            '070003,,Harare 01,3,3,3,3,3,3\n'
+            '070004,CAND-0,Harare 01,3,3,3,3,3,3\n'
+            '070002,CAND-2,Harare 01,3,3,3,3,3,3\n'
+            ',,,,,,,,\n'
+        )
+        result = ZimsecImportService(2027).import_csv(StringIO(sheet))
+
+        self.assertEqual((result['rows'], result['created'], result['updated'], result['failed']), (5, 1, 1, 3))
+        errors = {e['row']: e['error'] for e in result['errors']}
+        self.assertIn('birth_entry_number is needed', errors[3])
+        self.assertIn('more than once', errors[5])
+
+        first = ZimsecResults.objects.get(candidate_number='070001')
+        self.assertEqual((first.total_aggregate, first.exam_center), (6, 'Harare 01'))
+        self.assertEqual(ZimsecResults.objects.get(candidate_number='070002').student, self.students[1])
+        self.assertFalse(ZimsecResults.objects.filter(candidate_number='070004').exists())
+
+    def test_dry_run_writes_nothing(self):
+        result = ZimsecImportService(2027, dry_run=True).save_entries([self._entry(self.students[1], PASSING)])
+
+        self.assertEqual(result['created'], 1)
+        self.assertFalse(ZimsecResults.objects.filter(student=self.students[1]).exists())
+
+    def test_upload_and_batch_save_views(self):
+        self.client.force_login(Administrator.objects.create_superuser('import@school.com', 'testpass123'))
+        upload = SimpleUploadedFile(
+            'results.csv', b'candidate_number,birth_entry_number,english,mathematics,science,social_studies,'
+            b'indigenous_language,agriculture\n070009,CAND-2,1,2,1,2,1,2\n',
+        )
+        response = self.client.post(reverse('zimsec_import'), {'results_file': upload, 'academic_year': 2027})
+        self.assertEqual(response.json()['created'], 1, response.content)
+        self.assertEqual(ZimsecResults.objects.get(candidate_number='070009').total_aggregate, 9)
+
+        response = self.client.post(reverse('zimsec_batch_save'), json.dumps({
+            'academic_year': 2027, 'results': [self._entry(self.students[2], FAILING), {'student_id': 999999}],
+        }), content_type='application/json')
+        self.assertEqual((response.json()['saved'], response.json()['failed_students']), (1, ['999999']))
+        self.assertEqual(ZimsecResults.objects.get(student=self.students[2]).overall_status, 'FAIL')
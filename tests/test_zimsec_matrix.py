@@ -0,0 +1,82 @@
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import AcademicTerm, Administrator, AcademicYear, Class, Student, TermFee, ZimsecResults
+from core.services import current_period
+from core.services.zimsec_matrix import SUBJECT_FIELDS, ResultMatrix
+from core.utils.lazy_imports import is_available
+
+UNITS = [
+    ('A', 'M', [1, 1, 2, 2, 1, 2]),
+    ('A', 'F', [3, 4, 5, 2, 3, 4]),
+    ('A', 'F', [6, 7, 5, 8, 9, 6]),
+    ('B', 'M', [2, 3, 4, 5, 5, 1]),
+    ('B', 'F', [9, 9, 8, 7, 6, 9]),
+    ('B', 'M', [1, 2, 1, 2, 2, None]),
+]
+
+
+@skipUnless(is_available('numpy'), 'numpy is not installed')
+class ResultMatrixTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2027, start_date='2027-01-01', end_date='2027-12-31', is_active=True)
+        term = AcademicTerm.objects.create(academic_year=2027, term=1, start_date='2027-01-01', end_date='2027-12-31', is_current=True)
+        TermFee.objects.create(term=term, grade_level='PRIMARY', amount=Decimal('100.00'))
+        cls.classes = {section: Class.objects.create(grade=7, section=section, academic_year=2027) for section in 'AB'}
+        for index, (section, sex, units) in enumerate(UNITS):
+            student = Student.objects.create(
+                surname=f'Mat{index}', first_name='Test', sex=sex, date_of_birth='2014-01-01',
+                birth_entry_number=f'MAT-{index}', current_class=cls.classes[section], date_enrolled='2021-01-01',
+            )
+            ZimsecResults.objects.create(student=student, academic_year=2027, **dict(zip(SUBJECT_FIELDS, units)))
+
+    def setUp(self):
+        current_period.invalidate()
+        self.results = list(ZimsecResults.objects.filter(academic_year=2027).select_related('student'))
+        self.matrix = ResultMatrix.load(2027)
+
+    def test_group_summary_matches_results(self):
+        class_a = self.classes['A']
+        in_a = [r for r in self.results if r.student.current_class_id == class_a.id]
+        aggregates = [r.total_aggregate for r in in_a if r.total_aggregate]
+
+        self.assertEqual(len(self.matrix), len(UNITS))
+        self.assertEqual(self.matrix.group_summary('class_id')[class_a.id], {
+            'total': len(in_a),
+            'passed': sum(1 for r in in_a if r.overall_status == 'PASS'),
+            'aggregate_count': len(aggregates),
+            'aggregate_sum': sum(aggregates),
+            'distinctions': sum(1 for a in aggregates if a <= 13),
+        })
+        self.assertEqual(
+            sorted(self.matrix.groups('sex')[self.matrix.sex_code('M')].tolist()),
+            sorted(r.total_aggregate for r in self.results if r.student.sex == 'M' and r.total_aggregate),
+        )
+
+    def test_subject_summary_and_crosstab(self):
+        agriculture = self.matrix.subject_summary()['agriculture_units']
+        self.assertEqual(agriculture['count'], 5)
+        self.assertEqual(agriculture['units_4_up'], 3)
+        self.assertEqual(agriculture['units_8_up'], 1)
+
+        # sex (M, F) x status (FAIL, PASS); the incomplete result has no status
+        self.assertEqual(self.matrix.crosstab('sex', 'status').tolist(), [[0, 2], [2, 1]])
+
+    @skipUnless(is_available('scipy'), 'scipy is not installed')
+    def test_comparison_panels_render(self):
+        self.client.force_login(Administrator.objects.create_superuser('matrix@school.com', 'testpass123'))
+        for comparison_type in ('class', 'subject', 'gender'):
+            response = self.client.get(reverse('comparison_advanced'), {'year': 2027, 'type': comparison_type})
+            data = response.context['comparison_data']
+            self.assertEqual(data['type'], comparison_type)
+        self.assertEqual(data['Male']['total'], 3)
+        self.assertEqual(data['Female']['passed'], 1)
+
+        for test_type in ('ttest', 'anova', 'chi_square', 'correlation'):
+            response = self.client.post(reverse('statistical_tests'), {'test_type': test_type, 'year': 2027})
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertIn('p_value', response.json())
@@ -0,0 +1,109 @@
+import statistics
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.models import (
+    AcademicTerm, Administrator, AcademicYear, Class, Student, TermFee, ZimsecResults, ZimsecYearStats,
+)
+from core.services import current_period, zimsec_stats
+from core.services.zimsec_stats import Distribution
+from core.views.zimsec_views import Grade7StatisticsView
+
+UNITS = [
+    ('A', 'M', [1, 1, 2, 2, 1, 2]),
+    ('A', 'F', [3, 4, 5, 2, 3, 4]),
+    ('A', 'F', [6, 7, 5, 8, 9, 6]),
+    ('B', 'M', [2, 3, 4, 5, 5, 1]),
+    ('B', 'F', [9, 9, 8, 7, 6, 9]),
+    ('B', 'M', [1, 2, 1, 2, 2, 2]),
+]
+FIELDS = [field for field, _ in ZimsecYearStats.SUBJECTS]
+
+
+class ZimsecYearStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AcademicYear.objects.create(year=2027, start_date='2027-01-01', end_date='2027-12-31', is_active=True)
+        term = AcademicTerm.objects.create(academic_year=2027, term=1, start_date='2027-01-01', end_date='2027-12-31', is_current=True)
+        TermFee.objects.create(term=term, grade_level='PRIMARY', amount=Decimal('100.00'))
+        classes = {section: Class.objects.create(grade=7, section=section, academic_year=2027) for section in 'AB'}
+
+        cls.results = []
+        for index, (section, sex, units) in enumerate(UNITS):
+            student = Student.objects.create(
+                surname=f'Zim{index}', first_name='Test', sex=sex, date_of_birth='2014-01-01',
+                birth_entry_number=f'ZIM-{index}', current_class=classes[section], date_enrolled='2021-01-01',
+            )
+            cls.results.append(ZimsecResults.objects.create(
+                student=student, academic_year=2027, **dict(zip(FIELDS, units)),
+            ))
+        ZimsecYearStats.rebuild()
+
+    def setUp(self):
+        current_period.invalidate()
+
+    def _direct_year_stats(self):
+        """What calculate_year_stats used to compute from every result"""
+        results = list(ZimsecResults.objects.filter(academic_year=2027))
+        aggregates = [r.total_aggregate for r in results]
+        return {
+            'total_students': len(results),
+            'passed_students': sum(1 for r in results if r.overall_status == 'PASS'),
+            'average_aggregate': round(sum(aggregates) / len(aggregates), 1),
+            'top_aggregate': min(aggregates),
+            'distinction_count': sum(1 for r in results if all(getattr(r, f) <= 2 for f in FIELDS)),
+            'english': round(sum(r.english_units for r in results) / len(results), 2),
+        }
+
+    def _year_stats(self):
+        stats = Grade7StatisticsView().calculate_year_stats(2027)
+        stats['english'] = stats['subject_averages']['english']
+        return {key: stats[key] for key in self._direct_year_stats()}
+
+    def test_rebuild_matches_results(self):
+        self.assertEqual(self._year_stats(), self._direct_year_stats())
+
+        stats = zimsec_stats.year_stats(2027, sections=['B'], gender='m')
+        self.assertEqual(stats.candidates, 2)
+        self.assertEqual(stats.aggregate.histogram, {20: 1, 10: 1})
+        self.assertEqual(stats.subjects['english_units'].passed, 2)
+
+    def test_result_save_refreshes_on_commit(self):
+        result = self.results[4]
+        with self.captureOnCommitCallbacks(execute=True):
+            for field in FIELDS:
+                setattr(result, field, 1)
+            result.save()
+
+        self.assertEqual(self._year_stats(), self._direct_year_stats())
+        self.assertEqual(zimsec_stats.year_stats(2027).aggregate.minimum, 6)
+
+    def test_dashboard_figures_match_with_and_without_result_filters(self):
+        self.client.force_login(Administrator.objects.create_superuser('zimsec@school.com', 'testpass123'))
+        url = reverse('grade7_statistics')
+
+        rollup = self.client.get(url, {'year': 2027}).context
+        # An aggregate range covering everyone forces the per-result path
+        filtered = self.client.get(url, {'year': 2027, 'aggregate_min': 6, 'aggregate_max': 54}).context
+
+        self.assertEqual(rollup['overview_stats']['total_students'], len(UNITS))
+        for key in ('overview_stats', 'subject_stats', 'class_stats', 'advanced_stats', 'top_performers'):
+            self.assertEqual(rollup[key], filtered[key], key)
+
+
+class DistributionTests(SimpleTestCase):
+    def test_matches_sample_statistics(self):
+        values = [6, 8, 8, 10, 20, 31]
+        distribution = Distribution.of(values)
+
+        self.assertEqual(distribution.mean, statistics.mean(values))
+        self.assertAlmostEqual(distribution.variance, statistics.variance(values))
+        self.assertEqual(distribution.percentile(50), statistics.median(values))
+        # Linear interpolation between closest ranks (numpy's default)
+        self.assertEqual(distribution.percentile(25), 8)
+        self.assertAlmostEqual(distribution.percentile(90), 25.5)
+        self.assertEqual(distribution.mode, (8, 2))
+        self.assertGreater(distribution.skewness, 0)
+        self.assertEqual(distribution.values_outside(7, 25), [6, 31])